@@ -1,183 +1,71 @@
-import json
+import atexit
 import os
-from datetime import datetime, timedelta
+from datetime import datetime
+
+from utils.backup import backup_latar
+from utils.covers import CoverStore
+from utils.gabung import migrasi_peminjaman
+from utils.kategori import migrasi_kategori
+from utils.indeks import IndeksPeminjaman
+from utils.iolog import configure_from_variabel
+from utils.journal import Journal
+from utils.laporan import Laporan
+from utils.rollup import RollupSirkulasi
+from utils.metrics import METRICS
+from utils.profiler import PROFILER
+from utils.perpustakaan import DURASI_PEMINJAMAN_HARI, batas_pinjam, buat_layanan
+from utils.repository import Repository, load_variabel, migrate_legacy_json, paths_from_variabel
 
 def now():
     return datetime.now().strftime("%Y-%m-%d %H:%M:%S")
 
-FOLDER_DB = "database"
-FOLDER_BUKU = os.path.join(FOLDER_DB, "buku")
-BUKU_CHUNK_SIZE = 20
-LEGACY_FILE_BUKU = os.path.join(FOLDER_DB, "buku.json")
-FILE_LOG_HAPUS = os.path.join(FOLDER_DB, "log_hapus_buku.json")
-FILE_ANGGOTA = os.path.join(FOLDER_DB, "anggota.json")
-FILE_PINJAM = os.path.join(FOLDER_DB, "peminjaman.json")
-FILE_KATEGORI = os.path.join(FOLDER_DB, "kategori.json")
-FILE_BACKUP = os.path.join(FOLDER_DB, "backup")
+# CLI dan web UI memakai store yang sama (lokasi file diatur di variabel.txt)
+var = load_variabel()
+configure_from_variabel(var)  # log I/O storage, lihat utils/iolog.py
+FOLDER_DB = var["FOLDER_DB"]
+repo = Repository(paths_from_variabel(var), Journal.from_variabel(var))
+covers = CoverStore.from_variabel(var)
+indeks = IndeksPeminjaman.from_variabel(var)
 
-# Konstanta untuk keterlambatan
-DURASI_PEMINJAMAN_HARI = 7  # Buku harus dikembalikan dalam 7 hari
-
-
-def safe_write_json(path, data):
-    """Safely write JSON data using atomic write (write to temp then rename)"""
-    try:
-        tmp_path = path + ".tmp"
-        with open(tmp_path, "w", encoding='utf-8') as f:
-            json.dump(data, f, indent=4, ensure_ascii=False)
-        os.replace(tmp_path, path)
-    except Exception as e:
-        print(f"Error writing JSON to {path}: {e}")
-        # Clean up temp file if it exists
-        if os.path.exists(tmp_path):
-            try:
-                os.remove(tmp_path)
-            except:
-                pass
 
 def init_database():
-    """Initialize database folders and files"""
+    """Initialize database folders and import legacy JSON data once"""
     try:
-        if not os.path.exists(FOLDER_DB):
-            os.makedirs(FOLDER_DB)
-
-        if not os.path.exists(FOLDER_BUKU):
-            os.makedirs(FOLDER_BUKU)
-
-        if not os.path.exists(FILE_BACKUP):
-            os.makedirs(FILE_BACKUP)
-
-        # Buat file legacy jika belum ada, untuk kompatibilitas awal.
-        if not os.path.exists(LEGACY_FILE_BUKU):
-            safe_write_json(LEGACY_FILE_BUKU, [])
-
-        if not os.path.exists(FILE_LOG_HAPUS):
-            safe_write_json(FILE_LOG_HAPUS, [])
-
-        if not os.path.exists(FILE_ANGGOTA):
-            safe_write_json(FILE_ANGGOTA, [])
-
-        if not os.path.exists(FILE_PINJAM):
-            safe_write_json(FILE_PINJAM, [])
-
-        if not os.path.exists(FILE_KATEGORI):
-            safe_write_json(FILE_KATEGORI, [])
+        repo.init()
+
+        imported = migrate_legacy_json(repo, FOLDER_DB)
+        if imported:
+            print(f"Data JSON lama diimpor ke store utama: {', '.join(imported)}\n")
+        pindah = covers.migrasi(repo)
+        if pindah["dipindahkan"]:
+            print(f"{pindah['dipindahkan']} cover lama dipindahkan ke store cover ({pindah['file_unik']} file unik)\n")
+        diringkas = migrasi_peminjaman(repo)
+        if diringkas:
+            print(f"{diringkas} baris peminjaman kini hanya menyimpan ID buku/siswa\n")
+        dikodekan = migrasi_kategori(repo)
+        if dikodekan:
+            print(f"{dikodekan} buku kini menyimpan ID kategori\n")
     except Exception as e:
         print(f"Error initializing database: {e}")
 
 
-def load_buku():
-    """Load all books from database"""
-    data = []
-    try:
-        if os.path.exists(FOLDER_BUKU):
-            files = [f for f in os.listdir(FOLDER_BUKU) if f.startswith("buku_") and f.endswith(".json")]
-            if files:
-                for name in sorted(files):
-                    path = os.path.join(FOLDER_BUKU, name)
-                    try:
-                        with open(path, "r", encoding='utf-8') as f:
-                            data.extend(json.load(f))
-                    except (json.JSONDecodeError, IOError) as e:
-                        print(f"Error loading {path}: {e}")
-                return data
-
-        if os.path.exists(LEGACY_FILE_BUKU):
-            try:
-                with open(LEGACY_FILE_BUKU, "r", encoding='utf-8') as f:
-                    return json.load(f)
-            except (json.JSONDecodeError, IOError) as e:
-                print(f"Error loading legacy file: {e}")
-    except Exception as e:
-        print(f"Error in load_buku: {e}")
-
-    return data
-
-
-def save_buku(data):
-    """Save books data, splitting into chunks"""
-    try:
-        if not os.path.exists(FOLDER_BUKU):
-            os.makedirs(FOLDER_BUKU)
-
-        chunks = [data[i:i + BUKU_CHUNK_SIZE] for i in range(0, len(data), BUKU_CHUNK_SIZE)]
-        existing = [f for f in os.listdir(FOLDER_BUKU) if f.startswith("buku_") and f.endswith(".json")]
-        keep = set()
-
-        for idx, chunk in enumerate(chunks, start=1):
-            name = f"buku_{idx:03d}.json"
-            path = os.path.join(FOLDER_BUKU, name)
-            safe_write_json(path, chunk)
-            keep.add(name)
-
-        for name in existing:
-            if name not in keep:
-                try:
-                    os.remove(os.path.join(FOLDER_BUKU, name))
-                except OSError as e:
-                    print(f"Error removing old file {name}: {e}")
-
-        # Simpan juga legacy sebagai cadangan minimal data loss.
-        safe_write_json(LEGACY_FILE_BUKU, data)
-    except Exception as e:
-        print(f"Error in save_buku: {e}")
+# Set PERPUS_SERVICE_URL (misal http://127.0.0.1:8765) untuk memakai utils/server.py
+layanan = buat_layanan(repo, os.environ.get("PERPUS_SERVICE_URL", ""), covers, indeks, batas_pinjam(var),
+                       laporan=Laporan.from_variabel(var), rollup=RollupSirkulasi.from_variabel(var))
 
-
-def load_anggota():
-    """Load members data"""
-    try:
-        if os.path.exists(FILE_ANGGOTA):
-            with open(FILE_ANGGOTA, "r", encoding='utf-8') as f:
-                return json.load(f)
-    except (json.JSONDecodeError, IOError) as e:
-        print(f"Error loading anggota: {e}")
-    return []
-
-
-def save_anggota(data):
-    """Save members data"""
-    try:
-        safe_write_json(FILE_ANGGOTA, data)
-    except Exception as e:
-        print(f"Error in save_anggota: {e}")
+# Set PERPUS_METRICS_FILE (misal diagnostics/metrics.json) untuk menyimpan latensi
+# operasi storage/converter/ekspor dan trace per menu saat program selesai
+METRICS_FILE = os.environ.get("PERPUS_METRICS_FILE", "")
 
 
-def load_peminjaman():
-    """Load borrowing records"""
-    try:
-        if os.path.exists(FILE_PINJAM):
-            with open(FILE_PINJAM, "r", encoding='utf-8') as f:
-                return json.load(f)
-    except (json.JSONDecodeError, IOError) as e:
-        print(f"Error loading peminjaman: {e}")
-    return []
-
-
-def save_peminjaman(data):
-    """Save borrowing records"""
-    try:
-        safe_write_json(FILE_PINJAM, data)
-    except Exception as e:
-        print(f"Error in save_peminjaman: {e}")
-
-
-def load_kategori():
-    """Load book categories"""
-    try:
-        if os.path.exists(FILE_KATEGORI):
-            with open(FILE_KATEGORI, "r", encoding='utf-8') as f:
-                return json.load(f)
-    except (json.JSONDecodeError, IOError) as e:
-        print(f"Error loading kategori: {e}")
-    return []
-
-
-def save_kategori(data):
-    """Save book categories"""
+def dump_metrics():
+    if not METRICS_FILE:
+        return
     try:
-        safe_write_json(FILE_KATEGORI, data)
+        METRICS.dump(METRICS_FILE)
+        print(f"Metrik disimpan di {METRICS_FILE}")
     except Exception as e:
-        print(f"Error in save_kategori: {e}")
+        print(f"Error saving metrics: {e}")
 
 
 def tambah_buku():
@@ -186,6 +74,7 @@ def tambah_buku():
     judul = input("Judul buku: ").strip()
     penulis = input("Penulis: ").strip()
     penerbit = input("Penerbit: ").strip()
+    isbn = input("ISBN / barcode (scan, boleh kosong): ").strip()
 
     while True:
         try:
@@ -205,7 +94,7 @@ def tambah_buku():
             print("Masukkan angka yang benar.")
 
     # Pilih kategori
-    kategori_list = load_kategori()
+    kategori_list = layanan.daftar("kategori")
     if kategori_list:
         print("\nKategori tersedia:")
         for idx, kat in enumerate(kategori_list, 1):
@@ -223,44 +112,30 @@ def tambah_buku():
     else:
         kategori = input("Masukkan kategori baru: ").strip()
 
-    data_buku = load_buku()
-
-    buku_baru = {
-        "id": len(data_buku) + 1,
+    ok, pesan, _ = layanan.tambah_buku({
         "judul": judul,
         "penulis": penulis,
         "penerbit": penerbit,
-        "tahun": tahun,
+        "isbn": isbn,
+        "tahun_terbit": tahun,
         "stok": stok,
-        "kategori": kategori,
-        "created_at": now()
-    }
-
-    data_buku.append(buku_baru)
-    save_buku(data_buku)
-
-    # Tambah kategori jika baru
-    if kategori_list and kategori not in [k['nama'] for k in kategori_list]:
-        kategori_list.append({"id": len(kategori_list) + 1, "nama": kategori})
-        save_kategori(kategori_list)
-    elif not kategori_list:
-        save_kategori([{"id": 1, "nama": kategori}])
-
-    print("Buku berhasil disimpan ke database!\n")
+        "kategori": kategori
+    })
+    print(f"{pesan}\n")
 
 
 def lihat_buku():
     print("\n=== Daftar Buku ===")
-    data_buku = load_buku()
+    data_buku = layanan.daftar("buku")
 
     if not data_buku:
         print("Database masih kosong.\n")
         return
 
     for buku in data_buku:
-        created = buku.get('created_at', '-')
+        created = buku.get('created_at') or '-'
         kategori = buku.get('kategori', '-')
-        print(f"[{buku['id']}] {buku['judul']} - {buku['penulis']} ({buku['tahun']}) | "
+        print(f"[{buku['id']}] {buku['judul']} - {buku['penulis']} ({buku.get('tahun_terbit') or '-'}) | "
               f"Kategori: {kategori} | Stok: {buku['stok']} | Ditambahkan: {created}")
     print()
 
@@ -269,10 +144,7 @@ def cari_buku():
     print("\n=== Cari Buku ===")
     keyword = input("Masukkan kata kunci (judul/penulis/penerbit): ").strip().lower()
     
-    data_buku = load_buku()
-    hasil = [b for b in data_buku if keyword in b['judul'].lower() or 
-             keyword in b['penulis'].lower() or 
-             keyword in b['penerbit'].lower()]
+    hasil = layanan.cari_buku(keyword)
     
     if not hasil:
         print("Buku tidak ditemukan.\n")
@@ -281,13 +153,13 @@ def cari_buku():
     print(f"\nHasil pencarian untuk '{keyword}':")
     for buku in hasil:
         kategori = buku.get('kategori', '-')
-        print(f"[{buku['id']}] {buku['judul']} - {buku['penulis']} ({buku['tahun']}) | "
+        print(f"[{buku['id']}] {buku['judul']} - {buku['penulis']} ({buku.get('tahun_terbit') or '-'}) | "
               f"Kategori: {kategori} | Stok: {buku['stok']}")
     print()
 
 
 def hapus_buku():
-    data_buku = load_buku()
+    data_buku = layanan.daftar("buku")
 
     if not data_buku:
         print("Tidak ada buku untuk dihapus.\n")
@@ -312,30 +184,8 @@ def hapus_buku():
         print("Alasan tidak boleh kosong. Penghapusan dibatalkan.\n")
         return
 
-    # Hapus dari daftar buku
-    data_buku = [b for b in data_buku if b["id"] != id_hapus]
-    save_buku(data_buku)
-
-    # Simpan log penghapusan
-    try:
-        if os.path.exists(FILE_LOG_HAPUS):
-            with open(FILE_LOG_HAPUS, "r", encoding='utf-8') as f:
-                log_data = json.load(f)
-        else:
-            log_data = []
-
-        log_data.append({
-            "id_buku": buku_dipilih["id"],
-            "judul": buku_dipilih["judul"],
-            "alasan": alasan,
-            "deleted_at": now()
-        })
-
-        safe_write_json(FILE_LOG_HAPUS, log_data)
-    except Exception as e:
-        print(f"Error saving log: {e}")
-
-    print("Buku berhasil dihapus dan alasan dicatat.\n")
+    ok, pesan, _ = layanan.hapus_buku(id_hapus, alasan)
+    print(f"{pesan}\n")
 
 
 def tambah_anggota():
@@ -349,95 +199,46 @@ def tambah_anggota():
         print("Semua data wajib diisi. Jangan males.\n")
         return
 
-    data_anggota = load_anggota()
-
-    # Cegah NIS ganda
-    if any(a["nis"] == nis for a in data_anggota):
-        print("NIS sudah terdaftar! Tidak boleh dobel.\n")
-        return
-
-    anggota_baru = {
-        "id": len(data_anggota) + 1,
-        "nama": nama,
-        "kelas": kelas,
-        "nis": nis,
-        "created_at": now()
-    }
-
-    data_anggota.append(anggota_baru)
-    save_anggota(data_anggota)
-
-    print("Data siswa berhasil disimpan!\n")
+    ok, pesan, _ = layanan.tambah_anggota({"nama": nama, "kelas": kelas, "nis": nis})
+    print(f"{pesan}\n")
 
 
 def lihat_anggota():
     print("\n=== Daftar Siswa ===")
-    data_anggota = load_anggota()
+    data_anggota = layanan.daftar("anggota")
 
     if not data_anggota:
         print("Belum ada data siswa.\n")
         return
 
     for a in data_anggota:
-        created = a.get('created_at', '-')
+        created = a.get('created_at') or '-'
         print(f"[{a['id']}] {a['nama']} | Kelas: {a['kelas']} | NIS: {a['nis']} | Ditambahkan: {created}")
     print()
 
 
 def pinjam_buku():
-    data_buku = load_buku()
-    data_anggota = load_anggota()
-    data_pinjam = load_peminjaman()
-
-    if not data_buku or not data_anggota:
-        print("Data buku atau siswa masih kosong.\n")
-        return
-
-    lihat_buku()
-    lihat_anggota()
-
-    try:
-        id_buku = int(input("Masukkan ID buku: "))
-        id_anggota = int(input("Masukkan ID siswa: "))
-    except ValueError:
-        print("ID harus angka.\n")
-        return
-
-    buku = next((b for b in data_buku if b["id"] == id_buku), None)
-    anggota = next((a for a in data_anggota if a["id"] == id_anggota), None)
-
-    if not buku or not anggota:
-        print("Buku atau siswa tidak ditemukan.\n")
+    """Mode scanner: scan kartu siswa sekali, lalu scan buku satu per satu"""
+    print("\n=== Pinjam Buku (scan atau ketik kode) ===")
+    kode_kartu = input("Kartu siswa (NIS atau ID): ").strip()
+    siswa = layanan.cari_kode("anggota", kode_kartu)
+    if not siswa:
+        print(f"Kartu siswa '{kode_kartu}' tidak dikenal.\n")
         return
+    print(f"Siswa: {siswa['nama']} ({siswa['nis']}) - {siswa.get('kelas', '')}")
 
-    if buku["stok"] <= 0:
-        print("Stok buku habis.\n")
-        return
-
-    peminjaman_baru = {
-        "id": len(data_pinjam) + 1,
-        "id_buku": buku["id"],
-        "judul": buku["judul"],
-        "id_anggota": anggota["id"],
-        "nama": anggota["nama"],
-        "status": "dipinjam",
-        "tanggal_pinjam": now(),
-        "tanggal_kembali": None
-    }
-
-    buku["stok"] -= 1
-    save_buku(data_buku)
-
-    data_pinjam.append(peminjaman_baru)
-    save_peminjaman(data_pinjam)
-
-    print("Buku berhasil dipinjam!\n")
+    while True:
+        kode_buku = input("Buku (ISBN/barcode atau ID, kosong = selesai): ").strip()
+        if not kode_buku:
+            break
+        ok, pesan, data = layanan.pinjam_kode(kode_buku, siswa["nis"])
+        print(f"  {data['judul']}: {pesan}" if ok and data else f"  {pesan}")
+    print()
 
 
 def kembalikan_buku():
     """Kembalikan buku yang dipinjam"""
-    data_buku = load_buku()
-    data_pinjam = load_peminjaman()
+    data_pinjam = layanan.daftar("peminjaman")
 
     pinjaman_aktif = [p for p in data_pinjam if p["status"] == "dipinjam"]
 
@@ -454,27 +255,13 @@ def kembalikan_buku():
         print("ID harus angka.\n")
         return
 
-    pinjam = next((p for p in data_pinjam if p["id"] == id_pinjam and p["status"] == "dipinjam"), None)
-
-    if not pinjam:
-        print("Data peminjaman tidak ditemukan.\n")
-        return
-
-    buku = next((b for b in data_buku if b["id"] == pinjam["id_buku"]), None)
-    if buku:
-        buku["stok"] += 1
-        save_buku(data_buku)
-
-    pinjam["status"] = "dikembalikan"
-    pinjam["tanggal_kembali"] = now()
-    save_peminjaman(data_pinjam)
-
-    print("Buku berhasil dikembalikan!\n")
+    ok, pesan, _ = layanan.kembalikan(id_pinjam)
+    print(f"{pesan}\n")
 
 
 def lihat_peminjaman():
     print("\n=== Data Peminjaman Buku ===")
-    data_pinjam = load_peminjaman()
+    data_pinjam = layanan.daftar("peminjaman")
 
     if not data_pinjam:
         print("Belum ada transaksi peminjaman.\n")
@@ -490,8 +277,7 @@ def lihat_peminjaman():
 def lihat_peminjaman_anggota():
     """Lihat riwayat peminjaman per anggota"""
     print("\n=== Riwayat Peminjaman per Anggota ===")
-    data_anggota = load_anggota()
-    data_pinjam = load_peminjaman()
+    data_anggota = layanan.daftar("anggota")
 
     if not data_anggota:
         print("Belum ada data siswa.\n")
@@ -509,7 +295,7 @@ def lihat_peminjaman_anggota():
         print("Siswa tidak ditemukan.\n")
         return
 
-    riwayat = [p for p in data_pinjam if p["id_anggota"] == id_anggota]
+    riwayat = layanan.riwayat_anggota(id_anggota)
 
     if not riwayat:
         print(f"Belum ada riwayat peminjaman untuk {anggota['nama']}.\n")
@@ -525,7 +311,7 @@ def lihat_peminjaman_anggota():
 def lihat_keterlambatan():
     """Lihat buku yang belum dikembalikan (terlambat)"""
     print("\n=== Buku Terlambat ===")
-    data_pinjam = load_peminjaman()
+    data_pinjam = layanan.daftar("peminjaman")
 
     pinjaman_aktif = [p for p in data_pinjam if p["status"] == "dipinjam"]
 
@@ -533,17 +319,7 @@ def lihat_keterlambatan():
         print("Semua buku sudah dikembalikan.\n")
         return
 
-    terlambat = []
-    sekarang = datetime.now()
-
-    for p in pinjaman_aktif:
-        tanggal_pinjam = datetime.strptime(p["tanggal_pinjam"], "%Y-%m-%d %H:%M:%S")
-        durasi = (sekarang - tanggal_pinjam).days
-        if durasi > DURASI_PEMINJAMAN_HARI:
-            terlambat.append({
-                "peminjaman": p,
-                "hari_terlambat": durasi - DURASI_PEMINJAMAN_HARI
-            })
+    terlambat = layanan.buku_terlambat()
 
     if not terlambat:
         print("Tidak ada buku yang terlambat.\n")
@@ -560,39 +336,56 @@ def lihat_keterlambatan():
 def lihat_log_hapus():
     print("\n=== Log Penghapusan Buku ===")
 
-    try:
-        if os.path.exists(FILE_LOG_HAPUS):
-            with open(FILE_LOG_HAPUS, "r", encoding='utf-8') as f:
-                logs = json.load(f)
-        else:
-            logs = []
-    except (json.JSONDecodeError, IOError) as e:
-        print(f"Error loading log: {e}")
-        logs = []
+    halaman = 1
+    while True:
+        logs, berikutnya = layanan.log_hapus(halaman)
+        if not logs and halaman == 1:
+            print("Belum ada buku yang dihapus.\n")
+            return
 
-    if not logs:
-        print("Belum ada buku yang dihapus.\n")
+        for log in logs:
+            print(f"ID Buku: {log['id_buku']} | Judul: {log['judul']} | Alasan: {log['alasan']} | Dihapus: {log.get('deleted_at') or '-'}")
+        print()
+        pilihan = input(("Enter untuk halaman berikutnya, " if berikutnya else "") +
+                        "p untuk memulihkan buku, q untuk kembali: ").strip().lower()
+        if pilihan == "p":
+            pulihkan_buku()
+            return
+        if pilihan == "q" or not berikutnya:
+            return
+        halaman += 1
+
+
+def pulihkan_buku():
+    terhapus = layanan.buku_terhapus()
+    if not terhapus:
+        print("Tidak ada buku terhapus yang bisa dipulihkan.\n")
         return
 
-    for log in logs:
-        print(f"ID Buku: {log['id_buku']} | Judul: {log['judul']} | Alasan: {log['alasan']} | Dihapus: {log['deleted_at']}")
-    print()
+    for b in terhapus:
+        print(f"ID: {b['id']} | Judul: {b['judul']} | Dihapus: {b.get('dihapus_at') or '-'}")
+
+    try:
+        id_pulih = int(input("Masukkan ID buku yang ingin dipulihkan: "))
+    except ValueError:
+        print("ID harus angka.\n")
+        return
+
+    ok, pesan, _ = layanan.pulihkan_buku(id_pulih)
+    print(f"{pesan}\n")
 
 
 def statistik_perpustakaan():
     """Tampilkan statistik perpustakaan"""
     print("\n=== Statistik Perpustakaan ===")
     
-    data_buku = load_buku()
-    data_anggota = load_anggota()
-    data_pinjam = load_peminjaman()
-
-    total_buku = len(data_buku)
-    total_stok = sum(b.get("stok", 0) for b in data_buku)
-    total_anggota = len(data_anggota)
-    total_peminjaman = len(data_pinjam)
-    peminjaman_aktif = len([p for p in data_pinjam if p["status"] == "dipinjam"])
-    peminjaman_selesai = len([p for p in data_pinjam if p["status"] == "dikembalikan"])
+    stats = layanan.statistik()
+    total_buku = stats["total_buku"]
+    total_stok = stats["total_stok"]
+    total_anggota = stats["total_anggota"]
+    total_peminjaman = stats["total_peminjaman"]
+    peminjaman_aktif = stats["peminjaman_aktif"]
+    peminjaman_selesai = stats["peminjaman_selesai"]
 
     print(f"Total Judul Buku: {total_buku}")
     print(f"Total Stok Buku: {total_stok}")
@@ -600,38 +393,51 @@ def statistik_perpustakaan():
     print(f"Total Transaksi Peminjaman: {total_peminjaman}")
     print(f"Peminjaman Aktif: {peminjaman_aktif}")
     print(f"Peminjaman Selesai: {peminjaman_selesai}")
+
+    stat_kategori = layanan.statistik_kategori()
+    if stat_kategori:
+        print("\nPer Kategori:")
+        for k in stat_kategori:
+            print(f"  - {k['nama']}: {k['judul']} judul | Stok: {k['stok']} | Dipinjam: {k['dipinjam']}")
+
+    laporan = layanan.laporan()
+    if laporan["judul_terlaris"]:
+        print("\nJudul Paling Sering Dipinjam:")
+        for r in laporan["judul_terlaris"]:
+            print(f"  - {r['judul']}: {r['jumlah']} kali")
+    if laporan["kelas_teraktif"]:
+        print("\nKelas Paling Aktif:")
+        for r in laporan["kelas_teraktif"][:5]:
+            print(f"  - {r['kelas']}: {r['jumlah']} peminjaman")
+    if laporan["pengadaan"]:
+        print("\nPengadaan per Sumber:")
+        for r in laporan["pengadaan"]:
+            print(f"  - {r['sumber']} {r['tahun']}: {r['judul']} judul")
+    print(f"(data per {laporan['diperbarui']})")
     print()
 
 
 def backup_database():
-    """Backup database ke folder backup"""
+    """Backup inkremental (utils/backup.py) di latar belakang"""
     print("\n=== Backup Database ===")
-    
-    try:
-        if not os.path.exists(FILE_BACKUP):
-            os.makedirs(FILE_BACKUP)
-        
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        
-        # Backup file-file penting
-        files_to_backup = [LEGACY_FILE_BUKU, FILE_ANGGOTA, FILE_PINJAM, FILE_LOG_HAPUS, FILE_KATEGORI]
-        
-        for file_path in files_to_backup:
-            if os.path.exists(file_path):
-                filename = os.path.basename(file_path)
-                backup_path = os.path.join(FILE_BACKUP, f"{filename}.{timestamp}")
-                with open(file_path, 'r', encoding='utf-8') as f:
-                    data = f.read()
-                with open(backup_path, 'w', encoding='utf-8') as f:
-                    f.write(data)
-        
-        print(f"Backup berhasil dibuat dengan timestamp: {timestamp}\n")
-    except Exception as e:
-        print(f"Error saat backup: {e}\n")
+
+    def selesai(hasil, error):
+        if error:
+            print(f"\nError saat backup: {error}\n")
+        else:
+            print(f"\nBackup {hasil['id']} selesai: {hasil['file']} file, {hasil['dibaca']} berubah, "
+                  f"{hasil['bytes_baru'] / 1024:.1f} KB baru ({hasil['durasi_ms']} ms)\n")
+
+    if backup_latar(var, selesai) is None:
+        print("Backup sebelumnya masih berjalan.\n")
+    else:
+        print("Backup berjalan di latar belakang; menu tetap bisa dipakai.\n")
+        print("Restore: python -m utils.backup daftar / python -m utils.backup pulihkan <id>\n")
 
 
 def menu():
     init_database()
+    atexit.register(dump_metrics)
 
     while True:
         print("=== SISTEM PERPUSTAKAAN ===")
@@ -654,6 +460,10 @@ def menu():
         pilih = input("Pilih menu: ")
         print()
 
+        METRICS.start_trace(f"menu {pilih}")
+        # PROFILING=1 di variabel.txt dibaca ulang tiap aksi, jadi bisa dinyalakan tanpa restart
+        PROFILER.configure(load_variabel())
+        PROFILER.start(f"menu {pilih}")
         if pilih == "1":
             tambah_buku()
         elif pilih == "2":
@@ -684,9 +494,12 @@ def menu():
             backup_database()
         elif pilih == "15":
             print("Program selesai.")
+            PROFILER.stop()
             break
         else:
             print("Pilihan tidak valid.\n")
+        PROFILER.stop()
+        METRICS.end_trace()
 
 
 if __name__ == "__main__":
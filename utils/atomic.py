@@ -0,0 +1,325 @@
+"""
+Penulisan file atomik dan tahan crash untuk semua penulis storage.
+
+    with atomic_open("database/buku.csv", "w", newline="") as f:
+        csv.writer(f).writerows(rows)
+
+Isi ditulis ke file sementara di folder yang sama, di-fsync, lalu di-rename ke
+tujuan dan folder-nya di-fsync. Crash di tengah jalan meninggalkan file lama utuh
+(plus file .tmp yatim yang dibersihkan oleh penulisan berikutnya ke file itu).
+
+Beberapa tabel bisa di-commit bersama (misal buku + peminjaman saat pinjam):
+
+    with transaksi():
+        repo.save("buku", buku)
+        repo.save("peminjaman", pinjam)
+
+Di dalam transaksi fsync data ditunda sampai commit dan dikerjakan berturut-turut,
+rename baru dilakukan setelah semua data aman di disk, dan tiap folder hanya
+di-fsync sekali. Jika terjadi exception, tidak ada file yang diganti.
+
+Log yang hanya bertambah (log hapus buku) ditulis dengan append_text(): hanya baris
+baru yang ditulis di akhir file. Di dalam transaksi append ikut ditunda dan dikerjakan
+saat commit sebelum rename, seperti write-ahead log.
+"""
+import glob
+import os
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from typing import IO, Any, Callable, Dict, Iterator, List, Optional
+
+from utils import iolog
+
+TMP_SUFFIX = ".tmp"
+TMP_KEDALUWARSA = 600  # detik; file sementara lebih tua dari ini dianggap sisa crash
+
+_local = threading.local()
+_append_lock = threading.Lock()
+
+
+def _tmp_prefix(path: str) -> str:
+    return f".{os.path.basename(path)}."
+
+
+def fsync_dir(folder: str) -> None:
+    """fsync entri direktori supaya rename ikut tersimpan (dilewati di Windows)"""
+    if os.name == "nt":
+        return
+    fd = os.open(folder or ".", os.O_RDONLY)
+    try:
+        iolog.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def fsync_path(path: str) -> None:
+    """fsync file yang sudah ditutup (dipakai untuk penulisan in-place)"""
+    fd = os.open(path, os.O_RDWR)
+    try:
+        iolog.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def _remove(path: str) -> None:
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+def bersihkan_tmp(path: str) -> None:
+    """Hapus file sementara yatim milik `path` sisa crash sebelumnya"""
+    folder = os.path.dirname(path) or "."
+    batas = time.time() - TMP_KEDALUWARSA
+    for tmp in glob.glob(os.path.join(glob.escape(folder), glob.escape(_tmp_prefix(path)) + "*" + TMP_SUFFIX)):
+        try:
+            # Penulis lain (proses lain) mungkin sedang memakai file sementara yang baru
+            if os.path.getmtime(tmp) < batas:
+                os.remove(tmp)
+        except OSError:
+            pass
+
+
+class Transaksi:
+    """Kumpulan penulisan yang di-commit bersama; lihat transaksi()"""
+
+    def __init__(self) -> None:
+        self.pending: Dict[str, str] = {}  # path tujuan -> file sementara
+        self.overlay: Dict[Any, Any] = {}  # data milik store yang belum di-commit
+        self.appends: Dict[str, List[str]] = {}  # path -> teks yang ditambahkan di akhir file
+        self._before_commit: List[Callable[[], None]] = []
+        self._on_commit: List[Callable[[], None]] = []
+
+    def add(self, path: str, tmp: str) -> None:
+        lama = self.pending.pop(path, None)
+        if lama is not None:
+            _remove(lama)  # tabel ditulis dua kali dalam satu transaksi
+        self.pending[path] = tmp
+
+    def append(self, path: str, teks: str) -> None:
+        self.appends.setdefault(path, []).append(teks)
+
+    def before_commit(self, callback: Callable[[], None]) -> None:
+        """Jalankan callback di akhir blok transaksi, saat penulisan masih bisa ditambahkan"""
+        self._before_commit.append(callback)
+
+    def after_commit(self, callback: Callable[[], None]) -> None:
+        self._on_commit.append(callback)
+
+    def _run_before_commit(self) -> None:
+        while self._before_commit:
+            self._before_commit.pop(0)()
+
+    def commit(self) -> None:
+        if not self.pending and not self.appends:
+            self._run_callbacks()
+            return
+        label = "+".join(sorted(os.path.basename(p) for p in list(self.pending) + list(self.appends)))
+        with iolog.catat("commit", label) as ev:
+            ev["bytes"] = 0
+            for tmp in self.pending.values():
+                fsync_path(tmp)
+            # Log dulu, baru file yang diganti: crash di antaranya menyisakan catatan
+            # aksi yang tidak jadi, bukan aksi tanpa catatan
+            for path, bagian in self.appends.items():
+                _append(path, "".join(bagian))
+            self.appends.clear()
+            folders = []
+            for path, tmp in self.pending.items():
+                os.replace(tmp, path)
+                folder = os.path.dirname(path) or "."
+                if folder not in folders:
+                    folders.append(folder)
+            for folder in folders:
+                fsync_dir(folder)
+        self.pending.clear()
+        self._run_callbacks()
+
+    def rollback(self) -> None:
+        for tmp in self.pending.values():
+            _remove(tmp)
+        self.pending.clear()
+        self.appends.clear()
+        self._on_commit.clear()
+
+    def _run_callbacks(self) -> None:
+        callbacks, self._on_commit = self._on_commit, []
+        for callback in callbacks:
+            callback()
+
+
+def current() -> Optional[Transaksi]:
+    """Transaksi yang sedang berjalan di thread ini, atau None"""
+    return getattr(_local, "trx", None)
+
+
+@contextmanager
+def transaksi() -> Iterator[Transaksi]:
+    """Group commit; transaksi bersarang ikut ke transaksi terluar"""
+    trx = current()
+    if trx is not None:
+        yield trx
+        return
+    trx = _local.trx = Transaksi()
+    try:
+        yield trx
+        trx._run_before_commit()
+    except BaseException:
+        _local.trx = None
+        trx.rollback()
+        raise
+    _local.trx = None
+    trx.commit()
+
+
+def ukuran_tulis(path: str) -> int:
+    """Ukuran `path` sesudah transaksi aktif di-commit (file sementara jika masih tertunda)"""
+    trx = current()
+    tmp = trx.pending.get(path) if trx is not None else None
+    try:
+        return os.path.getsize(tmp or path)
+    except OSError:
+        return 0
+
+
+def after_commit(callback: Callable[[], None]) -> None:
+    """Jalankan callback setelah transaksi aktif di-commit, atau langsung jika tidak ada transaksi"""
+    trx = current()
+    if trx is None:
+        callback()
+    else:
+        trx.after_commit(callback)
+
+
+def _mode_file(path: str) -> int:
+    try:
+        return os.stat(path).st_mode & 0o777
+    except OSError:
+        return 0o644
+
+
+@contextmanager
+def atomic_open(path: str, mode: str = "w", encoding: Optional[str] = "utf-8",
+                newline: Optional[str] = None) -> Iterator[IO[Any]]:
+    """
+    Buka `path` untuk ditulis secara atomik
+
+    Args:
+        path (str): File tujuan
+        mode (str): "w" (teks) atau "wb" (biner)
+        encoding (str): Encoding untuk mode teks
+        newline (str): Sama seperti open(); "" untuk file CSV
+    """
+    folder = os.path.dirname(path) or "."
+    os.makedirs(folder, exist_ok=True)
+    bersihkan_tmp(path)
+    fd, tmp = tempfile.mkstemp(prefix=_tmp_prefix(path), suffix=TMP_SUFFIX, dir=folder)
+    trx = current()
+    try:
+        os.chmod(tmp, _mode_file(path))
+        if "b" in mode:
+            f = os.fdopen(fd, mode)
+        else:
+            f = os.fdopen(fd, mode, encoding=encoding, newline=newline)
+        with f:
+            yield f
+            f.flush()
+            if trx is None:
+                iolog.fsync(f.fileno())
+    except BaseException:
+        _remove(tmp)
+        raise
+    if trx is not None:
+        trx.add(path, tmp)
+        return
+    try:
+        os.replace(tmp, path)
+    except BaseException:
+        _remove(tmp)
+        raise
+    fsync_dir(folder)
+
+
+def akhir_baris(f: IO[bytes], size: int, blok: int = 4096) -> int:
+    """Posisi sesudah newline terakhir di file, atau -1 jika tidak ada newline sama sekali"""
+    pos = size
+    while pos > 0:
+        mulai = max(0, pos - blok)
+        f.seek(mulai)
+        i = f.read(pos - mulai).rfind(b"\n")
+        if i >= 0:
+            return mulai + i + 1
+        pos = mulai
+    return -1
+
+
+@contextmanager
+def kunci(f: IO[bytes]) -> Iterator[None]:
+    """Kunci eksklusif antar proses pada file yang terbuka (flock, atau msvcrt di Windows)"""
+    if os.name == "nt":
+        import msvcrt
+        f.seek(0)
+        while True:
+            try:
+                msvcrt.locking(f.fileno(), msvcrt.LK_NBLCK, 1)
+                break
+            except OSError:
+                time.sleep(0.1)
+        try:
+            yield
+        finally:
+            f.seek(0)
+            msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+    else:
+        import fcntl
+        fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
+
+def _append(path: str, teks: str) -> None:
+    # Commit dari thread lain (lock) atau proses lain (kunci) bisa menambah ke file yang
+    # sama bersamaan; potong-ekor dan tulis harus satu langkah
+    with _append_lock:
+        fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+        with os.fdopen(fd, "r+b") as f, kunci(f):
+            size = f.seek(0, os.SEEK_END)
+            akhir = akhir_baris(f, size) if size else 0
+            if 0 < akhir < size:
+                f.truncate(akhir)  # baris terpotong dari append yang crash
+            f.seek(0, os.SEEK_END)
+            if akhir < 0:
+                f.write(b"\n")
+            f.write(teks.encode("utf-8"))
+            f.flush()
+            iolog.fsync(f.fileno())
+
+
+def append_text(path: str, teks: str) -> None:
+    """
+    Tambahkan `teks` (diakhiri newline) di akhir `path` tanpa menulis ulang isinya
+
+    Biayanya sebanding dengan panjang `teks`, bukan ukuran file. Baris terakhir yang
+    terpotong oleh crash di tengah append sebelumnya dibuang dulu. Di dalam transaksi
+    ditunda sampai commit (lihat Transaksi.commit).
+    """
+    trx = current()
+    if trx is not None:
+        trx.append(path, teks)
+        return
+    _append(path, teks)
+
+
+def write_bytes(path: str, data: bytes) -> None:
+    with atomic_open(path, "wb") as f:
+        f.write(data)
+
+
+def write_text(path: str, text: str, encoding: str = "utf-8") -> None:
+    with atomic_open(path, "w", encoding=encoding) as f:
+        f.write(text)
@@ -0,0 +1,545 @@
+"""
+Backup inkremental ter-deduplikasi (content-addressed).
+
+Struktur folder backup (default database/backup):
+
+    chunks/ab/ab12...      potongan isi file, dikompresi zlib, nama = blake2b isi aslinya
+    snapshots/20240101_120000.json
+                           daftar file pada saat backup: ukuran, mtime, urutan chunk
+    .lock                  kunci antar proses untuk buat() dan retensi()
+
+File teks (CSV/JSON) dipotong di batas baris yang ditentukan isi baris itu sendiri,
+jadi menyisipkan atau mengubah satu baris hanya menghasilkan satu-dua chunk baru.
+File biner (cover) dipotong per BINARY_CHUNK byte. Chunk yang sudah ada tidak
+ditulis lagi, dan file yang ukuran+mtime-nya sama dengan snapshot sebelumnya tidak
+dibaca sama sekali, sehingga backup harian perpustakaan yang tidak berubah hanya
+menulis satu file snapshot kecil.
+
+    python -m utils.backup buat
+    python -m utils.backup daftar
+    python -m utils.backup pulihkan 20240101_120000 [--tujuan folder] [--file database/buku.csv]
+    python -m utils.backup retensi [--harian 7 --mingguan 4 --bulanan 6]
+    python -m utils.backup pulihkan-waktu "2024-03-05 10:30:00" [--tujuan folder]
+
+Restore ke titik waktu sembarang memakai snapshot terdekat sebelum waktu itu lalu
+memutar ulang change log (utils.journal) sampai waktu tersebut; lihat pulihkan_ke().
+"""
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import threading
+import time
+import zlib
+from contextlib import contextmanager
+from datetime import datetime
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Iterator, List, Optional, Set, Tuple, Union
+
+from utils.atomic import atomic_open, kunci, transaksi
+from utils.journal import FORMAT_TS, Journal, State, terapkan
+from utils.repository import DELTA_EXT, Repository, load_variabel, paths_from_variabel
+
+FORMAT_ID = "%Y%m%d_%H%M%S"
+TEXT_EXT = (".csv", ".json", ".txt", ".jsonl")
+MIN_CHUNK = 16 * 1024
+MAX_CHUNK = 1024 * 1024
+BOUNDARY_MASK = 0x3F        # rata-rata satu batas tiap 64 baris (setelah MIN_CHUNK)
+BINARY_CHUNK = 1024 * 1024
+COMPRESS_LEVEL = 6
+ABAIKAN_EXT = (".tmp", ".sync", ".sync.idx")
+LOCK_FILE = ".lock"
+
+Entry = Dict[str, Any]
+
+
+def _digest(data: bytes) -> str:
+    return hashlib.blake2b(data, digest_size=16).hexdigest()
+
+
+# ============= CHUNKING =============
+def _chunks_teks(data: bytes) -> Iterator[bytes]:
+    start = 0
+    pos = 0
+    n = len(data)
+    while pos < n:
+        nl = data.find(b"\n", pos)
+        end = n if nl < 0 else nl + 1
+        size = end - start
+        if size >= MAX_CHUNK or (size >= MIN_CHUNK and zlib.crc32(data[pos:end]) & BOUNDARY_MASK == 0):
+            yield data[start:end]
+            start = end
+        pos = end
+    if start < n:
+        yield data[start:]
+
+
+def _chunks_biner(data: bytes) -> Iterator[bytes]:
+    for start in range(0, len(data), BINARY_CHUNK):
+        yield data[start:start + BINARY_CHUNK]
+
+
+def potong(path: str, data: bytes) -> Iterator[bytes]:
+    """Potong isi file menjadi chunk; batas chunk teks mengikuti isi baris"""
+    if path.lower().endswith(TEXT_EXT):
+        return _chunks_teks(data)
+    return _chunks_biner(data)
+
+
+@contextmanager
+def _kunci_file(path: str) -> Iterator[None]:
+    """Kunci eksklusif antar proses selama blok berjalan (flock, atau msvcrt di Windows)"""
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "a+b") as f, kunci(f):
+        yield
+
+
+# ============= STORE =============
+class BackupStore:
+    """Folder backup berisi chunk dan snapshot; lihat docstring modul"""
+
+    def __init__(self, folder: str, clock: Optional[Callable[[], datetime]] = None) -> None:
+        self.folder = folder
+        self.clock = clock or datetime.now
+        self.chunk_dir = os.path.join(folder, "chunks")
+        self.snapshot_dir = os.path.join(folder, "snapshots")
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_variabel(cls, var: Dict[str, str]) -> "BackupStore":
+        folder_db = var.get("FOLDER_DB", "database")
+        return cls(var.get("FOLDER_BACKUP", os.path.join(folder_db, "backup")))
+
+    @contextmanager
+    def _eksklusif(self) -> Iterator[None]:
+        """
+        Kunci store untuk buat() dan retensi()
+
+        put_chunk() melewati chunk yang sudah ada, jadi _gc() dari proses lain (misal
+        retensi lewat CLI saat backup latar berjalan) tidak boleh menghapus chunk di
+        antara pengecekan itu dan ditulisnya snapshot yang merujuknya.
+        """
+        with self._lock, _kunci_file(os.path.join(self.folder, LOCK_FILE)):
+            yield
+
+    def _chunk_path(self, digest: str) -> str:
+        return os.path.join(self.chunk_dir, digest[:2], digest)
+
+    def has_chunk(self, digest: str) -> bool:
+        return os.path.exists(self._chunk_path(digest))
+
+    def put_chunk(self, data: bytes, baru: Optional[Set[str]] = None) -> Tuple[str, int]:
+        """
+        Simpan chunk jika belum ada; kembalikan (digest, byte yang ditulis)
+
+        `baru` berisi digest yang sudah ditulis dalam transaksi yang sama (belum terlihat
+        di disk sampai commit)
+        """
+        digest = _digest(data)
+        path = self._chunk_path(digest)
+        if (baru is not None and digest in baru) or os.path.exists(path):
+            return digest, 0
+        if baru is not None:
+            baru.add(digest)
+        packed = zlib.compress(data, COMPRESS_LEVEL)
+        with atomic_open(path, "wb") as f:
+            f.write(packed)
+        return digest, len(packed)
+
+    def get_chunk(self, digest: str) -> bytes:
+        with open(self._chunk_path(digest), "rb") as f:
+            data = zlib.decompress(f.read())
+        if _digest(data) != digest:
+            raise ValueError(f"Chunk {digest} rusak")
+        return data
+
+    # ---- snapshot ----
+    def daftar(self) -> List[str]:
+        """ID snapshot, terlama dulu"""
+        if not os.path.isdir(self.snapshot_dir):
+            return []
+        return sorted(name[:-5] for name in os.listdir(self.snapshot_dir) if name.endswith(".json"))
+
+    def baca_snapshot(self, snapshot_id: str) -> Dict[str, Any]:
+        with open(os.path.join(self.snapshot_dir, f"{snapshot_id}.json"), "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    def terakhir(self) -> Optional[Dict[str, Any]]:
+        ids = self.daftar()
+        return self.baca_snapshot(ids[-1]) if ids else None
+
+    def buat(self, sumber: List[str]) -> Dict[str, Any]:
+        """
+        Buat snapshot baru dari daftar file/folder
+
+        Returns:
+            dict: id, jumlah file, file yang dibaca ulang, chunk baru, byte baru
+                ditulis (terkompresi), dan durasi
+        """
+        with self._eksklusif():
+            mulai = time.perf_counter()
+            # Perubahan yang di-journal sebelum titik ini sudah ada di file yang dibaca di bawah
+            sekarang = self.clock()
+            lama = self.terakhir()
+            files_lama: Dict[str, Entry] = lama["files"] if lama else {}
+            dasar = snapshot_id = sekarang.strftime(FORMAT_ID)
+            urut = 1
+            while lama and snapshot_id <= lama["id"]:  # beberapa backup dalam detik yang sama
+                snapshot_id = f"{dasar}_{urut}"
+                urut += 1
+
+            files: Dict[str, Entry] = {}
+            dibaca = byte_baru = 0
+            baru: Set[str] = set()
+            with transaksi():
+                for path in _kumpulkan(sumber):
+                    try:
+                        st = os.stat(path)
+                    except OSError:
+                        continue
+                    key = _kunci(path)
+                    prev = files_lama.get(key)
+                    if prev and prev["size"] == st.st_size and prev["mtime_ns"] == st.st_mtime_ns:
+                        files[key] = prev
+                        continue
+                    with open(path, "rb") as f:
+                        data = f.read()
+                    dibaca += 1
+                    digests = []
+                    for chunk in potong(path, data):
+                        digest, written = self.put_chunk(chunk, baru)
+                        digests.append(digest)
+                        byte_baru += written
+                    files[key] = {"size": len(data), "mtime_ns": st.st_mtime_ns,
+                                  "hash": _digest(data), "chunks": digests}
+
+                snapshot = {"id": snapshot_id, "dibuat": sekarang.strftime("%Y-%m-%d %H:%M:%S"),
+                            "journal_ts": sekarang.strftime(FORMAT_TS), "files": files}
+                with atomic_open(os.path.join(self.snapshot_dir, f"{snapshot_id}.json"), "w") as f:
+                    json.dump(snapshot, f, ensure_ascii=False)
+
+            return {"id": snapshot_id, "file": len(files), "dibaca": dibaca, "chunk_baru": len(baru),
+                    "bytes_baru": byte_baru, "durasi_ms": round((time.perf_counter() - mulai) * 1000, 1)}
+
+    def pulihkan(self, snapshot_id: str, tujuan: str = "", hanya: Optional[List[str]] = None) -> Dict[str, int]:
+        """
+        Kembalikan file dari snapshot
+
+        Args:
+            snapshot_id (str): ID snapshot (lihat daftar())
+            tujuan (str): Folder akar hasil restore; "" menimpa file aslinya
+            hanya (list): Hanya pulihkan path ini (misal ["database/buku.csv"])
+
+        Returns:
+            dict: jumlah file ditulis dan dilewati (isi sudah sama)
+        """
+        snapshot = self.baca_snapshot(snapshot_id)
+        ditulis = dilewati = 0
+        with transaksi():
+            for key, entry in snapshot["files"].items():
+                if hanya and key not in hanya:
+                    continue
+                path = os.path.join(tujuan, key) if tujuan else key
+                if _sama(path, entry):
+                    dilewati += 1
+                    continue
+                with atomic_open(path, "wb") as f:
+                    for digest in entry["chunks"]:
+                        f.write(self.get_chunk(digest))
+                ditulis += 1
+        return {"ditulis": ditulis, "dilewati": dilewati}
+
+    def baca_file(self, entry: Entry) -> Iterator[bytes]:
+        """Isi satu file snapshot, chunk demi chunk"""
+        for digest in entry["chunks"]:
+            yield self.get_chunk(digest)
+
+    def snapshot_sebelum(self, waktu: str) -> Optional[Dict[str, Any]]:
+        """Snapshot terbaru yang diambil pada/sebelum `waktu` (FORMAT_TS) dan punya titik journal"""
+        batas_id = datetime.strptime(waktu, FORMAT_TS).strftime(FORMAT_ID)
+        for snapshot_id in reversed(self.daftar()):
+            if snapshot_id[:15] > batas_id:
+                continue
+            snapshot = self.baca_snapshot(snapshot_id)
+            # Snapshot lama (sebelum ada journal) tidak bisa dijadikan titik awal replay
+            if "journal_ts" in snapshot and snapshot["journal_ts"] <= waktu:
+                return snapshot
+        return None
+
+    def pulihkan_ke(self, waktu: Union[str, datetime], journal: Journal, paths: Dict[str, str],
+                    tujuan: Repository) -> Dict[str, Any]:
+        """
+        Point-in-time restore: snapshot terdekat + replay journal sampai `waktu`
+
+        Args:
+            waktu: Titik waktu ("YYYY-MM-DD HH:MM:SS[.ffffff]" atau datetime)
+            journal: Change log yang dicatat Repository sejak snapshot diambil
+            paths: Lokasi file tabel saat backup dibuat (paths_from_variabel)
+            tujuan: Repository yang ditimpa dengan hasil restore; jika repository ini
+                memakai journal, restore-nya sendiri ikut tercatat
+
+        Returns:
+            dict: snapshot yang dipakai, jumlah record journal yang diputar, jumlah baris per tabel
+        """
+        sampai = _titik_waktu(waktu)
+        snapshot = self.snapshot_sebelum(sampai)
+        if snapshot is None:
+            raise ValueError(f"Tidak ada snapshot sebelum {sampai}")
+
+        state: State = {}
+        folder = tempfile.mkdtemp(prefix="pitr-")
+        try:
+            # Tabel dari snapshot dibaca dengan parser yang sama seperti Repository
+            tmp_paths: Dict[str, str] = {}
+            for tabel, path in paths.items():
+                tmp_paths[tabel] = os.path.join(folder, f"{tabel}_{os.path.basename(path)}")
+                for sumber, tujuan_tmp in ((path, tmp_paths[tabel]), (path + DELTA_EXT, tmp_paths[tabel] + DELTA_EXT)):
+                    entry = snapshot["files"].get(_kunci(sumber))
+                    if entry is None:
+                        continue
+                    with open(tujuan_tmp, "wb") as f:
+                        for data in self.baca_file(entry):
+                            f.write(data)
+            awal = Repository(tmp_paths)
+            for tabel in paths:
+                rows = awal.load(tabel)
+                state[tabel] = OrderedDict((row.get("id", i), row) for i, row in enumerate(rows))
+        finally:
+            shutil.rmtree(folder, ignore_errors=True)
+
+        diputar = 0
+        for record in journal.baca(dari=snapshot["journal_ts"], sampai=sampai):
+            for tabel, perubahan in record["tabel"].items():
+                if tabel in paths:
+                    terapkan(state, tabel, perubahan)
+            diputar += 1
+
+        with tujuan.transaksi():
+            for tabel in paths:
+                tujuan.save(tabel, list(state[tabel].values()))
+        return {"snapshot": snapshot["id"], "journal": diputar,
+                **{tabel: len(rows) for tabel, rows in state.items()}}
+
+    # ---- retensi ----
+    def retensi(self, harian: int = 7, mingguan: int = 4, bulanan: int = 6) -> Dict[str, int]:
+        """
+        Simpan snapshot terakhir per hari/minggu/bulan sesuai batas, hapus sisanya,
+        lalu buang chunk yang tidak lagi dipakai snapshot mana pun
+
+        Returns:
+            dict: jumlah snapshot dihapus, chunk dihapus, byte dibebaskan
+        """
+        with self._eksklusif():
+            ids = self.daftar()
+            simpan: Set[str] = set(ids[-1:])
+            for kunci_periode, batas in ((_hari, harian), (_minggu, mingguan), (_bulan, bulanan)):
+                periode: Dict[Any, str] = {}
+                for snapshot_id in ids:
+                    periode[kunci_periode(_waktu(snapshot_id))] = snapshot_id  # terakhir per periode
+                if batas > 0:
+                    simpan.update(sorted(periode.values())[-batas:])
+
+            hapus = [snapshot_id for snapshot_id in ids if snapshot_id not in simpan]
+            for snapshot_id in hapus:
+                os.remove(os.path.join(self.snapshot_dir, f"{snapshot_id}.json"))
+            chunk, freed = self._gc()
+            return {"snapshot_dihapus": len(hapus), "chunk_dihapus": chunk, "bytes_dibebaskan": freed}
+
+    def _gc(self) -> Tuple[int, int]:
+        dipakai: Set[str] = set()
+        for snapshot_id in self.daftar():
+            for entry in self.baca_snapshot(snapshot_id)["files"].values():
+                dipakai.update(entry["chunks"])
+        chunk = freed = 0
+        if not os.path.isdir(self.chunk_dir):
+            return 0, 0
+        for sub in os.listdir(self.chunk_dir):
+            folder = os.path.join(self.chunk_dir, sub)
+            for name in os.listdir(folder):
+                if name not in dipakai and not name.endswith(".tmp"):
+                    path = os.path.join(folder, name)
+                    freed += os.path.getsize(path)
+                    os.remove(path)
+                    chunk += 1
+        return chunk, freed
+
+
+def _titik_waktu(waktu: Union[str, datetime]) -> str:
+    """Normalisasi ke FORMAT_TS; waktu tanpa pecahan detik mencakup seluruh detik itu"""
+    if isinstance(waktu, datetime):
+        return waktu.strftime(FORMAT_TS)
+    waktu = waktu.strip()
+    if len(waktu) == 10:
+        waktu += " 23:59:59"
+    if len(waktu) == 19:
+        waktu += ".999999"
+    datetime.strptime(waktu, FORMAT_TS)  # ValueError jika format salah
+    return waktu
+
+
+def _waktu(snapshot_id: str) -> datetime:
+    return datetime.strptime(snapshot_id[:15], FORMAT_ID)
+
+
+def _hari(waktu: datetime) -> Any:
+    return waktu.date()
+
+
+def _minggu(waktu: datetime) -> Any:
+    return waktu.isocalendar()[:2]
+
+
+def _bulan(waktu: datetime) -> Any:
+    return (waktu.year, waktu.month)
+
+
+def _kunci(path: str) -> str:
+    """Path relatif terhadap folder kerja dengan pemisah '/' (portabel antar OS)"""
+    rel = os.path.relpath(path)
+    return rel.replace(os.sep, "/")
+
+
+def _sama(path: str, entry: Entry) -> bool:
+    try:
+        if os.path.getsize(path) != entry["size"]:
+            return False
+        with open(path, "rb") as f:
+            return _digest(f.read()) == entry["hash"]
+    except OSError:
+        return False
+
+
+def _kumpulkan(sumber: List[str]) -> List[str]:
+    """File dari daftar file/folder, tanpa file sementara dan manifest sinkronisasi"""
+    hasil: List[str] = []
+    seen: Set[str] = set()
+    for item in sumber:
+        if os.path.isdir(item):
+            paths = []
+            for root, dirs, names in os.walk(item):
+                dirs.sort()
+                paths.extend(os.path.join(root, name) for name in sorted(names))
+        else:
+            # Delta tabel CSV (lihat utils.repository) ikut bersama tabelnya
+            paths = [item, item + DELTA_EXT] if os.path.exists(item + DELTA_EXT) else [item]
+        for path in paths:
+            name = os.path.basename(path)
+            if name.endswith(ABAIKAN_EXT) or name.startswith("."):
+                continue
+            key = os.path.abspath(path)
+            if key not in seen:
+                seen.add(key)
+                hasil.append(path)
+    return hasil
+
+
+def sumber_default(var: Dict[str, str]) -> List[str]:
+    """Tabel (di mana pun lokasinya), shard buku/, cover, dan isi FOLDER_DB selain folder backup"""
+    folder_db = var.get("FOLDER_DB", "database")
+    backup = os.path.abspath(BackupStore.from_variabel(var).folder)
+    sumber = list(paths_from_variabel(var).values())
+    if os.path.isdir(folder_db):
+        for name in sorted(os.listdir(folder_db)):
+            path = os.path.join(folder_db, name)
+            if os.path.abspath(path) != backup:
+                sumber.append(path)
+    return sumber
+
+
+# ============= LATAR BELAKANG =============
+_berjalan = threading.Lock()
+
+
+def backup_latar(var: Dict[str, str], selesai: Optional[Callable[[Optional[Dict[str, Any]], str], None]] = None,
+                 retensi: bool = True) -> Optional[threading.Thread]:
+    """
+    Jalankan backup (dan retensi) di thread terpisah
+
+    Args:
+        var: Isi variabel.txt
+        selesai: Dipanggil dengan (hasil, pesan error) setelah backup selesai
+        retensi (bool): Terapkan kebijakan retensi setelah backup
+
+    Returns:
+        Thread yang berjalan, atau None jika backup lain masih berjalan
+    """
+    if not _berjalan.acquire(blocking=False):
+        return None
+
+    def run() -> None:
+        hasil: Optional[Dict[str, Any]] = None
+        error = ""
+        try:
+            store = BackupStore.from_variabel(var)
+            hasil = store.buat(sumber_default(var))
+            if retensi:
+                hasil.update(store.retensi(*_batas_retensi(var)))
+        except Exception as e:
+            error = str(e)
+        finally:
+            _berjalan.release()
+        if selesai is not None:
+            selesai(hasil, error)
+
+    thread = threading.Thread(target=run, name="backup", daemon=False)
+    thread.start()
+    return thread
+
+
+def _batas_retensi(var: Dict[str, str]) -> Tuple[int, int, int]:
+    def angka(key: str, default: int) -> int:
+        try:
+            return int(var.get(key, default))
+        except ValueError:
+            return default
+    return angka("BACKUP_HARIAN", 7), angka("BACKUP_MINGGUAN", 4), angka("BACKUP_BULANAN", 6)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Backup inkremental Sistem Perpustakaan")
+    parser.add_argument("--variabel", default="variabel.txt")
+    sub = parser.add_subparsers(dest="perintah", required=True)
+    sub.add_parser("buat", help="Buat snapshot baru")
+    sub.add_parser("daftar", help="Daftar snapshot")
+    p_restore = sub.add_parser("pulihkan", help="Pulihkan file dari snapshot")
+    p_restore.add_argument("snapshot")
+    p_restore.add_argument("--tujuan", default="", help="Folder akar hasil restore (default: timpa file asli)")
+    p_restore.add_argument("--file", action="append", help="Hanya pulihkan file ini (boleh berulang)")
+    p_pitr = sub.add_parser("pulihkan-waktu", help="Pulihkan tabel ke titik waktu (snapshot + journal)")
+    p_pitr.add_argument("waktu", help='"YYYY-MM-DD HH:MM:SS"')
+    p_pitr.add_argument("--tujuan", default="", help="Folder hasil restore (default: timpa tabel aktif)")
+    p_retensi = sub.add_parser("retensi", help="Terapkan kebijakan retensi")
+    p_retensi.add_argument("--harian", type=int)
+    p_retensi.add_argument("--mingguan", type=int)
+    p_retensi.add_argument("--bulanan", type=int)
+    args = parser.parse_args()
+
+    var = load_variabel(args.variabel)
+    store = BackupStore.from_variabel(var)
+    if args.perintah == "buat":
+        print(store.buat(sumber_default(var)))
+    elif args.perintah == "daftar":
+        for snapshot_id in store.daftar():
+            snapshot = store.baca_snapshot(snapshot_id)
+            total = sum(e["size"] for e in snapshot["files"].values())
+            print(f"{snapshot_id}  {len(snapshot['files'])} file  {total / 1024:.1f} KB")
+    elif args.perintah == "pulihkan":
+        print(store.pulihkan(args.snapshot, args.tujuan, args.file))
+    elif args.perintah == "pulihkan-waktu":
+        paths = paths_from_variabel(var)
+        journal = Journal.from_variabel(var)
+        if args.tujuan:
+            tujuan = Repository({t: os.path.join(args.tujuan, os.path.basename(p)) for t, p in paths.items()})
+        else:
+            tujuan = Repository(paths, journal)
+        try:
+            print(store.pulihkan_ke(args.waktu, journal, paths, tujuan))
+        except ValueError as e:
+            print(f"Error: {e}")
+    else:
+        harian, mingguan, bulanan = _batas_retensi(var)
+        print(store.retensi(args.harian if args.harian is not None else harian,
+                            args.mingguan if args.mingguan is not None else mingguan,
+                            args.bulanan if args.bulanan is not None else bulanan))
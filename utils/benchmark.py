@@ -2,7 +2,10 @@ import time
 import os
 import json
 import csv
-from converter import load_csv
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from utils.converter import load_csv
 
 def benchmark_load_data(file_path, iterations=100):
     start_time = time.time()
@@ -0,0 +1,100 @@
+"""
+Benchmark checkout dengan scanner: waktu per scan (pinjam_kode) pada katalog besar.
+
+Membuat database sintetis di folder sementara (default 40.000 judul, 3.000 siswa,
+100.000 riwayat peminjaman), lalu mengukur setiap scan buku dari sisi layanan:
+lookup ISBN/NIS, cek batas pinjam, dan commit ke disk (fsync). Dibandingkan dengan
+mode tulis utuh (BATAS_DELTA = 0, setiap scan menulis ulang CSV) seperti sebelumnya,
+yang cukup diukur dengan SCAN_TULIS_UTUH scan karena setiap scan-nya memakan detik.
+
+    python -m utils.benchmark_sirkulasi [jumlah_scan] [jumlah_buku]
+"""
+import os
+import random
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from typing import Dict, List
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from utils import repository
+from utils.indeks import IndeksPeminjaman
+from utils.perpustakaan import Perpustakaan
+from utils.repository import Repository
+
+TARGET_MS = 100
+SCAN_TULIS_UTUH = 20
+JUMLAH_SISWA = 3000
+JUMLAH_RIWAYAT = 100000
+
+
+def buat_database(folder: str, jumlah_buku: int) -> Dict[str, str]:
+    """Tulis tabel sintetis sekali (save utuh) dan kembalikan paths-nya"""
+    paths = {tabel: os.path.join(folder, f"{tabel}.csv") for tabel in ("buku", "anggota", "peminjaman", "log_hapus")}
+    paths["kategori"] = os.path.join(folder, "kategori.json")
+    rng = random.Random(43)
+    repo = Repository(paths)
+    repo.save("kategori", [{"id": 1, "nama": "Umum"}])
+    repo.save("buku", [{"id": i, "judul": f"Judul Buku {i}", "penulis": f"Penulis {i % 900}", "penerbit": "Gramedia",
+                        "isbn": f"978602{i:07d}", "id_kategori": 1, "stok": 1000,
+                        "created_at": "2024-01-01 07:00:00"} for i in range(1, jumlah_buku + 1)])
+    repo.save("anggota", [{"id": i, "nama": f"Siswa {i}", "kelas": f"X-{i % 9}", "nis": f"{20000 + i}",
+                           "created_at": "2024-01-01 07:00:00"} for i in range(1, JUMLAH_SISWA + 1)])
+    repo.save("peminjaman", [{"id": i, "id_buku": rng.randint(1, jumlah_buku),
+                              "id_anggota": rng.randint(1, JUMLAH_SISWA), "status": "dikembalikan",
+                              "tanggal_pinjam": "2024-02-01 08:00:00", "tanggal_kembali": "2024-02-05 08:00:00"}
+                             for i in range(1, JUMLAH_RIWAYAT + 1)])
+    return paths
+
+
+def ukur(paths: Dict[str, str], jumlah_scan: int, jumlah_buku: int) -> List[float]:
+    """Durasi (ms) tiap scan; layanan dipanaskan dulu seperti proses web UI yang sudah berjalan"""
+    rng = random.Random(7)
+    folder = os.path.dirname(paths["buku"])
+    layanan = Perpustakaan(Repository(paths), indeks=IndeksPeminjaman(os.path.join(folder, "indeks.json")),
+                           batas_pinjam=jumlah_scan + 1)
+    layanan.cari_kode("buku", "1")
+    layanan.cari_kode("anggota", "1")
+    layanan.jumlah_pinjaman_aktif(1)
+    layanan.store.id_berikut("peminjaman")
+
+    durasi: List[float] = []
+    kartu = f"{20000 + rng.randint(1, JUMLAH_SISWA)}"
+    for _ in range(jumlah_scan):
+        isbn = f"978-602-{rng.randint(1, jumlah_buku):07d}"
+        mulai = time.perf_counter()
+        ok, pesan, _ = layanan.pinjam_kode(isbn, kartu)
+        durasi.append((time.perf_counter() - mulai) * 1000)
+        if not ok:
+            raise RuntimeError(pesan)
+    return durasi
+
+
+def ringkas(durasi: List[float]) -> str:
+    urut = sorted(durasi)
+    p95 = urut[min(len(urut) - 1, int(len(urut) * 0.95))]
+    return f"{statistics.median(urut):>8.1f} | {p95:>8.1f} | {urut[-1]:>8.1f}"
+
+
+if __name__ == "__main__":
+    jumlah_scan = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    jumlah_buku = int(sys.argv[2]) if len(sys.argv) > 2 else 40000
+
+    print(f"Katalog {jumlah_buku} judul, {JUMLAH_SISWA} siswa, {JUMLAH_RIWAYAT} riwayat; {jumlah_scan} scan")
+    print(f"{'Mode':<22} | {'p50 (ms)':>8} | {'p95 (ms)':>8} | {'max (ms)':>8}")
+    print("-" * 56)
+    hasil = {}
+    for mode, batas, n in (("delta (upsert)", repository.BATAS_DELTA, jumlah_scan),
+                           ("tulis utuh", 0, min(jumlah_scan, SCAN_TULIS_UTUH))):
+        folder = tempfile.mkdtemp(prefix="bench-sirkulasi-")
+        try:
+            repository.BATAS_DELTA = batas
+            hasil[mode] = ukur(buat_database(folder, jumlah_buku), n, jumlah_buku)
+        finally:
+            shutil.rmtree(folder, ignore_errors=True)
+        print(f"{mode:<22} | {ringkas(hasil[mode])}", flush=True)
+
+    p95 = sorted(hasil["delta (upsert)"])[min(jumlah_scan - 1, int(jumlah_scan * 0.95))]
+    print(f"\nTarget < {TARGET_MS} ms per scan (p95): {'OK' if p95 < TARGET_MS else 'GAGAL'}")
@@ -0,0 +1,116 @@
+import ast
+import json
+import os
+import statistics
+import subprocess
+import sys
+from typing import Dict, List, Tuple
+
+# Root repository, supaya `utils.*` bisa di-import oleh subprocess
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+HEAVY_MODULES = ["pandas", "PIL.Image", "openpyxl"]
+SCRIPTS = ["webui2.py", "webui2_optimized.py"]
+
+
+def top_level_imports(script: str) -> List[str]:
+    """Ambil semua statement import di level modul dari sebuah script"""
+    with open(script, "r", encoding="utf-8") as f:
+        source = f.read()
+    tree = ast.parse(source)
+    statements: List[str] = []
+    for node in tree.body:
+        if isinstance(node, (ast.Import, ast.ImportFrom)):
+            segment = ast.get_source_segment(source, node)
+            if segment:
+                statements.append(segment.split("#")[0].strip())
+    return statements
+
+
+def build_probe(statements: List[str]) -> str:
+    """
+    Susun kode probe: jalankan import, lalu laporkan modul berat yang ikut termuat.
+    Import yang gagal (dependency belum terpasang) dilewati agar benchmark tetap jalan.
+    """
+    lines = ["import sys", "missing = []"]
+    for stmt in statements:
+        lines.append("try:")
+        lines.append(f"    {stmt}")
+        lines.append("except ImportError as e:")
+        lines.append("    missing.append(str(e))")
+    lines.append(f"heavy = [m for m in {HEAVY_MODULES!r} if m in sys.modules]")
+    lines.append("import json")
+    lines.append("print(json.dumps({'heavy': heavy, 'missing': missing}))")
+    return "\n".join(lines)
+
+
+def parse_importtime(stderr: str) -> Tuple[int, Dict[str, int]]:
+    """
+    Parse output `-X importtime`
+
+    Returns:
+        tuple: (total cumulative us untuk modul top-level, cumulative per modul)
+    """
+    total = 0
+    per_module: Dict[str, int] = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        parts = line[len("import time:"):].split("|")
+        if len(parts) != 3:
+            continue
+        cumulative = int(parts[1].strip())
+        name = parts[2].rstrip()
+        # Modul top-level tidak diindentasi, jadi total tidak dihitung dobel
+        if not name.startswith("  "):
+            total += cumulative
+        per_module[name.strip()] = cumulative
+    return total, per_module
+
+
+def measure(code: str, iterations: int = 5) -> Dict[str, object]:
+    """Jalankan `code` di interpreter baru beberapa kali dan ambil median waktunya"""
+    totals: List[int] = []
+    per_module: Dict[str, int] = {}
+    report: Dict[str, object] = {}
+    for _ in range(iterations):
+        proc = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", code],
+            cwd=ROOT_DIR, capture_output=True, text=True
+        )
+        total, per_module = parse_importtime(proc.stderr)
+        totals.append(total)
+        if proc.stdout.strip():
+            report = json.loads(proc.stdout.strip().splitlines()[-1])
+    top = sorted(per_module.items(), key=lambda kv: kv[1], reverse=True)[:10]
+    return {
+        "median_ms": statistics.median(totals) / 1000 if totals else 0.0,
+        "heavy_loaded": report.get("heavy", []),
+        "missing": report.get("missing", []),
+        "top_modules": top
+    }
+
+
+if __name__ == "__main__":
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    output_file = sys.argv[2] if len(sys.argv) > 2 else ""
+
+    results: Dict[str, object] = {}
+    targets = [(s, build_probe(top_level_imports(os.path.join(ROOT_DIR, s)))) for s in SCRIPTS]
+    targets += [(m, build_probe([f"import {m}"])) for m in HEAVY_MODULES]
+
+    print(f"{'Target':<25} | {'Median Import (ms)':<20} | {'Modul berat termuat'}")
+    print("-" * 75)
+
+    for name, code in targets:
+        result = measure(code, iterations)
+        results[name] = result
+        heavy = ", ".join(result["heavy_loaded"]) or "-"  # type: ignore[arg-type]
+        print(f"{name:<25} | {result['median_ms']:<20.2f} | {heavy}")
+        for err in result["missing"]:  # type: ignore[attr-defined]
+            print(f"{'':<25}   (dilewati: {err})")
+
+    if output_file:
+        with open(output_file, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=4, ensure_ascii=False)
+        print(f"\nHasil disimpan ke {output_file}")
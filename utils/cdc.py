@@ -0,0 +1,147 @@
+"""
+Change feed (CDC) dari journal untuk konsumen di luar aplikasi, misal sistem laporan sekolah.
+
+Journal (utils/journal.py) sudah berisi setiap perubahan tabel yang di-commit,
+berurutan dan append-only. Modul ini menyajikannya per baris:
+
+    {"seq": 202403000000004821, "ts": "2024-03-05 10:32:01.123456", "aksi": "layanan.pinjam",
+     "tabel": "buku", "op": "update", "id": 12,
+     "sebelum": {"id": 12, "stok": 3, ...}, "sesudah": {"id": 12, "stok": 2, ...}}
+
+op adalah "insert", "update", "delete", atau "ganti" (tabel tanpa id ditulis ulang utuh,
+"sesudah" berisi seluruh baris). Record journal lama yang belum mencatat isi sebelum
+memberi op "upsert".
+
+seq = bulan segmen journal (YYYYMM) * 10^12 + posisi byte record di segmen itu, plus
+urutan baris dalam record. Nilainya naik terus tanpa perlu penghitung bersama antar
+proses, dan cursor (seq pertama yang belum diproses) langsung menunjuk posisi file,
+jadi konsumen hanya membaca perubahan sejak cursor terakhir, tidak memindai ulang CSV.
+Cursor yang dikembalikan baca() atau seq terakhir yang sudah diproses + 1 sama-sama sah:
+
+    python -m utils.cdc                        # seluruh feed sebagai JSON lines
+    python -m utils.cdc --cursor 202403000000004822 --ikuti
+
+atau lewat utils/server.py: GET /api/feed?cursor=<cursor>&n=<batas>.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from typing import Any, Dict, Iterator, List, Tuple
+
+from utils.atomic import akhir_baris
+from utils.journal import Journal, Perubahan
+
+SEGMEN = 10 ** 12  # posisi byte maksimal per segmen bulanan
+BATAS_FEED = 1000
+INTERVAL_IKUTI = 1.0  # detik
+
+
+def _bulan(path: str) -> int:
+    return int(os.path.basename(path)[len("journal-"):-len(".jsonl")])
+
+
+def _peristiwa(record: Dict[str, Any], seq: int) -> List[Dict[str, Any]]:
+    """Baris-baris feed dari satu record journal; seq naik per baris"""
+    hasil: List[Dict[str, Any]] = []
+    for tabel, perubahan in record.get("tabel", {}).items():
+        for op, id_, sebelum, sesudah in _baris(perubahan):
+            hasil.append({"seq": seq + len(hasil), "ts": record.get("ts"), "aksi": record.get("aksi"),
+                          "tabel": tabel, "op": op, "id": id_, "sebelum": sebelum, "sesudah": sesudah})
+    return hasil
+
+
+def _baris(perubahan: Perubahan) -> Iterator[Tuple[str, Any, Any, Any]]:
+    if "ganti" in perubahan:
+        yield "ganti", None, None, perubahan["ganti"]
+        return
+    sebelum = {row["id"]: row for row in perubahan.get("sebelum", [])}
+    tercatat = "sebelum" in perubahan
+    for row in perubahan.get("upsert", []):
+        lama = sebelum.get(row["id"])
+        yield ("update" if lama is not None else "insert" if tercatat else "upsert"), row["id"], lama, row
+    for id_ in perubahan.get("hapus", []):
+        yield "delete", id_, sebelum.get(id_), None
+
+
+def baca(journal: Journal, cursor: int = 0, batas: int = BATAS_FEED) -> Tuple[List[Dict[str, Any]], int]:
+    """
+    Baris feed dengan seq >= `cursor` (0 = dari awal journal); berhenti di akhir record
+    setelah sekitar `batas` baris
+
+    Returns:
+        (baris feed, cursor untuk panggilan berikutnya); cursor tetap jika belum ada
+        perubahan baru. Record yang sedang ditulis (belum diakhiri newline) ditunggu.
+    """
+    hasil: List[Dict[str, Any]] = []
+    segmen = journal.segmen()
+    for path in segmen:
+        bulan = _bulan(path)
+        if bulan < cursor // SEGMEN:
+            continue
+        with open(path, "rb") as f:
+            if bulan == cursor // SEGMEN and cursor % SEGMEN:
+                # Cursor bisa berupa seq di tengah record: mulai dari awal record itu
+                f.seek(max(akhir_baris(f, cursor % SEGMEN), 0))
+            posisi = f.tell()
+            for line in f:
+                if not line.endswith(b"\n") and path == segmen[-1]:
+                    return hasil, cursor
+                seq = bulan * SEGMEN + posisi
+                posisi += len(line)
+                mulai, cursor = cursor, bulan * SEGMEN + posisi
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    continue  # baris terpotong karena crash
+                hasil.extend(p for p in _peristiwa(record, seq) if p["seq"] >= mulai)
+                if len(hasil) >= batas:
+                    return hasil, cursor
+    return hasil, cursor
+
+
+def ujung(journal: Journal) -> int:
+    """Cursor di akhir journal saat ini (untuk konsumen yang baru membaca isi tabel utuh)"""
+    segmen = journal.segmen()
+    if not segmen:
+        return 0
+    with open(segmen[-1], "rb") as f:
+        akhir = akhir_baris(f, f.seek(0, os.SEEK_END))
+    return _bulan(segmen[-1]) * SEGMEN + max(akhir, 0)
+
+
+def ikuti(journal: Journal, cursor: int = 0, interval: float = INTERVAL_IKUTI) -> Iterator[Dict[str, Any]]:
+    """Seperti `tail -f`: baris feed sejak `cursor`, lalu menunggu perubahan berikutnya"""
+    while True:
+        hasil, cursor = baca(journal, cursor)
+        yield from hasil
+        if not hasil:
+            time.sleep(interval)
+
+
+if __name__ == "__main__":
+    from utils.repository import load_variabel
+
+    parser = argparse.ArgumentParser(description="Change feed (JSON lines) dari journal perpustakaan")
+    parser.add_argument("--variabel", default="variabel.txt")
+    parser.add_argument("--cursor", type=int, default=0, help="cursor dari pembacaan sebelumnya (seq terakhir + 1)")
+    parser.add_argument("--ikuti", action="store_true", help="terus menunggu perubahan baru")
+    args = parser.parse_args()
+
+    journal = Journal.from_variabel(load_variabel(args.variabel))
+    try:
+        if args.ikuti:
+            for baris in ikuti(journal, args.cursor):
+                print(json.dumps(baris, ensure_ascii=False), flush=True)
+        else:
+            while True:
+                hasil, cursor_baru = baca(journal, args.cursor)
+                for baris in hasil:
+                    print(json.dumps(baris, ensure_ascii=False))
+                if cursor_baru == args.cursor:
+                    break
+                args.cursor = cursor_baru
+            print(f"cursor {args.cursor}", file=sys.stderr)
+    except KeyboardInterrupt:
+        pass
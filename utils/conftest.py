@@ -0,0 +1,19 @@
+import os
+
+import pytest
+
+TABEL_CSV = ("buku", "anggota", "peminjaman", "log_hapus")
+
+
+@pytest.fixture
+def db(tmp_path):
+    """Folder database sementara"""
+    return str(tmp_path / "db")
+
+
+@pytest.fixture
+def paths(db):
+    """Lokasi tabel di `db`, susunannya sama dengan paths_from_variabel; file baru dibuat saat ditulis"""
+    paths = {tabel: os.path.join(db, f"{tabel}.csv") for tabel in TABEL_CSV}
+    paths["kategori"] = os.path.join(db, "kategori.json")
+    return paths
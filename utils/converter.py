@@ -1,9 +1,27 @@
 import json
 import csv
+import io
 import os
-from typing import List, Dict, Tuple, Any
+from typing import List, Dict, Tuple, Any, Iterator, Optional
 
+from utils.atomic import atomic_open, ukuran_tulis
+from utils.metrics import add_bytes, file_size, timed
+from utils.schema import compile_parser
 
+
+def union_fieldnames(data: List[Dict[str, Any]]) -> List[str]:
+    """Gabungan kolom semua baris sesuai urutan kemunculan"""
+    fieldnames: List[str] = []
+    seen = set()
+    for row in data:
+        for key in row:
+            if key not in seen:
+                seen.add(key)
+                fieldnames.append(key)
+    return fieldnames
+
+
+@timed("converter.json_to_csv")
 def json_to_csv(json_file: str, csv_file: str) -> Tuple[bool, str]:
     """
     Konversi file JSON ke CSV
@@ -25,22 +43,23 @@ def json_to_csv(json_file: str, csv_file: str) -> Tuple[bool, str]:
         # Handle empty data - create empty CSV with headers if data is empty
         if not data or len(data) == 0:
             os.makedirs(os.path.dirname(csv_file) if os.path.dirname(csv_file) else '.', exist_ok=True)
-            with open(csv_file, 'w', newline='', encoding='utf-8') as f:
+            with atomic_open(csv_file, 'w', newline='') as f:
                 writer = csv.writer(f)
                 writer.writerow([])  # Write empty header
             return True, f"Berhasil convert ke {csv_file} (file kosong)"
         
-        # Ambil keys dari dict pertama
-        fieldnames = list(data[0].keys())
+        # Gabungan kolom semua baris, bukan hanya dict pertama
+        fieldnames = union_fieldnames(data)
         
         # Buat CSV
         os.makedirs(os.path.dirname(csv_file) if os.path.dirname(csv_file) else '.', exist_ok=True)
         
-        with open(csv_file, 'w', newline='', encoding='utf-8') as f:
+        with atomic_open(csv_file, 'w', newline='') as f:
             writer = csv.DictWriter(f, fieldnames=fieldnames)
             writer.writeheader()
             writer.writerows(data)
         
+        add_bytes(read=file_size(json_file), written=ukuran_tulis(csv_file))
         return True, f"Berhasil convert ke {csv_file}"
     
     except json.JSONDecodeError:
@@ -49,6 +68,7 @@ def json_to_csv(json_file: str, csv_file: str) -> Tuple[bool, str]:
         return False, f"Error: {str(e)}"
 
 
+@timed("converter.csv_to_json")
 def csv_to_json(csv_file: str, json_file: str) -> Tuple[bool, str]:
     """
     Konversi file CSV ke JSON
@@ -64,79 +84,56 @@ def csv_to_json(csv_file: str, json_file: str) -> Tuple[bool, str]:
         if not os.path.exists(csv_file):
             return False, f"File {csv_file} tidak ditemukan!"
         
-        # Define numeric columns
-        numeric_columns = {'id', 'stok', 'tahun_terbit', 'tahun', 'nis'}
-        
         data: List[Dict[str, Any]] = []
-        with open(csv_file, 'r', encoding='utf-8') as f:
-            reader = csv.DictReader(f)
-            for row in reader:
-                # Convert known numeric columns
-                row_cleaned: Dict[str, Any] = {}
-                if row:
-                    for key, value in row.items():
-                        key_str: str = str(key) if key else ""
-                        value_str: str = str(value) if value else ""
-                        
-                        if key_str in numeric_columns:
-                            try:
-                                row_cleaned[key_str] = int(value_str)
-                            except (ValueError, TypeError):
-                                row_cleaned[key_str] = value_str
-                        else:
-                            row_cleaned[key_str] = value_str
-                    data.append(row_cleaned)
+        with open(csv_file, 'r', encoding='utf-8', newline='') as f:
+            reader = csv.reader(f)
+            header = next(reader, None)
+            if header:
+                # Tanggal tetap string karena hasilnya ditulis ke JSON
+                parse_row = compile_parser(None, header, parse_dates=False)
+                data = [parse_row(values) for values in reader if values]
         
         os.makedirs(os.path.dirname(json_file) if os.path.dirname(json_file) else '.', exist_ok=True)
         
-        with open(json_file, 'w', encoding='utf-8') as f:
+        with atomic_open(json_file, 'w') as f:
             json.dump(data, f, indent=4, ensure_ascii=False)
         
+        add_bytes(read=file_size(csv_file), written=ukuran_tulis(json_file))
         return True, f"Berhasil convert ke {json_file}"
     
     except Exception as e:
         return False, f"Error: {str(e)}"
 
 
-def load_csv(file: str) -> List[Dict[str, Any]]:
-    """Load data dari file CSV with smart type conversion"""
+@timed("converter.load_csv")
+def load_csv(file: str, tabel: Optional[str] = None) -> List[Dict[str, Any]]:
+    """
+    Load data dari file CSV dengan tipe kolom dari utils.schema
+
+    Args:
+        file (str): Path file CSV
+        tabel (str): Nama tabel di utils.schema.SCHEMA; None memakai SCHEMA_UMUM
+            (id, stok, tahun_terbit, tahun sebagai int)
+    """
     try:
         if not os.path.exists(file):
             return []
         
-        # Define numeric columns
-        numeric_columns = {'id', 'stok', 'tahun_terbit', 'tahun', 'nis'}
-        
-        data: List[Dict[str, Any]] = []
-        with open(file, 'r', encoding='utf-8') as f:
-            reader = csv.DictReader(f)
-            if reader is None:
+        add_bytes(read=file_size(file))
+        with open(file, 'r', encoding='utf-8', newline='') as f:
+            reader = csv.reader(f)
+            header = next(reader, None)
+            if not header:
                 return []
-            for row in reader:
-                # Smart type conversion: only convert known numeric columns
-                row_cleaned: Dict[str, Any] = {}
-                if row:
-                    for key, value in row.items():
-                        key_str: str = str(key) if key else ""
-                        value_str: str = str(value) if value else ""
-                        
-                        # Only try to convert if in numeric columns list
-                        if key_str in numeric_columns:
-                            try:
-                                row_cleaned[key_str] = int(value_str)
-                            except (ValueError, TypeError):
-                                # Keep as string if conversion fails
-                                row_cleaned[key_str] = value_str
-                        else:
-                            # Keep all other columns as string
-                            row_cleaned[key_str] = value_str
-                    data.append(row_cleaned)
-        return data
+            # Parser kolom dikompilasi sekali per header, bukan dicek per sel
+            parse_row = compile_parser(tabel, header)
+            return [parse_row(values) for values in reader if values]
     except Exception as e:
         print(f"Error loading CSV: {e}")
         return []
 
 
+@timed("converter.save_csv")
 def save_csv(file: str, data: List[Dict[str, Any]]) -> bool:
     """Save data ke file CSV - handle empty data gracefully"""
     try:
@@ -145,22 +142,93 @@ def save_csv(file: str, data: List[Dict[str, Any]]) -> bool:
         
         # Handle empty data - create empty CSV with no rows
         if not data or len(data) == 0:
-            with open(file, 'w', newline='', encoding='utf-8') as f:
+            with atomic_open(file, 'w', newline='') as f:
                 writer = csv.writer(f)
                 writer.writerow([])  # Write empty header
             return True
         
-        fieldnames: List[str] = list(data[0].keys())
-        with open(file, 'w', newline='', encoding='utf-8') as f:
+        # Gabungan kolom semua baris, supaya baris dengan kolom tambahan tidak gagal ditulis
+        fieldnames = union_fieldnames(data)
+        with atomic_open(file, 'w', newline='') as f:
             writer = csv.DictWriter(f, fieldnames=fieldnames)
             writer.writeheader()
             writer.writerows(data)
+        add_bytes(written=ukuran_tulis(file))
         return True
     except Exception as e:
         print(f"Error saving CSV: {e}")
         return False
 
 
+def header_csv(file: str) -> List[str]:
+    """Nama kolom di baris pertama file CSV, [] jika file tidak ada atau kosong"""
+    try:
+        with open(file, 'r', encoding='utf-8', newline='') as f:
+            return next(csv.reader(f), [])
+    except OSError:
+        return []
+
+
+def baris_csv(fieldnames: List[str], data: List[Dict[str, Any]]) -> str:
+    """Baris CSV (tanpa header) untuk ditambahkan ke file yang header-nya `fieldnames`"""
+    output = io.StringIO()
+    csv.DictWriter(output, fieldnames=fieldnames).writerows(data)
+    return output.getvalue()
+
+
+BLOK_MUNDUR = 64 * 1024
+
+
+def load_csv_mundur(file: str, tabel: Optional[str] = None) -> Iterator[Dict[str, Any]]:
+    """
+    Baris CSV dari yang terakhir ke yang pertama, dibaca per blok dari akhir file
+
+    Hanya bagian yang dilewati yang dibaca, jadi halaman terbaru log yang besar tidak
+    perlu memuat seluruh file. Field ber-quote yang berisi newline tetap utuh: potongan
+    baris digabung sampai jumlah tanda kutipnya genap. Ekor tanpa newline (append yang
+    terputus) dilewati.
+    """
+    header = header_csv(file)
+    if not header:
+        return
+    parse_row = compile_parser(tabel, header)
+
+    def parse(record: bytes) -> Optional[Dict[str, Any]]:
+        values = next(csv.reader(io.StringIO(record.decode("utf-8"), newline="")), None)
+        return parse_row(values) if values else None
+
+    with open(file, "rb") as f:
+        f.readline()
+        awal = f.tell()
+        pos = f.seek(0, os.SEEK_END)
+        f.seek(max(pos - 1, 0))
+        ekor = pos > awal and f.read(1) != b"\n"
+        sisa = b""
+        tertunda: Optional[bytes] = None  # record yang belum lengkap (quote belum tertutup)
+        while pos > awal:
+            mulai = max(awal, pos - BLOK_MUNDUR)
+            f.seek(mulai)
+            lines = (f.read(pos - mulai) + sisa).split(b"\n")
+            pos = mulai
+            # Baris pertama blok bisa terpotong, kecuali blok sudah sampai awal data
+            sisa = lines.pop(0) if pos > awal else b""
+            if ekor and lines:
+                lines[-1], ekor = b"", False
+            for line in reversed(lines):
+                record = line if tertunda is None else line + b"\n" + tertunda
+                if record.count(b'"') % 2:
+                    tertunda = record
+                    continue
+                tertunda = None
+                row = parse(record)
+                if row is not None:
+                    yield row
+        if tertunda is not None:
+            row = parse(tertunda)
+            if row is not None:
+                yield row
+
+
 if __name__ == "__main__":
     # Test
     print("=== Test Converter ===")
@@ -13,6 +13,17 @@ def _get_numeric_columns():
     """Cache numeric columns definition"""
     return NUMERIC_COLUMNS
 
+def _union_fieldnames(data: List[Dict[str, Any]]) -> List[str]:
+    """Gabungan kolom semua baris sesuai urutan kemunculan"""
+    fieldnames: List[str] = []
+    seen = set()
+    for row in data:
+        for key in row:
+            if key not in seen:
+                seen.add(key)
+                fieldnames.append(key)
+    return fieldnames
+
 def json_to_csv(json_file: str, csv_file: str) -> Tuple[bool, str]:
     """
     Konversi file JSON ke CSV dengan optimasi buffer
@@ -39,8 +50,8 @@ def json_to_csv(json_file: str, csv_file: str) -> Tuple[bool, str]:
                 writer.writerow([])
             return True, f"Berhasil convert ke {csv_file} (file kosong)"
         
-        # Ambil keys dari dict pertama
-        fieldnames = list(data[0].keys())
+        # Gabungan kolom semua baris, bukan hanya dict pertama
+        fieldnames = _union_fieldnames(data)
         
         # Buat CSV dengan buffer
         os.makedirs(os.path.dirname(csv_file) if os.path.dirname(csv_file) else '.', exist_ok=True)
@@ -153,7 +164,7 @@ def save_csv(file: str, data: List[Dict[str, Any]]) -> bool:
                 writer.writerow([])
             return True
         
-        fieldnames: List[str] = list(data[0].keys())
+        fieldnames = _union_fieldnames(data)
         with open(file, 'w', newline='', encoding='utf-8', buffering=8192) as f:
             writer = csv.DictWriter(f, fieldnames=fieldnames)
             writer.writeheader()
@@ -0,0 +1,414 @@
+"""
+Penyimpanan cover buku yang dialamatkan dengan isi (content-addressed).
+
+Cover disimpan sekali per isi, dengan nama = hash blake2b file WebP-nya:
+
+    database/covers/ab/ab12cd....webp     (kolom "cover" buku: covers/ab/ab12cd....webp)
+
+Dua puluh eksemplar buku yang sama dengan gambar yang sama memakai satu file.
+Jumlah referensi dihitung dari kolom "cover" tabel buku, jadi tidak ada berkas
+refcount terpisah yang bisa tidak sinkron. Cover dilepas saat buku dihapus atau
+cover-nya diganti; gc() menyapu file yang tidak dirujuk lagi (misal sisa upload
+yang gagal disimpan ke tabel).
+
+    python -m utils.covers migrasi   # pindahkan covers/cover_<id>.webp lama ke store
+    python -m utils.covers gc
+    python -m utils.covers info
+
+Upload di-encode oleh encode_cover() menurut KebijakanEncode: ukuran dan dimensi
+dicek dari header dulu, frame pertama untuk GIF/APNG animasi, JPEG di-decode
+langsung di skala kecil, diperkecil ke batas dimensi, lalu quality/method dicari
+supaya hasilnya di bawah target byte tanpa melewati anggaran waktu encode. Upload
+WebP yang sudah cukup kecil disimpan apa adanya.
+"""
+import argparse
+import hashlib
+import io
+import os
+import time
+from collections import Counter
+from typing import IO, Any, Dict, Iterable, List, NamedTuple, Tuple
+
+from utils.atomic import after_commit, write_bytes
+from utils.lazy import lazy_import
+from utils.metrics import add_bytes, timed
+from utils.profiler import ukur_rss
+from utils.repository import Repository, load_variabel
+
+Image = lazy_import("PIL.Image")  # hanya dibutuhkan untuk encode_cover() dan thumbnail()
+
+EXT = ".webp"
+FOLDER = "covers"
+THUMB_FOLDER = "thumb"       # covers/thumb/<hash>_<lebar>.webp, turunan yang bisa dibuat ulang
+THUMB_LEBAR = 150           # lebar cover di halaman daftar buku
+THUMB_QUALITY = 70
+GC_TENGGANG = 600  # detik; file lebih baru dari ini mungkin belum sempat dicatat di tabel buku
+
+
+class KebijakanEncode(NamedTuple):
+    target_bytes: int = 40 * 1024
+    batas_ms: float = 400.0            # anggaran waktu encode per upload
+    max_ukuran: Tuple[int, int] = (600, 800)  # cover ditampilkan 150px; cukup untuk layar 4x
+    quality_max: int = 85
+    quality_min: int = 40
+    max_bytes_upload: int = 25 * 1024 * 1024
+    max_piksel: int = 24_000_000       # piksel yang di-decode (sesudah draft JPEG); ~100 MB RGBA
+
+    @classmethod
+    def from_variabel(cls, var: Dict[str, str]) -> "KebijakanEncode":
+        def angka(key: str, default: float) -> float:
+            try:
+                return float(var.get(key, default))
+            except ValueError:
+                return default
+        dasar = cls()
+        return cls(target_bytes=int(angka("COVER_TARGET_KB", dasar.target_bytes / 1024) * 1024),
+                   batas_ms=angka("COVER_BATAS_MS", dasar.batas_ms),
+                   max_bytes_upload=int(angka("COVER_MAX_MB", dasar.max_bytes_upload / 1024 ** 2) * 1024 ** 2),
+                   max_piksel=int(angka("COVER_MAX_MEGAPIKSEL", dasar.max_piksel / 1e6) * 1e6))
+
+
+def _buka_upload(upload: Any) -> Tuple[IO[bytes], int]:
+    """File object dan ukuran upload tanpa menyalin isinya"""
+    if isinstance(upload, bytes):
+        return io.BytesIO(upload), len(upload)
+    size = getattr(upload, "size", None)  # UploadedFile Streamlit
+    if size is None:
+        upload.seek(0, os.SEEK_END)
+        size = upload.tell()
+    upload.seek(0)
+    return upload, int(size)
+
+
+def _decode(img: Any, kebijakan: KebijakanEncode) -> Any:
+    """
+    Decode seperlunya: frame pertama, JPEG di skala DCT terkecil yang masih cukup,
+    batas piksel dicek dari header sebelum decode, lalu diperkecil dan diratakan ke RGB
+    """
+    if getattr(img, "is_animated", False):
+        img.seek(0)
+    if img.format == "JPEG":
+        img.draft("RGB", kebijakan.max_ukuran)  # ukuran img ikut berubah ke skala decode
+    if img.width * img.height > kebijakan.max_piksel:
+        raise ValueError(f"Gambar terlalu besar ({img.width}x{img.height} piksel)")
+    if img.mode in ("P", "PA", "1"):
+        # Palet tidak bisa di-resample selain nearest; ubah dulu (ukurannya masih asli)
+        img = img.convert("RGBA" if img.mode == "PA" or "transparency" in img.info else "RGB")
+    # reducing_gap: perkecil dulu dengan faktor bulat (murah) sebelum resampling LANCZOS
+    img.thumbnail(kebijakan.max_ukuran, Image.Resampling.LANCZOS, reducing_gap=3.0)
+    if img.mode in ("RGBA", "LA"):
+        rgba = img.convert("RGBA")
+        rgb = Image.new("RGB", rgba.size, (255, 255, 255))
+        rgb.paste(rgba, mask=rgba.split()[-1])
+        return rgb
+    return img if img.mode == "RGB" else img.convert("RGB")
+
+
+def _webp(img: Any, quality: int, method: int) -> bytes:
+    output = io.BytesIO()
+    img.save(output, "WEBP", quality=quality, method=method)
+    return output.getvalue()
+
+
+def _cari_encode(img: Any, kebijakan: KebijakanEncode, mulai: float) -> Tuple[bytes, int, int, int]:
+    """(data, quality, method, jumlah percobaan); lihat encode_cover()"""
+    def sisa_ms() -> float:
+        return kebijakan.batas_ms - (time.perf_counter() - mulai) * 1000
+
+    # Percobaan pertama di quality tertinggi sekaligus mengukur biaya satu encode
+    t = time.perf_counter()
+    data = _webp(img, kebijakan.quality_max, 4)
+    biaya_ms = (time.perf_counter() - t) * 1000
+    percobaan = 1
+    quality, method = kebijakan.quality_max, 4
+    if len(data) > kebijakan.target_bytes:
+        lo, hi = kebijakan.quality_min, kebijakan.quality_max - 1
+        terkecil = (data, quality)
+        while lo <= hi and sisa_ms() > biaya_ms:
+            q = (lo + hi) // 2
+            hasil = _webp(img, q, 4)
+            percobaan += 1
+            if len(hasil) <= kebijakan.target_bytes:
+                data, quality = hasil, q
+                lo = q + 1
+            else:
+                if len(hasil) < len(terkecil[0]):
+                    terkecil = (hasil, q)
+                hi = q - 1
+        if len(data) > kebijakan.target_bytes and terkecil[1] == kebijakan.quality_max:
+            # Anggaran habis sebelum pencarian dimulai: satu encode terakhir di quality terendah
+            terkecil = (_webp(img, kebijakan.quality_min, 4), kebijakan.quality_min)
+            percobaan += 1
+        if len(data) > kebijakan.target_bytes:
+            data, quality = terkecil  # target tidak tercapai dalam anggaran: pakai yang terkecil
+
+    if sisa_ms() > biaya_ms * 3:  # method 6 kira-kira 2-3x lebih lambat dari method 4
+        hasil = _webp(img, quality, 6)
+        percobaan += 1
+        if len(hasil) < len(data):
+            data, method = hasil, 6
+    return data, quality, method, percobaan
+
+
+@timed("image.encode_cover")
+def encode_cover(upload: Any, kebijakan: KebijakanEncode = KebijakanEncode()) -> Tuple[bytes, Dict[str, Any]]:
+    """
+    Encode upload cover ke WebP menurut kebijakan ukuran/latensi/memori
+
+    Ukuran file dan dimensi dicek dari header sebelum ada piksel yang di-decode,
+    jadi bom dekompresi ditolak tanpa memakan memori. Quality dicari dengan biner
+    (method 4) selama anggaran waktu masih cukup untuk satu percobaan lagi; jika
+    anggaran habis sebelum pencarian dimulai, quality terendah dicoba sekali. Jika
+    waktu tersisa, hasil terbaik di-encode ulang dengan method 6 (lebih lambat,
+    biasanya lebih kecil) dan dipakai jika memang lebih kecil.
+
+    Args:
+        upload: File upload Streamlit, file object, atau bytes
+        kebijakan: Target byte, anggaran waktu, batas dimensi dan batas upload
+
+    Returns:
+        tuple: (isi WebP, laporan: ukuran asal/akhir, dimensi, quality, method,
+            jumlah percobaan, durasi encode, puncak RSS)
+
+    Raises:
+        ValueError: Upload melebihi max_bytes_upload atau max_piksel
+    """
+    mulai = time.perf_counter()
+    f, size = _buka_upload(upload)
+    if size > kebijakan.max_bytes_upload:
+        raise ValueError(f"File terlalu besar ({size / 1024 ** 2:.1f} MB)")
+    add_bytes(read=size)
+    with ukur_rss() as rss:
+        try:
+            img = Image.open(f)  # hanya membaca header
+        except Image.DecompressionBombError as e:
+            raise ValueError(f"Gambar terlalu besar: {e}") from e
+        laporan: Dict[str, Any] = {"format_asal": img.format, "bytes_asal": size, "dimensi_asal": img.size,
+                                   "animasi": bool(getattr(img, "is_animated", False))}
+
+        if (img.format == "WEBP" and not laporan["animasi"] and size <= kebijakan.target_bytes
+                and img.width <= kebijakan.max_ukuran[0] and img.height <= kebijakan.max_ukuran[1]):
+            f.seek(0)
+            data = f.read()
+            laporan.update({"encode_ulang": False, "dimensi": img.size, "quality": None, "method": None,
+                            "percobaan": 0})
+        else:
+            img = _decode(img, kebijakan)
+            data, quality, method, percobaan = _cari_encode(img, kebijakan, mulai)
+            laporan.update({"encode_ulang": True, "dimensi": img.size, "quality": quality, "method": method,
+                            "percobaan": percobaan})
+            add_bytes(written=len(data))
+    laporan.update({"bytes": len(data), "encode_ms": round((time.perf_counter() - mulai) * 1000, 1),
+                    "rss_puncak_mb": rss["puncak_mb"], "rss_tambahan_mb": rss["tambahan_mb"]})
+    return data, laporan
+
+
+def _digest(data: bytes) -> str:
+    return hashlib.blake2b(data, digest_size=16).hexdigest()
+
+
+def referensi(buku: Iterable[Dict[str, Any]]) -> Counter:
+    """Jumlah buku yang memakai tiap path cover"""
+    return Counter(str(b.get("cover") or "") for b in buku if b.get("cover"))
+
+
+class CoverStore:
+    """Folder cover content-addressed di bawah FOLDER_DB; lihat docstring modul"""
+
+    def __init__(self, folder_db: str) -> None:
+        self.folder_db = folder_db
+        self.folder = os.path.join(folder_db, FOLDER)
+
+    @classmethod
+    def from_variabel(cls, var: Dict[str, str]) -> "CoverStore":
+        return cls(var.get("FOLDER_DB", "database"))
+
+    def path(self, cover: str) -> str:
+        """Path di disk untuk nilai kolom "cover" (relatif terhadap FOLDER_DB)"""
+        return os.path.join(self.folder_db, cover)
+
+    def simpan(self, data: bytes) -> str:
+        """
+        Simpan isi cover (sudah di-encode) jika belum ada
+
+        Returns:
+            str: Nilai untuk kolom "cover", misal "covers/ab/ab12....webp"
+        """
+        digest = _digest(data)
+        cover = "/".join((FOLDER, digest[:2], digest + EXT))
+        path = self.path(cover)
+        if os.path.exists(path):
+            # Sentuh supaya gc() yang berjalan bersamaan tidak menghapusnya sebelum dirujuk
+            os.utime(path)
+        else:
+            write_bytes(path, data)
+        return cover
+
+    def milik_store(self, cover: str) -> bool:
+        """True jika `cover` adalah path content-addressed (bukan cover lama per buku)"""
+        parts = cover.split("/")
+        return len(parts) == 3 and parts[0] == FOLDER and parts[2].endswith(EXT) and parts[2].startswith(parts[1])
+
+    def _hapus(self, cover: str, batas: float = 0) -> int:
+        path = self.path(cover)
+        try:
+            if batas and os.path.getmtime(path) > batas:
+                return 0  # baru saja diunggah ulang, mungkin sedang akan dirujuk
+            size = os.path.getsize(path)
+            os.remove(path)
+            return size
+        except OSError:
+            return 0
+
+    def lepas(self, cover: str, buku: List[Dict[str, Any]]) -> None:
+        """
+        Hapus file cover jika tidak ada lagi buku di `buku` yang memakainya (setelah commit)
+
+        Tetap memakai masa tenggang: simpan() untuk gambar yang sama hanya menyentuh file
+        yang sudah ada, jadi unggahan yang belum tercatat di tabel buku tidak ikut terhapus.
+        """
+        if cover and self.milik_store(cover) and referensi(buku)[cover] == 0:
+            def hapus() -> None:
+                self._hapus(cover, time.time() - GC_TENGGANG)
+            after_commit(hapus)
+
+    def _kunci_thumb(self, cover: str) -> str:
+        """Nama dasar thumbnail: hash cover di store, atau hash path+ukuran+mtime untuk cover lama"""
+        if self.milik_store(cover):
+            return cover.split("/")[2][:-len(EXT)]
+        st = os.stat(self.path(cover))
+        return _digest(f"{cover}|{st.st_size}|{st.st_mtime_ns}".encode("utf-8"))
+
+    def thumbnail(self, cover: str, lebar: int = THUMB_LEBAR) -> bytes:
+        """
+        Thumbnail WebP selebar `lebar` px untuk halaman daftar; dibuat sekali lalu disimpan
+
+        Karena nama cover = hash isinya, thumbnail tidak pernah basi dan tidak perlu
+        divalidasi. Cover di luar store (belum dimigrasi) dikenali dari path, ukuran,
+        dan mtime-nya. Decode dibatasi seperti encode_cover() (draft JPEG, batas piksel).
+
+        Raises:
+            ValueError: Gambar melebihi batas piksel
+        """
+        path = os.path.join(self.folder, THUMB_FOLDER, f"{self._kunci_thumb(cover)}_{lebar}{EXT}")
+        try:
+            with open(path, "rb") as f:
+                return f.read()
+        except FileNotFoundError:
+            pass
+        try:
+            with Image.open(self.path(cover)) as img:
+                kecil = _decode(img, KebijakanEncode(max_ukuran=(lebar, lebar * 2)))
+                data = _webp(kecil, THUMB_QUALITY, 4)
+        except Image.DecompressionBombError as e:
+            raise ValueError(f"Gambar terlalu besar: {e}") from e
+        write_bytes(path, data)
+        return data
+
+    def gc(self, buku: List[Dict[str, Any]], tenggang: float = GC_TENGGANG) -> Dict[str, int]:
+        """
+        Hapus file cover yang tidak dirujuk buku mana pun
+
+        Returns:
+            dict: jumlah file diperiksa, dihapus, dan byte dibebaskan
+        """
+        dipakai = referensi(buku)
+        batas = time.time() - tenggang
+        diperiksa = dihapus = freed = 0
+        for cover in self.semua():
+            diperiksa += 1
+            if dipakai[cover]:
+                continue
+            size = self._hapus(cover, batas)
+            if size:
+                freed += size
+                dihapus += 1
+        # Thumbnail yang cover aslinya sudah tidak ada
+        ada = {cover.split("/")[2][:-len(EXT)] for cover in self.semua()}
+        for cover in dipakai:
+            if not self.milik_store(cover):
+                try:
+                    ada.add(self._kunci_thumb(cover))
+                except OSError:
+                    pass
+        folder = os.path.join(self.folder, THUMB_FOLDER)
+        for name in os.listdir(folder) if os.path.isdir(folder) else []:
+            if name.endswith(EXT) and name.rsplit("_", 1)[0] not in ada:
+                freed += self._hapus("/".join((FOLDER, THUMB_FOLDER, name)))
+        return {"diperiksa": diperiksa, "dihapus": dihapus, "bytes_dibebaskan": freed}
+
+    def semua(self) -> List[str]:
+        """Semua cover di store (nilai kolom "cover")"""
+        hasil: List[str] = []
+        if not os.path.isdir(self.folder):
+            return hasil
+        for sub in sorted(os.listdir(self.folder)):
+            folder = os.path.join(self.folder, sub)
+            if len(sub) != 2 or not os.path.isdir(folder):
+                continue
+            hasil.extend("/".join((FOLDER, sub, name)) for name in sorted(os.listdir(folder))
+                         if name.endswith(EXT) and self.milik_store("/".join((FOLDER, sub, name))))
+        return hasil
+
+    def migrasi(self, store: Repository) -> Dict[str, int]:
+        """
+        Pindahkan cover lama (covers/cover_<id>.webp, satu file per buku) ke store
+
+        Tabel buku diperbarui dulu; file lama baru dihapus setelah tabelnya di-commit,
+        jadi crash di tengah migrasi tidak pernah meninggalkan buku tanpa cover.
+
+        Returns:
+            dict: file lama dipindahkan, buku diperbarui, file unik setelah dedup
+        """
+        lama: Dict[str, str] = {}  # path lama (nilai kolom) -> path baru
+        if os.path.isdir(self.folder):
+            for name in sorted(os.listdir(self.folder)):
+                path = os.path.join(self.folder, name)
+                if not name.endswith(EXT) or not os.path.isfile(path):
+                    continue
+                with open(path, "rb") as f:
+                    lama["/".join((FOLDER, name))] = self.simpan(f.read())
+        if not lama:
+            return {"dipindahkan": 0, "buku_diperbarui": 0, "file_unik": 0}
+
+        buku = store.load("buku")
+        diubah = 0
+        for b in buku:
+            cover = str(b.get("cover") or "").replace("\\", "/")
+            if cover in lama:
+                b["cover"] = lama[cover]
+                diubah += 1
+        with store.transaksi():
+            if diubah:
+                store.save("buku", buku)
+            for cover in lama:
+                def hapus(cover: str = cover) -> None:
+                    self._hapus(cover)
+                after_commit(hapus)
+        return {"dipindahkan": len(lama), "buku_diperbarui": diubah, "file_unik": len(set(lama.values()))}
+
+
+def info(covers: CoverStore, buku: List[Dict[str, Any]]) -> Dict[str, Any]:
+    semua = covers.semua()
+    dipakai = referensi(buku)
+    total = sum(os.path.getsize(covers.path(c)) for c in semua)
+    return {"file": len(semua), "kb": round(total / 1024, 1), "buku_dengan_cover": sum(dipakai.values()),
+            "tidak_dirujuk": sum(1 for c in semua if not dipakai[c])}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Store cover buku")
+    parser.add_argument("--variabel", default="variabel.txt")
+    parser.add_argument("perintah", choices=["migrasi", "gc", "info"])
+    parser.add_argument("--tenggang", type=float, default=GC_TENGGANG, help="Detik (untuk gc)")
+    args = parser.parse_args()
+
+    var = load_variabel(args.variabel)
+    covers = CoverStore.from_variabel(var)
+    repo = Repository.from_variabel(args.variabel)
+    if args.perintah == "migrasi":
+        print(covers.migrasi(repo))
+    elif args.perintah == "gc":
+        print(covers.gc(repo.load("buku"), args.tenggang))
+    else:
+        print(info(covers, repo.load("buku")))
@@ -0,0 +1,115 @@
+"""
+Join saat baca untuk tabel peminjaman dan buku.
+
+Baris peminjaman hanya menyimpan id_buku dan id_anggota; judul buku dan nama siswa
+diisi saat dibaca dari tabel buku dan anggota. Mengganti judul atau membetulkan nama
+cukup menulis tabel asalnya, riwayat peminjaman tidak ikut ditulis ulang, dan setiap
+baris peminjaman tidak lagi membawa salinan teksnya. Dengan cara yang sama buku hanya
+menyimpan id_kategori dan nama kategorinya diisi dari kategori.json (utils/kategori.py).
+
+Peta id -> judul, id -> nama, dan id -> nama kategori dibangun sekali per versi tabel
+sumbernya. Join dikerjakan per kolom (id seluruh daftar dipetakan sekaligus, lalu
+disusun kembali menjadi baris), dan hasil untuk seluruh tabel di-cache per versi
+tabel-tabel yang terlibat, jadi tampilan tabel dan ekspor tidak mengulang join selama
+data tidak berubah.
+
+Judul buku yang sudah dihapus diambil dari log_hapus. Baris lama yang masih menyimpan
+judul/nama sendiri memakai nilai itu jika id-nya tidak ditemukan; migrasi_peminjaman()
+membuang salinan yang sudah bisa diisi dari tabel sumber.
+"""
+import threading
+from typing import Any, Dict, List, Tuple
+
+# tabel -> kolom hasil -> (kolom id di tabel itu, sumber (tabel, kolom kunci, kolom nilai) urut prioritas)
+KOLOM_GABUNG: Dict[str, Dict[str, Tuple[str, Tuple[Tuple[str, str, str], ...]]]] = {
+    "peminjaman": {
+        "judul": ("id_buku", (("buku", "id", "judul"), ("log_hapus", "id_buku", "judul"))),
+        "nama": ("id_anggota", (("anggota", "id", "nama"),)),
+    },
+    "buku": {
+        "kategori": ("id_kategori", (("kategori", "id", "nama"),)),
+    },
+}
+TIDAK_DIKENAL = "-"
+
+
+def _tabel_sumber(tabel: str) -> Tuple[str, ...]:
+    return tuple(dict.fromkeys(t for _, sumber in KOLOM_GABUNG[tabel].values() for t, _, _ in sumber))
+
+
+def _versi(store: Any, tabel: str) -> Any:
+    version = getattr(store, "version", None)
+    return version(tabel) if version is not None else None
+
+
+class Gabungan:
+    """Cache peta id -> nilai dan hasil join per tabel; lihat docstring modul"""
+
+    def __init__(self) -> None:
+        self._peta: Dict[Tuple[str, str], Tuple[Any, Dict[Any, Any]]] = {}
+        self._daftar: Dict[str, Tuple[Any, List[Dict[str, Any]]]] = {}
+        self._lock = threading.RLock()
+
+    def peta(self, store: Any, tabel: str, kolom: str) -> Dict[Any, Any]:
+        """id -> nilai kolom gabungan (judul/nama/kategori), dibangun ulang jika tabel sumbernya berubah"""
+        _, sumber = KOLOM_GABUNG[tabel][kolom]
+        with self._lock:
+            versi = tuple(_versi(store, t) for t, _, _ in sumber)
+            cached = self._peta.get((tabel, kolom))
+            if cached is None or cached[0] != versi or None in versi:
+                peta: Dict[Any, Any] = {}
+                for t, kunci, nilai in reversed(sumber):  # sumber pertama menang
+                    peta.update((row.get(kunci), row.get(nilai)) for row in store.load(t))
+                cached = (versi, peta)
+                self._peta[(tabel, kolom)] = cached
+            return cached[1]
+
+    def _kolom(self, store: Any, tabel: str, kolom: str, rows: List[Dict[str, Any]]) -> List[Any]:
+        kolom_id, _ = KOLOM_GABUNG[tabel][kolom]
+        nilai = map(self.peta(store, tabel, kolom).get, [r.get(kolom_id) for r in rows])
+        return [n or r.get(kolom) or TIDAK_DIKENAL for n, r in zip(nilai, rows)]
+
+    def gabung(self, store: Any, tabel: str, rows: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Baris baru berisi kolom gabungan dari tabel sumber; `rows` tidak diubah"""
+        nama_kolom = tuple(KOLOM_GABUNG[tabel])
+        kolom = [self._kolom(store, tabel, k, rows) for k in nama_kolom]
+        return [dict(r, **dict(zip(nama_kolom, nilai))) for r, nilai in zip(rows, zip(*kolom))]
+
+    def daftar(self, store: Any, tabel: str) -> List[Dict[str, Any]]:
+        """Seluruh tabel yang sudah di-join (salinan per baris)"""
+        with self._lock:
+            versi = tuple(_versi(store, t) for t in (tabel,) + _tabel_sumber(tabel))
+            cached = self._daftar.get(tabel)
+            if cached is None or cached[0] != versi or None in versi:
+                cached = (versi, self.gabung(store, tabel, store.load(tabel)))
+                self._daftar[tabel] = cached
+            rows = cached[1]
+        return [dict(row) for row in rows]
+
+
+def migrasi_peminjaman(store: Any) -> int:
+    """
+    Buang salinan judul/nama dari baris peminjaman yang id-nya masih bisa di-join
+
+    Salinan dipertahankan hanya untuk buku/siswa yang tidak ditemukan di tabel sumber.
+    Tabel ditulis sekali, dan hanya jika ada yang dibuang.
+
+    Returns:
+        int: Jumlah baris yang diringkas
+    """
+    gabung = KOLOM_GABUNG["peminjaman"]
+    pinjam = store.load("peminjaman")
+    if not any(k in p for p in pinjam for k in gabung):
+        return 0
+    gabungan = Gabungan()
+    peta = {kolom: gabungan.peta(store, "peminjaman", kolom) for kolom in gabung}
+    jumlah = 0
+    for p in pinjam:
+        dibuang = [k for k, (kolom_id, _) in gabung.items()
+                   if k in p and (peta[k].get(p.get(kolom_id)) or not p[k])]
+        jumlah += any(p[k] for k in dibuang)  # sel kosong dari header CSV tidak dihitung
+        for k in dibuang:
+            del p[k]
+    if jumlah:
+        store.save("peminjaman", pinjam)
+    return jumlah
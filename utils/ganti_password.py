@@ -2,6 +2,8 @@ import hashlib
 import os
 from typing import Dict, Tuple
 
+from utils.atomic import atomic_open
+
 
 CONFIG_FILE = "config/config.txt"
 
@@ -22,8 +24,7 @@ def load_config() -> Dict[str, str]:
 
 def save_config(config: Dict[str, str]) -> None:
     """Menyimpan konfigurasi ke config.txt"""
-    os.makedirs(os.path.dirname(CONFIG_FILE), exist_ok=True)
-    with open(CONFIG_FILE, "w") as f:
+    with atomic_open(CONFIG_FILE, "w") as f:
         for key, value in config.items():
             f.write(f"{key}={value}\n")
 
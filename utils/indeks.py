@@ -0,0 +1,138 @@
+"""
+Indeks sekunder peminjaman per anggota, disimpan di database/indeks/peminjaman_anggota.json.
+
+    {"versi": [mtime_ns, size],            # versi file peminjaman saat indeks ditulis
+     "anggota": {"12": [3, 17, 40]},       # id peminjaman per anggota, urut tanggal pinjam
+     "aktif": {"12": [40]}}                # yang masih berstatus "dipinjam"
+
+Riwayat satu anggota dan jumlah pinjaman aktifnya (untuk batas peminjaman) dibaca
+tanpa memindai seluruh tabel peminjaman. Indeks diperbarui oleh Perpustakaan saat
+pinjam/kembalikan, setelah transaksinya di-commit. Jika file peminjaman diubah tanpa
+lewat indeks (proses lain, sinkronisasi JSON, crash sebelum indeks ditulis), versinya
+tidak cocok lagi dan indeks dibangun ulang sekali dari tabel.
+
+Saat pinjam/kembalikan beruntun (scan di meja sirkulasi), file indeks ditulis paling
+sering sekali per SIMPAN_JEDA detik; di antaranya indeks di memori tetap terbaru, dan
+proses lain yang membaca file yang tertinggal hanya membangun ulang dari tabel.
+"""
+import json
+import os
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from utils.atomic import after_commit, write_text
+
+Versi = Tuple[int, ...]
+
+SIMPAN_JEDA = 5.0  # detik
+
+
+class IndeksPeminjaman:
+    """Indeks id anggota -> id peminjaman; lihat docstring modul"""
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self.versi: Optional[Versi] = None
+        self.anggota: Dict[str, List[int]] = {}
+        self.aktif: Dict[str, List[int]] = {}
+        self._lock = threading.RLock()
+        self._disimpan = 0.0  # time.monotonic() penulisan file terakhir
+
+    @classmethod
+    def from_variabel(cls, var: Dict[str, str]) -> "IndeksPeminjaman":
+        folder_db = var.get("FOLDER_DB", "database")
+        return cls(os.path.join(folder_db, "indeks", "peminjaman_anggota.json"))
+
+    # ---- validasi ----
+    def _baca_file(self) -> None:
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            self.versi = tuple(data["versi"])  # type: ignore[assignment]
+            self.anggota = data["anggota"]
+            self.aktif = data["aktif"]
+        except (OSError, ValueError, KeyError, TypeError):
+            self.versi = None
+
+    def bangun(self, pinjam: List[Dict[str, Any]]) -> None:
+        """Bangun ulang dari seluruh tabel peminjaman"""
+        with self._lock:
+            anggota: Dict[str, List[int]] = {}
+            aktif: Dict[str, List[int]] = {}
+            for p in sorted(pinjam, key=lambda p: (str(p.get("tanggal_pinjam") or ""), _id(p["id"]))):
+                key = str(p.get("id_anggota"))
+                anggota.setdefault(key, []).append(p["id"])
+                if p.get("status") == "dipinjam":
+                    aktif.setdefault(key, []).append(p["id"])
+            self.anggota, self.aktif = anggota, aktif
+
+    def segarkan(self, store: Any) -> None:
+        """Pastikan indeks sesuai dengan file peminjaman saat ini"""
+        with self._lock:
+            versi = store.version("peminjaman")
+            if self.versi == versi:
+                return
+            self._baca_file()
+            if self.versi == versi:
+                return
+            self.bangun(store.load("peminjaman"))
+            self.versi = versi
+            self._simpan()
+
+    def _simpan(self) -> None:
+        self._disimpan = time.monotonic()
+        try:
+            write_text(self.path, json.dumps({"versi": list(self.versi or (0, 0)), "anggota": self.anggota,
+                                              "aktif": self.aktif}, ensure_ascii=False))
+        except Exception as e:
+            print(f"Error saving loan index: {e}")
+
+    # ---- baca ----
+    def riwayat(self, store: Any, id_anggota: Any) -> List[int]:
+        """Id peminjaman anggota, terlama dulu"""
+        with self._lock:
+            self.segarkan(store)
+            return list(self.anggota.get(str(id_anggota), []))
+
+    def jumlah_aktif(self, store: Any, id_anggota: Any) -> int:
+        with self._lock:
+            self.segarkan(store)
+            return len(self.aktif.get(str(id_anggota), []))
+
+    # ---- tulis ----
+    def catat(self, store: Any, peminjaman: Dict[str, Any]) -> None:
+        """
+        Perbarui indeks untuk satu baris peminjaman (baru atau berubah status)
+
+        Dipanggil setelah store.save("peminjaman", ...) di dalam transaksi yang sama;
+        indeks baru diubah setelah commit, jadi rollback tidak meninggalkan jejak.
+        Indeks harus sudah segar (segarkan()) sebelum tabel diubah; jika tidak, indeks
+        hanya ditandai usang dan dibangun ulang saat dibaca berikutnya.
+        """
+        segar = self.versi is not None and self.versi == store.version("peminjaman")
+
+        def terapkan() -> None:
+            with self._lock:
+                if not segar or self.versi is None:
+                    self.versi = None
+                    return
+                key = str(peminjaman.get("id_anggota"))
+                ids = self.anggota.setdefault(key, [])
+                if peminjaman["id"] not in ids:
+                    ids.append(peminjaman["id"])
+                aktif = self.aktif.setdefault(key, [])
+                if peminjaman.get("status") == "dipinjam":
+                    if peminjaman["id"] not in aktif:
+                        aktif.append(peminjaman["id"])
+                elif peminjaman["id"] in aktif:
+                    aktif.remove(peminjaman["id"])
+                self.versi = store.version("peminjaman")
+                if time.monotonic() - self._disimpan >= SIMPAN_JEDA:
+                    self._simpan()
+        after_commit(terapkan)
+
+
+def _id(value: Any) -> Tuple[int, Any]:
+    # Urutkan id numerik sebagai angka, sisanya (data lama) sebagai string
+    return (0, value) if isinstance(value, int) else (1, str(value))
@@ -0,0 +1,215 @@
+"""
+Log I/O terstruktur untuk setiap pemanggilan storage.
+
+Setiap load/save tabel (dan sinkronisasi JSON <-> CSV) menulis satu baris JSON ke
+log berputar (default diagnostics/io.jsonl, atur dengan IO_LOG di variabel.txt,
+kosongkan untuk mematikan):
+
+    {"ts": "...", "pid": 1, "aksi": "layanan.kembalikan", "aksi_id": 42,
+     "op": "save", "tabel": "peminjaman", "rows": 1200, "bytes": 98304,
+     "durasi_ms": 3.1, "fsync": 0, "ok": true}
+
+`aksi` adalah aksi pengguna yang memicu I/O (span layanan.* dari utils.metrics,
+atau nama halaman/menu). Ringkasan write amplification per aksi:
+
+    python -m utils.iolog [--log diagnostics/io.jsonl] [--aksi layanan.kembalikan]
+"""
+import argparse
+import glob
+import json
+import logging
+import logging.handlers
+import os
+import threading
+import time
+from collections import defaultdict
+from datetime import datetime
+from typing import Any, Dict, Iterator, List, Optional
+
+from utils.metrics import METRICS, file_size
+
+DEFAULT_LOG = os.path.join("diagnostics", "io.jsonl")
+MAX_BYTES = 5 * 1024 * 1024
+BACKUP_COUNT = 5
+
+_logger = logging.getLogger("perpustakaan.io")
+_logger.propagate = False
+_logger.setLevel(logging.INFO)
+_local = threading.local()
+_log_path: Optional[str] = None
+
+
+def configure(path: Optional[str], max_bytes: int = MAX_BYTES, backup_count: int = BACKUP_COUNT) -> None:
+    """Arahkan log ke `path` (None/"" untuk mematikan); aman dipanggil berulang kali"""
+    global _log_path
+    if path == _log_path:
+        return
+    for handler in list(_logger.handlers):
+        _logger.removeHandler(handler)
+        handler.close()
+    _log_path = path or None
+    if not path:
+        return
+    try:
+        folder = os.path.dirname(path)
+        if folder:
+            os.makedirs(folder, exist_ok=True)
+        handler = logging.handlers.RotatingFileHandler(
+            path, maxBytes=max_bytes, backupCount=backup_count, encoding="utf-8")
+        handler.setFormatter(logging.Formatter("%(message)s"))
+        _logger.addHandler(handler)
+    except OSError as e:
+        print(f"Error opening I/O log: {e}")
+        _log_path = None
+
+
+def configure_from_variabel(var: Dict[str, str]) -> None:
+    configure(var.get("IO_LOG", DEFAULT_LOG))
+
+
+def enabled() -> bool:
+    return _log_path is not None
+
+
+class catat:
+    """
+    `with catat("save", "buku", path) as ev: ...; ev["rows"] = len(data)`
+
+    Durasi diukur otomatis; byte diambil dari ukuran file sesudah operasi kecuali
+    pemanggil mengisi ev["bytes"] sendiri.
+    """
+
+    def __init__(self, op: str, tabel: str, path: str = "") -> None:
+        self.op = op
+        self.tabel = tabel
+        self.path = path
+        self.event: Dict[str, Any] = {}
+
+    def __enter__(self) -> Dict[str, Any]:
+        self.event = {"rows": 0, "fsync": 0}
+        self._outer = getattr(_local, "event", None)
+        _local.event = self.event
+        self._start = time.perf_counter()
+        return self.event
+
+    def __exit__(self, exc_type: Any, exc: Any, tb: Any) -> None:
+        durasi = time.perf_counter() - self._start
+        _local.event = self._outer
+        if not enabled():
+            return
+        aksi, aksi_id = METRICS.aksi()
+        ev = {
+            "ts": datetime.now().strftime("%Y-%m-%d %H:%M:%S.%f")[:-3],
+            "pid": os.getpid(),
+            "aksi": aksi,
+            "aksi_id": aksi_id,
+            "op": self.op,
+            "tabel": self.tabel,
+            "rows": self.event["rows"],
+            "bytes": self.event.get("bytes", file_size(self.path) if self.path else 0),
+            "durasi_ms": round(durasi * 1000, 3),
+            "fsync": self.event["fsync"],
+            "ok": exc_type is None and self.event.get("ok", True)
+        }
+        try:
+            _logger.info(json.dumps(ev, ensure_ascii=False))
+        except Exception as e:
+            print(f"Error writing I/O log: {e}")
+
+
+def fsync(fd: int) -> None:
+    """os.fsync yang ikut dihitung di event storage yang sedang berjalan"""
+    os.fsync(fd)
+    event = getattr(_local, "event", None)
+    if event is not None:
+        event["fsync"] += 1
+
+
+# ============= AGREGASI =============
+def baca_log(path: str = DEFAULT_LOG) -> Iterator[Dict[str, Any]]:
+    """Event dari log dan file rotasinya (io.jsonl.5 ... io.jsonl), terlama dulu"""
+    nomor = [p[len(path) + 1:] for p in glob.glob(glob.escape(path) + ".*")]
+    rotasi = [f"{path}.{n}" for n in sorted((int(n) for n in nomor if n.isdigit()), reverse=True)]
+    for file in rotasi + [path]:
+        if not os.path.exists(file):
+            continue
+        with open(file, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    yield json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+
+
+def ringkas(events: Iterator[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Write amplification per aksi
+
+    Returns:
+        list: Per aksi: jumlah pemanggilan, rata-rata file ditulis, baris dan KB
+            ditulis/dibaca, fsync, durasi I/O, dan amplifikasi (baris ditulis per
+            tabel yang ditulis, dengan asumsi satu aksi mengubah satu baris per tabel)
+    """
+    total: Dict[str, Dict[str, float]] = defaultdict(lambda: defaultdict(float))
+    pemanggilan: Dict[str, set] = defaultdict(set)
+    tabel_ditulis: Dict[str, set] = defaultdict(set)
+    for ev in events:
+        aksi = ev.get("aksi", "-")
+        t = total[aksi]
+        pemanggilan[aksi].add((ev.get("pid"), ev.get("aksi_id")))
+        if ev.get("op") == "load":
+            t["baca"] += 1
+            t["bytes_baca"] += ev.get("bytes", 0)
+        elif ev.get("op") != "commit":  # commit transaksi hanya membawa fsync & durasi
+            t["tulis"] += 1
+            t["rows_tulis"] += ev.get("rows", 0)
+            t["bytes_tulis"] += ev.get("bytes", 0)
+            tabel_ditulis[aksi].add(ev.get("tabel"))
+        t["fsync"] += ev.get("fsync", 0)
+        t["durasi_ms"] += ev.get("durasi_ms", 0)
+
+    hasil = []
+    for aksi, t in total.items():
+        n = len(pemanggilan[aksi])
+        hasil.append({
+            "aksi": aksi,
+            "jumlah": n,
+            "tulis_per_aksi": round(t["tulis"] / n, 2),
+            "baris_tulis_per_aksi": round(t["rows_tulis"] / n, 1),
+            "kb_tulis_per_aksi": round(t["bytes_tulis"] / n / 1024, 1),
+            "kb_baca_per_aksi": round(t["bytes_baca"] / n / 1024, 1),
+            "fsync_per_aksi": round(t["fsync"] / n, 2),
+            "io_ms_per_aksi": round(t["durasi_ms"] / n, 2),
+            "amplifikasi": round(t["rows_tulis"] / t["tulis"], 1) if t["tulis"] else 0.0,
+            "tabel_ditulis": ", ".join(sorted(str(x) for x in tabel_ditulis[aksi]))
+        })
+    hasil.sort(key=lambda r: r["kb_tulis_per_aksi"] * r["jumlah"], reverse=True)
+    return hasil
+
+
+def _cetak(rows: List[Dict[str, Any]]) -> None:
+    if not rows:
+        print("Log I/O kosong.")
+        return
+    kolom = ["aksi", "jumlah", "tulis_per_aksi", "baris_tulis_per_aksi", "kb_tulis_per_aksi",
+             "kb_baca_per_aksi", "fsync_per_aksi", "io_ms_per_aksi", "amplifikasi", "tabel_ditulis"]
+    lebar = {k: max(len(k), *(len(str(r[k])) for r in rows)) for k in kolom}
+    print("  ".join(k.ljust(lebar[k]) for k in kolom).rstrip())
+    for r in rows:
+        print("  ".join(str(r[k]).ljust(lebar[k]) for k in kolom).rstrip())
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Ringkasan write amplification dari log I/O")
+    parser.add_argument("--log", default=DEFAULT_LOG)
+    parser.add_argument("--aksi", default="", help="Hanya tampilkan aksi ini")
+    parser.add_argument("--json", action="store_true", help="Cetak sebagai JSON")
+    args = parser.parse_args()
+
+    rows = ringkas(baca_log(args.log))
+    if args.aksi:
+        rows = [r for r in rows if r["aksi"] == args.aksi]
+    if args.json:
+        print(json.dumps(rows, indent=4, ensure_ascii=False))
+    else:
+        _cetak(rows)
@@ -0,0 +1,152 @@
+"""
+Riwayat perubahan per transaksi (change log) untuk point-in-time restore.
+
+Setiap Repository.save() dibandingkan dengan isi tabel sebelumnya dan hanya baris
+yang berubah yang dicatat. Semua tabel yang diubah dalam satu transaksi
+(utils.atomic.transaksi, misal buku + peminjaman saat pinjam) menjadi satu baris:
+
+    {"ts": "2024-03-05 10:32:01.123456", "pid": 1, "aksi": "layanan.pinjam",
+     "tabel": {"buku": {"upsert": [{"id": 12, "stok": 2, ...}], "hapus": [],
+                        "sebelum": [{"id": 12, "stok": 3, ...}]},
+               "peminjaman": {"upsert": [{"id": 7, ...}], "hapus": [], "sebelum": []}}}
+
+"sebelum" berisi isi lama baris yang diubah/dihapus, supaya utils/cdc.py bisa
+menyajikan journal sebagai change feed insert/update/delete untuk konsumen luar.
+
+Baris ditambahkan ke database/journal/journal-YYYYMM.jsonl dengan atomic.append_text
+saat transaksinya di-commit, sebelum file tabel diganti: crash di antaranya menyisakan
+record perubahan yang tidak jadi, bukan perubahan tanpa record. Penerapan ulang
+bersifat idempoten (upsert/hapus per id), jadi replay boleh dimulai sedikit sebelum
+snapshot diambil. Lihat utils.backup.pulihkan_ke untuk restore ke titik waktu tertentu.
+"""
+import json
+import os
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+from utils.atomic import append_text, current
+from utils.metrics import METRICS
+from utils.schema import dump_record, parse_record
+
+FORMAT_TS = "%Y-%m-%d %H:%M:%S.%f"
+
+Perubahan = Dict[str, Any]           # {"upsert": [...], "hapus": [...], "sebelum": [...]} atau {"ganti": [...]}
+State = Dict[str, "OrderedDict[Any, Dict[str, Any]]"]
+
+
+def selisih(lama: List[Dict[str, Any]], baru: List[Dict[str, Any]]) -> Optional[Perubahan]:
+    """Baris yang ditambah/diubah, id yang dihapus, dan isi lama keduanya; None jika tidak ada perubahan"""
+    index = {row["id"]: row for row in lama if "id" in row}
+    ids_baru = {row["id"] for row in baru if "id" in row}
+    if len(index) != len(lama) or len(ids_baru) != len(baru):
+        # Baris tanpa id atau id ganda (data lama): catat isi tabel utuh
+        return None if lama == baru else {"ganti": [dump_record(row) for row in baru]}
+    diubah = [row for row in baru if index.get(row["id"]) != row]
+    hapus = [row["id"] for row in lama if row["id"] not in ids_baru]
+    if not diubah and not hapus:
+        return None
+    sebelum = [index[row["id"]] for row in diubah if row["id"] in index] + [index[i] for i in hapus]
+    return {"upsert": [dump_record(row) for row in diubah], "hapus": hapus,
+            "sebelum": [dump_record(row) for row in sebelum]}
+
+
+def terapkan(state: State, tabel: str, perubahan: Perubahan) -> None:
+    """Terapkan satu perubahan tabel ke state (id -> baris, urutan seperti di file)"""
+    if "ganti" in perubahan:
+        state[tabel] = OrderedDict((i, parse_record(tabel, row)) for i, row in enumerate(perubahan["ganti"]))
+        return
+    rows = state.setdefault(tabel, OrderedDict())
+    for id_hapus in perubahan.get("hapus", []):
+        rows.pop(parse_record(tabel, {"id": id_hapus})["id"], None)
+    for row in perubahan.get("upsert", []):
+        row = parse_record(tabel, row)
+        rows[row["id"]] = row
+
+
+class Journal:
+    """Change log append-only, satu segmen per bulan"""
+
+    def __init__(self, folder: str, clock: Optional[Callable[[], datetime]] = None) -> None:
+        self.folder = folder
+        self.clock = clock or datetime.now
+
+    @classmethod
+    def from_variabel(cls, var: Dict[str, str]) -> "Journal":
+        folder_db = var.get("FOLDER_DB", "database")
+        return cls(var.get("FOLDER_JOURNAL", os.path.join(folder_db, "journal")))
+
+    def now(self) -> str:
+        return self.clock().strftime(FORMAT_TS)
+
+    def _segmen(self, ts: str) -> str:
+        return os.path.join(self.folder, f"journal-{ts[:4]}{ts[5:7]}.jsonl")
+
+    # ---- tulis ----
+    def catat(self, tabel: str, lama: List[Dict[str, Any]], baru: List[Dict[str, Any]]) -> None:
+        """Catat perubahan satu tabel; dalam transaksi digabung dan ditulis saat commit"""
+        perubahan = selisih(lama, baru)
+        if perubahan is not None:
+            self.catat_perubahan(tabel, perubahan)
+
+    def catat_perubahan(self, tabel: str, perubahan: Perubahan) -> None:
+        """Seperti catat(), untuk pemanggil yang sudah tahu baris mana yang berubah"""
+        trx = current()
+        if trx is None:
+            self._tulis({tabel: perubahan})
+            return
+        key = ("journal", id(self))
+        pending = trx.overlay.get(key)
+        if pending is None:
+            pending = trx.overlay[key] = {}
+            # Baru dirender di akhir blok, setelah semua tabel transaksi ini tercatat
+            trx.before_commit(lambda: self._tulis(pending))
+        if tabel in pending and "ganti" not in perubahan and "ganti" not in pending[tabel]:
+            # Tabel disimpan dua kali dalam satu transaksi: gabungkan
+            gabung = pending[tabel]
+            if "sebelum" in gabung:
+                # Isi sebelum transaksi: yang pertama tercatat per id; baris yang baru
+                # ditambahkan di transaksi ini tidak punya isi sebelum
+                sudah = {r["id"] for r in gabung["sebelum"]} | {r["id"] for r in gabung["upsert"]}
+                gabung["sebelum"].extend(r for r in perubahan.get("sebelum", []) if r["id"] not in sudah)
+            gabung["upsert"] = [r for r in gabung["upsert"] if r["id"] not in perubahan["hapus"]]
+            gabung["upsert"].extend(perubahan["upsert"])
+            gabung["hapus"].extend(perubahan["hapus"])
+        else:
+            pending[tabel] = perubahan
+
+    def _tulis(self, perubahan: Dict[str, Perubahan]) -> None:
+        if not perubahan:
+            return
+        ts = self.now()
+        record = {"ts": ts, "pid": os.getpid(), "aksi": METRICS.aksi()[0], "tabel": perubahan}
+        os.makedirs(self.folder, exist_ok=True)
+        append_text(self._segmen(ts), json.dumps(record, ensure_ascii=False) + "\n")
+
+    # ---- baca ----
+    def segmen(self) -> List[str]:
+        if not os.path.isdir(self.folder):
+            return []
+        return sorted(os.path.join(self.folder, name) for name in os.listdir(self.folder)
+                      if name.startswith("journal-") and name.endswith(".jsonl"))
+
+    def baca(self, dari: str = "", sampai: str = "") -> Iterator[Dict[str, Any]]:
+        """
+        Stream record dengan dari <= ts <= sampai (string FORMAT_TS), satu baris per langkah
+
+        Segmen di luar rentang bulan tidak dibuka sama sekali.
+        """
+        for path in self.segmen():
+            bulan = os.path.basename(path)[len("journal-"):-len(".jsonl")]
+            if (dari and bulan < dari[:4] + dari[5:7]) or (sampai and bulan > sampai[:4] + sampai[5:7]):
+                continue
+            with open(path, "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except json.JSONDecodeError:
+                        continue  # ekor terpotong karena crash; dibuang oleh append berikutnya
+                    ts = record.get("ts", "")
+                    if (dari and ts < dari) or (sampai and ts > sampai):
+                        continue
+                    yield record
@@ -0,0 +1,149 @@
+"""
+Kategori buku sebagai kamus: buku menyimpan id_kategori, nama ada di kategori.json.
+
+Nama -> id dicari lewat peta kolom Repository (hash, dibangun sekali per versi
+kategori.json) dan id -> nama diisi saat buku dibaca oleh utils/gabung.py, jadi baris
+buku tidak membawa salinan nama kategori dan tambah_buku tidak membangun daftar nama.
+
+StatKategori menyimpan jumlah judul, total stok, pinjaman aktif dan id buku per
+kategori di memori. Hitungan dibangun sekali dari tabel buku + peminjaman lalu
+diperbarui per aksi (tambah/ubah/hapus buku, pinjam, kembalikan) setelah transaksinya
+di-commit; jika salah satu tabel diubah tanpa lewat StatKategori (proses lain,
+sinkronisasi JSON), versinya tidak cocok dan hitungan dibangun ulang saat dibaca.
+"""
+import threading
+from contextlib import nullcontext
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from utils.atomic import after_commit
+from utils.schema import KOLOM_HAPUS
+
+KOLOM_HITUNG = ("judul", "stok", "dipinjam")
+
+
+def _stok(row: Dict[str, Any]) -> int:
+    try:
+        return int(row.get("stok", 0) or 0)
+    except (TypeError, ValueError):
+        return 0
+
+
+def _versi(store: Any) -> Optional[Tuple[Any, ...]]:
+    version = getattr(store, "version", None)
+    return (version("buku"), version("peminjaman")) if version is not None else None
+
+
+class StatKategori:
+    """Hitungan per id_kategori (None = tanpa kategori); lihat docstring modul"""
+
+    def __init__(self) -> None:
+        self.versi: Optional[Tuple[Any, ...]] = None
+        self.hitung: Dict[Any, Dict[str, int]] = {}
+        self.buku: Dict[Any, Set[Any]] = {}          # id_kategori -> id buku
+        self.aktif_buku: Dict[Any, int] = {}         # id buku -> pinjaman aktif
+        self._lock = threading.RLock()
+
+    def _tambah(self, row: Dict[str, Any], arah: int) -> None:
+        kunci = row.get("id_kategori")
+        hitung = self.hitung.setdefault(kunci, dict.fromkeys(KOLOM_HITUNG, 0))
+        hitung["judul"] += arah
+        hitung["stok"] += arah * _stok(row)
+        hitung["dipinjam"] += arah * self.aktif_buku.get(row["id"], 0)
+        ids = self.buku.setdefault(kunci, set())
+        if arah > 0:
+            ids.add(row["id"])
+        else:
+            ids.discard(row["id"])
+
+    def bangun(self, buku: List[Dict[str, Any]], pinjam: List[Dict[str, Any]]) -> None:
+        """Bangun ulang dari seluruh tabel buku dan peminjaman"""
+        with self._lock:
+            self.hitung, self.buku, self.aktif_buku = {}, {}, {}
+            for p in pinjam:
+                if p.get("status") == "dipinjam":
+                    self.aktif_buku[p.get("id_buku")] = self.aktif_buku.get(p.get("id_buku"), 0) + 1
+            for row in buku:
+                if not row.get(KOLOM_HAPUS):  # tombstone: sudah dihapus
+                    self._tambah(row, 1)
+
+    def segarkan(self, store: Any) -> None:
+        with self._lock:
+            versi = _versi(store)
+            if versi is None or self.versi != versi:
+                self.bangun(store.load("buku"), store.load("peminjaman"))
+                self.versi = versi
+
+    # ---- baca ----
+    def ringkasan(self, store: Any) -> Dict[Any, Dict[str, int]]:
+        """id_kategori -> {"judul", "stok", "dipinjam"} (salinan)"""
+        with self._lock:
+            self.segarkan(store)
+            return {k: dict(v) for k, v in self.hitung.items() if v["judul"] or v["dipinjam"]}
+
+    def id_buku(self, store: Any, id_kategori: Any) -> List[Any]:
+        """Id buku dalam satu kategori, urut naik"""
+        with self._lock:
+            self.segarkan(store)
+            return sorted(self.buku.get(id_kategori, ()), key=str)
+
+    # ---- tulis ----
+    def catat(self, store: Any, lama: Optional[Dict[str, Any]], baru: Optional[Dict[str, Any]],
+              dipinjam: int = 0) -> None:
+        """
+        Perbarui hitungan untuk satu buku yang ditambah (lama None), diubah, atau dihapus
+        (baru None); `dipinjam` +1/-1 saat buku itu dipinjam/dikembalikan. Baris
+        ber-tombstone tidak dihitung, hanya pinjaman aktifnya.
+
+        Dipanggil di dalam transaksi yang menulis bukunya dan diterapkan setelah commit,
+        seperti IndeksPeminjaman.catat; hitungan yang sudah usang hanya ditandai usang.
+        """
+        segar = self.versi is not None and self.versi == _versi(store)
+        id_ = (baru or lama or {}).get("id")
+        lama = dict(lama) if lama is not None and not lama.get(KOLOM_HAPUS) else None
+        baru = dict(baru) if baru is not None and not baru.get(KOLOM_HAPUS) else None
+
+        def terapkan() -> None:
+            with self._lock:
+                if not segar or self.versi is None:
+                    self.versi = None
+                    return
+                if lama is not None:
+                    self._tambah(lama, -1)
+                self.aktif_buku[id_] = self.aktif_buku.get(id_, 0) + dipinjam
+                if baru is not None:
+                    self._tambah(baru, 1)
+                self.versi = _versi(store)
+        after_commit(terapkan)
+
+
+def migrasi_kategori(store: Any) -> int:
+    """
+    Ganti nama kategori di baris buku dengan id_kategori
+
+    Nama yang belum ada di kategori.json ditambahkan ke kamus. Kedua tabel ditulis
+    sekali, dan hanya jika ada buku yang masih menyimpan nama.
+
+    Returns:
+        int: Jumlah buku yang dikodekan
+    """
+    buku = store.load("buku")
+    if not any("kategori" in b for b in buku):
+        return 0
+    kategori = store.load("kategori")
+    kode = {k.get("nama"): k["id"] for k in kategori}
+    jumlah = 0
+    for b in buku:
+        nama = str(b.pop("kategori", "") or "").strip()
+        if not nama or b.get("id_kategori") not in (None, ""):
+            continue
+        if nama not in kode:
+            kode[nama] = max([int(k["id"]) for k in kategori if str(k.get("id", "")).isdigit()], default=0) + 1
+            kategori.append({"id": kode[nama], "nama": nama})
+        b["id_kategori"] = kode[nama]
+        jumlah += 1
+
+    transaksi = getattr(store, "transaksi", None)
+    with transaksi() if transaksi is not None else nullcontext():
+        store.save("kategori", kategori)
+        store.save("buku", buku)
+    return jumlah
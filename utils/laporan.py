@@ -0,0 +1,205 @@
+"""
+Laporan agregat yang dimaterialisasi dan diperbarui inkremental, disimpan di
+database/indeks/laporan.json.
+
+    {"cursor": 202403000000004822,          # posisi change feed (utils/cdc.py) yang sudah diterapkan
+     "versi": {"buku": [...], "peminjaman": [...]},
+     "maks_pinjam": 5120,                   # id peminjaman terbesar yang sudah dihitung
+     "sirkulasi": {"2024-03": {"5": 12}},   # bulan -> id_kategori -> jumlah peminjaman
+     "buku": {"12": 30}, "kelas": {"X-1": 41},
+     "pengadaan": {"BOSP": {"2024": 120}}}  # sumber_pendapatan -> tahun -> jumlah judul
+
+Setiap pembacaan hanya menerapkan baris change feed yang baru sejak cursor: peminjaman
+baru menambah hitungan bulan/kategori, buku, dan kelas (kategori dan kelas saat
+peminjaman tercatat), dan buku yang ditambah/diubah/dihapus menggeser hitungan
+pengadaan dengan isi sebelum/sesudahnya. Tabel tidak dipindai ulang per tampilan.
+
+Dibangun ulang dari tabel jika belum ada journal, jika tabel berubah tanpa tercatat
+di journal (versinya berbeda tanpa baris feed, misal diedit di luar aplikasi), atau
+jika perubahannya tidak bisa diterapkan inkremental (peminjaman dihapus/dipindah).
+"""
+import heapq
+import json
+import os
+import threading
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from utils import cdc
+from utils.atomic import write_text
+from utils.schema import FORMAT_TANGGAL, KOLOM_HAPUS
+
+TABEL_LAPORAN = ("buku", "peminjaman")
+BATAS_TERLARIS = 10
+# Kolom peminjaman yang menentukan hitungan; jika berubah, laporan dibangun ulang
+KOLOM_PINJAM = ("id_buku", "id_anggota", "tanggal_pinjam")
+
+
+def _kunci(nilai: Any) -> str:
+    return "" if nilai is None else str(nilai)
+
+
+def _tambah(hitung: Dict[str, Any], kunci: List[str], n: int) -> None:
+    for k in kunci[:-1]:
+        hitung = hitung.setdefault(k, {})
+    hitung[kunci[-1]] = hitung.get(kunci[-1], 0) + n
+    if not hitung[kunci[-1]]:
+        del hitung[kunci[-1]]
+
+
+def _pengadaan(buku: Optional[Dict[str, Any]]) -> Optional[List[str]]:
+    """(sumber, tahun) satu buku: tahun beli (BOSP), diberikan (Donatur), atau dicatat"""
+    if buku is None or buku.get(KOLOM_HAPUS):
+        return None
+    tanggal = buku.get("tanggal_beli") or buku.get("tanggal_diberikan") or buku.get("created_at")
+    return [buku.get("sumber_pendapatan") or "-", str(tanggal)[:4] if tanggal else "-"]
+
+
+class Laporan:
+    """Agregat sirkulasi dan pengadaan; lihat docstring modul"""
+
+    def __init__(self, path: Optional[str] = None) -> None:
+        self.path = path  # None = hanya di memori
+        self.data: Optional[Dict[str, Any]] = None
+        self.diperbarui = ""  # waktu terakhir agregat dipastikan sesuai tabel
+        self._hasil: Optional[Dict[str, Any]] = None
+        self._lock = threading.RLock()
+
+    @classmethod
+    def from_variabel(cls, var: Dict[str, str]) -> "Laporan":
+        folder_db = var.get("FOLDER_DB", "database")
+        return cls(os.path.join(folder_db, "indeks", "laporan.json"))
+
+    # ---- bangun & simpan ----
+    def _baca_file(self) -> None:
+        if self.path is None:
+            return
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                self.data = json.load(f)
+        except (OSError, ValueError):
+            self.data = None
+
+    def _simpan(self) -> None:
+        if self.path is None:
+            return
+        try:
+            write_text(self.path, json.dumps(self.data, ensure_ascii=False))
+        except Exception as e:
+            print(f"Error saving report cache: {e}")
+
+    def bangun(self, store: Any) -> None:
+        """Bangun ulang dari seluruh tabel buku, anggota, dan peminjaman"""
+        journal = getattr(store, "journal", None)
+        data: Dict[str, Any] = {"cursor": cdc.ujung(journal) if journal is not None else None,
+                                "versi": self._versi(store), "maks_pinjam": 0,
+                                "sirkulasi": {}, "buku": {}, "kelas": {}, "pengadaan": {}}
+        buku = store.load("buku")
+        kategori = {b["id"]: b.get("id_kategori") for b in buku}
+        kelas = {a["id"]: a.get("kelas") for a in store.load("anggota")}
+        for p in store.load("peminjaman"):
+            self._hitung_pinjam(data, p, kategori.get(p.get("id_buku")), kelas.get(p.get("id_anggota")))
+        for b in buku:
+            kunci = _pengadaan(b)
+            if kunci is not None:
+                _tambah(data["pengadaan"], kunci, 1)
+        self.data = data
+
+    @staticmethod
+    def _versi(store: Any) -> Optional[Dict[str, Any]]:
+        version = getattr(store, "version", None)
+        return {t: list(version(t)) for t in TABEL_LAPORAN} if version is not None else None
+
+    @staticmethod
+    def _hitung_pinjam(data: Dict[str, Any], p: Dict[str, Any], id_kategori: Any, kelas: Any) -> None:
+        _tambah(data["sirkulasi"], [str(p.get("tanggal_pinjam") or "-")[:7], _kunci(id_kategori)], 1)
+        _tambah(data["buku"], [_kunci(p.get("id_buku"))], 1)
+        _tambah(data["kelas"], [kelas or "-"], 1)
+        if isinstance(p.get("id"), int):
+            data["maks_pinjam"] = max(data["maks_pinjam"], p["id"])
+
+    # ---- inkremental ----
+    def _terapkan(self, store: Any, perubahan: Dict[str, Any]) -> bool:
+        """Terapkan satu baris change feed; False jika laporan harus dibangun ulang"""
+        assert self.data is not None
+        op, sebelum, sesudah = perubahan["op"], perubahan["sebelum"], perubahan["sesudah"]
+        if perubahan["tabel"] == "peminjaman":
+            if op == "insert":
+                if int(sesudah["id"]) > self.data["maks_pinjam"]:  # sudah dihitung saat dibangun
+                    b = store.ambil("buku", [int(sesudah["id_buku"])]) if sesudah.get("id_buku") else []
+                    a = store.ambil("anggota", [int(sesudah["id_anggota"])]) if sesudah.get("id_anggota") else []
+                    self._hitung_pinjam(self.data, dict(sesudah, id=int(sesudah["id"])),
+                                        b[0].get("id_kategori") if b else None, a[0].get("kelas") if a else None)
+                return True
+            return op == "update" and all(sebelum.get(k) == sesudah.get(k) for k in KOLOM_PINJAM)
+        if perubahan["tabel"] == "buku":
+            if op not in ("insert", "update", "delete"):
+                return False
+            for kunci, n in ((_pengadaan(sebelum), -1), (_pengadaan(sesudah), 1)):
+                if kunci is not None:
+                    _tambah(self.data["pengadaan"], kunci, n)
+        return True
+
+    def segarkan(self, store: Any) -> None:
+        """Pastikan agregat sesuai tabel saat ini; biasanya hanya membaca baris feed baru"""
+        with self._lock:
+            if self.data is None:
+                self._baca_file()
+            versi = self._versi(store)  # dibaca sebelum feed: tulisan sesudahnya menunggu pembacaan berikutnya
+            journal = getattr(store, "journal", None)
+            berubah = False
+            data = self.data
+            if data is None or data.get("versi") is None:
+                segar = False
+            elif journal is not None and versi is not None and data["cursor"] is not None:
+                segar, tersentuh = True, set()
+                while segar:
+                    feed, cursor = cdc.baca(journal, data["cursor"])
+                    if cursor == data["cursor"]:
+                        break
+                    for perubahan in feed:
+                        tersentuh.add(perubahan["tabel"])
+                        if not self._terapkan(store, perubahan):
+                            segar = False
+                            break
+                    data["cursor"] = cursor
+                    berubah = True
+                # Tabel yang berubah tanpa tercatat di journal
+                segar = segar and all(t in tersentuh or versi[t] == data["versi"][t] for t in TABEL_LAPORAN)
+                if segar and berubah:
+                    data["versi"] = versi
+            else:
+                segar = journal is None and versi == data["versi"]
+            if not segar:
+                self.bangun(store)
+                berubah = True
+            if berubah:
+                self._hasil = None
+                self._simpan()
+            self.diperbarui = datetime.now().strftime(FORMAT_TANGGAL)
+
+    # ---- baca ----
+    def hasil(self, store: Any) -> Dict[str, Any]:
+        """
+        Laporan siap tampil beserta waktu `diperbarui`; daftar-daftarnya disusun sekali
+        per perubahan agregat
+        """
+        with self._lock:
+            self.segarkan(store)
+            assert self.data is not None
+            if self._hasil is None:
+                data = self.data
+                self._hasil = {
+                    "sirkulasi_bulanan": [
+                        {"bulan": bulan, "id_kategori": int(k) if k.isdigit() else None, "jumlah": n}
+                        for bulan in sorted(data["sirkulasi"]) for k, n in sorted(data["sirkulasi"][bulan].items())],
+                    "judul_terlaris": [
+                        {"id_buku": int(k) if k.isdigit() else k, "jumlah": n}
+                        for k, n in heapq.nlargest(BATAS_TERLARIS, data["buku"].items(), key=lambda x: x[1])],
+                    "kelas_teraktif": [{"kelas": k, "jumlah": n}
+                                       for k, n in sorted(data["kelas"].items(), key=lambda x: (-x[1], x[0]))],
+                    "pengadaan": [{"sumber": sumber, "tahun": tahun, "judul": n}
+                                  for sumber in sorted(data["pengadaan"])
+                                  for tahun, n in sorted(data["pengadaan"][sumber].items())],
+                }
+            return dict(self._hasil, diperbarui=self.diperbarui)
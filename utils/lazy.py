@@ -0,0 +1,50 @@
+import importlib
+import sys
+from typing import Any, List
+
+
+class LazyModule:
+    """
+    Proxy modul yang baru di-import saat atribut pertama kali diakses.
+
+    Dipakai web UI supaya pandas/PIL/openpyxl tidak ikut dimuat saat
+    halaman login dan dashboard dirender.
+    """
+
+    def __init__(self, name: str) -> None:
+        self.__dict__["_name"] = name
+        self.__dict__["_module"] = None
+
+    def _load(self) -> Any:
+        module = self.__dict__["_module"]
+        if module is None:
+            module = importlib.import_module(self.__dict__["_name"])
+            self.__dict__["_module"] = module
+        return module
+
+    def __getattr__(self, item: str) -> Any:
+        return getattr(self._load(), item)
+
+    def __repr__(self) -> str:
+        status = "loaded" if self.__dict__["_module"] is not None else "lazy"
+        return f"<LazyModule {self.__dict__['_name']} ({status})>"
+
+
+def lazy_import(name: str) -> Any:
+    """
+    Buat proxy lazy untuk modul `name`
+
+    Args:
+        name (str): Nama modul, misalnya "pandas" atau "PIL.Image"
+
+    Returns:
+        Proxy yang meneruskan akses atribut ke modul aslinya
+    """
+    if name in sys.modules:
+        return sys.modules[name]
+    return LazyModule(name)
+
+
+def loaded_modules(names: List[str]) -> List[str]:
+    """Daftar modul dari `names` yang sudah benar-benar di-import"""
+    return [name for name in names if name in sys.modules]
@@ -0,0 +1,321 @@
+"""
+Instrumentasi ringan untuk jalur panas (storage, converter, gambar, ekspor).
+
+    with timed("storage.load", tabel="buku"):
+        ...
+        add_bytes(read=nbytes)
+
+    @timed("image.save_cover")
+    def save_cover(...): ...
+
+Setiap operasi punya histogram latensi dengan bucket logaritmik (memori tetap kecil
+berapa pun jumlah panggilan) plus total byte dibaca/ditulis. Span yang terjadi
+selama satu rerun Streamlit atau satu menu CLI dikumpulkan menjadi satu trace.
+Semua data bisa diambil lewat METRICS.snapshot() atau ditulis ke JSON dengan dump().
+"""
+import itertools
+import json
+import math
+import os
+import threading
+import time
+from collections import deque
+from datetime import datetime
+from functools import wraps
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple, TypeVar
+
+BUCKET_BASE = 2 ** 0.125   # lebar bucket ~9%, cukup untuk p50/p95/p99
+MAX_TRACES = 50
+MAX_SPANS_PER_TRACE = 500
+AKSI_PREFIX = "layanan."  # span operasi bisnis = satu aksi pengguna
+
+_seq = itertools.count(1)
+
+F = TypeVar("F", bound=Callable[..., Any])
+
+
+class Histogram:
+    """Histogram latensi dengan bucket logaritmik (dalam mikrodetik)"""
+
+    def __init__(self) -> None:
+        self.buckets: Dict[int, int] = {}
+        self.count = 0
+        self.total = 0.0
+        self.min = math.inf
+        self.max = 0.0
+
+    def add(self, seconds: float) -> None:
+        idx = int(math.log(max(seconds * 1e6, 1.0), BUCKET_BASE))
+        self.buckets[idx] = self.buckets.get(idx, 0) + 1
+        self.count += 1
+        self.total += seconds
+        self.min = min(self.min, seconds)
+        self.max = max(self.max, seconds)
+
+    def percentile(self, q: float) -> float:
+        """Perkiraan persentil ke-q (0-1) dalam detik"""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for idx in sorted(self.buckets):
+            seen += self.buckets[idx]
+            if seen >= rank:
+                value = BUCKET_BASE ** (idx + 0.5) / 1e6
+                return min(max(value, self.min), self.max)
+        return self.max
+
+
+class Span:
+    __slots__ = ("name", "attrs", "start", "duration", "bytes_read", "bytes_written", "depth", "error", "seq")
+
+    def __init__(self, name: str, attrs: Dict[str, Any], depth: int) -> None:
+        self.name = name
+        self.attrs = attrs
+        self.start = time.perf_counter()
+        self.duration = 0.0
+        self.bytes_read = 0
+        self.bytes_written = 0
+        self.depth = depth
+        self.error = False
+        self.seq = next(_seq)
+
+
+class Trace:
+    def __init__(self, label: str) -> None:
+        self.label = label
+        self.mulai = datetime.now()
+        self.start = time.perf_counter()
+        self.duration: Optional[float] = None
+        self.spans: List[Span] = []
+        self.seq = next(_seq)
+
+
+class _Operasi:
+    def __init__(self) -> None:
+        self.hist = Histogram()
+        self.bytes_read = 0
+        self.bytes_written = 0
+        self.errors = 0
+
+
+class Metrics:
+    """Kumpulan metrik per proses; aman dipakai dari banyak thread (sesi Streamlit)"""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._ops: Dict[str, _Operasi] = {}
+        self._traces: Deque[Trace] = deque(maxlen=MAX_TRACES)
+        self.sejak = datetime.now()
+
+    # ---- span ----
+    def _stack(self) -> List[Span]:
+        stack = getattr(self._local, "stack", None)
+        if stack is None:
+            stack = self._local.stack = []
+        return stack
+
+    def current(self) -> Optional[Span]:
+        stack = self._stack()
+        return stack[-1] if stack else None
+
+    def begin(self, name: str, attrs: Dict[str, Any]) -> Span:
+        stack = self._stack()
+        span = Span(name, attrs, len(stack))
+        stack.append(span)
+        return span
+
+    def finish(self, span: Span, error: bool = False) -> None:
+        span.duration = time.perf_counter() - span.start
+        span.error = error
+        stack = self._stack()
+        if stack and stack[-1] is span:
+            stack.pop()
+        trace: Optional[Trace] = getattr(self._local, "trace", None)
+        with self._lock:
+            op = self._ops.get(span.name)
+            if op is None:
+                op = self._ops[span.name] = _Operasi()
+            op.hist.add(span.duration)
+            op.bytes_read += span.bytes_read
+            op.bytes_written += span.bytes_written
+            op.errors += error
+            if trace is not None and len(trace.spans) < MAX_SPANS_PER_TRACE:
+                trace.spans.append(span)
+
+    def aksi(self) -> Tuple[str, int]:
+        """
+        Aksi pengguna yang sedang berjalan di thread ini beserta nomor unik pemanggilannya:
+        span layanan.* terluar, atau label trace (halaman web UI / menu CLI)
+        """
+        for span in self._stack():
+            if span.name.startswith(AKSI_PREFIX):
+                return span.name, span.seq
+        trace: Optional[Trace] = getattr(self._local, "trace", None)
+        if trace is not None:
+            return trace.label, trace.seq
+        return "-", 0
+
+    # ---- trace ----
+    def start_trace(self, label: str) -> Trace:
+        """Mulai trace baru untuk thread ini; trace sebelumnya yang belum ditutup ikut diakhiri"""
+        self.end_trace()
+        trace = Trace(label)
+        self._local.trace = trace
+        with self._lock:
+            self._traces.append(trace)
+        return trace
+
+    def end_trace(self) -> None:
+        trace: Optional[Trace] = getattr(self._local, "trace", None)
+        if trace is not None and trace.duration is None:
+            trace.duration = time.perf_counter() - trace.start
+        self._local.trace = None
+
+    # ---- ekspor ----
+    def operasi(self) -> List[Dict[str, Any]]:
+        """Ringkasan per operasi, diurutkan dari total waktu terbesar"""
+        with self._lock:
+            items = list(self._ops.items())
+            rows = []
+            for name, op in items:
+                h = op.hist
+                rows.append({
+                    "operasi": name,
+                    "jumlah": h.count,
+                    "p50_ms": round(h.percentile(0.50) * 1000, 3),
+                    "p95_ms": round(h.percentile(0.95) * 1000, 3),
+                    "p99_ms": round(h.percentile(0.99) * 1000, 3),
+                    "max_ms": round(h.max * 1000, 3),
+                    "total_ms": round(h.total * 1000, 3),
+                    "bytes_read": op.bytes_read,
+                    "bytes_written": op.bytes_written,
+                    "error": op.errors
+                })
+        rows.sort(key=lambda r: r["total_ms"], reverse=True)
+        return rows
+
+    def traces(self) -> List[Dict[str, Any]]:
+        """Trace terbaru dulu, masing-masing dengan daftar span-nya"""
+        with self._lock:
+            traces = list(self._traces)
+        hasil = []
+        for trace in reversed(traces):
+            hasil.append({
+                "label": trace.label,
+                "mulai": trace.mulai.strftime("%Y-%m-%d %H:%M:%S"),
+                "durasi_ms": None if trace.duration is None else round(trace.duration * 1000, 3),
+                "spans": [{
+                    "operasi": s.name,
+                    "offset_ms": round((s.start - trace.start) * 1000, 3),
+                    "durasi_ms": round(s.duration * 1000, 3),
+                    "depth": s.depth,
+                    "bytes_read": s.bytes_read,
+                    "bytes_written": s.bytes_written,
+                    "error": s.error,
+                    **{k: str(v) for k, v in s.attrs.items()}
+                } for s in list(trace.spans)]
+            })
+        return hasil
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "pid": os.getpid(),
+            "sejak": self.sejak.strftime("%Y-%m-%d %H:%M:%S"),
+            "dibuat": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+            "operasi": self.operasi(),
+            "traces": self.traces()
+        }
+
+    def to_json(self) -> str:
+        return json.dumps(self.snapshot(), indent=4, ensure_ascii=False)
+
+    def dump(self, path: str) -> None:
+        """Tulis snapshot ke file JSON untuk analisis offline"""
+        folder = os.path.dirname(path)
+        if folder:
+            os.makedirs(folder, exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(self.to_json())
+
+    def reset(self) -> None:
+        with self._lock:
+            self._ops.clear()
+            self._traces.clear()
+            self.sejak = datetime.now()
+
+
+METRICS = Metrics()
+
+
+class _Timed:
+    """Context manager sekaligus decorator; lihat timed()"""
+
+    def __init__(self, name: Optional[str], attrs: Dict[str, Any]) -> None:
+        self.name = name
+        self.attrs = attrs
+        self._spans: List[Span] = []
+
+    def __enter__(self) -> Span:
+        span = METRICS.begin(self.name or "anonim", self.attrs)
+        self._spans.append(span)
+        return span
+
+    def __exit__(self, exc_type: Any, exc: Any, tb: Any) -> None:
+        METRICS.finish(self._spans.pop(), error=exc_type is not None)
+
+    def __call__(self, func: F) -> F:
+        name = self.name or f"{func.__module__}.{func.__qualname__}"
+        attrs = self.attrs
+
+        @wraps(func)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            span = METRICS.begin(name, attrs)
+            try:
+                result = func(*args, **kwargs)
+            except BaseException:
+                METRICS.finish(span, error=True)
+                raise
+            METRICS.finish(span)
+            return result
+        return wrapper  # type: ignore[return-value]
+
+
+def timed(name: Optional[str] = None, **attrs: Any) -> _Timed:
+    """
+    Ukur durasi sebuah operasi
+
+    Args:
+        name (str): Nama operasi, misal "storage.load"; default nama fungsi
+        **attrs: Atribut tambahan yang ikut dicatat di trace (misal tabel="buku")
+    """
+    return _Timed(name, attrs)
+
+
+def add_bytes(read: int = 0, written: int = 0) -> None:
+    """Catat byte dibaca/ditulis pada span yang sedang berjalan di thread ini"""
+    span = METRICS.current()
+    if span is not None:
+        span.bytes_read += read
+        span.bytes_written += written
+
+
+def file_size(path: str) -> int:
+    try:
+        return os.path.getsize(path)
+    except OSError:
+        return 0
+
+
+class trace_scope:
+    """`with trace_scope("menu 7"):` - satu trace untuk satu aksi CLI"""
+
+    def __init__(self, label: str) -> None:
+        self.label = label
+
+    def __enter__(self) -> Trace:
+        return METRICS.start_trace(self.label)
+
+    def __exit__(self, *exc: Any) -> None:
+        METRICS.end_trace()
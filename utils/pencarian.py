@@ -0,0 +1,215 @@
+"""
+Pencarian type-ahead untuk form yang memilih siswa/buku (misal Pinjam Buku).
+
+Setiap baris dipecah menjadi token (huruf kecil, per kata) dari kolom di KOLOM_CARI;
+daftar token unik disimpan terurut sehingga prefix dicari dengan bisect. Kueri "bud x-1"
+cocok dengan baris yang punya token berawalan "bud", "x", dan "1". Hasil diurutkan
+menurut kolom pertama (nama/judul) dan dipotong ke `batas`, jadi UI hanya
+mengirim beberapa opsi, bukan seluruh tabel.
+
+Indeks dibangun sekali per versi tabel dan dipakai ulang oleh semua kueri berikutnya.
+Baris yang ditulis Perpustakaan diterapkan ke indeks setelah commit (Pencarian.catat):
+perubahan yang tidak menyentuh kolom teks (stok setelah pinjam) hanya mengganti barisnya,
+baris baru atau yang teksnya berubah disimpan di samping indeks sampai BATAS_TAMBAHAN,
+baru kemudian indeks dibangun ulang dari baris yang sudah ada di memori.
+"""
+import copy
+import heapq
+import re
+import threading
+from bisect import bisect_left
+from collections import defaultdict
+from typing import Any, Callable, Dict, FrozenSet, Iterator, List, Optional, Tuple
+
+from utils.atomic import after_commit
+from utils.schema import KOLOM_HAPUS
+
+# Kolom yang diindeks per tabel; kolom pertama menentukan urutan hasil
+KOLOM_CARI: Dict[str, Tuple[str, ...]] = {
+    "anggota": ("nama", "nis", "kelas"),
+    "buku": ("judul", "penulis", "isbn", "id"),
+}
+BATAS_SARAN = 10
+# Baris di luar posting (baru/teks berubah/dihapus) sebelum indeks dibangun ulang
+BATAS_TAMBAHAN = 256
+
+_TOKEN = re.compile(r"\w+")
+
+
+def token(teks: Any) -> List[str]:
+    return _TOKEN.findall(str(teks or "").lower())
+
+
+def _hidup(rows: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Tanpa baris ber-tombstone (buku yang sudah dihapus)"""
+    return [row for row in rows if not row.get(KOLOM_HAPUS)]
+
+
+def _teks(row: Dict[str, Any], kolom: Tuple[str, ...]) -> Tuple[str, ...]:
+    return tuple(str(row.get(k) or "") for k in kolom)
+
+
+def _cocok(tokens: Tuple[str, ...], prefixes: List[str]) -> bool:
+    return all(any(t.startswith(p) for t in tokens) for p in prefixes)
+
+
+class IndeksCari:
+    """Indeks token -> posisi baris dengan pencarian prefix; lihat docstring modul"""
+
+    def __init__(self, rows: List[Dict[str, Any]], kolom: Tuple[str, ...]) -> None:
+        self.kolom = kolom
+        self.rows = sorted(rows, key=lambda r: str(r.get(kolom[0]) or "").lower())
+        self.teks = [_teks(row, kolom) for row in self.rows]
+        self.token_baris = [tuple(set(token(" ".join(t)))) for t in self.teks]
+        self.posting: Dict[str, List[int]] = defaultdict(list)  # token -> posisi baris, naik
+        for pos, tokens in enumerate(self.token_baris):
+            for t in tokens:
+                self.posting[t].append(pos)
+        self.kunci = sorted(self.posting)
+        self.posisi_id = {row.get("id"): pos for pos, row in enumerate(self.rows)}
+        self.mati: FrozenSet[int] = frozenset()  # posisi yang sudah dihapus atau pindah ke `tambahan`
+        # id -> (baris, token) untuk baris baru/berubah teks sejak dibangun, dipindai linear
+        self.tambahan: Dict[Any, Tuple[Dict[str, Any], Tuple[str, ...]]] = {}
+
+    def dengan_baris(self, rows: List[Dict[str, Any]]) -> Optional["IndeksCari"]:
+        """
+        Indeks untuk versi tabel berikutnya tanpa membangun ulang token, jika hanya kolom
+        di luar KOLOM_CARI yang berubah (misal stok setelah pinjam/kembalikan); None jika
+        ada baris yang ditambah, dihapus, atau teksnya berubah
+        """
+        if len(rows) != len(self.rows):
+            return None
+        baru: List[Dict[str, Any]] = [{}] * len(rows)
+        for row in rows:
+            pos = self.posisi_id.get(row.get("id"))
+            if pos is None or self.teks[pos] != _teks(row, self.kolom):
+                return None
+            baru[pos] = row
+        if self.mati or self.tambahan:
+            return None
+        indeks = copy.copy(self)
+        indeks.rows = baru
+        return indeks
+
+    def perbarui(self, rows: List[Dict[str, Any]]) -> "IndeksCari":
+        """
+        Indeks baru setelah `rows` (baris baru/berubah, per id) ditulis; indeks ini tidak
+        diubah karena bisa sedang dibaca thread lain
+
+        Baris dengan teks yang sama diganti di tempat; baris baru atau yang teksnya berubah
+        masuk `tambahan` dan posisi lamanya ditandai mati; baris ber-tombstone dibuang.
+        Jika sudah lebih dari BATAS_TAMBAHAN, indeks dibangun ulang dari barisnya sendiri.
+        """
+        indeks = copy.copy(self)
+        mati = set(self.mati)
+        indeks.tambahan = dict(self.tambahan)
+        for row in rows:
+            id_ = row.get("id")
+            teks = _teks(row, self.kolom)
+            pos = self.posisi_id.get(id_)
+            if pos is not None and pos not in mati and not row.get(KOLOM_HAPUS) and self.teks[pos] == teks:
+                if indeks.rows is self.rows:
+                    indeks.rows = list(self.rows)
+                indeks.rows[pos] = row
+                continue
+            if pos is not None:
+                mati.add(pos)
+            indeks.tambahan.pop(id_, None)
+            if not row.get(KOLOM_HAPUS):
+                indeks.tambahan[id_] = (row, tuple(set(token(" ".join(teks)))))
+        indeks.mati = frozenset(mati)
+        if len(indeks.mati) + len(indeks.tambahan) > BATAS_TAMBAHAN:
+            return IndeksCari(indeks.semua(), self.kolom)
+        return indeks
+
+    def semua(self) -> List[Dict[str, Any]]:
+        """Baris yang terindeks saat ini"""
+        return [row for pos, row in enumerate(self.rows) if pos not in self.mati] + \
+            [row for row, _ in self.tambahan.values()]
+
+    def _rentang(self, prefix: str) -> range:
+        return range(bisect_left(self.kunci, prefix), bisect_left(self.kunci, prefix + "\uffff"))
+
+    def _kandidat(self, prefixes: List[str]) -> Iterator[int]:
+        if not prefixes:
+            yield from range(len(self.rows))
+            return
+        # Mulai dari prefix dengan token cocok paling sedikit
+        rentang = min((self._rentang(p) for p in prefixes), key=len)
+        batas_scan = len(self.rows) // 8
+        jumlah = 0
+        for i in rentang:
+            jumlah += len(self.posting[self.kunci[i]])
+            if jumlah > batas_scan:
+                # Prefix pendek ("a") cocok dengan banyak baris: lebih murah menelusuri baris
+                # dalam urutan hasil dan berhenti begitu `batas` tercapai
+                yield from (pos for pos in range(len(self.rows)) if _cocok(self.token_baris[pos], prefixes))
+                return
+        posisi = sorted({pos for i in rentang for pos in self.posting[self.kunci[i]]})
+        yield from (pos for pos in posisi if _cocok(self.token_baris[pos], prefixes))
+
+    def cari(self, kueri: str, batas: int = BATAS_SARAN,
+             saring: Optional[Callable[[Dict[str, Any]], bool]] = None) -> List[Dict[str, Any]]:
+        """Maksimal `batas` baris (salinan) yang cocok dengan semua kata di `kueri`"""
+        prefixes = token(kueri)
+        urutan: Iterator[Dict[str, Any]] = (self.rows[pos] for pos in self._kandidat(prefixes)
+                                             if pos not in self.mati)
+        if self.tambahan:
+            def kunci(row: Dict[str, Any]) -> str:
+                return str(row.get(self.kolom[0]) or "").lower()
+            lain = sorted((row for row, tokens in self.tambahan.values() if _cocok(tokens, prefixes)), key=kunci)
+            urutan = heapq.merge(urutan, lain, key=kunci)
+        hasil: List[Dict[str, Any]] = []
+        for row in urutan:
+            if saring is None or saring(row):
+                hasil.append(dict(row))
+                if len(hasil) >= batas:
+                    break
+        return hasil
+
+
+class Pencarian:
+    """IndeksCari per tabel, dibangun ulang hanya jika versi tabel di store berubah"""
+
+    def __init__(self) -> None:
+        self._indeks: Dict[str, Tuple[Any, IndeksCari]] = {}
+        self._lock = threading.Lock()
+
+    def indeks(self, store: Any, tabel: str) -> IndeksCari:
+        version = getattr(store, "version", None)
+        if version is None:
+            return IndeksCari(_hidup(store.load(tabel)), KOLOM_CARI[tabel])
+        with self._lock:
+            versi = version(tabel)
+            cached = self._indeks.get(tabel)
+            if cached is None or cached[0] != versi:
+                rows = _hidup(store.load(tabel))
+                indeks = cached[1].dengan_baris(rows) if cached is not None else None
+                cached = (versi, indeks or IndeksCari(rows, KOLOM_CARI[tabel]))
+                self._indeks[tabel] = cached
+            return cached[1]
+
+    def catat(self, store: Any, tabel: str, rows: List[Dict[str, Any]]) -> None:
+        """
+        Terapkan baris yang baru ditulis ke indeks `tabel` (IndeksCari.perbarui)
+
+        Seperti IndeksPeminjaman.catat: dipanggil di dalam transaksi setelah barisnya
+        disimpan dan diterapkan setelah commit. Indeks yang sudah tidak sesuai versi tabel
+        sebelum penulisan dibiarkan, dan dibangun ulang saat dibaca berikutnya.
+        """
+        version = getattr(store, "version", None)
+        if tabel not in KOLOM_CARI or version is None:
+            return
+        with self._lock:
+            cached = self._indeks.get(tabel)
+            versi_lama = cached[0] if cached is not None and cached[0] == version(tabel) else None
+        rows = [dict(row) for row in rows]
+
+        def terapkan() -> None:
+            with self._lock:
+                cached = self._indeks.get(tabel)
+                versi = version(tabel)
+                # Versi baru: tulisan sebelumnya di commit yang sama sudah diterapkan
+                if versi_lama is not None and cached is not None and cached[0] in (versi_lama, versi):
+                    self._indeks[tabel] = (versi, cached[1].perbarui(rows))
+        after_commit(terapkan)
@@ -0,0 +1,642 @@
+import csv
+import io
+import re
+import threading
+from contextlib import nullcontext
+from datetime import date, datetime
+from typing import Any, ContextManager, Dict, List, Optional, Tuple
+
+from utils.gabung import KOLOM_GABUNG, TIDAK_DIKENAL, Gabungan
+from utils.kategori import StatKategori
+from utils.laporan import Laporan
+from utils.lazy import lazy_import
+from utils.metrics import add_bytes, timed
+from utils.pencarian import BATAS_SARAN, KOLOM_CARI, Pencarian
+from utils.rollup import RollupSirkulasi
+from utils.schema import FORMAT_TANGGAL, KOLOM_HAPUS, dump_record, to_datetime
+
+pd = lazy_import("pandas")
+
+DURASI_PEMINJAMAN_HARI = 7
+LOG_PER_HALAMAN = 20
+# Buku ber-tombstone yang boleh menumpuk sebelum dipadatkan di latar belakang
+BATAS_TOMBSTONE = 200
+
+
+def batas_pinjam(var: Dict[str, str]) -> int:
+    """BATAS_PINJAM di variabel.txt: pinjaman aktif maksimal per anggota (0/kosong = tanpa batas)"""
+    try:
+        return max(int(var.get("BATAS_PINJAM", "0") or 0), 0)
+    except ValueError:
+        return 0
+
+# Nama tabel yang dikenal layanan
+TABEL = ("buku", "anggota", "peminjaman", "log_hapus", "kategori")
+
+# Kolom yang dibaca scanner: barcode/ISBN di buku, kartu (NIS) di anggota
+KOLOM_KODE = {"buku": "isbn", "anggota": "nis"}
+
+# Satu pemadatan buku per proses (lihat Perpustakaan.padatkan_latar)
+_memadatkan = threading.Lock()
+
+# (success, message, record yang dibuat/diubah)
+Hasil = Tuple[bool, str, Optional[Dict[str, Any]]]
+
+
+def now() -> str:
+    return datetime.now().strftime(FORMAT_TANGGAL)
+
+
+# ============= FUNGSI BACA (murni, tanpa I/O) =============
+def next_id(data: List[Dict[str, Any]]) -> int:
+    return max([int(r["id"]) for r in data if str(r.get("id", "")).isdigit()], default=0) + 1
+
+
+def tanpa_terhapus(data: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Lewati baris ber-tombstone (buku yang sudah dihapus tapi belum dipadatkan)"""
+    return [r for r in data if not r.get(KOLOM_HAPUS)]
+
+
+def cari_buku(data: List[Dict[str, Any]], keyword: str) -> List[Dict[str, Any]]:
+    """Cari buku berdasarkan judul/penulis/penerbit (case-insensitive)"""
+    keyword_lower = keyword.lower()
+    hasil = []
+    for b in data:
+        if (keyword_lower in str(b.get('judul', '')).lower() or
+                keyword_lower in str(b.get('penulis', '')).lower() or
+                keyword_lower in str(b.get('penerbit', '')).lower()):
+            hasil.append(b)
+    return hasil
+
+
+def buku_terlambat(pinjam: List[Dict[str, Any]], sekarang: Optional[datetime] = None) -> List[Dict[str, Any]]:
+    """Peminjaman aktif yang melewati DURASI_PEMINJAMAN_HARI, beserta jumlah hari terlambat"""
+    sekarang = sekarang or datetime.now()
+    terlambat = []
+    for p in pinjam:
+        if p.get("status") != "dipinjam":
+            continue
+        # Sudah berupa datetime dari repository; string hanya untuk data mentah
+        tanggal_pinjam = to_datetime(p.get("tanggal_pinjam"))
+        if tanggal_pinjam is None:
+            continue
+        durasi = (sekarang - tanggal_pinjam).days
+        if durasi > DURASI_PEMINJAMAN_HARI:
+            terlambat.append({"peminjaman": p, "hari_terlambat": durasi - DURASI_PEMINJAMAN_HARI})
+    return terlambat
+
+
+def normalisasi_isbn(kode: Any) -> str:
+    """ISBN/barcode tanpa spasi dan tanda hubung, huruf besar ("978-602-03 3295-6" -> "9786020332956")"""
+    return re.sub(r"[\s-]", "", str(kode or "")).upper()
+
+
+def kunci_kode(tabel: str, kode: Any) -> str:
+    """Nilai KOLOM_KODE yang dicari untuk hasil scan `kode`"""
+    kode = str(kode or "").strip()
+    return normalisasi_isbn(kode) if KOLOM_KODE[tabel] == "isbn" else kode
+
+
+def same_id(a: Any, b: Any) -> bool:
+    """Bandingkan ID yang bisa berupa int (JSON) atau string (kolom CSV non-numerik)"""
+    return str(a) == str(b)
+
+
+def riwayat_anggota(pinjam: List[Dict[str, Any]], id_anggota: int) -> List[Dict[str, Any]]:
+    return [p for p in pinjam if same_id(p.get("id_anggota"), id_anggota)]
+
+
+def statistik(buku: List[Dict[str, Any]], anggota: List[Dict[str, Any]],
+              pinjam: List[Dict[str, Any]]) -> Dict[str, int]:
+    aktif = len([p for p in pinjam if p.get("status") == "dipinjam"])
+    return {
+        "total_buku": len(buku),
+        "total_stok": sum(int(b.get("stok", 0) or 0) for b in buku),
+        "total_anggota": len(anggota),
+        "total_peminjaman": len(pinjam),
+        "peminjaman_aktif": aktif,
+        "peminjaman_selesai": len([p for p in pinjam if p.get("status") == "dikembalikan"]),
+        "buku_terlambat": len(buku_terlambat(pinjam))
+    }
+
+
+def ringkasan_kategori(kategori: List[Dict[str, Any]], hitung: Dict[Any, Dict[str, int]]) -> List[Dict[str, Any]]:
+    """Baris statistik per kategori (urut kamus kategori), plus buku tanpa kategori jika ada"""
+    kosong = {"judul": 0, "stok": 0, "dipinjam": 0}
+    hasil = [{"id": k["id"], "nama": k.get("nama", ""), **hitung.get(k["id"], kosong)} for k in kategori]
+    if None in hitung:
+        hasil.append({"id": None, "nama": "Tanpa kategori", **hitung[None]})
+    return hasil
+
+
+def ekspor(data: List[Dict[str, Any]], format: str = "csv", sheet_name: str = "Data") -> bytes:
+    """
+    Ekspor data tabel ke CSV atau Excel
+
+    Args:
+        data: Baris tabel
+        format (str): "csv" atau "xlsx"
+        sheet_name (str): Nama sheet untuk Excel
+
+    Returns:
+        bytes: Isi file hasil ekspor
+    """
+    with timed(f"export.{format}"):
+        hasil = _ekspor(data, format, sheet_name)
+        add_bytes(written=len(hasil))
+        return hasil
+
+
+def _ekspor(data: List[Dict[str, Any]], format: str, sheet_name: str) -> bytes:
+    if format == "xlsx":
+        output = io.BytesIO()
+        with pd.ExcelWriter(output, engine='openpyxl') as writer:
+            pd.DataFrame(data).to_excel(writer, sheet_name=sheet_name, index=False)
+        return output.getvalue()
+
+    fieldnames: List[str] = []
+    for row in data:
+        for key in row:
+            if key not in fieldnames:
+                fieldnames.append(key)
+    output_str = io.StringIO()
+    writer_csv = csv.DictWriter(output_str, fieldnames=fieldnames)
+    writer_csv.writeheader()
+    writer_csv.writerows(dump_record(row) for row in data)
+    return output_str.getvalue().encode("utf-8")
+
+
+# ============= LAYANAN =============
+class Perpustakaan:
+    """
+    Operasi bisnis perpustakaan (pinjam, kembalikan, tambah, hapus, ekspor).
+
+    Tidak tahu apa-apa soal Streamlit maupun CLI; dipakai langsung oleh
+    webui2.py/app.py atau lewat HTTP oleh utils/server.py.
+    """
+
+    def __init__(self, store: Any, covers: Any = None, indeks: Any = None, batas_pinjam: int = 0,
+                 pencarian: Optional[Pencarian] = None, gabungan: Optional[Gabungan] = None,
+                 stat_kategori: Optional[StatKategori] = None, batas_tombstone: int = BATAS_TOMBSTONE,
+                 laporan: Optional[Laporan] = None, rollup: Optional[RollupSirkulasi] = None) -> None:
+        self.store = store
+        self.covers = covers  # utils.covers.CoverStore; file cover dilepas saat tidak dirujuk lagi
+        self.indeks = indeks  # utils.indeks.IndeksPeminjaman; riwayat & pinjaman aktif per anggota
+        self.batas_pinjam = batas_pinjam  # pinjaman aktif maksimal per anggota, 0 = tanpa batas
+        self.pencarian = pencarian or Pencarian()  # indeks type-ahead anggota/buku
+        self.gabungan = gabungan or Gabungan()  # judul/nama peminjaman dan nama kategori buku
+        self.stat_kategori = stat_kategori or StatKategori()  # judul/stok/dipinjam per kategori
+        self.batas_tombstone = batas_tombstone  # buku terhapus sebelum dipadatkan, 0 = tidak otomatis
+        self.laporan_agregat = laporan or Laporan()  # sirkulasi & pengadaan, diperbarui dari change feed
+        self.rollup = rollup or RollupSirkulasi()  # deret pinjam/kembali/terlambat untuk grafik
+
+    # ---- baca ----
+    def daftar(self, tabel: str) -> List[Dict[str, Any]]:
+        """
+        Baris tabel; peminjaman dilengkapi judul buku dan nama siswa, buku dilengkapi
+        nama kategori (utils/gabung.py) tanpa buku yang sudah dihapus. Untuk ditulis
+        kembali pakai store.load().
+        """
+        if tabel == "buku":
+            return tanpa_terhapus(self.gabungan.daftar(self.store, tabel))
+        if tabel in KOLOM_GABUNG:
+            return self.gabungan.daftar(self.store, tabel)
+        return self.store.load(tabel)
+
+    def cari_buku(self, keyword: str) -> List[Dict[str, Any]]:
+        return cari_buku(self.daftar("buku"), keyword)
+
+    def buku_terlambat(self) -> List[Dict[str, Any]]:
+        return buku_terlambat(self.daftar("peminjaman"))
+
+    def _satu(self, tabel: str, id_: Any, terhapus: bool = False) -> Optional[Dict[str, Any]]:
+        """Baris ber-id `id_`; baris ber-tombstone dianggap tidak ada kecuali `terhapus`"""
+        if hasattr(self.store, "ambil"):
+            rows = self.store.ambil(tabel, [id_])
+            row = rows[0] if rows else None
+        else:
+            row = next((x for x in self.store.load(tabel) if x["id"] == id_), None)
+        return row if row is None or terhapus or not row.get(KOLOM_HAPUS) else None
+
+    def _cari_kolom(self, tabel: str, kolom: str, nilai: Any) -> Optional[Dict[str, Any]]:
+        if hasattr(self.store, "cari"):
+            row = self.store.cari(tabel, kolom, nilai)
+            if row is None or not row.get(KOLOM_HAPUS):
+                return row
+            # Peta kolom menunjuk baris pertama; nilai yang sama bisa dipakai ulang buku lain
+        return next((x for x in self.store.load(tabel) if x.get(kolom) == nilai and not x.get(KOLOM_HAPUS)), None)
+
+    def cari_kode(self, tabel: str, kode: Any) -> Optional[Dict[str, Any]]:
+        """
+        Buku dari ISBN/barcode, atau anggota dari NIS di kartu; angka yang tidak cocok
+        dicoba sebagai ID. Hash lookup, tidak memindai tabel.
+        """
+        kode = str(kode or "").strip()
+        if not kode or tabel not in KOLOM_KODE:
+            return None
+        row = self._cari_kolom(tabel, KOLOM_KODE[tabel], kunci_kode(tabel, kode))
+        if row is None and kode.isdigit():
+            row = self._satu(tabel, int(kode))
+        return row
+
+    def saran(self, tabel: str, kueri: str, batas: int = BATAS_SARAN, tersedia: bool = False) -> List[Dict[str, Any]]:
+        """
+        Type-ahead: maksimal `batas` anggota (nama, awalan NIS, kelas) atau buku
+        (judul, penulis, id) yang cocok dengan `kueri`; `tersedia` hanya buku dengan stok
+        """
+        if tabel not in KOLOM_CARI:
+            return []
+        saring = (lambda b: int(b.get("stok", 0) or 0) > 0) if tersedia else None
+        return self.pencarian.indeks(self.store, tabel).cari(kueri, batas, saring)
+
+    def riwayat_anggota(self, id_anggota: int) -> List[Dict[str, Any]]:
+        if self.indeks is not None and hasattr(self.store, "ambil"):
+            pinjam = self.store.ambil("peminjaman", self.indeks.riwayat(self.store, id_anggota))
+            return self.gabungan.gabung(self.store, "peminjaman", pinjam)
+        return riwayat_anggota(self.daftar("peminjaman"), id_anggota)
+
+    def jumlah_pinjaman_aktif(self, id_anggota: int) -> int:
+        if self.indeks is not None:
+            return self.indeks.jumlah_aktif(self.store, id_anggota)
+        return len([p for p in self.store.load("peminjaman")
+                    if same_id(p.get("id_anggota"), id_anggota) and p.get("status") == "dipinjam"])
+
+    def statistik(self) -> Dict[str, int]:
+        return statistik(self.daftar("buku"), self.daftar("anggota"), self.store.load("peminjaman"))
+
+    def statistik_kategori(self) -> List[Dict[str, Any]]:
+        """Jumlah judul, stok, dan pinjaman aktif per kategori, dari hitungan inkremental"""
+        return ringkasan_kategori(self.daftar("kategori"), self.stat_kategori.ringkasan(self.store))
+
+    def laporan(self) -> Dict[str, Any]:
+        """
+        Sirkulasi per bulan & kategori, judul terlaris, kelas teraktif, dan pengadaan
+        BOSP/Donatur per tahun, dari agregat yang diperbarui inkremental (utils/laporan.py);
+        `diperbarui` = waktu agregat terakhir dipastikan sesuai data
+        """
+        hasil = self.laporan_agregat.hasil(self.store)
+        kategori = self.gabungan.peta(self.store, "buku", "kategori")
+        judul = self.gabungan.peta(self.store, "peminjaman", "judul")
+        hasil["sirkulasi_bulanan"] = [dict(r, kategori=kategori.get(r["id_kategori"]) or TIDAK_DIKENAL)
+                                      for r in hasil["sirkulasi_bulanan"]]
+        hasil["judul_terlaris"] = [dict(r, judul=judul.get(r["id_buku"]) or TIDAK_DIKENAL)
+                                   for r in hasil["judul_terlaris"]]
+        return hasil
+
+    def grafik_sirkulasi(self, dari: Optional[date] = None, sampai: Optional[date] = None,
+                         satuan: str = "") -> Dict[str, Any]:
+        """Deret pinjam/kembali/terlambat per periode dari rollup (utils/rollup.py), bukan tabel"""
+        return self.rollup.seri(self.store, dari, sampai, satuan)
+
+    def buku_kategori(self, id_kategori: Any) -> List[Dict[str, Any]]:
+        """Buku dalam satu kategori (None = tanpa kategori), tanpa memindai tabel buku"""
+        ids = self.stat_kategori.id_buku(self.store, id_kategori)
+        if hasattr(self.store, "ambil"):
+            rows = self.store.ambil("buku", ids)
+        else:
+            rows = [b for b in self.store.load("buku") if b["id"] in ids]
+        return self.gabungan.gabung(self.store, "buku", rows)
+
+    def ekspor(self, tabel: str, format: str = "csv", sheet_name: str = "Data") -> bytes:
+        return ekspor(self.daftar(tabel), format, sheet_name)
+
+    def log_hapus(self, halaman: int = 1, per_halaman: int = LOG_PER_HALAMAN) -> Tuple[List[Dict[str, Any]], bool]:
+        """
+        Satu halaman log hapus buku, terbaru dulu, dan apakah masih ada halaman berikutnya
+
+        Dibaca dari akhir file jika store punya mundur(), jadi halaman pertama tidak
+        memuat seluruh log.
+        """
+        mulai = (max(halaman, 1) - 1) * per_halaman
+        if hasattr(self.store, "mundur"):
+            rows = self.store.mundur("log_hapus", mulai, per_halaman + 1)
+        else:
+            rows = self.store.load("log_hapus")[::-1][mulai:mulai + per_halaman + 1]
+        return rows[:per_halaman], len(rows) > per_halaman
+
+    # ---- tulis ----
+    def _transaksi(self) -> ContextManager[Any]:
+        """Group commit jika store mendukungnya, supaya tabel-tabel satu aksi ditulis bersama"""
+        transaksi = getattr(self.store, "transaksi", None)
+        return transaksi() if transaksi is not None else nullcontext()
+
+    def _id_berikut(self, tabel: str) -> int:
+        if hasattr(self.store, "id_berikut"):
+            return self.store.id_berikut(tabel)
+        return next_id(self.daftar(tabel))
+
+    def _simpan_baris(self, tabel: str, row: Dict[str, Any]) -> None:
+        """Simpan satu baris baru/berubah; incremental jika store punya upsert()"""
+        if hasattr(self.store, "upsert"):
+            self.store.upsert(tabel, [row])
+        else:
+            rows = self.store.load(tabel)
+            i = next((i for i, x in enumerate(rows) if x["id"] == row["id"]), None)
+            if i is None:
+                rows.append(row)
+            else:
+                rows[i] = row
+            self.store.save(tabel, rows)
+        self.pencarian.catat(self.store, tabel, [row])
+
+    def _tambah_baris(self, tabel: str, row: Dict[str, Any]) -> None:
+        """Tambahkan satu baris di akhir tabel log; tanpa menulis ulang isinya jika store punya tambah()"""
+        if hasattr(self.store, "tambah"):
+            self.store.tambah(tabel, [row])
+            return
+        self.store.save(tabel, self.store.load(tabel) + [row])
+
+    @timed("layanan.tambah_buku")
+    def tambah_buku(self, data: Dict[str, Any]) -> Hasil:
+        if not data.get("judul") or not data.get("penulis") or not data.get("penerbit"):
+            return False, "Judul, Penulis, dan Penerbit harus diisi!", None
+        try:
+            stok = int(data.get("stok", 0))
+        except (TypeError, ValueError):
+            return False, "Stok harus angka!", None
+        if stok < 0:
+            return False, "Stok tidak boleh minus.", None
+        isbn = normalisasi_isbn(data.get("isbn"))
+        if isbn and self._cari_kolom("buku", "isbn", isbn) is not None:
+            return False, "ISBN/barcode sudah dipakai buku lain!", None
+
+        buku_baru: Dict[str, Any] = dict(data)
+        if "isbn" in data:
+            buku_baru["isbn"] = isbn
+        buku_baru["id"] = self._id_berikut("buku")
+        buku_baru["stok"] = stok
+        buku_baru.setdefault("created_at", now())
+        buku_baru[KOLOM_HAPUS] = None  # kolom tombstone ikut di header CSV sejak awal
+        with self._transaksi():
+            self._kodekan_kategori(buku_baru)
+            self._simpan_baris("buku", buku_baru)
+            self.stat_kategori.catat(self.store, None, buku_baru)
+
+        return True, "Buku berhasil ditambahkan!", self.gabungan.gabung(self.store, "buku", [buku_baru])[0]
+
+    def _kodekan_kategori(self, buku: Dict[str, Any]) -> None:
+        """Ganti nama kategori di `buku` dengan id_kategori; kategori baru ditambahkan ke kamus"""
+        if "kategori" not in buku:
+            return
+        nama = str(buku.pop("kategori") or "").strip()
+        if not nama:
+            buku["id_kategori"] = None
+            return
+        kategori = self._cari_kolom("kategori", "nama", nama)
+        if kategori is None:
+            kategori_list = self.store.load("kategori")
+            kategori = {"id": next_id(kategori_list), "nama": nama}
+            kategori_list.append(kategori)
+            self.store.save("kategori", kategori_list)
+        buku["id_kategori"] = kategori["id"]
+
+    @timed("layanan.ubah_buku")
+    def ubah_buku(self, id_buku: int, perubahan: Dict[str, Any]) -> Hasil:
+        # Satu baris buku yang ditulis; judul di riwayat peminjaman ikut lewat join
+        target = self._satu("buku", id_buku)
+        if not target:
+            return False, "Buku tidak ditemukan.", None
+        lama = dict(target)
+        cover_lama = target.get("cover", "")
+        target.update({k: v for k, v in perubahan.items() if k != "id"})
+        if "isbn" in perubahan:
+            target["isbn"] = normalisasi_isbn(perubahan["isbn"])
+            lain = self._cari_kolom("buku", "isbn", target["isbn"]) if target["isbn"] else None
+            if lain is not None and lain["id"] != id_buku:
+                return False, "ISBN/barcode sudah dipakai buku lain!", None
+        with self._transaksi():
+            self._kodekan_kategori(target)
+            self._simpan_baris("buku", target)
+            self.stat_kategori.catat(self.store, lama, target)
+            if self.covers is not None and target.get("cover", "") != cover_lama:
+                self.covers.lepas(cover_lama, self.store.load("buku"))
+        return True, "Buku berhasil diubah!", self.gabungan.gabung(self.store, "buku", [target])[0]
+
+    @timed("layanan.hapus_buku")
+    def hapus_buku(self, id_buku: int, alasan: str) -> Hasil:
+        """
+        Tandai buku terhapus (tombstone) dan catat alasannya; hanya baris itu yang ditulis
+
+        Cover belum dilepas supaya buku bisa dipulihkan; baris dan cover-nya dibuang saat
+        tabel dipadatkan (padatkan_buku), otomatis di latar belakang setelah
+        `batas_tombstone` buku terhapus.
+        """
+        if not alasan:
+            return False, "Alasan tidak boleh kosong!", None
+        dipilih = self._satu("buku", id_buku)
+        if not dipilih:
+            return False, "Buku tidak ditemukan.", None
+
+        with self._transaksi():
+            self._simpan_baris("buku", dict(dipilih, **{KOLOM_HAPUS: now()}))
+            self.stat_kategori.catat(self.store, dipilih, None)
+
+            if hasattr(self.store, "mundur"):
+                terakhir = self.store.mundur("log_hapus", 0, 1)
+            else:
+                terakhir = self.store.load("log_hapus")
+            log = {
+                "id": next_id(terakhir),
+                "id_buku": dipilih["id"],
+                "judul": dipilih["judul"],
+                "alasan": alasan,
+                "deleted_at": now()
+            }
+            self._tambah_baris("log_hapus", log)
+        if self.batas_tombstone and len(self.buku_terhapus()) >= self.batas_tombstone:
+            self.padatkan_latar()
+        return True, "Buku berhasil dihapus dan alasan dicatat.", log
+
+    def buku_terhapus(self) -> List[Dict[str, Any]]:
+        """Buku ber-tombstone yang masih bisa dipulihkan (belum dipadatkan)"""
+        if hasattr(self.store, "terhapus"):
+            ids = sorted(self.store.terhapus("buku"))
+            rows = self.store.ambil("buku", ids)
+        else:
+            rows = [b for b in self.store.load("buku") if b.get(KOLOM_HAPUS)]
+        return self.gabungan.gabung(self.store, "buku", rows)
+
+    @timed("layanan.pulihkan_buku")
+    def pulihkan_buku(self, id_buku: int) -> Hasil:
+        """Batalkan hapus_buku selama bukunya belum dipadatkan"""
+        target = self._satu("buku", id_buku, terhapus=True)
+        if not target or not target.get(KOLOM_HAPUS):
+            return False, "Buku terhapus tidak ditemukan (mungkin sudah dipadatkan).", None
+        if target.get("isbn") and self._cari_kolom("buku", "isbn", target["isbn"]) is not None:
+            return False, "ISBN/barcode sudah dipakai buku lain!", None
+        target[KOLOM_HAPUS] = None
+        with self._transaksi():
+            self._simpan_baris("buku", target)
+            self.stat_kategori.catat(self.store, None, target)
+        return True, "Buku berhasil dipulihkan!", self.gabungan.gabung(self.store, "buku", [target])[0]
+
+    @timed("layanan.padatkan_buku")
+    def padatkan_buku(self) -> Hasil:
+        """Buang fisik buku ber-tombstone (satu tulis utuh) dan lepas cover-nya"""
+        with self._transaksi():
+            if hasattr(self.store, "padatkan"):
+                dibuang = self.store.padatkan("buku")
+            else:
+                buku = self.store.load("buku")
+                dibuang = [b for b in buku if b.get(KOLOM_HAPUS)]
+                if dibuang:
+                    self.store.save("buku", tanpa_terhapus(buku))
+            if self.covers is not None and dibuang:
+                sisa = self.store.load("buku")
+                for b in dibuang:
+                    self.covers.lepas(b.get("cover", ""), sisa)
+        return True, f"{len(dibuang)} buku terhapus dipadatkan.", {"jumlah": len(dibuang)}
+
+    def padatkan_latar(self) -> Optional[threading.Thread]:
+        """
+        Jalankan padatkan_buku di thread terpisah
+
+        Returns:
+            Thread yang berjalan, atau None jika pemadatan lain masih berjalan
+        """
+        if not _memadatkan.acquire(blocking=False):
+            return None
+
+        def run() -> None:
+            try:
+                self.padatkan_buku()
+            except Exception as e:
+                print(f"Error memadatkan buku: {e}")
+            finally:
+                _memadatkan.release()
+
+        thread = threading.Thread(target=run, name="padatkan-buku", daemon=False)
+        thread.start()
+        return thread
+
+    @timed("layanan.tambah_anggota")
+    def tambah_anggota(self, data: Dict[str, Any]) -> Hasil:
+        nama = str(data.get("nama", "")).strip()
+        kelas = str(data.get("kelas", "")).strip()
+        nis = str(data.get("nis", "")).strip()
+        if not nama or not kelas or not nis:
+            return False, "Semua field harus diisi!", None
+
+        if self._cari_kolom("anggota", "nis", nis) is not None:
+            return False, "NIS sudah terdaftar!", None
+
+        anggota_baru = {
+            "id": self._id_berikut("anggota"),
+            "nama": nama,
+            "kelas": kelas,
+            "nis": nis,
+            "created_at": now()
+        }
+        with self._transaksi():
+            self._simpan_baris("anggota", anggota_baru)
+        return True, "Siswa ditambahkan!", anggota_baru
+
+    @timed("layanan.pinjam")
+    def pinjam(self, id_buku: int, id_anggota: int) -> Hasil:
+        # Lookup per id dan tulis per baris: biaya satu pinjam tidak bergantung ukuran katalog
+        b = self._satu("buku", id_buku)
+        s = self._satu("anggota", id_anggota)
+        if not b or not s:
+            return False, "Buku atau siswa tidak ditemukan.", None
+        if int(b.get("stok", 0) or 0) <= 0:
+            return False, "Stok buku habis.", None
+        if self.indeks is not None:
+            self.indeks.segarkan(self.store)
+        self.rollup.segarkan(self.store)
+        if self.batas_pinjam and self.jumlah_pinjaman_aktif(s["id"]) >= self.batas_pinjam:
+            return False, f"Siswa sudah meminjam {self.batas_pinjam} buku (batas maksimal).", None
+
+        # Hanya id yang disimpan; judul dan nama diisi saat dibaca
+        peminjaman_baru = {
+            "id": self._id_berikut("peminjaman"),
+            "id_buku": b["id"],
+            "id_anggota": s["id"],
+            "status": "dipinjam",
+            "tanggal_pinjam": now(),
+            "tanggal_kembali": ""
+        }
+        lama = dict(b)
+        b["stok"] = int(b["stok"]) - 1
+
+        with self._transaksi():
+            self._simpan_baris("buku", b)
+            self.stat_kategori.catat(self.store, lama, b, dipinjam=1)
+            self._simpan_baris("peminjaman", peminjaman_baru)
+            if self.indeks is not None:
+                self.indeks.catat(self.store, peminjaman_baru)
+            self.rollup.catat(self.store, peminjaman_baru, baru=True)
+        return True, "Buku dipinjam!", dict(peminjaman_baru, judul=b["judul"], nama=s["nama"])
+
+    @timed("layanan.pinjam_kode")
+    def pinjam_kode(self, kode_buku: str, kode_anggota: str) -> Hasil:
+        """Pinjam dari hasil scan: ISBN/barcode (atau ID) buku dan NIS di kartu (atau ID) siswa"""
+        s = self.cari_kode("anggota", kode_anggota)
+        if not s:
+            return False, f"Kartu siswa '{kode_anggota}' tidak dikenal.", None
+        b = self.cari_kode("buku", kode_buku)
+        if not b:
+            return False, f"Buku dengan kode '{kode_buku}' tidak ditemukan.", None
+        return self.pinjam(b["id"], s["id"])
+
+    @timed("layanan.kembalikan")
+    def kembalikan(self, id_pinjam: int) -> Hasil:
+        p = self._satu("peminjaman", id_pinjam)
+        if not p or p.get("status") != "dipinjam":
+            return False, "Data peminjaman tidak ditemukan.", None
+
+        if self.indeks is not None:
+            self.indeks.segarkan(self.store)
+        self.rollup.segarkan(self.store)
+        # Buku yang sudah dihapus tetap ada sampai dipadatkan; stoknya dikembalikan
+        # supaya benar jika bukunya dipulihkan
+        b = self._satu("buku", p["id_buku"], terhapus=True)
+        p["status"] = "dikembalikan"
+        p["tanggal_kembali"] = now()
+        with self._transaksi():
+            if b:
+                lama = dict(b)
+                b["stok"] = int(b.get("stok", 0) or 0) + 1
+                self._simpan_baris("buku", b)
+                self.stat_kategori.catat(self.store, lama, b, dipinjam=-1)
+            self._simpan_baris("peminjaman", p)
+            if self.indeks is not None:
+                self.indeks.catat(self.store, p)
+            self.rollup.catat(self.store, p, baru=False)
+        return True, "Buku dikembalikan!", self.gabungan.gabung(self.store, "peminjaman", [p])[0]
+
+
+# Operasi yang mengubah data; dipakai server untuk antrian writer
+AKSI_TULIS = ("tambah_buku", "ubah_buku", "hapus_buku", "pulihkan_buku", "padatkan_buku", "tambah_anggota", "pinjam",
+              "pinjam_kode", "kembalikan")
+
+
+def buat_layanan(store: Any, service_url: str = "", covers: Any = None, indeks: Any = None,
+                 batas_pinjam: int = 0, pencarian: Optional[Pencarian] = None,
+                 gabungan: Optional[Gabungan] = None, stat_kategori: Optional[StatKategori] = None,
+                 laporan: Optional[Laporan] = None, rollup: Optional[RollupSirkulasi] = None) -> Any:
+    """
+    Pilih layanan: lokal (in-process) atau klien HTTP jika `service_url` diisi
+
+    Args:
+        store: Objek penyimpanan dengan method load(tabel) dan save(tabel, data),
+            biasanya utils.repository.Repository
+        service_url (str): Alamat utils/server.py, misal "http://127.0.0.1:8765"
+        covers: utils.covers.CoverStore untuk melepas cover buku yang dihapus
+        indeks: utils.indeks.IndeksPeminjaman untuk riwayat/pinjaman aktif per anggota
+        batas_pinjam (int): Pinjaman aktif maksimal per anggota (0 = tanpa batas)
+        pencarian: utils.pencarian.Pencarian yang dipakai bersama antar instance
+            (misal antar rerun Streamlit) supaya indeks type-ahead tidak dibangun ulang
+        gabungan: utils.gabung.Gabungan yang dipakai bersama, supaya join peminjaman
+            dengan judul/nama tidak diulang selama tabelnya tidak berubah
+        stat_kategori: utils.kategori.StatKategori yang dipakai bersama, supaya hitungan
+            per kategori tidak dibangun ulang per instance
+        laporan: utils.laporan.Laporan yang dipakai bersama; Laporan.from_variabel
+            menyimpan agregatnya di disk sehingga tidak dibangun ulang per proses
+        rollup: utils.rollup.RollupSirkulasi yang dipakai bersama untuk grafik sirkulasi;
+            RollupSirkulasi.from_variabel menyimpannya di disk
+    """
+    if service_url:
+        from utils.server import LayananHttp
+        return LayananHttp(service_url)
+    return Perpustakaan(store, covers, indeks, batas_pinjam, pencarian, gabungan, stat_kategori, laporan=laporan,
+                        rollup=rollup)
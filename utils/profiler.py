@@ -0,0 +1,235 @@
+"""
+Mode profiling yang bisa dinyalakan saat aplikasi berjalan (tanpa restart).
+
+Aktif jika PROFILING=1 di variabel.txt atau dinyalakan lewat tombol admin di web UI.
+Setiap rerun Streamlit / aksi menu CLI dibungkus cProfile dan dua snapshot
+tracemalloc; hasilnya ditulis ke folder diagnostik:
+
+    diagnostics/profil/20240101_120000_123456_Dashboard.prof        (pstats)
+    diagnostics/profil/20240101_120000_123456_Dashboard.alloc.json  (top alokasi)
+
+Hanya `keep` profil terbaru yang disimpan. cProfile hanya bisa aktif satu per
+proses, jadi rerun sesi lain yang berjalan bersamaan tidak ikut diprofil.
+"""
+import cProfile
+import json
+import os
+import pstats
+import re
+import threading
+import tracemalloc
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+DEFAULT_FOLDER = os.path.join("diagnostics", "profil")
+DEFAULT_KEEP = 20
+TOP_ALLOC = 30
+TRACEMALLOC_FRAMES = 1
+
+
+def _slug(label: str) -> str:
+    return re.sub(r"[^0-9A-Za-z_-]+", "_", label).strip("_")[:40] or "run"
+
+
+class _Sesi:
+    def __init__(self, label: str) -> None:
+        self.label = label
+        self.mulai = datetime.now()
+        self.thread = threading.current_thread()
+        self.profile = cProfile.Profile()
+        self.before: Optional[tracemalloc.Snapshot] = None
+
+
+class Profiler:
+    """Satu per proses; dipakai bersama oleh semua sesi web UI"""
+
+    def __init__(self, folder: str = DEFAULT_FOLDER, keep: int = DEFAULT_KEEP) -> None:
+        self.folder = folder
+        self.keep = keep
+        self.manual = False   # dinyalakan dari tombol admin
+        self.config = False   # dari PROFILING di variabel.txt
+        self._lock = threading.Lock()
+        self._sesi: Optional[_Sesi] = None
+
+    @property
+    def enabled(self) -> bool:
+        return self.manual or self.config
+
+    def configure(self, var: Dict[str, str]) -> None:
+        """Baca PROFILING, FOLDER_DIAGNOSTICS dan PROFILING_KEEP dari variabel.txt"""
+        self.config = var.get("PROFILING", "0").strip().lower() in ("1", "true", "ya", "on")
+        folder = var.get("FOLDER_DIAGNOSTICS")
+        if folder:
+            self.folder = os.path.join(folder, "profil")
+        try:
+            self.keep = max(1, int(var.get("PROFILING_KEEP", self.keep)))
+        except ValueError:
+            pass
+        if not self.enabled:
+            self._stop_tracemalloc()
+
+    # ---- rekam ----
+    def start(self, label: str) -> bool:
+        """
+        Mulai profil untuk satu rerun/aksi menu
+
+        Returns:
+            bool: False jika profiling mati atau sesi lain sedang diprofil
+        """
+        if not self.enabled:
+            return False
+        with self._lock:
+            lama = self._sesi
+            if lama is not None:
+                # Rerun yang dihentikan st.rerun()/st.stop() tidak sempat memanggil stop()
+                if lama.thread is not threading.current_thread() and lama.thread.is_alive():
+                    return False
+                self._sesi = None
+                self._finish(lama)
+            sesi = _Sesi(label)
+            if not tracemalloc.is_tracing():
+                tracemalloc.start(TRACEMALLOC_FRAMES)
+            sesi.before = tracemalloc.take_snapshot()
+            try:
+                sesi.profile.enable()
+            except ValueError as e:  # profiler lain (debugger) sudah aktif
+                print(f"Error starting profiler: {e}")
+                return False
+            self._sesi = sesi
+            return True
+
+    def stop(self) -> Optional[str]:
+        """Akhiri profil thread ini; kembalikan path file .prof"""
+        with self._lock:
+            sesi = self._sesi
+            if sesi is None or sesi.thread is not threading.current_thread():
+                return None
+            self._sesi = None
+            return self._finish(sesi)
+
+    def _finish(self, sesi: _Sesi) -> Optional[str]:
+        sesi.profile.disable()
+        try:
+            os.makedirs(self.folder, exist_ok=True)
+            base = os.path.join(self.folder, f"{sesi.mulai.strftime('%Y%m%d_%H%M%S_%f')}_{_slug(sesi.label)}")
+            sesi.profile.dump_stats(base + ".prof")
+            alokasi = self._alokasi(sesi)
+            with open(base + ".alloc.json", "w", encoding="utf-8") as f:
+                json.dump({"label": sesi.label, "mulai": sesi.mulai.strftime("%Y-%m-%d %H:%M:%S"),
+                           "alokasi": alokasi}, f, indent=4, ensure_ascii=False)
+            self._rotate()
+            return base + ".prof"
+        except Exception as e:
+            print(f"Error saving profile: {e}")
+            return None
+
+    def _alokasi(self, sesi: _Sesi) -> List[Dict[str, Any]]:
+        if sesi.before is None or not tracemalloc.is_tracing():
+            return []
+        filters = [
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap*>")
+        ]
+        after = tracemalloc.take_snapshot().filter_traces(filters)
+        before = sesi.before.filter_traces(filters)
+        hasil = []
+        for stat in after.compare_to(before, "lineno")[:TOP_ALLOC]:
+            frame = stat.traceback[0]
+            hasil.append({
+                "lokasi": f"{frame.filename}:{frame.lineno}",
+                "size_diff": stat.size_diff,
+                "count_diff": stat.count_diff,
+                "size": stat.size
+            })
+        return hasil
+
+    def _rotate(self) -> None:
+        for path in daftar_profil(self.folder)[self.keep:]:
+            for p in (path, path[:-len(".prof")] + ".alloc.json"):
+                try:
+                    os.remove(p)
+                except OSError:
+                    pass
+
+    def _stop_tracemalloc(self) -> None:
+        with self._lock:
+            if self._sesi is None and tracemalloc.is_tracing():
+                tracemalloc.stop()
+
+
+# ---- baca hasil ----
+def daftar_profil(folder: str = DEFAULT_FOLDER) -> List[str]:
+    """File .prof di folder diagnostik, terbaru dulu"""
+    if not os.path.isdir(folder):
+        return []
+    files = [os.path.join(folder, name) for name in os.listdir(folder) if name.endswith(".prof")]
+    return sorted(files, reverse=True)
+
+
+def top_fungsi(path: str, top: int = 30) -> List[Dict[str, Any]]:
+    """Fungsi dengan waktu kumulatif terbesar dari satu file .prof"""
+    stats = pstats.Stats(path)
+    rows = []
+    for (filename, lineno, func), (cc, nc, tt, ct, _) in stats.stats.items():  # type: ignore[attr-defined]
+        rows.append({
+            "fungsi": func,
+            "lokasi": f"{filename}:{lineno}",
+            "panggilan": nc,
+            "tottime_ms": round(tt * 1000, 3),
+            "cumtime_ms": round(ct * 1000, 3)
+        })
+    rows.sort(key=lambda r: r["cumtime_ms"], reverse=True)
+    return rows[:top]
+
+
+def top_alokasi(path: str) -> Dict[str, Any]:
+    """Isi file .alloc.json pasangan sebuah file .prof"""
+    alloc = path[:-len(".prof")] + ".alloc.json"
+    try:
+        with open(alloc, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (json.JSONDecodeError, IOError):
+        return {"alokasi": []}
+
+
+# ---- RSS ----
+def _status_kb(field: str) -> Optional[int]:
+    try:
+        with open("/proc/self/status", "r") as f:
+            for line in f:
+                if line.startswith(field + ":"):
+                    return int(line.split()[1])
+    except (OSError, ValueError, IndexError):
+        pass
+    return None
+
+
+class ukur_rss:
+    """
+    `with ukur_rss() as rss: ...` lalu rss["puncak_mb"] / rss["tambahan_mb"]
+
+    Puncak RSS proses selama blok berjalan (termasuk memori Pillow/numpy yang tidak
+    terlihat oleh tracemalloc). Linux saja: penanda puncak di-reset lewat
+    /proc/self/clear_refs; di OS lain nilainya None. Angka ini milik seluruh proses,
+    jadi sesi lain yang berjalan bersamaan ikut terhitung.
+    """
+
+    def __enter__(self) -> Dict[str, Optional[float]]:
+        self.hasil: Dict[str, Optional[float]] = {"puncak_mb": None, "tambahan_mb": None}
+        self._awal = _status_kb("VmRSS")
+        try:
+            with open("/proc/self/clear_refs", "w") as f:
+                f.write("5")  # reset VmHWM ke RSS saat ini
+        except OSError:
+            self._awal = None
+        return self.hasil
+
+    def __exit__(self, *exc: Any) -> None:
+        puncak = _status_kb("VmHWM")
+        if self._awal is None or puncak is None:
+            return
+        self.hasil["puncak_mb"] = round(puncak / 1024, 1)
+        self.hasil["tambahan_mb"] = round(max(puncak - self._awal, 0) / 1024, 1)
+
+
+PROFILER = Profiler()
@@ -0,0 +1,643 @@
+"""
+Lapisan data tunggal untuk CLI (app.py), web UI (webui2.py) dan utils/server.py.
+
+Penyimpanan utama adalah file CSV yang diatur di variabel.txt (plus kategori.json).
+Hasil parsing (bertipe sesuai utils.schema) di-cache per tabel dan divalidasi dengan
+(mtime, size) file, jadi tulisan dari proses lain langsung terlihat tanpa parsing
+ulang yang tidak perlu.
+
+upsert() (pinjam/kembalikan) tidak menulis ulang CSV: baris yang berubah ditambahkan
+(append_text) ke file kecil `<tabel>.csv.delta`, satu baris JSON per record di bawah
+baris pertama berisi hash CSV dasarnya, dan digabung saat tabel dibaca (baris yang
+lebih belakang menang). Begitu delta melewati BATAS_DELTA baris, atau tabel disimpan
+utuh dengan save(), isinya dipadatkan ke CSV dan delta dihapus. Delta yang hash
+dasarnya tidak cocok lagi (CSV ditimpa proses lain, crash sebelum delta dihapus)
+diabaikan, begitu juga baris delta yang rusak atau terpotong.
+
+Buku yang dihapus hanya diberi tombstone (schema.KOLOM_HAPUS) lewat upsert();
+terhapus() memberi set id-nya tanpa memindai tabel, dan padatkan() membuang
+baris-baris itu secara fisik dengan satu tulis utuh.
+
+tambah() untuk tabel yang hanya bertambah (log_hapus): baris baru ditambahkan di akhir
+CSV tanpa membaca isinya, dan mundur() membaca halaman terbaru dari akhir file.
+"""
+import glob
+import hashlib
+import itertools
+import json
+import os
+import threading
+from typing import Any, Callable, ContextManager, Dict, FrozenSet, List, Optional, Set, Tuple
+
+from utils.atomic import Transaksi, after_commit, append_text, atomic_open, current, transaksi, ukuran_tulis
+from utils.converter import baris_csv, header_csv, load_csv, load_csv_mundur, save_csv
+from utils.iolog import catat
+from utils.journal import Journal
+from utils.metrics import add_bytes, file_size, timed
+from utils.schema import KOLOM_HAPUS, dump_record, parse_record, parse_records
+
+DEFAULT_VARIABEL = {
+    "FOLDER_DB": "database",
+    "FILE_BUKU": "database/buku.csv",
+    "FILE_ANGGOTA": "database/anggota.csv",
+    "FILE_PINJAM": "database/peminjaman.csv",
+    "FILE_LOG_HAPUS": "database/log_hapus_buku.csv"
+}
+
+# Nama file JSON lama milik app.py, dipakai sekali saat migrasi
+LEGACY_JSON = {
+    "buku": "buku.json",
+    "anggota": "anggota.json",
+    "peminjaman": "peminjaman.json",
+    "log_hapus": "log_hapus_buku.json"
+}
+
+Versi = Tuple[int, ...]
+
+DELTA_EXT = ".delta"
+BATAS_DELTA = 500  # baris di file delta sebelum dipadatkan ke CSV
+
+
+def _stat(path: str) -> Versi:
+    try:
+        st = os.stat(path)
+    except OSError:
+        return (0, 0)
+    return (st.st_mtime_ns, st.st_size)
+
+
+def _maks_id(rows: List[Dict[str, Any]]) -> int:
+    return max([int(r["id"]) for r in rows if str(r.get("id", "")).isdigit()], default=0)
+
+
+def _terhapus(rows: List[Dict[str, Any]]) -> Set[Any]:
+    return {r.get("id") for r in rows if r.get(KOLOM_HAPUS)}
+
+
+def _baris_delta(rows: List[Dict[str, Any]]) -> str:
+    return "".join(json.dumps(row, ensure_ascii=False) + "\n" for row in rows)
+
+
+def _terapkan_upsert(rows: List[Dict[str, Any]], upsert: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Salinan list `rows` dengan baris ber-id sama diganti, sisanya ditambahkan di akhir"""
+    hasil = list(rows)
+    posisi = {row.get("id"): i for i, row in enumerate(hasil)}
+    for row in upsert:
+        i = posisi.get(row["id"])
+        if i is None:
+            posisi[row["id"]] = len(hasil)
+            hasil.append(row)
+        else:
+            hasil[i] = row
+    return hasil
+
+
+def load_variabel(variabel_file: str = "variabel.txt") -> Dict[str, str]:
+    """Baca variabel.txt; nilai yang tidak ada memakai DEFAULT_VARIABEL"""
+    var: Dict[str, str] = dict(DEFAULT_VARIABEL)
+    if os.path.exists(variabel_file):
+        with open(variabel_file, "r") as f:
+            for line in f:
+                if "=" in line and not line.strip().startswith("#"):
+                    key, value = line.strip().split("=", 1)
+                    var[key.strip()] = value.strip()
+    return var
+
+
+def paths_from_variabel(var: Dict[str, str]) -> Dict[str, str]:
+    """Petakan variabel.txt ke lokasi file per tabel"""
+    folder_db = var.get("FOLDER_DB", "database")
+    return {
+        "buku": var.get("FILE_BUKU", DEFAULT_VARIABEL["FILE_BUKU"]),
+        "anggota": var.get("FILE_ANGGOTA", DEFAULT_VARIABEL["FILE_ANGGOTA"]),
+        "peminjaman": var.get("FILE_PINJAM", DEFAULT_VARIABEL["FILE_PINJAM"]),
+        "log_hapus": var.get("FILE_LOG_HAPUS", DEFAULT_VARIABEL["FILE_LOG_HAPUS"]),
+        "kategori": os.path.join(folder_db, "kategori.json")
+    }
+
+
+def load_paths(variabel_file: str = "variabel.txt") -> Dict[str, str]:
+    return paths_from_variabel(load_variabel(variabel_file))
+
+
+class Repository:
+    """
+    Store terpadu dengan cache per tabel dan notifikasi perubahan.
+
+    - load(tabel) / save(tabel, data) dipakai oleh utils.perpustakaan.Perpustakaan
+    - subscribe(callback) dipanggil dengan nama tabel setiap kali tabel berubah,
+      baik karena save() di proses ini maupun (lewat poll()) karena proses lain,
+      beserta baris yang ditulis upsert()/tambah() (None = seluruh tabel bisa berubah)
+    """
+
+    def __init__(self, paths: Dict[str, str], journal: Optional[Journal] = None) -> None:
+        self.paths = paths
+        self.journal = journal  # change log untuk point-in-time restore (utils.journal)
+        self._cache: Dict[str, Tuple[Versi, List[Dict[str, Any]]]] = {}
+        self._seen: Dict[str, Versi] = {}
+        # (tabel, kolom) -> (list baris, nilai -> posisi); posisi tetap valid setelah upsert()
+        self._peta: Dict[Tuple[str, str], Tuple[List[Dict[str, Any]], Dict[Any, int]]] = {}
+        self._maks_id: Dict[str, Tuple[List[Dict[str, Any]], int]] = {}
+        self._terhapus: Dict[str, Tuple[List[Dict[str, Any]], Set[Any]]] = {}  # id ber-tombstone
+        self._basis: Dict[str, Tuple[Versi, Dict[str, Any]]] = {}
+        self._delta: Dict[str, Tuple[Versi, Dict[str, Any]]] = {}
+        self._listeners: List[Callable[[str, Optional[List[Dict[str, Any]]]], None]] = []
+        self._lock = threading.RLock()
+
+    @classmethod
+    def from_variabel(cls, variabel_file: str = "variabel.txt") -> "Repository":
+        var = load_variabel(variabel_file)
+        return cls(paths_from_variabel(var), Journal.from_variabel(var))
+
+    # ---- versi & notifikasi ----
+    def version(self, tabel: str) -> Versi:
+        """Tanda versi file tabel: (mtime_ns, size), (0, 0) jika belum ada; plus versi delta jika ada"""
+        path = self.paths[tabel]
+        versi = _stat(path)
+        if path.endswith(".csv"):
+            delta = _stat(path + DELTA_EXT)
+            if delta != (0, 0):
+                return versi + delta
+        return versi
+
+    def subscribe(self, callback: Callable[[str, Optional[List[Dict[str, Any]]]], None]) -> None:
+        self._listeners.append(callback)
+
+    def _notify(self, tabel: str, rows: Optional[List[Dict[str, Any]]] = None) -> None:
+        for callback in list(self._listeners):
+            try:
+                callback(tabel, rows)
+            except Exception as e:
+                print(f"Error in change listener: {e}")
+
+    def poll(self) -> List[str]:
+        """Cek perubahan dari proses lain; listener dipanggil untuk tiap tabel yang berubah"""
+        changed: List[str] = []
+        with self._lock:
+            for tabel in self.paths:
+                versi = self.version(tabel)
+                if tabel in self._seen and self._seen[tabel] != versi:
+                    changed.append(tabel)
+                self._seen[tabel] = versi
+        for tabel in changed:
+            self._notify(tabel)
+        return changed
+
+    # ---- baca/tulis ----
+    def _read_file(self, tabel: str) -> List[Dict[str, Any]]:
+        path = self.paths[tabel]
+        with timed("storage.load", tabel=tabel), catat("load", tabel, path) as ev:
+            add_bytes(read=file_size(path))
+            rows = self._read_file_raw(tabel)
+            ev["rows"] = len(rows)
+            return rows
+
+    def _read_file_raw(self, tabel: str) -> List[Dict[str, Any]]:
+        path = self.paths[tabel]
+        if not os.path.exists(path):
+            return []
+        if path.endswith(".csv"):
+            rows = load_csv(path, tabel)
+            delta = self._baca_delta(tabel)
+            if delta is not None:
+                rows = _terapkan_upsert(rows, [parse_record(tabel, row) for row in delta["upsert"]])
+            return rows
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                return parse_records(tabel, json.load(f))
+        except (json.JSONDecodeError, IOError):
+            return []
+
+    def _write_file(self, tabel: str, data: List[Dict[str, Any]]) -> None:
+        path = self.paths[tabel]
+        with timed("storage.save", tabel=tabel), catat("save", tabel, path) as ev:
+            ev["ok"] = self._write_file_raw(tabel, data)
+            ev["rows"] = len(data)
+            ev["bytes"] = ukuran_tulis(path)
+            add_bytes(written=ev["bytes"])
+
+    def _write_file_raw(self, tabel: str, data: List[Dict[str, Any]]) -> bool:
+        path = self.paths[tabel]
+        rows = [dump_record(row) for row in data]
+        if path.endswith(".csv"):
+            return save_csv(path, rows)
+        try:
+            os.makedirs(os.path.dirname(path) if os.path.dirname(path) else '.', exist_ok=True)
+            with atomic_open(path, "w") as f:
+                json.dump(rows, f, indent=4, ensure_ascii=False)
+            return True
+        except Exception as e:
+            print(f"Error saving {tabel}: {e}")
+            return False
+
+    # ---- delta ----
+    def _basis_csv(self, tabel: str) -> Dict[str, Any]:
+        """Ukuran + hash isi CSV yang menjadi dasar delta (di-cache per versi file)"""
+        path = self.paths[tabel]
+        versi = _stat(path)
+        cached = self._basis.get(tabel)
+        if cached is None or cached[0] != versi:
+            try:
+                with open(path, "rb") as f:
+                    data = f.read()
+            except OSError:
+                data = b""
+            cached = (versi, {"size": len(data), "hash": hashlib.blake2b(data, digest_size=16).hexdigest()})
+            self._basis[tabel] = cached
+        return cached[1]
+
+    def _baca_delta(self, tabel: str) -> Optional[Dict[str, Any]]:
+        """
+        Isi file delta: {"basis", "upsert" (sudah digabung per id), "baris" (jumlah
+        record di file)}, atau None jika tidak ada atau dasarnya bukan CSV saat ini
+        """
+        path = self.paths[tabel] + DELTA_EXT
+        versi = _stat(path)
+        cached = self._delta.get(tabel)
+        if cached is not None and cached[0] == versi:
+            delta: Any = cached[1]
+        else:
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    delta = json.loads(f.readline())
+                    # Delta format lama (satu objek JSON) menyimpan barisnya di header
+                    rows = delta.pop("upsert", []) if isinstance(delta, dict) else []
+                    for line in f:
+                        try:
+                            row = json.loads(line)
+                        except ValueError:
+                            continue  # ekor terpotong karena crash; dibuang oleh append berikutnya
+                        if isinstance(row, dict) and "id" in row:
+                            rows.append(row)
+            except (OSError, ValueError):
+                return None
+            if isinstance(delta, dict):
+                delta = {"basis": delta.get("basis"), "upsert": _terapkan_upsert([], rows), "baris": len(rows)}
+            self._delta[tabel] = (versi, delta)
+        if not isinstance(delta, dict) or delta.get("basis") != self._basis_csv(tabel):
+            return None
+        return delta
+
+    def _hapus_delta(self, tabel: str) -> None:
+        try:
+            os.remove(self.paths[tabel] + DELTA_EXT)
+        except OSError:
+            pass
+
+    def _rows(self, tabel: str) -> List[Dict[str, Any]]:
+        trx = current()
+        if trx is not None and (id(self), tabel) in trx.overlay:
+            # Tulisan transaksi ini yang belum di-commit
+            return trx.overlay[(id(self), tabel)]
+        if trx is not None and ("tambah", id(self), tabel) in trx.overlay:
+            # Baris tambah() yang baru ditulis ke file saat commit
+            return self._rows_file(tabel) + trx.overlay[("tambah", id(self), tabel)]
+        return self._rows_file(tabel)
+
+    def _rows_file(self, tabel: str) -> List[Dict[str, Any]]:
+        with self._lock:
+            versi = self.version(tabel)
+            cached = self._cache.get(tabel)
+            if cached is None or cached[0] != versi:
+                cached = (versi, self._read_file(tabel))
+                self._cache[tabel] = cached
+                self._seen[tabel] = versi
+            return cached[1]
+
+    def load(self, tabel: str) -> List[Dict[str, Any]]:
+        """Baris tabel; salinan per baris supaya pemanggil bebas mengubahnya"""
+        return [dict(row) for row in self._rows(tabel)]
+
+    def _peta_kolom(self, tabel: str, kolom: str) -> Tuple[List[Dict[str, Any]], Dict[Any, int]]:
+        """Peta nilai kolom -> posisi baris (baris pertama jika ganda); panggil dengan _lock"""
+        rows = self._rows(tabel)
+        cached = self._peta.get((tabel, kolom))
+        if cached is None or cached[0] is not rows:
+            peta: Dict[Any, int] = {}
+            for i, row in enumerate(rows):
+                nilai = row.get(kolom)
+                if nilai is not None and nilai != "":
+                    peta.setdefault(nilai, i)
+            cached = (rows, peta)
+            self._peta[(tabel, kolom)] = cached
+        return cached
+
+    def ambil(self, tabel: str, ids: List[Any]) -> List[Dict[str, Any]]:
+        """
+        Baris dengan id tertentu (urutan mengikuti `ids`, id yang tidak ada dilewati)
+
+        Peta id -> baris dibangun sekali per versi tabel (dan diperbarui oleh upsert()),
+        jadi pencarian berikutnya sebanding dengan jumlah id yang diminta, bukan ukuran tabel.
+        """
+        with self._lock:
+            rows, by_id = self._peta_kolom(tabel, "id")
+            return [dict(rows[by_id[i]]) for i in ids if i in by_id]
+
+    def cari(self, tabel: str, kolom: str, nilai: Any) -> Optional[Dict[str, Any]]:
+        """Salinan baris pertama dengan `kolom` == `nilai` (hash lookup, misal ISBN/NIS)"""
+        with self._lock:
+            rows, peta = self._peta_kolom(tabel, kolom)
+            i = peta.get(nilai)
+            return dict(rows[i]) if i is not None else None
+
+    def id_berikut(self, tabel: str) -> int:
+        """Sama seperti perpustakaan.next_id, tapi hanya dihitung ulang jika tabel berubah"""
+        with self._lock:
+            rows = self._rows(tabel)
+            cached = self._maks_id.get(tabel)
+            if cached is None or cached[0] is not rows:
+                cached = (rows, _maks_id(rows))
+                self._maks_id[tabel] = cached
+            return cached[1] + 1
+
+    def terhapus(self, tabel: str) -> FrozenSet[Any]:
+        """Id baris ber-tombstone (schema.KOLOM_HAPUS); diperbarui per upsert, tidak memindai ulang"""
+        with self._lock:
+            rows = self._rows(tabel)
+            cached = self._terhapus.get(tabel)
+            if cached is None or cached[0] is not rows:
+                cached = (rows, _terhapus(rows))
+                self._terhapus[tabel] = cached
+            return frozenset(cached[1])
+
+    def padatkan(self, tabel: str) -> List[Dict[str, Any]]:
+        """
+        Buang fisik baris ber-tombstone dengan satu save() utuh
+
+        Baca dan tulis dikerjakan dengan _lock, jadi upsert() dari thread lain tidak
+        tertimpa. Returns salinan baris yang dibuang.
+        """
+        with self._lock:
+            if not self.terhapus(tabel):
+                return []
+            rows = self._rows(tabel)
+            self.save(tabel, [row for row in rows if not row.get(KOLOM_HAPUS)])
+            return [dict(row) for row in rows if row.get(KOLOM_HAPUS)]
+
+    def _terapkan(self, tabel: str, baru: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Seperti _terapkan_upsert pada isi tabel saat ini, tetapi memakai peta posisi id
+        yang sudah ada dan memindahkan peta-peta tabel ke list baru alih-alih membangunnya
+        ulang; panggil dengan _lock
+        """
+        lama, posisi = self._peta_kolom(tabel, "id")
+        rows = list(lama)
+        diganti: List[Tuple[Dict[str, Any], Dict[str, Any]]] = []
+        for row in baru:
+            i = posisi.get(row["id"])
+            if i is None:
+                posisi[row["id"]] = len(rows)
+                rows.append(row)
+            else:
+                diganti.append((rows[i], row))
+                rows[i] = row
+        for (t, kolom), (basis, peta) in list(self._peta.items()):
+            if t != tabel or basis is not lama:
+                continue
+            if kolom != "id":
+                if any(a.get(kolom) != b.get(kolom) for a, b in diganti):
+                    del self._peta[(t, kolom)]  # nilai berpindah: bangun ulang saat dipakai
+                    continue
+                for i in range(len(lama), len(rows)):
+                    nilai = rows[i].get(kolom)
+                    if nilai is not None and nilai != "":
+                        peta.setdefault(nilai, i)
+            self._peta[(t, kolom)] = (rows, peta)
+        cached = self._maks_id.get(tabel)
+        if cached is not None and cached[0] is lama:
+            self._maks_id[tabel] = (rows, max(cached[1], _maks_id(baru)))
+        terhapus = self._terhapus.get(tabel)
+        if terhapus is not None and terhapus[0] is lama:
+            ids = set(terhapus[1])
+            for row in baru:
+                if row.get(KOLOM_HAPUS):
+                    ids.add(row["id"])
+                else:
+                    ids.discard(row["id"])
+            self._terhapus[tabel] = (rows, ids)
+        return rows
+
+    def save(self, tabel: str, data: List[Dict[str, Any]]) -> None:
+        # Baris baru dari pemanggil bisa masih berisi string tanggal
+        rows = parse_records(tabel, data)
+        with self._lock:
+            lama = self._rows(tabel) if self.journal is not None else []
+            self._write_file(tabel, data)
+        if self.journal is not None:
+            self.journal.catat(tabel, lama, rows)
+        trx = current()
+        if trx is not None:
+            trx.overlay[(id(self), tabel)] = rows
+            # upsert() berikutnya dalam transaksi ini ikut menulis utuh, karena delta
+            # dihapus setelah commit
+            trx.overlay[("penuh", id(self), tabel)] = True
+            trx.overlay.pop(("delta", id(self), tabel), None)
+        self._selesai(tabel, rows, hapus_delta=True)
+
+    def upsert(self, tabel: str, data: List[Dict[str, Any]]) -> None:
+        """
+        Tambah/ubah baris per id tanpa menulis ulang tabel (lihat docstring modul)
+
+        Tabel non-CSV, atau delta yang sudah melewati BATAS_DELTA, ditulis utuh lewat save().
+        """
+        baru = parse_records(tabel, data)
+        path = self.paths[tabel]
+        trx = current()
+        sebelum: List[Dict[str, Any]] = []
+        with self._lock:
+            if self.journal is not None:
+                lama, posisi = self._peta_kolom(tabel, "id")
+                sebelum = [dump_record(lama[posisi[row["id"]]]) for row in baru if row["id"] in posisi]
+            rows = self._terapkan(tabel, baru)
+            key = ("delta", id(self), tabel)
+            delta_path = path + DELTA_EXT
+            dumped = [dump_record(row) for row in baru]
+            delta = lama_delta = None
+            # Delta selalu berdasar CSV yang sudah ada; tabel baru ditulis utuh sekali
+            if path.endswith(".csv") and os.path.exists(path) and \
+                    (trx is None or ("penuh", id(self), tabel) not in trx.overlay):
+                lama_delta = (trx.overlay.get(key) if trx is not None else None) or self._baca_delta(tabel)
+                if lama_delta is None:
+                    delta = {"basis": self._basis_csv(tabel), "upsert": dumped, "baris": len(dumped)}
+                else:
+                    upsert = _terapkan_upsert(lama_delta["upsert"], dumped)
+                    # File yang dibuat di transaksi ini masih sementara: ditulis ulang, bukan di-append
+                    baris = len(upsert) if trx is not None and delta_path in trx.pending else \
+                        lama_delta["baris"] + len(dumped)
+                    delta = {"basis": lama_delta["basis"], "upsert": upsert, "baris": baris}
+            if delta is None or delta["baris"] > BATAS_DELTA:
+                self.save(tabel, rows)
+                return
+            with timed("storage.save", tabel=tabel), catat("delta", tabel, delta_path) as ev:
+                if lama_delta is None or (trx is not None and delta_path in trx.pending):
+                    teks = json.dumps({"basis": delta["basis"]}) + "\n" + _baris_delta(delta["upsert"])
+                    with atomic_open(delta_path, "w") as f:
+                        f.write(teks)
+                else:
+                    teks = _baris_delta(dumped)
+                    append_text(delta_path, teks)
+                ev["rows"] = len(baru)
+                ev["bytes"] = len(teks.encode("utf-8"))
+                add_bytes(written=ev["bytes"])
+        if self.journal is not None:
+            self.journal.catat_perubahan(tabel, {"upsert": [dump_record(row) for row in baru], "hapus": [],
+                                                 "sebelum": sebelum})
+        if trx is not None:
+            trx.overlay[key] = delta
+            trx.overlay[(id(self), tabel)] = rows
+        self._selesai(tabel, rows, delta=delta, berubah=baru)
+
+    def tambah(self, tabel: str, data: List[Dict[str, Any]]) -> None:
+        """
+        Tambahkan baris di akhir tabel tanpa membaca atau menulis ulang isinya (log append-only)
+
+        Hanya untuk CSV yang sudah ada, tanpa delta, dengan header yang memuat semua kolom
+        baris baru; selain itu (file baru, kolom baru) tabel ditulis utuh lewat save().
+        Di dalam transaksi baris baru sudah terlihat oleh load()/mundur() berikutnya,
+        tetapi baru ditambahkan ke file saat commit.
+        """
+        baru = parse_records(tabel, data)
+        path = self.paths[tabel]
+        trx = current()
+        header = header_csv(path) if path.endswith(".csv") else []
+        tertunda = trx is not None and (id(self), tabel) in trx.overlay
+        if not header or tertunda or os.path.exists(path + DELTA_EXT) or \
+                any(k not in header for row in baru for k in row):
+            self.save(tabel, self._rows(tabel) + baru)
+            return
+        with self._lock:
+            versi_lama = self.version(tabel)
+            teks = baris_csv(header, [dump_record(row) for row in baru])
+            with timed("storage.save", tabel=tabel), catat("append", tabel, path) as ev:
+                append_text(path, teks)
+                ev["rows"] = len(baru)
+                ev["bytes"] = len(teks.encode("utf-8"))
+                add_bytes(written=ev["bytes"])
+        if self.journal is not None:
+            self.journal.catat_perubahan(tabel, {"upsert": [dump_record(row) for row in baru], "hapus": [],
+                                                 "sebelum": []})
+        if trx is not None:
+            kunci = ("tambah", id(self), tabel)
+            trx.overlay[kunci] = trx.overlay.get(kunci, []) + baru
+
+        def selesai() -> None:
+            with self._lock:
+                versi = self.version(tabel)
+                cached = self._cache.get(tabel)
+                if cached is not None and cached[0] == versi_lama:
+                    # Cache yang sudah dimuat cukup diperpanjang, tidak dibaca ulang
+                    rows = cached[1] + baru
+                    maks = self._maks_id.get(tabel)
+                    if maks is not None and maks[0] is cached[1]:
+                        self._maks_id[tabel] = (rows, max(maks[1], _maks_id(baru)))
+                    self._cache[tabel] = (versi, rows)
+                else:
+                    self._cache.pop(tabel, None)
+                self._seen[tabel] = versi
+            self._notify(tabel, baru)
+        after_commit(selesai)
+
+    def mundur(self, tabel: str, mulai: int = 0, jumlah: int = 20) -> List[Dict[str, Any]]:
+        """
+        Salinan `jumlah` baris mulai dari baris ke-`mulai` dihitung dari akhir tabel
+        (terbaru dulu)
+
+        Jika tabel belum ada di cache, CSV dibaca dari belakang per blok sampai baris
+        yang diminta, tanpa memuat seluruh file (lihat converter.load_csv_mundur).
+        """
+        path = self.paths[tabel]
+        trx = current()
+        with self._lock:
+            cached = self._cache.get(tabel)
+            dimuat = cached is not None and cached[0] == self.version(tabel)
+        if dimuat or (trx is not None and (id(self), tabel) in trx.overlay) or \
+                not path.endswith(".csv") or os.path.exists(path + DELTA_EXT):
+            rows = self._rows(tabel)
+            akhir = len(rows) - mulai
+            return [dict(row) for row in reversed(rows[max(akhir - jumlah, 0):max(akhir, 0)])]
+        tertunda = trx.overlay.get(("tambah", id(self), tabel), []) if trx is not None else []
+        with timed("storage.load", tabel=tabel), catat("load_mundur", tabel, path) as ev:
+            urutan = itertools.chain(reversed(tertunda), load_csv_mundur(path, tabel))
+            rows = [dict(row) for row in itertools.islice(urutan, mulai, mulai + jumlah)]
+            ev["rows"] = len(rows)
+        return rows
+
+    def _selesai(self, tabel: str, rows: List[Dict[str, Any]], hapus_delta: bool = False,
+                 delta: Optional[Dict[str, Any]] = None, berubah: Optional[List[Dict[str, Any]]] = None) -> None:
+        def selesai() -> None:
+            with self._lock:
+                if hapus_delta and self.paths[tabel].endswith(".csv"):
+                    # Setelah CSV baru di tempatnya; crash di antaranya aman karena
+                    # dasar delta tidak cocok lagi dengan CSV baru
+                    self._hapus_delta(tabel)
+                if delta is not None:
+                    self._delta[tabel] = (_stat(self.paths[tabel] + DELTA_EXT), delta)
+                versi = self.version(tabel)
+                self._cache[tabel] = (versi, rows)
+                self._seen[tabel] = versi
+            self._notify(tabel, berubah)
+        # Dalam transaksi file baru terlihat setelah commit, begitu juga cache-nya
+        after_commit(selesai)
+
+    def transaksi(self) -> "ContextManager[Transaksi]":
+        """Group commit beberapa save(); lihat utils.atomic.transaksi"""
+        return transaksi()
+
+    def init(self) -> None:
+        """Pastikan folder database ada"""
+        for path in self.paths.values():
+            folder = os.path.dirname(path)
+            if folder:
+                os.makedirs(folder, exist_ok=True)
+
+
+def _normalize_buku(row: Dict[str, Any]) -> Dict[str, Any]:
+    # app.py lama menyimpan tahun terbit sebagai "tahun"
+    if "tahun" in row and "tahun_terbit" not in row:
+        row = dict(row)
+        row["tahun_terbit"] = row.pop("tahun")
+    return row
+
+
+def _read_legacy_buku(folder_db: str) -> List[Dict[str, Any]]:
+    shards = sorted(glob.glob(os.path.join(folder_db, "buku", "buku_*.json")))
+    files = shards or [os.path.join(folder_db, LEGACY_JSON["buku"])]
+    data: List[Dict[str, Any]] = []
+    for path in files:
+        if not os.path.exists(path):
+            continue
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                data.extend(json.load(f))
+        except (json.JSONDecodeError, IOError) as e:
+            print(f"Error loading {path}: {e}")
+    return data
+
+
+def migrate_legacy_json(repo: Repository, folder_db: str = "database") -> List[str]:
+    """
+    Impor data JSON lama app.py ke store utama, hanya untuk tabel yang masih kosong
+
+    Returns:
+        list: Nama tabel yang diimpor
+    """
+    imported: List[str] = []
+    for tabel, name in LEGACY_JSON.items():
+        if repo.load(tabel):
+            continue
+        if tabel == "buku":
+            rows = [_normalize_buku(r) for r in _read_legacy_buku(folder_db)]
+        else:
+            path = os.path.join(folder_db, name)
+            if not os.path.exists(path):
+                continue
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    rows = json.load(f)
+            except (json.JSONDecodeError, IOError) as e:
+                print(f"Error loading {path}: {e}")
+                continue
+        if rows:
+            repo.save(tabel, rows)
+            imported.append(tabel)
+    return imported
@@ -0,0 +1,231 @@
+"""
+Rollup deret waktu sirkulasi untuk grafik, disimpan di database/indeks/rollup_sirkulasi.json.
+
+    {"versi": [mtime_ns, size],                        # versi file peminjaman saat rollup ditulis
+     "harian": {"2024-03-05": [12, 9, 1]},             # periode -> [pinjam, kembali, terlambat]
+     "mingguan": {"2024-03-04": [61, 58, 4]},          # kunci = tanggal Senin minggu itu
+     "bulanan": {"2024-03": [240, 231, 15]},
+     "aktif": {"2024-03-13": 3}}                       # pinjaman aktif per tanggal mulai terlambat
+
+Ketiga tingkat diperbarui bersama oleh Perpustakaan saat pinjam/kembalikan, setelah
+transaksinya di-commit (seperti utils/indeks.py). "terlambat" dihitung pada periode
+hari pertama peminjaman terlambat: saat dikembalikan terlambat, atau selama masih
+dipinjam melewati tanggal itu (dari "aktif" saat dibaca).
+
+Rollup dipadatkan setiap kali disimpan: periode harian hanya disimpan SIMPAN_HARIAN
+hari terakhir dan mingguan SIMPAN_MINGGUAN minggu terakhir; bulanan disimpan
+seluruhnya. seri() memilih satuan dari panjang rentang, jadi grafik sepuluh tahun
+(bulanan) dan satu minggu (harian) sama-sama membaca paling banyak ratusan periode,
+tanpa menyentuh tabel peminjaman. Jika file peminjaman diubah tanpa lewat rollup,
+versinya tidak cocok dan rollup dibangun ulang sekali dari tabel.
+"""
+import json
+import os
+import threading
+import time
+from datetime import date, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+
+from utils.atomic import after_commit, write_text
+from utils.indeks import SIMPAN_JEDA
+from utils.schema import to_datetime
+
+Versi = Tuple[int, ...]
+
+SATUAN = ("harian", "mingguan", "bulanan")
+KOLOM_SERI = ("pinjam", "kembali", "terlambat")
+SIMPAN_HARIAN = 92  # hari
+SIMPAN_MINGGUAN = 106  # minggu, sekitar dua tahun
+
+
+def _periode(tanggal: date, satuan: str) -> str:
+    if satuan == "harian":
+        return tanggal.isoformat()
+    if satuan == "mingguan":
+        return (tanggal - timedelta(days=tanggal.weekday())).isoformat()
+    return tanggal.strftime("%Y-%m")
+
+
+def _rentang(dari: date, sampai: date, satuan: str) -> List[str]:
+    """Semua periode dari `dari` sampai `sampai`, termasuk yang kosong"""
+    hasil: List[str] = []
+    if satuan == "bulanan":
+        tahun, bulan = dari.year, dari.month
+        while (tahun, bulan) <= (sampai.year, sampai.month):
+            hasil.append(f"{tahun:04d}-{bulan:02d}")
+            tahun, bulan = (tahun + 1, 1) if bulan == 12 else (tahun, bulan + 1)
+        return hasil
+    langkah = 7 if satuan == "mingguan" else 1
+    tanggal = date.fromisoformat(_periode(dari, satuan))
+    while tanggal <= sampai:
+        hasil.append(tanggal.isoformat())
+        tanggal += timedelta(days=langkah)
+    return hasil
+
+
+def pilih_satuan(dari: date, sampai: date) -> str:
+    """Satuan terhalus yang masih tersimpan untuk seluruh rentang"""
+    hari = (date.today() - dari).days
+    if hari < SIMPAN_HARIAN and (sampai - dari).days <= SIMPAN_HARIAN:
+        return "harian"
+    if hari < SIMPAN_MINGGUAN * 7:
+        return "mingguan"
+    return "bulanan"
+
+
+def _durasi() -> int:
+    from utils.perpustakaan import DURASI_PEMINJAMAN_HARI
+    return DURASI_PEMINJAMAN_HARI
+
+
+class RollupSirkulasi:
+    """Hitungan pinjam/kembali/terlambat per hari, minggu, dan bulan; lihat docstring modul"""
+
+    def __init__(self, path: Optional[str] = None) -> None:
+        self.path = path  # None = hanya di memori
+        self.versi: Optional[Versi] = None
+        self.hitung: Dict[str, Dict[str, List[int]]] = {satuan: {} for satuan in SATUAN}
+        self.aktif: Dict[str, int] = {}
+        self._lock = threading.RLock()
+        self._disimpan = 0.0  # time.monotonic() penulisan file terakhir
+
+    @classmethod
+    def from_variabel(cls, var: Dict[str, str]) -> "RollupSirkulasi":
+        folder_db = var.get("FOLDER_DB", "database")
+        return cls(os.path.join(folder_db, "indeks", "rollup_sirkulasi.json"))
+
+    # ---- validasi ----
+    def _baca_file(self) -> None:
+        if self.path is None:
+            return
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            self.versi = tuple(data["versi"])  # type: ignore[assignment]
+            self.hitung = {satuan: data[satuan] for satuan in SATUAN}
+            self.aktif = data["aktif"]
+        except (OSError, ValueError, KeyError, TypeError):
+            self.versi = None
+
+    def bangun(self, pinjam: List[Dict[str, Any]]) -> None:
+        """Bangun ulang dari seluruh tabel peminjaman"""
+        with self._lock:
+            self.hitung = {satuan: {} for satuan in SATUAN}
+            self.aktif = {}
+            durasi = _durasi()
+            for p in pinjam:
+                self._terapkan(p, durasi, baru=True)
+            self._padatkan()
+
+    def segarkan(self, store: Any) -> None:
+        """Pastikan rollup sesuai dengan file peminjaman saat ini"""
+        with self._lock:
+            versi = store.version("peminjaman")
+            if self.versi == versi:
+                return
+            self._baca_file()
+            if self.versi == versi:
+                return
+            self.bangun(store.load("peminjaman"))
+            self.versi = versi
+            self._simpan()
+
+    def _padatkan(self) -> None:
+        """Buang periode harian/mingguan yang sudah lewat masa simpannya"""
+        hari_ini = date.today()
+        for satuan, batas in (("harian", hari_ini - timedelta(days=SIMPAN_HARIAN)),
+                              ("mingguan", hari_ini - timedelta(weeks=SIMPAN_MINGGUAN))):
+            kunci = _periode(batas, satuan)
+            self.hitung[satuan] = {k: v for k, v in self.hitung[satuan].items() if k >= kunci}
+
+    def _simpan(self) -> None:
+        self._disimpan = time.monotonic()
+        self._padatkan()
+        if self.path is None:
+            return
+        try:
+            data: Dict[str, Any] = {"versi": list(self.versi or (0, 0)), "aktif": self.aktif}
+            data.update(self.hitung)
+            write_text(self.path, json.dumps(data, ensure_ascii=False))
+        except Exception as e:
+            print(f"Error saving circulation rollup: {e}")
+
+    # ---- tulis ----
+    def _tambah(self, tanggal: date, kolom: int, n: int = 1) -> None:
+        for satuan in SATUAN:
+            self.hitung[satuan].setdefault(_periode(tanggal, satuan), [0] * len(KOLOM_SERI))[kolom] += n
+
+    def _terapkan(self, p: Dict[str, Any], durasi: int, baru: bool) -> None:
+        """Hitung satu peminjaman: dipinjam (`baru`) dan/atau dikembalikan"""
+        pinjam = to_datetime(p.get("tanggal_pinjam"))
+        if pinjam is None:
+            return
+        terlambat = (pinjam + timedelta(days=durasi + 1)).date().isoformat()
+        if baru:
+            self._tambah(pinjam.date(), 0)
+            self.aktif[terlambat] = self.aktif.get(terlambat, 0) + 1
+        if p.get("status") != "dikembalikan":
+            return
+        sisa = self.aktif.pop(terlambat, 0) - 1
+        if sisa > 0:
+            self.aktif[terlambat] = sisa
+        kembali = to_datetime(p.get("tanggal_kembali"))
+        if kembali is None:
+            return
+        self._tambah(kembali.date(), 1)
+        if (kembali - pinjam).days > durasi:  # sama dengan buku_terlambat()
+            self._tambah(date.fromisoformat(terlambat), 2)
+
+    def catat(self, store: Any, peminjaman: Dict[str, Any], baru: bool) -> None:
+        """
+        Perbarui rollup untuk satu peminjaman baru (`baru`) atau yang baru dikembalikan
+
+        Seperti IndeksPeminjaman.catat(): dipanggil di dalam transaksi setelah tabel
+        peminjaman disimpan, diterapkan setelah commit, dan rollup harus sudah segar
+        (segarkan()) sebelum tabel diubah; jika tidak, dibangun ulang saat dibaca.
+        """
+        segar = self.versi is not None and self.versi == store.version("peminjaman")
+
+        def terapkan() -> None:
+            with self._lock:
+                if not segar or self.versi is None:
+                    self.versi = None
+                    return
+                self._terapkan(peminjaman, _durasi(), baru)
+                self.versi = store.version("peminjaman")
+                if time.monotonic() - self._disimpan >= SIMPAN_JEDA:
+                    self._simpan()
+        after_commit(terapkan)
+
+    # ---- baca ----
+    def seri(self, store: Any, dari: Optional[date] = None, sampai: Optional[date] = None,
+             satuan: str = "") -> Dict[str, Any]:
+        """
+        Deret pinjam/kembali/terlambat dari `dari` sampai `sampai` (default: seluruh
+        riwayat sampai hari ini), satu baris per periode termasuk yang kosong
+
+        Args:
+            satuan (str): "harian", "mingguan", "bulanan"; selain itu dipilih dari
+                panjang rentang (pilih_satuan)
+
+        Returns:
+            {"satuan": ..., "data": [{"periode", "pinjam", "kembali", "terlambat"}]}
+        """
+        with self._lock:
+            self.segarkan(store)
+            hari_ini = date.today()
+            sampai = sampai or hari_ini
+            if dari is None:
+                awal = min(self.hitung["bulanan"], default=_periode(hari_ini, "bulanan"))
+                dari = date.fromisoformat(awal + "-01")
+            satuan = satuan if satuan in SATUAN else pilih_satuan(dari, sampai)
+            tersimpan = self.hitung[satuan]
+            data = {k: list(tersimpan.get(k, (0, 0, 0))) for k in _rentang(dari, sampai, satuan)}
+            # Pinjaman yang masih dipinjam melewati hari pertama terlambatnya
+            for tanggal, n in self.aktif.items():
+                kunci = _periode(date.fromisoformat(tanggal), satuan)
+                if tanggal <= hari_ini.isoformat() and kunci in data:
+                    data[kunci][2] += n
+        return {"satuan": satuan,
+                "data": [dict(zip(KOLOM_SERI, v), periode=k) for k, v in data.items()]}
+
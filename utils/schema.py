@@ -0,0 +1,245 @@
+"""
+Registry skema per tabel: tipe kolom, nullable, default dan format tanggal.
+
+Parser kolom dikompilasi sekali per (tabel, header) lalu dipakai untuk setiap baris,
+jadi load_csv tidak lagi mengecek nama kolom per sel. Kolom tanggal diparse sekali
+saat file dibaca menjadi datetime/date, sehingga laporan keterlambatan dan dashboard
+tidak perlu strptime berulang kali. Saat ditulis kembali, dump_record() mengubahnya
+lagi ke string dengan format yang sama.
+"""
+from datetime import date, datetime
+from functools import lru_cache
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Tuple
+
+FORMAT_TANGGAL = "%Y-%m-%d %H:%M:%S"
+FORMAT_TANGGAL_SAJA = "%Y-%m-%d"
+
+# Tombstone: baris dengan kolom ini terisi sudah dihapus dan dilewati pembaca,
+# sampai dibuang fisik oleh Repository.padatkan()
+KOLOM_HAPUS = "dihapus_at"
+
+
+class Kolom(NamedTuple):
+    tipe: str                 # "int", "str", "datetime" atau "date"
+    nullable: bool = True     # sel kosong -> None; jika False -> default
+    default: Any = None
+    format: str = ""          # format strptime untuk kolom tanggal
+
+
+TEKS = Kolom("str", nullable=False, default="")
+ANGKA = Kolom("int")
+ID = Kolom("int", nullable=False)
+WAKTU = Kolom("datetime", format=FORMAT_TANGGAL)
+TANGGAL = Kolom("date", format=FORMAT_TANGGAL_SAJA)
+
+SCHEMA: Dict[str, Dict[str, Kolom]] = {
+    "buku": {
+        "id": ID,
+        "judul": TEKS,
+        "penulis": TEKS,
+        "penerbit": TEKS,
+        "isbn": TEKS,  # ISBN/barcode tanpa tanda hubung, lihat perpustakaan.normalisasi_isbn
+        "id_kategori": ANGKA,  # nama di kategori.json, diisi saat dibaca (utils/kategori.py)
+        "cover": TEKS,
+        "stok": Kolom("int", nullable=False, default=0),
+        "tahun_terbit": ANGKA,
+        "tahun": ANGKA,  # nama lama tahun_terbit di app.py
+        "sumber_pendapatan": TEKS,
+        "nama_donatur": TEKS,
+        "tanggal_beli": TANGGAL,
+        "tanggal_diberikan": TANGGAL,
+        "created_at": WAKTU,
+        KOLOM_HAPUS: WAKTU
+    },
+    "anggota": {
+        "id": ID,
+        "nama": TEKS,
+        "kelas": TEKS,
+        "nis": TEKS,  # string di semua front-end, nol di depan tetap terjaga
+        "created_at": WAKTU
+    },
+    "peminjaman": {
+        "id": ID,
+        "id_buku": ID,
+        "id_anggota": ID,  # judul/nama tidak disimpan, diisi saat dibaca (utils/gabung.py)
+        "status": TEKS,
+        "tanggal_pinjam": WAKTU,
+        "tanggal_kembali": WAKTU
+    },
+    "log_hapus": {
+        "id": ID,
+        "id_buku": ID,
+        "judul": TEKS,
+        "alasan": TEKS,
+        "deleted_at": WAKTU
+    },
+    "kategori": {
+        "id": ID,
+        "nama": TEKS
+    }
+}
+
+# Untuk file CSV yang bukan tabel terdaftar (halaman konversi, file uji)
+SCHEMA_UMUM: Dict[str, Kolom] = {
+    "id": ANGKA,
+    "stok": ANGKA,
+    "tahun_terbit": ANGKA,
+    "tahun": ANGKA,
+    "nis": TEKS
+}
+
+Parser = Callable[[Any], Any]
+
+
+def _parse_datetime(value: str, fmt: str) -> datetime:
+    if fmt == FORMAT_TANGGAL:
+        return datetime.fromisoformat(value)  # jauh lebih cepat dari strptime
+    return datetime.strptime(value, fmt)
+
+
+def _parse_date(value: str, fmt: str) -> date:
+    if fmt == FORMAT_TANGGAL_SAJA:
+        return date.fromisoformat(value)
+    return datetime.strptime(value, fmt).date()
+
+
+def _compile_kolom(kolom: Kolom, parse_dates: bool) -> Parser:
+    kosong = None if kolom.nullable else kolom.default
+    tipe = kolom.tipe
+    if tipe in ("datetime", "date") and not parse_dates:
+        tipe, kosong = "str", ""
+
+    if tipe == "int":
+        def parse(value: Any) -> Any:
+            if value is None or value == "":
+                return kosong
+            if isinstance(value, int):
+                return value
+            try:
+                return int(value)
+            except (TypeError, ValueError):
+                return value  # nilai rusak tetap disimpan apa adanya
+        return parse
+
+    if tipe == "datetime":
+        fmt = kolom.format or FORMAT_TANGGAL
+
+        def parse(value: Any) -> Any:
+            if value is None or value == "":
+                return kosong
+            if isinstance(value, datetime):
+                return value
+            try:
+                return _parse_datetime(str(value), fmt)
+            except ValueError:
+                return value
+        return parse
+
+    if tipe == "date":
+        fmt = kolom.format or FORMAT_TANGGAL_SAJA
+
+        def parse(value: Any) -> Any:
+            if value is None or value == "":
+                return kosong
+            if isinstance(value, datetime):
+                return value.date()
+            if isinstance(value, date):
+                return value
+            try:
+                return _parse_date(str(value), fmt)
+            except ValueError:
+                return value
+        return parse
+
+    def parse(value: Any) -> Any:
+        if value is None or value == "":
+            return kosong
+        return value if isinstance(value, str) else str(value)
+    return parse
+
+
+def kolom_tabel(tabel: Optional[str]) -> Dict[str, Kolom]:
+    """Skema kolom tabel; SCHEMA_UMUM jika tabel tidak terdaftar"""
+    return SCHEMA.get(tabel or "", SCHEMA_UMUM)
+
+
+@lru_cache(maxsize=None)
+def _parsers(tabel: Optional[str], parse_dates: bool) -> Dict[str, Parser]:
+    return {nama: _compile_kolom(kolom, parse_dates) for nama, kolom in kolom_tabel(tabel).items()}
+
+
+def _as_text(value: Any) -> Any:
+    return "" if value is None else value
+
+
+@lru_cache(maxsize=128)
+def _header_parsers(tabel: Optional[str], header: Tuple[str, ...],
+                    parse_dates: bool) -> Tuple[Parser, ...]:
+    parsers = _parsers(tabel, parse_dates)
+    return tuple(parsers.get(nama, _as_text) for nama in header)
+
+
+def compile_parser(tabel: Optional[str], header: List[str],
+                   parse_dates: bool = True) -> Callable[[List[str]], Dict[str, Any]]:
+    """
+    Buat fungsi pengubah satu baris CSV (list nilai sesuai header) menjadi dict bertipe
+
+    Args:
+        tabel (str): Nama tabel di SCHEMA, atau None untuk SCHEMA_UMUM
+        header (list): Nama kolom sesuai urutan di file
+        parse_dates (bool): False untuk membiarkan kolom tanggal sebagai string
+            (dipakai saat hasilnya akan ditulis ke JSON)
+    """
+    names = tuple(header)
+    parsers = _header_parsers(tabel, names, parse_dates)
+    n = len(names)
+
+    def parse_row(values: List[str]) -> Dict[str, Any]:
+        if len(values) < n:
+            values = values + [""] * (n - len(values))
+        return {nama: parse(v) for nama, parse, v in zip(names, parsers, values)}
+    return parse_row
+
+
+def parse_record(tabel: Optional[str], row: Dict[str, Any], parse_dates: bool = True) -> Dict[str, Any]:
+    """Ubah satu record dict (dari JSON atau CSV) ke tipe sesuai skema"""
+    parsers = _parsers(tabel, parse_dates)
+    return {key: parsers[key](value) if key in parsers else value for key, value in row.items()}
+
+
+def parse_records(tabel: Optional[str], rows: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    return [parse_record(tabel, row) for row in rows]
+
+
+def dump_value(value: Any) -> Any:
+    """Nilai siap tulis ke CSV/JSON: tanggal jadi string, None jadi string kosong"""
+    if isinstance(value, datetime):
+        return value.strftime(FORMAT_TANGGAL)
+    if isinstance(value, date):
+        return value.strftime(FORMAT_TANGGAL_SAJA)
+    if value is None:
+        return ""
+    return value
+
+
+def dump_record(row: Dict[str, Any]) -> Dict[str, Any]:
+    return {key: dump_value(value) for key, value in row.items()}
+
+
+def json_default(value: Any) -> Any:
+    """Parameter `default` untuk json.dumps agar kolom tanggal ikut terserialisasi"""
+    if isinstance(value, (datetime, date)):
+        return dump_value(value)
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def to_datetime(value: Any) -> Optional[datetime]:
+    """datetime dari nilai kolom waktu (sudah diparse atau masih string), None jika gagal"""
+    if isinstance(value, datetime):
+        return value
+    if not value:
+        return None
+    try:
+        return _parse_datetime(str(value), FORMAT_TANGGAL)
+    except ValueError:
+        return None
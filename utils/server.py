@@ -0,0 +1,491 @@
+"""
+API HTTP/JSON headless untuk utils.perpustakaan.
+
+Semua operasi tulis masuk ke satu antrian dan dikerjakan oleh satu writer task,
+sehingga tidak ada dua mutasi yang berjalan bersamaan. Pembaca dilayani dari
+snapshot di memori yang diganti utuh setiap kali writer selesai.
+
+Hasil aksi dikirim ke klien lebih dulu; sesudahnya snapshot baru disusun hanya dari
+baris yang ditulis aksi itu (listener Repository), bukan dengan membaca ulang semua
+tabel. Tabel yang ditulis utuh (save(), proses lain lewat poll()) dimuat ulang sendiri.
+
+Jalankan dari root repository:
+    python -m utils.server --host 127.0.0.1 --port 8765
+"""
+import argparse
+import asyncio
+import json
+import threading
+import urllib.error
+import urllib.request
+from datetime import date
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlencode, urlparse
+
+from utils.perpustakaan import (
+    AKSI_TULIS, KOLOM_KODE, LOG_PER_HALAMAN, TABEL, Perpustakaan, batas_pinjam, buku_terlambat, cari_buku, ekspor,
+    riwayat_anggota, statistik
+)
+from utils import cdc
+from utils.covers import CoverStore
+from utils.gabung import KOLOM_GABUNG, migrasi_peminjaman
+from utils.kategori import migrasi_kategori
+from utils.indeks import IndeksPeminjaman
+from utils.iolog import configure_from_variabel
+from utils.journal import Journal
+from utils.laporan import Laporan
+from utils.pencarian import BATAS_SARAN, KOLOM_CARI, IndeksCari
+from utils.repository import Repository, load_variabel, paths_from_variabel
+from utils.rollup import RollupSirkulasi
+from utils.schema import KOLOM_HAPUS, json_default, parse_record, parse_records
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+MAX_BODY = 1024 * 1024
+POLL_INTERVAL = 1.0  # detik, cek tulisan dari CLI/web UI yang tidak lewat server
+
+STATUS_TEXT = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+               413: "Payload Too Large", 500: "Internal Server Error"}
+
+
+Berubah = Dict[str, Optional[Dict[Any, Dict[str, Any]]]]  # tabel -> id -> baris; None = seluruh tabel
+
+
+class LayananServer:
+    """Server asyncio: banyak pembaca dari snapshot, satu writer untuk mutasi"""
+
+    def __init__(self, layanan: Perpustakaan) -> None:
+        self.layanan = layanan
+        self.snapshot: Dict[str, List[Dict[str, Any]]] = {}
+        self.indeks_cari: Dict[str, IndeksCari] = {}
+        self.posisi: Dict[str, Dict[Any, int]] = {}  # tabel -> id -> posisi baris di snapshot
+        self.queue: "Optional[asyncio.Queue[Tuple[str, Dict[str, Any], asyncio.Future[Any]]]]" = None
+        self._berubah: Berubah = {}
+        self._kunci_berubah = threading.Lock()
+        self._memperbarui = threading.Lock()
+
+    def siapkan(self) -> None:
+        """Antrian writer, snapshot awal, dan listener perubahan Repository"""
+        self.queue = asyncio.Queue()
+        if hasattr(self.layanan.store, "subscribe"):
+            self.layanan.store.subscribe(self._tandai)
+        self._muat_snapshot()
+
+    def _tandai(self, tabel: str, rows: Optional[List[Dict[str, Any]]]) -> None:
+        """Listener Repository: kumpulkan baris yang berubah sampai _perbarui_snapshot"""
+        with self._kunci_berubah:
+            lama = self._berubah.get(tabel, {})
+            if rows is None or lama is None:
+                self._berubah[tabel] = None
+            else:
+                lama.update((row["id"], row) for row in rows)
+                self._berubah[tabel] = lama
+
+    def _muat_snapshot(self) -> None:
+        self._berubah = dict.fromkeys(TABEL)
+        self._perbarui_snapshot()
+
+    def _sumber_berubah(self, tabel: str, kunci: str, nilai: str, berubah: Berubah) -> bool:
+        """Apakah kolom `nilai` tabel sumber join berubah untuk baris yang sudah ada di snapshot"""
+        if tabel not in berubah:
+            return False
+        rows = berubah[tabel]
+        if rows is None or tabel not in self.snapshot:
+            return True
+        if kunci != "id":
+            return False  # log_hapus hanya bertambah
+        posisi = self.posisi[tabel]
+        return any(id_ in posisi and self.snapshot[tabel][posisi[id_]].get(nilai) != row.get(nilai)
+                   for id_, row in rows.items())
+
+    def _gabung(self, tabel: str, rows: List[Dict[str, Any]], snapshot: Dict[str, List[Dict[str, Any]]],
+                posisi: Dict[str, Dict[Any, int]]) -> List[Dict[str, Any]]:
+        """Kolom gabungan untuk baris yang berubah; judul/nama diambil dari snapshot tabel sumbernya"""
+        if tabel != "peminjaman":
+            return self.layanan.gabungan.gabung(self.layanan.store, tabel, rows) if tabel in KOLOM_GABUNG else rows
+        hasil = []
+        for row in rows:
+            gabung = dict(row)
+            for kolom, (kolom_id, sumber) in KOLOM_GABUNG[tabel].items():
+                t = sumber[0][0]
+                i = posisi[t].get(row.get(kolom_id))
+                gabung[kolom] = (snapshot[t][i].get(kolom) if i is not None else None) or row.get(kolom)
+            if any(not gabung.get(kolom) for kolom in KOLOM_GABUNG[tabel]):
+                # Buku yang sudah dihapus: judulnya dari log_hapus
+                gabung = self.layanan.gabungan.gabung(self.layanan.store, tabel, [row])[0]
+            hasil.append(gabung)
+        return hasil
+
+    def _perbarui_snapshot(self) -> None:
+        """
+        Snapshot baru dari perubahan yang dikumpulkan _tandai: baris yang berubah diganti,
+        ditambah, atau (tombstone) dibuang; tabel bertanda None dimuat ulang utuh
+        """
+        with self._memperbarui:
+            with self._kunci_berubah:
+                berubah, self._berubah = self._berubah, {}
+            if not berubah:
+                return
+            try:
+                self._susun_snapshot(berubah)
+            except BaseException:
+                # Kembalikan tanda perubahan supaya pembaruan berikutnya mencobanya lagi
+                with self._kunci_berubah:
+                    for tabel, rows in berubah.items():
+                        baru = self._berubah.get(tabel, {})
+                        if rows is None or baru is None:
+                            self._berubah[tabel] = None
+                        else:
+                            self._berubah[tabel] = {**rows, **baru}
+                raise
+
+    def _susun_snapshot(self, berubah: Berubah) -> None:
+        """Pasang `berubah` ke salinan snapshot; yang lama tetap utuh jika gagal di tengah"""
+        snapshot = dict(self.snapshot)
+        indeks_cari = dict(self.indeks_cari)
+        posisi_baru = dict(self.posisi)
+        # Kolom gabungan ikut dimuat ulang jika nilai di tabel sumbernya berubah (misal judul diganti)
+        for tabel, kolom_gabung in KOLOM_GABUNG.items():
+            if any(self._sumber_berubah(t, kunci, nilai, berubah)
+                   for _, sumber in kolom_gabung.values() for t, kunci, nilai in sumber):
+                berubah[tabel] = None
+        for tabel in TABEL:
+            if tabel not in berubah:
+                continue
+            rows = berubah[tabel]
+            if rows is None or tabel not in snapshot:
+                snapshot[tabel] = self.layanan.daftar(tabel)
+                posisi_baru[tabel] = {row.get("id"): i for i, row in enumerate(snapshot[tabel])}
+                if tabel in KOLOM_CARI:
+                    indeks_cari[tabel] = IndeksCari(snapshot[tabel], KOLOM_CARI[tabel])
+                continue
+            daftar, posisi = list(snapshot[tabel]), dict(posisi_baru[tabel])
+            gabung = self._gabung(tabel, list(rows.values()), snapshot, posisi_baru)
+            dibuang = set()
+            for row in gabung:
+                i = posisi.get(row.get("id"))
+                if row.get(KOLOM_HAPUS):
+                    dibuang.add(row.get("id"))
+                elif i is not None:
+                    daftar[i] = row
+                else:
+                    posisi[row.get("id")] = len(daftar)
+                    daftar.append(row)
+            if dibuang & set(posisi):
+                daftar = [row for row in daftar if row.get("id") not in dibuang]
+                posisi = {row.get("id"): i for i, row in enumerate(daftar)}
+            snapshot[tabel], posisi_baru[tabel] = daftar, posisi
+            if tabel in KOLOM_CARI:
+                indeks_cari[tabel] = indeks_cari[tabel].perbarui(gabung)
+        if berubah.keys() & {"buku", "peminjaman", "kategori"}:
+            snapshot["statistik_kategori"] = self.layanan.statistik_kategori()
+        if "buku" in berubah:
+            snapshot["buku_terhapus"] = self.layanan.buku_terhapus()
+        self.snapshot, self.indeks_cari, self.posisi = snapshot, indeks_cari, posisi_baru
+
+    async def writer(self) -> None:
+        """Satu-satunya task yang boleh memanggil operasi tulis"""
+        assert self.queue is not None
+        loop = asyncio.get_running_loop()
+        while True:
+            aksi, kwargs, future = await self.queue.get()
+            try:
+                try:
+                    # I/O file dijalankan di thread agar pembaca tetap dilayani
+                    hasil = await loop.run_in_executor(None, lambda: getattr(self.layanan, aksi)(**kwargs))
+                except Exception as e:
+                    future.set_exception(e)
+                    continue
+                try:
+                    if hasil[0] and not hasattr(self.layanan.store, "subscribe"):
+                        self._berubah = dict.fromkeys(TABEL)
+                    # Sebelum klien menerima hasilnya: GET berikutnya harus melihat tulisan ini
+                    await loop.run_in_executor(None, self._perbarui_snapshot)
+                except Exception as e:
+                    print(f"Error updating snapshot: {e}")
+                future.set_result(hasil)
+            finally:
+                self.queue.task_done()
+
+    async def watch(self) -> None:
+        """Muat ulang tabel yang ditulis langsung ke repository oleh proses lain"""
+        repo = self.layanan.store
+        if not isinstance(repo, Repository):
+            return
+        loop = asyncio.get_running_loop()
+        while True:
+            await asyncio.sleep(POLL_INTERVAL)
+            if await loop.run_in_executor(None, repo.poll):
+                await loop.run_in_executor(None, self._perbarui_snapshot)
+
+    async def submit(self, aksi: str, kwargs: Dict[str, Any]) -> Any:
+        assert self.queue is not None
+        future: "asyncio.Future[Any]" = asyncio.get_running_loop().create_future()
+        await self.queue.put((aksi, kwargs, future))
+        return await future
+
+    async def route(self, method: str, target: str, body: bytes) -> Tuple[int, str, bytes]:
+        url = urlparse(target)
+        query = parse_qs(url.query)
+        parts = [p for p in url.path.split("/") if p]
+        if len(parts) < 2 or parts[0] != "api":
+            return 404, "application/json", b'{"error": "not found"}'
+        nama = parts[1]
+        snap = self.snapshot
+
+        if method == "GET":
+            if nama == "log_hapus" and len(parts) == 2 and "halaman" in query:
+                halaman, n = query["halaman"][0], query.get("n", [""])[0]
+                per_halaman = int(n) if n.isdigit() else LOG_PER_HALAMAN
+                mulai = (max(int(halaman) if halaman.isdigit() else 1, 1) - 1) * per_halaman
+                # Hanya potongan halaman ini yang dibalik, bukan salinan seluruh log
+                log = snap["log_hapus"]
+                akhir = max(len(log) - mulai, 0)
+                rows = log[max(akhir - per_halaman - 1, 0):akhir][::-1]
+                return self._json({"data": rows[:per_halaman], "berikutnya": len(rows) > per_halaman})
+            if nama in TABEL and len(parts) == 2:
+                return self._json(snap[nama])
+            if nama == "kategori" and len(parts) == 3:
+                id_kategori = int(parts[2]) if parts[2].isdigit() else None
+                return self._json([b for b in snap["buku"] if b.get("id_kategori") == id_kategori])
+            if nama == "feed" and len(parts) == 2:
+                journal = getattr(self.layanan.store, "journal", None)
+                if journal is None:
+                    return 404, "application/json", b'{"error": "journal tidak aktif"}'
+                cursor, n = query.get("cursor", ["0"])[0], query.get("n", [""])[0]
+                data, berikutnya = await asyncio.get_running_loop().run_in_executor(
+                    None, cdc.baca, journal, int(cursor) if cursor.isdigit() else 0,
+                    int(n) if n.isdigit() else cdc.BATAS_FEED)
+                return self._json({"data": data, "cursor": berikutnya})
+            if nama == "laporan" and len(parts) == 2:
+                return self._json(await asyncio.get_running_loop().run_in_executor(None, self.layanan.laporan))
+            if nama == "grafik" and len(parts) == 2:
+                try:
+                    dari, sampai = (date.fromisoformat(query[k][0]) if k in query else None for k in ("dari", "sampai"))
+                except ValueError:
+                    return 400, "application/json", b'{"error": "tanggal tidak valid"}'
+                return self._json(await asyncio.get_running_loop().run_in_executor(
+                    None, self.layanan.grafik_sirkulasi, dari, sampai, query.get("satuan", [""])[0]))
+            if nama == "buku_terhapus" and len(parts) == 2:
+                return self._json(snap["buku_terhapus"])
+            if nama == "statistik" and len(parts) == 3 and parts[2] == "kategori":
+                return self._json(snap["statistik_kategori"])
+            if nama == "statistik":
+                return self._json(statistik(snap["buku"], snap["anggota"], snap["peminjaman"]))
+            if nama == "terlambat":
+                return self._json(buku_terlambat(snap["peminjaman"]))
+            if nama == "cari":
+                return self._json(cari_buku(snap["buku"], query.get("q", [""])[0]))
+            if nama == "kode" and len(parts) == 3 and parts[2] in KOLOM_KODE:
+                # Hash lookup di Repository, tidak perlu peta kode di snapshot
+                row = await asyncio.get_running_loop().run_in_executor(
+                    None, self.layanan.cari_kode, parts[2], query.get("k", [""])[0])
+                return self._json(row) if row is not None else (404, "application/json", b'{"error": "not found"}')
+            if nama == "saran" and len(parts) == 3 and parts[2] in KOLOM_CARI:
+                n = query.get("n", [""])[0]
+                saring = (lambda b: int(b.get("stok", 0) or 0) > 0) if query.get("tersedia") else None
+                return self._json(self.indeks_cari[parts[2]].cari(
+                    query.get("q", [""])[0], int(n) if n.isdigit() else BATAS_SARAN, saring))
+            if nama == "riwayat" and len(parts) == 3 and parts[2].isdigit():
+                return self._json(riwayat_anggota(snap["peminjaman"], int(parts[2])))
+            if nama == "ekspor" and len(parts) == 3 and parts[2] in TABEL:
+                fmt = query.get("format", ["csv"])[0]
+                mime = "text/csv" if fmt == "csv" else \
+                    "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+                return 200, mime, ekspor(snap[parts[2]], fmt, query.get("sheet", ["Data"])[0])
+            return 404, "application/json", b'{"error": "not found"}'
+
+        if method == "POST":
+            if nama not in AKSI_TULIS:
+                return 404, "application/json", b'{"error": "aksi tidak dikenal"}'
+            try:
+                kwargs = json.loads(body or b"{}")
+            except json.JSONDecodeError:
+                return 400, "application/json", b'{"error": "body bukan JSON"}'
+            try:
+                ok, pesan, data = await self.submit(nama, kwargs)
+            except TypeError as e:
+                return self._json({"error": str(e)}, 400)
+            return self._json({"ok": ok, "pesan": pesan, "data": data})
+
+        return 405, "application/json", b'{"error": "method not allowed"}'
+
+    @staticmethod
+    def _json(payload: Any, status: int = 200) -> Tuple[int, str, bytes]:
+        data = json.dumps(payload, ensure_ascii=False, default=json_default)
+        return status, "application/json", data.encode("utf-8")
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            request_line = (await reader.readline()).decode("latin-1").strip()
+            if not request_line:
+                writer.close()
+                return
+            method, target, _ = request_line.split(" ", 2)
+            headers: Dict[str, str] = {}
+            while True:
+                line = (await reader.readline()).decode("latin-1")
+                if line in ("\r\n", "\n", ""):
+                    break
+                key, _, value = line.partition(":")
+                headers[key.strip().lower()] = value.strip()
+
+            length = int(headers.get("content-length", "0") or 0)
+            if length > MAX_BODY:
+                status, mime, payload = 413, "application/json", b'{"error": "body terlalu besar"}'
+            else:
+                body = await reader.readexactly(length) if length else b""
+                status, mime, payload = await self.route(method.upper(), target, body)
+        except Exception as e:
+            status, mime, payload = self._json({"error": str(e)}, 500)
+
+        head = (f"HTTP/1.1 {status} {STATUS_TEXT.get(status, '')}\r\n"
+                f"Content-Type: {mime}; charset=utf-8\r\n"
+                f"Content-Length: {len(payload)}\r\n"
+                "Connection: close\r\n\r\n")
+        writer.write(head.encode("latin-1") + payload)
+        try:
+            await writer.drain()
+        finally:
+            writer.close()
+
+    async def serve(self, host: str = DEFAULT_HOST, port: int = DEFAULT_PORT) -> None:
+        self.siapkan()
+        tasks = [asyncio.ensure_future(self.writer()), asyncio.ensure_future(self.watch())]
+        server = await asyncio.start_server(self.handle, host, port)
+        print(f"Layanan perpustakaan berjalan di http://{host}:{port}")
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            for task in tasks:
+                task.cancel()
+
+
+class LayananHttp:
+    """Klien HTTP dengan method yang sama seperti utils.perpustakaan.Perpustakaan"""
+
+    def __init__(self, base_url: str, timeout: float = 10.0) -> None:
+        self.base_url = base_url.rstrip("/")
+        self.timeout = timeout
+
+    def _request(self, path: str, payload: Optional[Dict[str, Any]] = None) -> bytes:
+        data = json.dumps(payload, default=json_default).encode("utf-8") if payload is not None else None
+        req = urllib.request.Request(self.base_url + path, data=data,
+                                     headers={"Content-Type": "application/json"})
+        with urllib.request.urlopen(req, timeout=self.timeout) as resp:
+            return resp.read()
+
+    def _get(self, path: str) -> Any:
+        return json.loads(self._request(path))
+
+    def _aksi(self, nama: str, **kwargs: Any) -> Any:
+        try:
+            hasil = json.loads(self._request(f"/api/{nama}", kwargs))
+        except urllib.error.URLError as e:
+            return False, f"Layanan tidak bisa dihubungi: {e}", None
+        return hasil["ok"], hasil["pesan"], hasil["data"]
+
+    # ---- baca (baris diparse dengan skema yang sama seperti repository) ----
+    def daftar(self, tabel: str) -> List[Dict[str, Any]]:
+        return parse_records(tabel, self._get(f"/api/{tabel}"))
+
+    def cari_buku(self, keyword: str) -> List[Dict[str, Any]]:
+        return parse_records("buku", self._get("/api/cari?" + urlencode({"q": keyword})))
+
+    def buku_terlambat(self) -> List[Dict[str, Any]]:
+        return [{"peminjaman": parse_record("peminjaman", item["peminjaman"]),
+                 "hari_terlambat": item["hari_terlambat"]}
+                for item in self._get("/api/terlambat")]
+
+    def cari_kode(self, tabel: str, kode: str) -> Optional[Dict[str, Any]]:
+        try:
+            return parse_record(tabel, self._get(f"/api/kode/{tabel}?" + urlencode({"k": kode})))
+        except urllib.error.HTTPError as e:
+            if e.code == 404:
+                return None
+            raise
+
+    def saran(self, tabel: str, kueri: str, batas: int = BATAS_SARAN, tersedia: bool = False) -> List[Dict[str, Any]]:
+        params = {"q": kueri, "n": batas, **({"tersedia": 1} if tersedia else {})}
+        return parse_records(tabel, self._get(f"/api/saran/{tabel}?" + urlencode(params)))
+
+    def riwayat_anggota(self, id_anggota: int) -> List[Dict[str, Any]]:
+        return parse_records("peminjaman", self._get(f"/api/riwayat/{id_anggota}"))
+
+    def statistik(self) -> Dict[str, int]:
+        return self._get("/api/statistik")
+
+    def statistik_kategori(self) -> List[Dict[str, Any]]:
+        return self._get("/api/statistik/kategori")
+
+    def laporan(self) -> Dict[str, Any]:
+        return self._get("/api/laporan")
+
+    def grafik_sirkulasi(self, dari: Optional[date] = None, sampai: Optional[date] = None,
+                         satuan: str = "") -> Dict[str, Any]:
+        query = {k: v.isoformat() for k, v in (("dari", dari), ("sampai", sampai)) if v is not None}
+        if satuan:
+            query["satuan"] = satuan
+        return self._get("/api/grafik?" + urlencode(query))
+
+    def buku_kategori(self, id_kategori: Any) -> List[Dict[str, Any]]:
+        return parse_records("buku", self._get(f"/api/kategori/{'tanpa' if id_kategori is None else id_kategori}"))
+
+    def buku_terhapus(self) -> List[Dict[str, Any]]:
+        return parse_records("buku", self._get("/api/buku_terhapus"))
+
+    def log_hapus(self, halaman: int = 1, per_halaman: int = LOG_PER_HALAMAN) -> Tuple[List[Dict[str, Any]], bool]:
+        hasil = self._get("/api/log_hapus?" + urlencode({"halaman": halaman, "n": per_halaman}))
+        return parse_records("log_hapus", hasil["data"]), hasil["berikutnya"]
+
+    def ekspor(self, tabel: str, format: str = "csv", sheet_name: str = "Data") -> bytes:
+        return self._request(f"/api/ekspor/{tabel}?" + urlencode({"format": format, "sheet": sheet_name}))
+
+    # ---- tulis ----
+    def tambah_buku(self, data: Dict[str, Any]) -> Any:
+        return self._aksi("tambah_buku", data=data)
+
+    def ubah_buku(self, id_buku: int, perubahan: Dict[str, Any]) -> Any:
+        return self._aksi("ubah_buku", id_buku=id_buku, perubahan=perubahan)
+
+    def hapus_buku(self, id_buku: int, alasan: str) -> Any:
+        return self._aksi("hapus_buku", id_buku=id_buku, alasan=alasan)
+
+    def pulihkan_buku(self, id_buku: int) -> Any:
+        return self._aksi("pulihkan_buku", id_buku=id_buku)
+
+    def padatkan_buku(self) -> Any:
+        return self._aksi("padatkan_buku")
+
+    def tambah_anggota(self, data: Dict[str, Any]) -> Any:
+        return self._aksi("tambah_anggota", data=data)
+
+    def pinjam(self, id_buku: int, id_anggota: int) -> Any:
+        return self._aksi("pinjam", id_buku=id_buku, id_anggota=id_anggota)
+
+    def pinjam_kode(self, kode_buku: str, kode_anggota: str) -> Any:
+        return self._aksi("pinjam_kode", kode_buku=kode_buku, kode_anggota=kode_anggota)
+
+    def kembalikan(self, id_pinjam: int) -> Any:
+        return self._aksi("kembalikan", id_pinjam=id_pinjam)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="API HTTP/JSON Sistem Perpustakaan")
+    parser.add_argument("--host", default=DEFAULT_HOST)
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--variabel", default="variabel.txt")
+    args = parser.parse_args()
+
+    var = load_variabel(args.variabel)
+    configure_from_variabel(var)
+    layanan = Perpustakaan(Repository(paths_from_variabel(var), Journal.from_variabel(var)),
+                           CoverStore.from_variabel(var), IndeksPeminjaman.from_variabel(var), batas_pinjam(var),
+                           laporan=Laporan.from_variabel(var), rollup=RollupSirkulasi.from_variabel(var))
+    migrasi_peminjaman(layanan.store)
+    migrasi_kategori(layanan.store)
+    try:
+        asyncio.run(LayananServer(layanan).serve(args.host, args.port))
+    except KeyboardInterrupt:
+        print("Layanan dihentikan.")
@@ -0,0 +1,673 @@
+"""
+Sinkronisasi inkremental JSON <-> CSV.
+
+json_to_csv/csv_to_json di utils/converter.py mem-parsing dan menulis ulang seluruh
+file setiap kali dipanggil. sync() menyimpan manifest di samping file tujuan:
+
+    <tujuan>.sync      metadata sumber & tujuan (ukuran, mtime, hash prefix, kolom)
+    <tujuan>.sync.idx  satu baris per record: key, digest, offset awal & akhir di tujuan
+
+Pada sinkronisasi berikutnya:
+- sumber tidak berubah            -> tidak ada yang ditulis
+- sumber hanya bertambah di akhir -> hanya ekor sumber yang di-parse, baris baru di-append
+- ada baris berubah/terhapus      -> sumber dibaca streaming sekali; file tujuan dipotong
+  di baris pertama yang berbeda dan hanya bagian setelahnya yang ditulis
+- kolom CSV bertambah, atau manifest tidak cocok dengan file tujuan -> tulis ulang penuh
+
+Tujuan tidak boleh berupa tabel aktif (paths_from_variabel): tabel hanya ditulis
+lewat Repository supaya journal, delta, dan indeks tetap konsisten.
+
+Sumber tidak pernah dimuat utuh ke memori, jadi file yang lebih besar dari RAM tetap
+bisa disinkronkan. File tujuan dianggap turunan dari sumber: jika proses terhenti di
+tengah jalan, manifest tidak lagi cocok dan sinkronisasi berikutnya membangun ulang.
+"""
+import codecs
+import csv
+import hashlib
+import io
+import json
+import os
+import re
+import shutil
+import tempfile
+from json.encoder import encode_basestring_ascii
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from utils.atomic import atomic_open, fsync_path
+from utils.iolog import catat
+from utils.metrics import add_bytes, file_size, timed
+from utils.repository import load_variabel, paths_from_variabel
+from utils.schema import compile_parser
+
+CHUNK_SIZE = 64 * 1024
+MANIFEST_VERSION = 1
+
+JSON_HEADER = b"[\n"
+JSON_SEP = b",\n"
+JSON_FOOTER = b"\n]"
+JSON_EMPTY = b"[]"
+
+# (row, offset awal, offset akhir, digest isi baris) di file sumber
+Record = Tuple[Dict[str, Any], int, int, str]
+# (key, digest, offset awal, offset akhir) di file tujuan, relatif terhadap akhir header
+Entry = Tuple[str, str, int, int]
+
+_WHITESPACE = re.compile(r"[ \t\n\r]*")
+_TOKEN = re.compile(r"[ \t\n\r]*([^ \t\n\r])")
+
+
+def _format(path: str) -> str:
+    return "csv" if path.lower().endswith(".csv") else "json"
+
+
+def _digest(raw: bytes) -> str:
+    return hashlib.blake2b(raw, digest_size=8).hexdigest()
+
+
+# ============= PEMBACA SUMBER (streaming) =============
+def iter_json_array(path: str, start: int = 0) -> Iterator[Record]:
+    """
+    Baca array JSON elemen demi elemen tanpa memuat seluruh file
+
+    Args:
+        path (str): File JSON berisi array of object
+        start (int): 0 untuk dari awal, atau offset tepat setelah sebuah elemen
+            untuk melanjutkan membaca ekor file
+    """
+    decoder = json.JSONDecoder()
+    utf8 = codecs.getincrementaldecoder("utf-8")()
+    with open(path, "rb") as f:
+        f.seek(start)
+        buf, i, pos, eof = "", 0, start, False
+        state = "open" if start == 0 else "after"
+        while True:
+            if state == "value":
+                m = _WHITESPACE.match(buf, i)  # selalu cocok (boleh kosong)
+                j = m.end() if m else i
+                pos += j - i  # whitespace JSON selalu 1 byte
+                i = j
+                if i < len(buf):
+                    try:
+                        obj, end = decoder.raw_decode(buf, i)
+                    except json.JSONDecodeError:
+                        # Elemen terpotong di batas chunk: baca chunk berikutnya
+                        if eof:
+                            raise ValueError("Format JSON tidak valid!")
+                    else:
+                        if not isinstance(obj, dict):
+                            raise ValueError("Elemen array JSON harus berupa object")
+                        raw = buf[i:end].encode("utf-8")
+                        yield obj, pos, pos + len(raw), _digest(raw)
+                        pos += len(raw)
+                        i = end
+                        state = "after"
+                        continue
+                elif eof:
+                    raise ValueError("Format JSON tidak valid!")
+            else:
+                m = _TOKEN.match(buf, i)
+                if m:
+                    ch = m.group(1)
+                    if state == "open":
+                        if ch != "[":
+                            raise ValueError("File JSON harus berisi array")
+                        state = "first"
+                    elif ch == "]":
+                        return
+                    elif state == "first":
+                        # Awal elemen pertama: jangan dikonsumsi
+                        pos += m.start(1) - i
+                        i = m.start(1)
+                        state = "value"
+                        continue
+                    elif ch == ",":
+                        state = "value"
+                    else:
+                        raise ValueError("Format JSON tidak valid!")
+                    pos += m.end() - i
+                    i = m.end()
+                    continue
+                if eof:
+                    raise ValueError("Format JSON tidak valid!")
+
+            chunk = f.read(CHUNK_SIZE)
+            eof = not chunk
+            buf = buf[i:] + utf8.decode(chunk, final=eof)
+            i = 0
+
+
+class _LineCounter:
+    """Iterator baris untuk csv.reader yang mencatat offset byte yang sudah dibaca"""
+
+    def __init__(self, f: Any) -> None:
+        self.f = f
+        self.pos = f.tell()
+        self.first = self.pos == 0
+
+    def __iter__(self) -> "_LineCounter":
+        return self
+
+    def __next__(self) -> str:
+        line = self.f.readline()
+        if not line:
+            raise StopIteration
+        self.pos += len(line)
+        text = line.decode("utf-8")
+        if self.first:
+            self.first = False
+            text = text.lstrip("\ufeff")
+        return text
+
+
+def csv_header(path: str) -> List[str]:
+    with open(path, "rb") as f:
+        return next(csv.reader(_LineCounter(f)), [])
+
+
+def iter_csv(path: str, start: int = 0, header: Optional[List[str]] = None) -> Iterator[Record]:
+    """
+    Baca CSV baris demi baris dengan konversi tipe yang sama seperti csv_to_json
+
+    Args:
+        path (str): File CSV
+        start (int): Offset awal; jika > 0, `header` wajib diisi
+        header (list): Nama kolom, dibaca dari baris pertama jika None
+    """
+    with open(path, "rb") as f:
+        f.seek(start)
+        lines = _LineCounter(f)
+        reader = csv.reader(lines)
+        if header is None:
+            header = next(reader, [])
+        # Tanggal tetap string karena hasilnya bisa ditulis ke JSON
+        parse_row = compile_parser(None, header, parse_dates=False)
+        row_start = lines.pos
+        for values in reader:
+            row_end = lines.pos
+            if values:
+                values += [""] * (len(header) - len(values))
+                # Digest dari nilai, bukan teks: baris pendek/beda quoting tetap dianggap sama
+                yield parse_row(values), row_start, row_end, _digest("\x1f".join(values).encode("utf-8"))
+            row_start = row_end
+
+
+def _iter_source(path: str, start: int = 0, header: Optional[List[str]] = None) -> Iterator[Record]:
+    if _format(path) == "csv":
+        return iter_csv(path, start, header)
+    return iter_json_array(path, start)
+
+
+# ============= ENCODER TUJUAN =============
+class _Encoder:
+    """Serialisasi baris ke format file tujuan (CSV, atau JSON indent=4 seperti json.dump)"""
+
+    def __init__(self, fmt: str, fieldnames: List[str]) -> None:
+        self.fieldnames = list(fieldnames)
+        self.field_set = set(fieldnames)
+        self._buf = io.StringIO()
+        self._writer = csv.DictWriter(self._buf, fieldnames=self.fieldnames) if fmt == "csv" else None
+
+    def add_fields(self, row: Dict[str, Any]) -> bool:
+        """Tambahkan kolom baru dari `row` (CSV saja); True jika ada kolom baru"""
+        if self._writer is None or self.field_set.issuperset(row):
+            return False
+        for name in row:
+            if name not in self.field_set:
+                self.field_set.add(name)
+                self.fieldnames.append(name)
+        self._writer = csv.DictWriter(self._buf, fieldnames=self.fieldnames)
+        return True
+
+    def header(self) -> bytes:
+        if self._writer is None:
+            return JSON_HEADER
+        return self._line(self.fieldnames)
+
+    def sep(self, index: int) -> bytes:
+        return JSON_SEP if self._writer is None and index > 0 else b""
+
+    def footer(self) -> bytes:
+        return JSON_FOOTER if self._writer is None else b""
+
+    def empty(self) -> bytes:
+        return JSON_EMPTY if self._writer is None else self._line([])
+
+    def _line(self, values: List[str]) -> bytes:
+        self._buf.seek(0)
+        self._buf.truncate()
+        csv.writer(self._buf).writerow(values)
+        return self._buf.getvalue().encode("utf-8")
+
+    def encode(self, row: Dict[str, Any]) -> bytes:
+        if self._writer is None:
+            text = json.dumps(row, indent=4, ensure_ascii=False)
+            return ("    " + text.replace("\n", "\n    ")).encode("utf-8")
+        self._buf.seek(0)
+        self._buf.truncate()
+        self._writer.writerow(row)
+        return self._buf.getvalue().encode("utf-8")
+
+
+class _Keys:
+    """Key unik per baris; key duplikat diberi akhiran urutan kemunculan"""
+
+    def __init__(self) -> None:
+        self.count: Dict[str, int] = {}
+
+    def __call__(self, key: str) -> str:
+        n = self.count.get(key, 0)
+        self.count[key] = n + 1
+        return key if n == 0 else f"{key}#{n}"
+
+
+# ============= MANIFEST =============
+def _manifest_paths(target: str) -> Tuple[str, str]:
+    return target + ".sync", target + ".sync.idx"
+
+
+def _stat(path: str) -> Tuple[int, int]:
+    st = os.stat(path)
+    return st.st_size, st.st_mtime_ns
+
+
+def _hash_range(path: str, end: int, start: int = 0, hasher: Any = None) -> Any:
+    """Hash blake2b byte [start:end] file; `hasher` yang diberikan akan dilanjutkan"""
+    hasher = hasher or hashlib.blake2b()
+    with open(path, "rb") as f:
+        f.seek(start)
+        remaining = end - start
+        while remaining > 0:
+            chunk = f.read(min(CHUNK_SIZE, remaining))
+            if not chunk:
+                break
+            hasher.update(chunk)
+            remaining -= len(chunk)
+    return hasher
+
+
+def _load_manifest(source: str, target: str, key: str) -> Optional[Dict[str, Any]]:
+    """Manifest yang masih cocok dengan file tujuan & index, atau None"""
+    meta_path, idx_path = _manifest_paths(target)
+    try:
+        with open(meta_path, "r", encoding="utf-8") as f:
+            meta = json.load(f)
+        if (meta.get("version") != MANIFEST_VERSION or meta.get("key") != key
+                or meta["source"]["path"] != os.path.abspath(source)):
+            return None
+        if list(_stat(target)) != [meta["target"]["size"], meta["target"]["mtime_ns"]]:
+            return None
+        if os.path.getsize(idx_path) != meta["index_size"]:
+            return None
+    except (OSError, ValueError, KeyError, TypeError):
+        return None
+    return meta
+
+
+def _index_line(key: str, digest: str, start: int, end: int) -> bytes:
+    return f"{encode_basestring_ascii(key)}\t{digest}\t{start}\t{end}\n".encode("ascii")
+
+
+def _parse_index_line(line: bytes) -> Entry:
+    key, digest, start, end = line.decode("ascii").split("\t")
+    # Key tanpa escape cukup dilepas tanda kutipnya
+    key = json.loads(key) if "\\" in key else key[1:-1]
+    return key, digest, int(start), int(end)
+
+
+def _read_index(idx_path: str) -> Tuple[List[Entry], List[int]]:
+    """Entry index beserta offset byte tiap baris di file index"""
+    entries: List[Entry] = []
+    offsets: List[int] = []
+    pos = 0
+    with open(idx_path, "rb") as f:
+        for line in f:
+            entries.append(_parse_index_line(line))
+            offsets.append(pos)
+            pos += len(line)
+    return entries, offsets
+
+
+def _write_meta(source: str, target: str, key: str, src_end: int, src_hash: str,
+                src_stat: Tuple[int, int], fieldnames: List[str], header_end: int,
+                rows: int, data_end: int) -> None:
+    meta_path, idx_path = _manifest_paths(target)
+    # Target dan indeks harus sudah di disk sebelum manifest yang menjaminnya;
+    # crash sebelum manifest ditulis membuat manifest lama usang -> rebuild
+    fsync_path(target)
+    fsync_path(idx_path)
+    size, mtime_ns = _stat(target)
+    header = csv_header(source) if _format(source) == "csv" else None
+    meta = {
+        "version": MANIFEST_VERSION,
+        "key": key,
+        "source": {"path": os.path.abspath(source), "size": src_stat[0], "mtime_ns": src_stat[1],
+                   "end": src_end, "hash": src_hash, "header": header},
+        "target": {"size": size, "mtime_ns": mtime_ns, "fieldnames": fieldnames,
+                   "header_end": header_end, "rows": rows, "end": data_end},
+        "index_size": os.path.getsize(idx_path)
+    }
+    with atomic_open(meta_path, "w") as f:
+        json.dump(meta, f, ensure_ascii=False)
+
+
+def _stats(mode: str, **kwargs: int) -> Dict[str, Any]:
+    stats: Dict[str, Any] = {"mode": mode, "baru": 0, "berubah": 0, "dihapus": 0, "baris": 0, "bytes": 0}
+    stats.update(kwargs)
+    return stats
+
+
+# ============= STRATEGI SINKRONISASI =============
+def _pad_rows(body: Any, idx_in: Any, out: Any, idx_out: Any, encoder: _Encoder) -> int:
+    """
+    Salin isi CSV sementara ke `out` dengan lebar header final: baris yang ditulis
+    sebelum sebuah kolom muncul diberi nilai kosong. Offset index ikut dihitung ulang.
+
+    Returns:
+        int: Offset akhir data (relatif terhadap akhir header)
+    """
+    width = len(encoder.fieldnames)
+    text = io.TextIOWrapper(body, encoding="utf-8", newline="")
+    idx_in.seek(0)
+    pos = 0
+    for values, line in zip(csv.reader(text), idx_in):
+        key, digest, _, _ = _parse_index_line(line)
+        data = encoder._line(values + [""] * (width - len(values)))
+        out.write(data)
+        idx_out.write(_index_line(key, digest, pos, pos + len(data)))
+        pos += len(data)
+    text.detach()
+    return pos
+
+
+def _rebuild(source: str, target: str, key: str, src_stat: Tuple[int, int],
+             fieldnames: Optional[List[str]] = None) -> Dict[str, Any]:
+    """
+    Tulis ulang penuh dalam satu pass streaming.
+
+    Union kolom CSV dikumpulkan sambil jalan dan header ditulis di depan isi setelah
+    pass selesai. Jika ada kolom yang baru muncul setelah beberapa baris ditulis, isi
+    sementara di-encode ulang sekali dengan header final agar setiap baris selebar header.
+    """
+    encoder = _Encoder(_format(target), fieldnames or [])
+    _, idx_path = _manifest_paths(target)
+    folder = os.path.dirname(os.path.abspath(target))
+    os.makedirs(folder, exist_ok=True)
+
+    out = tempfile.NamedTemporaryFile("wb", dir=folder, delete=False)
+    idx = tempfile.NamedTemporaryFile("w+b", dir=folder, delete=False)
+    temps = [out.name, idx.name]
+    idx_name = idx.name
+    try:
+        with out, idx, tempfile.TemporaryFile() as body:
+            rows, pos, src_end, ragged = 0, 0, 0, False
+            for row, _, end, digest in _iter_source(source):
+                if encoder.add_fields(row) and rows:
+                    ragged = True
+                sep = encoder.sep(rows)
+                data = encoder.encode(row)
+                body.write(sep + data)
+                idx.write(_index_line(str(row.get(key, "")), digest,
+                                      pos + len(sep), pos + len(sep) + len(data)))
+                pos += len(sep) + len(data)
+                rows += 1
+                src_end = end
+            if rows:
+                header = encoder.header()
+                out.write(header)
+                body.seek(0)
+                if ragged:
+                    padded = tempfile.NamedTemporaryFile("wb", dir=folder, delete=False)
+                    temps.append(padded.name)
+                    with padded:
+                        pos = _pad_rows(body, idx, out, padded, encoder)
+                    idx_name = padded.name
+                else:
+                    shutil.copyfileobj(body, out)
+                out.write(encoder.footer())
+            else:
+                # Sama seperti save_csv/json.dump untuk data kosong
+                header = b""
+                out.write(encoder.empty())
+            written = out.tell()
+        os.replace(out.name, target)
+        os.replace(idx_name, idx_path)
+    finally:
+        for name in temps:
+            if os.path.exists(name):
+                os.remove(name)
+
+    _write_meta(source, target, key, src_end, _hash_range(source, src_end).hexdigest(), src_stat,
+                encoder.fieldnames, len(header), rows, pos)
+    return _stats("rebuild", baris=rows, baru=rows, bytes=written)
+
+
+def _append(source: str, target: str, key: str, meta: Dict[str, Any],
+            src_stat: Tuple[int, int]) -> Optional[Dict[str, Any]]:
+    """Sumber hanya bertambah di akhir: parse ekornya saja. None jika bukan kasus append"""
+    src, tgt = meta["source"], meta["target"]
+    old_end = src["end"]
+    if _format(source) == "csv":
+        # Baris terakhir harus sudah ditutup newline, kalau tidak ekor bisa menyambungnya
+        with open(source, "rb") as f:
+            f.seek(old_end - 1)
+            if f.read(1) != b"\n":
+                return None
+    hasher = _hash_range(source, old_end)
+    if hasher.copy().hexdigest() != src["hash"]:
+        return None
+
+    encoder = _Encoder(_format(target), tgt["fieldnames"])
+    chunks: List[bytes] = []
+    lines: List[bytes] = []
+    rows, pos, new_end = tgt["rows"], tgt["end"], old_end
+    try:
+        for row, _, end, digest in _iter_source(source, old_end, src["header"]):
+            if encoder.add_fields(row):
+                return None  # kolom baru: header harus ditulis ulang
+            sep = encoder.sep(rows)
+            data = encoder.encode(row)
+            chunks.append(sep + data)
+            lines.append(_index_line(str(row.get(key, "")), digest,
+                                     pos + len(sep), pos + len(sep) + len(data)))
+            pos += len(sep) + len(data)
+            rows += 1
+            new_end = end
+    except (ValueError, csv.Error):
+        return None
+
+    written = 0
+    if chunks:
+        footer = encoder.footer()
+        with open(target, "r+b") as f:
+            f.seek(tgt["header_end"] + tgt["end"])
+            for chunk in chunks:
+                f.write(chunk)
+            f.write(footer)
+            f.truncate()
+        with open(_manifest_paths(target)[1], "ab") as f:
+            f.writelines(lines)
+        written = sum(len(c) for c in chunks) + len(footer)
+        hasher = _hash_range(source, new_end, old_end, hasher)
+
+    _write_meta(source, target, key, new_end, hasher.hexdigest(), src_stat,
+                tgt["fieldnames"], tgt["header_end"], rows, pos)
+    return _stats("append" if chunks else "noop", baru=rows - tgt["rows"], baris=rows, bytes=written)
+
+
+def _cut_offset(fmt: str, old: List[Entry], index: int) -> int:
+    """Offset (relatif) tempat baris ke-`index` dimulai, termasuk separator JSON"""
+    if fmt == "json" or index >= len(old):
+        return old[index - 1][3] if index > 0 else 0
+    return old[index][2]
+
+
+def _diff(source: str, target: str, key: str, meta: Dict[str, Any],
+          src_stat: Tuple[int, int]) -> Dict[str, Any]:
+    """
+    Bandingkan sumber dengan index per primary key dalam satu pass streaming.
+
+    Baris sebelum perbedaan pertama tidak disentuh; setelahnya, baris yang tidak
+    berubah disalin apa adanya dari file tujuan lama dan hanya baris baru/berubah
+    yang diserialisasi ulang.
+    """
+    fmt = _format(target)
+    tgt = meta["target"]
+    header_end = tgt["header_end"]
+    encoder = _Encoder(fmt, tgt["fieldnames"])
+    idx_path = _manifest_paths(target)[1]
+
+    old, idx_offsets = _read_index(idx_path)
+    old_keys = _Keys()
+    old_okeys = [old_keys(entry[0]) for entry in old]
+    old_map = dict(zip(old_okeys, old))
+
+    keys = _Keys()
+    seen = set()
+    baru = berubah = 0
+    rows, src_end, pos = 0, 0, 0
+    cut: Optional[int] = None
+    new_entries: List[Entry] = []
+    schema_changed = False
+
+    with open(target, "rb") as old_f, tempfile.TemporaryFile() as tail:
+        for row, _, end, digest in _iter_source(source):
+            index = rows
+            rows += 1
+            src_end = end
+            raw_key = str(row.get(key, ""))
+            okey = keys(raw_key)
+            seen.add(okey)
+            lama = old_map.get(okey)
+            if lama is None:
+                baru += 1
+            elif lama[1] != digest:
+                berubah += 1
+            if encoder.add_fields(row):
+                schema_changed = True
+
+            if cut is None:
+                if index < len(old) and old_okeys[index] == okey and old[index][1] == digest:
+                    continue
+                cut = index
+                pos = _cut_offset(fmt, old, cut)
+            if schema_changed:
+                continue  # header berubah, semua baris ditulis ulang di bawah
+
+            if lama is not None and lama[1] == digest:
+                old_f.seek(header_end + lama[2])
+                data = old_f.read(lama[3] - lama[2])
+            else:
+                data = encoder.encode(row)
+            sep = encoder.sep(index)
+            tail.write(sep + data)
+            new_entries.append((raw_key, digest, pos + len(sep), pos + len(sep) + len(data)))
+            pos += len(sep) + len(data)
+
+        counts = {"baru": baru, "berubah": berubah,
+                  "dihapus": sum(1 for okey in old_okeys if okey not in seen)}
+        if schema_changed or rows == 0:
+            stats = _rebuild(source, target, key, src_stat, tgt["fieldnames"])
+            stats.update(counts)
+            return stats
+
+        src_hash = _hash_range(source, src_end).hexdigest()
+        if cut is None:
+            if rows == len(old):
+                # Hanya format sumber yang berubah (spasi di luar elemen, dsb.)
+                _write_meta(source, target, key, src_end, src_hash, src_stat,
+                            tgt["fieldnames"], header_end, rows, tgt["end"])
+                return _stats("noop", baris=rows)
+            cut = rows
+            pos = _cut_offset(fmt, old, cut)
+
+        footer = encoder.footer()
+        written = tail.tell() + len(footer)
+        tail.seek(0)
+        with open(target, "r+b") as f:
+            f.seek(header_end + _cut_offset(fmt, old, cut))
+            shutil.copyfileobj(tail, f)
+            f.write(footer)
+            f.truncate()
+
+    with open(idx_path, "r+b") as f:
+        f.seek(idx_offsets[cut] if cut < len(old) else os.path.getsize(idx_path))
+        f.writelines(_index_line(*entry) for entry in new_entries)
+        f.truncate()
+
+    _write_meta(source, target, key, src_end, src_hash, src_stat,
+                tgt["fieldnames"], header_end, rows, pos)
+    return _stats("diff", baris=rows, bytes=written, **counts)
+
+
+def sync(source: str, target: str, key: str = "id") -> Dict[str, Any]:
+    """
+    Sinkronkan file tujuan dengan sumber (JSON -> CSV atau CSV -> JSON)
+
+    Args:
+        source (str): File sumber (.json atau .csv)
+        target (str): File tujuan; formatnya ditentukan dari ekstensi
+        key (str): Kolom primary key untuk mencocokkan baris
+
+    Returns:
+        dict: mode ("noop", "append", "diff", "rebuild"), jumlah baris baru,
+            berubah, dihapus, total baris, dan byte yang ditulis
+    """
+    with timed("converter.sync"), catat("sync", os.path.basename(target)) as ev:
+        stats = _sync(source, target, key)
+        add_bytes(read=file_size(source), written=stats.get("bytes", 0))
+        ev.update(rows=stats["baru"] + stats["berubah"], bytes=stats.get("bytes", 0))
+        return stats
+
+
+def _tabel_aktif() -> List[str]:
+    """Lokasi tabel di variabel.txt; hanya boleh ditulis lewat Repository"""
+    return [os.path.abspath(path) for path in paths_from_variabel(load_variabel()).values()]
+
+
+def _sync(source: str, target: str, key: str) -> Dict[str, Any]:
+    if not os.path.exists(source):
+        raise FileNotFoundError(source)
+    if os.path.abspath(target) in _tabel_aktif():
+        # Menulis langsung melewati transaksi, journal, dan delta milik Repository
+        raise ValueError(f"{target} adalah tabel aktif; ubah lewat Repository, bukan sinkronisasi")
+    src_stat = _stat(source)
+    meta = _load_manifest(source, target, key)
+    if meta is None or meta["target"]["rows"] == 0:
+        return _rebuild(source, target, key, src_stat)
+
+    src = meta["source"]
+    if [src["size"], src["mtime_ns"]] == list(src_stat):
+        return _stats("noop", baris=meta["target"]["rows"])
+    if src_stat[0] > src["size"]:
+        stats = _append(source, target, key, meta, src_stat)
+        if stats is not None:
+            return stats
+    return _diff(source, target, key, meta, src_stat)
+
+
+def _sync_pesan(source: str, target: str, key: str) -> Tuple[bool, str]:
+    try:
+        stats = sync(source, target, key)
+    except FileNotFoundError:
+        return False, f"File {source} tidak ditemukan!"
+    except (ValueError, csv.Error) as e:
+        return False, str(e)
+    except Exception as e:
+        return False, f"Error: {str(e)}"
+
+    if stats["mode"] == "noop":
+        return True, f"{target} sudah sinkron, tidak ada perubahan"
+    if stats["mode"] == "rebuild" and not (stats["berubah"] or stats["dihapus"]):
+        return True, f"Berhasil convert ke {target} ({stats['baris']} baris)"
+    return True, (f"Berhasil sinkron ke {target}: {stats['baru']} baru, {stats['berubah']} berubah, "
+                  f"{stats['dihapus']} dihapus ({stats['bytes']} byte ditulis)")
+
+
+def sync_json_to_csv(json_file: str, csv_file: str, key: str = "id") -> Tuple[bool, str]:
+    """Versi inkremental dari converter.json_to_csv, dengan hasil (success, message) yang sama"""
+    return _sync_pesan(json_file, csv_file, key)
+
+
+def sync_csv_to_json(csv_file: str, json_file: str, key: str = "id") -> Tuple[bool, str]:
+    """Versi inkremental dari converter.csv_to_json, dengan hasil (success, message) yang sama"""
+    return _sync_pesan(csv_file, json_file, key)
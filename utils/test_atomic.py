@@ -0,0 +1,135 @@
+import os
+import subprocess
+import sys
+import time
+
+import pytest
+
+from utils import iolog
+from utils.atomic import append_text, atomic_open, transaksi
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+ISI_LAMA = "id,judul\n1,Buku Lama\n"
+
+
+def _tulis(path, text):
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(text)
+
+
+def _baca(path):
+    with open(path, "r", encoding="utf-8") as f:
+        return f.read()
+
+
+def _crash(script):
+    """Jalankan script di proses terpisah yang mati mendadak (os._exit) di tengah penulisan"""
+    result = subprocess.run([sys.executable, "-c", script], cwd=ROOT, timeout=60)
+    assert result.returncode == 9
+
+
+def test_crash_saat_menulis_tidak_merusak_file(tmp_path):
+    target = str(tmp_path / "buku.csv")
+    _tulis(target, ISI_LAMA)
+    _crash(f"""
+import os
+from utils.atomic import atomic_open
+with atomic_open({target!r}, "w", newline="") as f:
+    for i in range(100000):
+        f.write(f"{{i}},Buku {{i}}\\n")
+    os._exit(9)
+""")
+    assert _baca(target) == ISI_LAMA
+
+
+def test_crash_sebelum_commit_tidak_mengganti_tabel_apa_pun(tmp_path):
+    buku, pinjam = str(tmp_path / "buku.csv"), str(tmp_path / "peminjaman.csv")
+    _tulis(buku, ISI_LAMA)
+    _tulis(pinjam, "id\n")
+    _crash(f"""
+import os
+from utils.atomic import atomic_open, transaksi
+with transaksi():
+    with atomic_open({buku!r}, "w") as f:
+        f.write("baru")
+    with atomic_open({pinjam!r}, "w") as f:
+        f.write("baru")
+    os._exit(9)
+""")
+    assert _baca(buku) == ISI_LAMA
+    assert _baca(pinjam) == "id\n"
+
+
+def test_exception_membatalkan_transaksi(tmp_path):
+    buku, pinjam = str(tmp_path / "buku.csv"), str(tmp_path / "peminjaman.csv")
+    _tulis(buku, ISI_LAMA)
+    with pytest.raises(RuntimeError):
+        with transaksi():
+            with atomic_open(buku, "w") as f:
+                f.write("baru")
+            with atomic_open(pinjam, "w") as f:
+                f.write("baru")
+            raise RuntimeError("gagal di tengah aksi")
+    assert _baca(buku) == ISI_LAMA
+    assert not os.path.exists(pinjam)
+    assert sorted(os.listdir(tmp_path)) == ["buku.csv"]  # tidak ada file .tmp tersisa
+
+
+def test_latensi_dan_group_commit(tmp_path, monkeypatch):
+    buku, pinjam = str(tmp_path / "buku.csv"), str(tmp_path / "peminjaman.csv")
+    data = "x" * 64 * 1024
+    n = 20
+    fsync_asli = os.fsync
+    jumlah_fsync = [0]
+
+    def hitung_fsync(fd):
+        jumlah_fsync[0] += 1
+        fsync_asli(fd)
+    monkeypatch.setattr(iolog.os, "fsync", hitung_fsync)
+
+    mulai = time.perf_counter()
+    for _ in range(n):
+        with atomic_open(buku, "w") as f:
+            f.write(data)
+        with atomic_open(pinjam, "w") as f:
+            f.write(data)
+    sendiri = (time.perf_counter() - mulai) / n
+    fsync_sendiri, jumlah_fsync[0] = jumlah_fsync[0], 0
+
+    mulai = time.perf_counter()
+    for _ in range(n):
+        with transaksi():
+            with atomic_open(buku, "w") as f:
+                f.write(data)
+            with atomic_open(pinjam, "w") as f:
+                f.write(data)
+    batch = (time.perf_counter() - mulai) / n
+
+    print(f"pinjam (2 tabel): {sendiri * 1000:.2f} ms tanpa transaksi, {batch * 1000:.2f} ms dengan group commit")
+    # 2 fsync data + 2 fsync folder vs 2 fsync data + 1 fsync folder
+    assert fsync_sendiri == 4 * n
+    assert jumlah_fsync[0] == 3 * n
+    assert _baca(buku) == data and _baca(pinjam) == data
+    assert sendiri < 1.0 and batch < 1.0
+
+
+def test_append_menunggu_append_dari_proses_lain(tmp_path):
+    log = str(tmp_path / "log.jsonl")
+    _tulis(log, "1\n")
+    # Proses lain sedang di tengah append: barisnya belum selesai ditulis
+    proses = subprocess.Popen([sys.executable, "-c", f"""
+import time
+from utils.atomic import kunci
+with open({log!r}, "r+b") as f, kunci(f):
+    f.seek(0, 2)
+    f.write(b"2")
+    f.flush()
+    print("siap", flush=True)
+    time.sleep(1)
+    f.write(b"\\n")
+"""], cwd=ROOT, stdout=subprocess.PIPE, text=True)
+    assert proses.stdout is not None and proses.stdout.readline().strip() == "siap"
+    append_text(log, "3\n")
+    assert proses.wait(timeout=60) == 0
+    # Tanpa kunci antar proses, "2" dikira sisa crash dan dipotong
+    assert _baca(log) == "1\n2\n3\n"
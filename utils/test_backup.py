@@ -0,0 +1,79 @@
+import os
+import subprocess
+import sys
+import time
+
+from utils.backup import BackupStore
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _isi_db():
+    os.makedirs("db/covers", exist_ok=True)
+    with open("db/buku.csv", "w", encoding="utf-8", newline="") as f:
+        f.write("id,judul,stok\n")
+        f.writelines(f"{i},Buku {i},{i % 5}\n" for i in range(1, 5001))
+    with open("db/covers/a.webp", "wb") as f:
+        f.write(os.urandom(300 * 1024))
+
+
+def _baca(path):
+    with open(path, "rb") as f:
+        return f.read()
+
+
+def test_backup_ulang_tanpa_perubahan_tidak_menulis_chunk_dan_pulihkan_utuh(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    _isi_db()
+    store = BackupStore("backup")
+    pertama = store.buat(["db"])
+    assert pertama["chunk_baru"] > 1 and pertama["dibaca"] == 2
+    awal = {path: _baca(path) for path in ("db/buku.csv", "db/covers/a.webp")}
+
+    kedua = store.buat(["db"])
+    assert (kedua["dibaca"], kedua["chunk_baru"], kedua["bytes_baru"]) == (0, 0, 0)
+    # mtime berubah tapi isi sama: dibaca ulang, tetap tidak ada chunk baru
+    os.utime("db/buku.csv")
+    ketiga = store.buat(["db"])
+    assert (ketiga["dibaca"], ketiga["chunk_baru"]) == (1, 0)
+
+    with open("db/buku.csv", "a", encoding="utf-8", newline="") as f:
+        f.write("5001,Buku Baru,1\n")
+    keempat = store.buat(["db"])
+    assert 1 <= keempat["chunk_baru"] <= 2
+
+    hasil = store.pulihkan(pertama["id"], tujuan="pulih")
+    assert hasil == {"ditulis": 2, "dilewati": 0}
+    for path, isi in awal.items():
+        assert _baca(os.path.join("pulih", path)) == isi
+    assert store.pulihkan(keempat["id"], tujuan="pulih") == {"ditulis": 1, "dilewati": 1}
+    assert _baca("pulih/db/buku.csv") == _baca("db/buku.csv")
+    assert store.pulihkan(keempat["id"]) == {"ditulis": 0, "dilewati": 2}
+
+
+def test_retensi_menunggu_backup_dari_proses_lain(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    _isi_db()
+    store = BackupStore("backup")
+    snapshot_id = store.buat(["db"])["id"]
+    snapshot = os.path.join(store.snapshot_dir, f"{snapshot_id}.json")
+    isi = _baca(snapshot)
+    os.remove(snapshot)  # semua chunk sekarang yatim
+
+    # Proses lain sedang backup: memakai ulang chunk yatim itu sebelum snapshotnya ditulis
+    proses = subprocess.Popen([sys.executable, "-c", f"""
+import time
+from utils.backup import BackupStore
+with BackupStore({str(tmp_path / "backup")!r})._eksklusif():
+    print("siap", flush=True)
+    time.sleep(1)
+    with open({str(tmp_path / snapshot)!r}, "wb") as f:
+        f.write({isi!r})
+"""], cwd=ROOT, stdout=subprocess.PIPE, text=True)
+    assert proses.stdout is not None and proses.stdout.readline().strip() == "siap"
+    mulai = time.monotonic()
+    hasil = store.retensi()
+    assert proses.wait(timeout=60) == 0
+    assert time.monotonic() - mulai >= 0.5
+    assert hasil["chunk_dihapus"] == 0
+    assert store.pulihkan(snapshot_id, tujuan="pulih")["ditulis"] == 2
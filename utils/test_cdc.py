@@ -0,0 +1,40 @@
+import os
+
+from utils import cdc
+from utils.journal import Journal
+from utils.perpustakaan import Perpustakaan
+from utils.repository import Repository
+
+
+def test_feed_insert_update_delete_dengan_cursor(db, paths):
+    journal = Journal(os.path.join(db, "journal"))
+    layanan = Perpustakaan(Repository(paths, journal), batas_tombstone=0)
+    layanan.tambah_buku({"judul": "Fisika", "penulis": "A", "penerbit": "B", "stok": 2})
+    layanan.tambah_anggota({"nama": "Budi", "kelas": "X-1", "nis": "0042"})
+    feed, cursor = cdc.baca(journal)
+    assert [(p["tabel"], p["op"], p["id"]) for p in feed] == [("buku", "insert", 1), ("anggota", "insert", 1)]
+
+    layanan.pinjam(1, 1)
+    baru, cursor = cdc.baca(journal, cursor)
+    perubahan = {(p["tabel"], p["op"]): p for p in baru}
+    assert perubahan[("buku", "update")]["sebelum"]["stok"] == 2
+    assert perubahan[("buku", "update")]["sesudah"]["stok"] == 1
+    assert perubahan[("peminjaman", "insert")]["sebelum"] is None
+    assert cdc.baca(journal, cursor) == ([], cursor)
+
+    layanan.hapus_buku(1, "rusak")
+    layanan.padatkan_buku()
+    baru, cursor = cdc.baca(journal, cursor)
+    assert [(p["tabel"], p["op"]) for p in baru] == [("buku", "update"), ("log_hapus", "insert"), ("buku", "delete")]
+    assert baru[-1]["sebelum"]["judul"] == "Fisika" and baru[-1]["sesudah"] is None
+
+    # seq naik terus; seq terakhir yang diproses + 1 melanjutkan dari tengah record
+    semua, _ = cdc.baca(journal)
+    seq = [p["seq"] for p in semua]
+    assert seq == sorted(set(seq))
+    assert cdc.baca(journal, semua[2]["seq"] + 1)[0] == semua[3:]
+
+    # Record yang belum selesai ditulis ditunggu, tidak dilewati
+    with open(journal.segmen()[-1], "ab") as f:
+        f.write(b'{"ts": "2099')
+    assert cdc.baca(journal, cursor) == ([], cursor)
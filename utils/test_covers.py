@@ -0,0 +1,135 @@
+import io
+import os
+
+import pytest
+
+from utils.covers import CoverStore, KebijakanEncode, encode_cover
+from utils.perpustakaan import Perpustakaan
+from utils.repository import Repository
+
+GAMBAR_A = b"RIFF....WEBPVP8 gambar-a"
+GAMBAR_B = b"RIFF....WEBPVP8 gambar-b"
+
+
+def _layanan(db, paths):
+    repo = Repository(paths)
+    covers = CoverStore(db)
+    return repo, covers, Perpustakaan(repo, covers)
+
+
+def _tambah(layanan, covers, data):
+    _, _, buku = layanan.tambah_buku({"judul": "Fisika X", "penulis": "A", "penerbit": "B", "stok": 1})
+    layanan.ubah_buku(buku["id"], {"cover": covers.simpan(data)})
+    return buku["id"]
+
+
+def test_cover_sama_disimpan_sekali_dan_dilepas_saat_tidak_dirujuk(db, paths):
+    repo, covers, layanan = _layanan(db, paths)
+    ids = [_tambah(layanan, covers, GAMBAR_A) for _ in range(20)]
+    _tambah(layanan, covers, GAMBAR_B)
+    assert len(covers.semua()) == 2
+
+    for id_buku in ids[:-1]:
+        layanan.hapus_buku(id_buku, "Rusak")
+    assert len(covers.semua()) == 2  # masih dipakai satu buku
+
+    layanan.hapus_buku(ids[-1], "Rusak")
+    assert len(covers.semua()) == 2  # tombstone: buku masih bisa dipulihkan
+    layanan.padatkan_buku()
+    # Baru saja diunggah: dilepas oleh gc() setelah masa tenggang, bukan langsung
+    assert len(covers.semua()) == 2
+    assert covers.gc(repo.load("buku"), tenggang=0)["dihapus"] == 1
+    assert len(covers.semua()) == 1
+
+    # Cover diganti: cover lama yang tidak dirujuk lagi ikut dilepas gc()
+    id_buku = _tambah(layanan, covers, GAMBAR_A)
+    layanan.ubah_buku(id_buku, {"cover": covers.simpan(GAMBAR_B)})
+    assert covers.gc(repo.load("buku"), tenggang=0)["dihapus"] == 1
+    assert covers.semua() == [repo.load("buku")[-1]["cover"]]
+
+
+def test_migrasi_cover_lama(db, paths):
+    repo, covers, layanan = _layanan(db, paths)
+    os.makedirs(covers.folder)
+    for id_buku, data in ((1, GAMBAR_A), (2, GAMBAR_A), (3, GAMBAR_B)):
+        layanan.tambah_buku({"judul": f"Buku {id_buku}", "penulis": "A", "penerbit": "B", "stok": 1})
+        with open(os.path.join(covers.folder, f"cover_{id_buku}.webp"), "wb") as f:
+            f.write(data)
+        layanan.ubah_buku(id_buku, {"cover": f"covers/cover_{id_buku}.webp"})
+
+    hasil = covers.migrasi(repo)
+    assert hasil == {"dipindahkan": 3, "buku_diperbarui": 3, "file_unik": 2}
+    buku = repo.load("buku")
+    assert buku[0]["cover"] == buku[1]["cover"] != buku[2]["cover"]
+    assert sorted(os.listdir(covers.folder)) == sorted({b["cover"].split("/")[1] for b in buku})
+    with open(covers.path(buku[2]["cover"]), "rb") as f:
+        assert f.read() == GAMBAR_B
+
+
+def test_encode_cover_mengikuti_kebijakan():
+    Image = pytest.importorskip("PIL.Image")
+    gradasi = Image.radial_gradient("L").resize((1200, 1800)).convert("RGB")
+    gambar = Image.blend(gradasi, Image.effect_noise((1200, 1800), 40).convert("RGB"), 0.3)
+    upload = io.BytesIO()
+    gambar.save(upload, "PNG")
+
+    data, laporan = encode_cover(upload.getvalue(), KebijakanEncode(target_bytes=30 * 1024, batas_ms=5000))
+    assert laporan["encode_ulang"] and laporan["bytes"] == len(data) <= 30 * 1024
+    assert max(laporan["dimensi"]) <= 800
+
+    # WebP kecil tidak di-encode ulang
+    ulang, laporan = encode_cover(data)
+    assert ulang == data and not laporan["encode_ulang"]
+
+    frames = [Image.new("RGB", (90, 120), (i * 80, 0, 0)) for i in range(3)]
+    gif = io.BytesIO()
+    frames[0].save(gif, "GIF", save_all=True, append_images=frames[1:])
+    _, laporan = encode_cover(gif.getvalue())
+    assert laporan["animasi"] and laporan["dimensi"] == (90, 120)
+
+
+def test_encode_cover_menolak_bom_dekompresi_dari_header():
+    Image = pytest.importorskip("PIL.Image")
+    bom = io.BytesIO()
+    Image.new("1", (8000, 8000)).save(bom, "PNG")  # ~1 MB di disk, 64 megapiksel
+    with pytest.raises(ValueError):
+        encode_cover(bom.getvalue())
+    with pytest.raises(ValueError):
+        encode_cover(bom.getvalue(), KebijakanEncode(max_bytes_upload=1024))
+
+
+def test_thumbnail_dibuat_sekali_dan_ikut_dibersihkan_gc(tmp_path):
+    Image = pytest.importorskip("PIL.Image")
+    covers = CoverStore(str(tmp_path))
+    upload = io.BytesIO()
+    Image.new("RGB", (600, 800), (200, 30, 30)).save(upload, "PNG")
+    cover = covers.simpan(encode_cover(upload.getvalue())[0])
+
+    thumb = covers.thumbnail(cover)
+    assert Image.open(io.BytesIO(thumb)).size == (150, 200)
+    assert covers.thumbnail(cover) == thumb
+    assert covers.semua() == [cover]
+
+    covers.gc([], tenggang=0)
+    assert covers.semua() == [] and os.listdir(os.path.join(covers.folder, "thumb")) == []
+
+
+def test_thumbnail_cover_lama_diperkecil_dan_dibatasi(tmp_path):
+    Image = pytest.importorskip("PIL.Image")
+    covers = CoverStore(str(tmp_path))
+    os.makedirs(covers.folder)
+    Image.new("RGB", (1200, 1600), (30, 30, 200)).save(os.path.join(covers.folder, "cover_1.webp"), "WEBP")
+    lama = "covers/cover_1.webp"
+
+    thumb = covers.thumbnail(lama)
+    assert Image.open(io.BytesIO(thumb)).size == (150, 200)
+    assert len(thumb) < os.path.getsize(covers.path(lama))
+    assert covers.thumbnail(lama) == thumb
+    covers.gc([{"cover": lama}], tenggang=0)
+    assert len(os.listdir(os.path.join(covers.folder, "thumb"))) == 1  # masih dirujuk
+    covers.gc([], tenggang=0)
+    assert os.listdir(os.path.join(covers.folder, "thumb")) == []
+
+    Image.new("1", (8000, 8000)).save(os.path.join(covers.folder, "cover_2.png"), "PNG")
+    with pytest.raises(ValueError):
+        covers.thumbnail("covers/cover_2.png")
@@ -0,0 +1,35 @@
+from utils.converter import load_csv, save_csv
+from utils.gabung import migrasi_peminjaman
+from utils.perpustakaan import Perpustakaan
+from utils.repository import Repository
+
+
+def test_peminjaman_hanya_menyimpan_id(paths):
+    layanan = Perpustakaan(Repository(paths))
+    layanan.tambah_buku({"judul": "Fisika", "penulis": "A", "penerbit": "B", "stok": 2})
+    layanan.tambah_buku({"judul": "Kimia", "penulis": "A", "penerbit": "B", "stok": 2})
+    layanan.tambah_anggota({"nama": "Budi", "kelas": "X-1", "nis": "1"})
+    ok, _, p = layanan.pinjam(1, 1)
+    assert ok and p is not None and (p["judul"], p["nama"]) == ("Fisika", "Budi")
+    layanan.pinjam(2, 1)
+
+    assert "judul" not in load_csv(paths["peminjaman"])[0]
+    layanan.ubah_buku(1, {"judul": "Fisika Dasar"})
+    assert [p["judul"] for p in layanan.daftar("peminjaman")] == ["Fisika Dasar", "Kimia"]
+    assert layanan.hapus_buku(2, "rusak")[0]
+    assert [p["judul"] for p in layanan.riwayat_anggota(1)] == ["Fisika Dasar", "Kimia"]
+
+
+def test_migrasi_membuang_salinan_judul_nama(paths):
+    save_csv(paths["buku"], [{"id": 1, "judul": "Judul Baru", "penulis": "A", "penerbit": "B", "stok": 1}])
+    save_csv(paths["anggota"], [{"id": 1, "nama": "Budi", "kelas": "X-1", "nis": "1"}])
+    save_csv(paths["peminjaman"], [
+        {"id": 1, "id_buku": 1, "judul": "Judul Lama", "id_anggota": 1, "nama": "Budi", "status": "dipinjam"},
+        {"id": 2, "id_buku": 9, "judul": "Buku Hilang", "id_anggota": 1, "nama": "Budi", "status": "dikembalikan"},
+    ])
+    repo = Repository(paths)
+    assert migrasi_peminjaman(repo) == 2
+    assert migrasi_peminjaman(repo) == 0
+    assert [p["judul"] for p in load_csv(paths["peminjaman"])] == ["", "Buku Hilang"]
+    assert [(p["judul"], p["nama"]) for p in Perpustakaan(repo).daftar("peminjaman")] == \
+        [("Judul Baru", "Budi"), ("Buku Hilang", "Budi")]
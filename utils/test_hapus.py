@@ -0,0 +1,71 @@
+import os
+
+from utils import perpustakaan
+from utils.perpustakaan import Perpustakaan
+from utils.repository import DELTA_EXT, Repository
+
+
+def _layanan(paths, jumlah_buku, batas_tombstone=0):
+    """Buku 1..`jumlah_buku` kategori Sains (stok 2); buku 2 sedang dipinjam Budi"""
+    repo = Repository(paths)
+    layanan = Perpustakaan(repo, batas_tombstone=batas_tombstone)
+    for n in range(jumlah_buku):
+        layanan.tambah_buku({"judul": f"Buku {n}", "penulis": "A", "penerbit": "B", "stok": 2,
+                             "kategori": "Sains", "isbn": f"97860203{n:04d}"})
+    layanan.tambah_anggota({"nama": "Budi", "kelas": "X-1", "nis": "0042"})
+    layanan.pinjam(2, 1)
+    return repo, layanan
+
+
+def test_hapus_buku_hanya_tombstone_dan_bisa_dipulihkan(paths):
+    repo, layanan = _layanan(paths, 4)
+    csv_buku = os.stat(paths["buku"])
+    assert layanan.hapus_buku(2, "hilang")[0]
+
+    # CSV tidak ditulis ulang; pembaca melewati buku ber-tombstone
+    assert os.stat(paths["buku"]).st_mtime_ns == csv_buku.st_mtime_ns
+    assert os.path.exists(paths["buku"] + DELTA_EXT)
+    assert repo.terhapus("buku") == {2}
+    assert [b["id"] for b in layanan.daftar("buku")] == [1, 3, 4]
+    assert layanan.cari_kode("buku", "978602030001") is None
+    assert not layanan.pinjam(2, 1)[0]
+    assert [b["id"] for b in layanan.saran("buku", "buku")] == [1, 3, 4]
+    assert layanan.statistik_kategori()[0]["judul"] == 3
+    assert layanan.daftar("peminjaman")[0]["judul"] == "Buku 1"
+
+    # Buku baru boleh memakai ISBN buku terhapus; buku lama lalu tidak bisa dipulihkan
+    ok, _, baru = layanan.tambah_buku({"judul": "Baru", "penulis": "A", "penerbit": "B", "isbn": "978602030001"})
+    kode = layanan.cari_kode("buku", "978602030001")
+    assert ok and baru is not None and kode is not None and kode["id"] == baru["id"]
+    assert not layanan.pulihkan_buku(2)[0]
+    assert layanan.hapus_buku(baru["id"], "salah input")[0]
+    ok, _, b = layanan.pulihkan_buku(2)
+    assert ok and b is not None and b["kategori"] == "Sains"
+    assert [b["id"] for b in Perpustakaan(Repository(paths)).daftar("buku")] == [1, 2, 3, 4]
+    assert layanan.statistik_kategori()[0]["dipinjam"] == 1
+
+
+def test_tombstone_dipadatkan_di_latar_belakang(paths):
+    repo, layanan = _layanan(paths, 4, batas_tombstone=2)
+    layanan.hapus_buku(1, "rusak")
+    assert repo.terhapus("buku") == {1}
+    layanan.hapus_buku(2, "rusak")
+    with perpustakaan._memadatkan:  # tunggu thread pemadatan selesai
+        pass
+
+    assert [b["id"] for b in Repository(paths).load("buku")] == [3, 4]
+    assert repo.terhapus("buku") == set()
+    # Judul buku yang sudah dibuang fisik diambil dari log hapus
+    assert layanan.daftar("peminjaman")[0]["judul"] == "Buku 1"
+
+
+def test_kembalikan_buku_terhapus_lalu_dipulihkan(paths):
+    _, layanan = _layanan(paths, 2)
+    stok_kategori = layanan.statistik_kategori()[0]["stok"]
+    assert layanan.hapus_buku(2, "hilang")[0]  # masih dipinjam (stok 1)
+    assert layanan.kembalikan(1)[0]
+    ok, _, b = layanan.pulihkan_buku(2)
+    assert ok and b is not None and b["stok"] == 2
+    assert Repository(paths).ambil("buku", [2])[0]["stok"] == 2
+    kategori = layanan.statistik_kategori()[0]
+    assert kategori["stok"] == stok_kategori + 1 and kategori["dipinjam"] == 0
@@ -0,0 +1,52 @@
+import os
+
+from utils.indeks import IndeksPeminjaman
+from utils.perpustakaan import Perpustakaan, riwayat_anggota
+from utils.repository import Repository
+
+
+def _layanan(db, paths, batas=0):
+    repo = Repository(paths)
+    indeks = IndeksPeminjaman(os.path.join(db, "indeks", "peminjaman_anggota.json"))
+    return repo, indeks, Perpustakaan(repo, indeks=indeks, batas_pinjam=batas)
+
+
+def test_riwayat_dan_batas_pinjam_dari_indeks(db, paths):
+    repo, indeks, layanan = _layanan(db, paths, batas=2)
+    for n in range(3):
+        layanan.tambah_buku({"judul": f"Buku {n}", "penulis": "A", "penerbit": "B", "stok": 5})
+        layanan.tambah_anggota({"nama": f"Siswa {n}", "kelas": "X-1", "nis": str(100 + n)})
+
+    assert layanan.pinjam(1, 1)[0] and layanan.pinjam(2, 2)[0] and layanan.pinjam(2, 1)[0]
+    ok, pesan, _ = layanan.pinjam(3, 1)
+    assert not ok and "batas" in pesan
+    assert layanan.jumlah_pinjaman_aktif(1) == 2
+
+    assert layanan.kembalikan(1)[0]
+    assert layanan.jumlah_pinjaman_aktif(1) == 1
+    assert layanan.pinjam(3, 1)[0]
+    assert [p["id"] for p in layanan.riwayat_anggota(1)] == [1, 3, 4]
+    assert layanan.riwayat_anggota(1) == riwayat_anggota(layanan.daftar("peminjaman"), 1)
+
+    # Proses baru membaca indeks dari file tanpa membangun ulang
+    _, indeks_baru, layanan_baru = _layanan(db, paths)
+    assert layanan_baru.riwayat_anggota(1) == layanan.riwayat_anggota(1)
+    assert indeks_baru.anggota == indeks.anggota
+
+
+def test_indeks_dibangun_ulang_jika_tabel_diubah_langsung(db, paths):
+    repo, indeks, layanan = _layanan(db, paths)
+    layanan.tambah_buku({"judul": "Buku", "penulis": "A", "penerbit": "B", "stok": 5})
+    layanan.tambah_anggota({"nama": "Siswa", "kelas": "X-1", "nis": "100"})
+    layanan.tambah_anggota({"nama": "Siswa 2", "kelas": "X-1", "nis": "101"})
+    layanan.pinjam(1, 1)
+    layanan.pinjam(1, 1)
+
+    # Tulisan di luar layanan (mis. sinkronisasi JSON) memindahkan satu peminjaman
+    pinjam = repo.load("peminjaman")
+    pinjam[1]["id_anggota"] = 2
+    repo.save("peminjaman", pinjam)
+
+    assert [p["id"] for p in layanan.riwayat_anggota(1)] == [1]
+    assert [p["id"] for p in layanan.riwayat_anggota(2)] == [2]
+    assert layanan.jumlah_pinjaman_aktif(2) == 1
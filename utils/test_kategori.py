@@ -0,0 +1,53 @@
+from utils.converter import load_csv, save_csv
+from utils.kategori import StatKategori, migrasi_kategori
+from utils.perpustakaan import Perpustakaan
+from utils.repository import Repository
+
+
+def _hitung_ulang(repo):
+    stat = StatKategori()
+    return stat.ringkasan(repo)
+
+
+def test_kategori_dikodekan_dan_hitungan_inkremental(paths):
+    repo = Repository(paths)
+    layanan = Perpustakaan(repo)
+    for judul, kategori in (("Fisika", "Sains"), ("Kimia", "Sains"), ("Laskar Pelangi", "Fiksi"), ("Atlas", "")):
+        ok, _, b = layanan.tambah_buku({"judul": judul, "penulis": "A", "penerbit": "B", "stok": 2,
+                                        "kategori": kategori})
+        assert ok and b is not None and b["kategori"] == (kategori or "-")
+    layanan.tambah_anggota({"nama": "Budi", "kelas": "X-1", "nis": "1"})
+
+    assert [k["nama"] for k in repo.load("kategori")] == ["Sains", "Fiksi"]
+    assert "kategori" not in load_csv(paths["buku"])[0]
+    assert [b["kategori"] for b in layanan.daftar("buku")] == ["Sains", "Sains", "Fiksi", "-"]
+
+    stat = {k["nama"]: k for k in layanan.statistik_kategori()}  # hitungan dibangun di sini
+    assert (stat["Sains"]["judul"], stat["Sains"]["stok"]) == (2, 4)
+
+    ok, _, p = layanan.pinjam(1, 1)
+    assert ok and p is not None
+    layanan.pinjam(3, 1)
+    layanan.kembalikan(p["id"])
+    layanan.ubah_buku(2, {"kategori": "Fiksi"})
+    layanan.hapus_buku(4, "rusak")
+
+    stat = {k["nama"]: k for k in layanan.statistik_kategori()}
+    assert [(stat[n]["judul"], stat[n]["stok"], stat[n]["dipinjam"]) for n in ("Sains", "Fiksi")] == \
+        [(1, 2, 0), (2, 3, 1)]
+    assert "Tanpa kategori" not in stat
+    assert layanan.stat_kategori.ringkasan(repo) == _hitung_ulang(repo)
+    assert [b["judul"] for b in layanan.buku_kategori(2)] == ["Kimia", "Laskar Pelangi"]
+
+
+def test_migrasi_nama_kategori_ke_id(paths):
+    save_csv(paths["buku"], [{"id": 1, "judul": "A", "kategori": "Sains", "stok": 1},
+                             {"id": 2, "judul": "B", "kategori": "Agama", "stok": 1},
+                             {"id": 3, "judul": "C", "kategori": "", "stok": 1}])
+    repo = Repository(paths)
+    repo.save("kategori", [{"id": 1, "nama": "Agama"}])
+
+    assert migrasi_kategori(repo) == 2
+    assert migrasi_kategori(repo) == 0
+    assert [b["id_kategori"] for b in Repository(paths).load("buku")] == [2, 1, None]
+    assert [b["kategori"] for b in Perpustakaan(repo).daftar("buku")] == ["Sains", "Agama", "-"]
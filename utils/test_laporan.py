@@ -0,0 +1,55 @@
+import os
+
+from utils.journal import Journal
+from utils.laporan import Laporan
+from utils.perpustakaan import Perpustakaan
+from utils.repository import Repository
+
+
+def _layanan(db, paths):
+    laporan = os.path.join(db, "indeks", "laporan.json")
+    layanan = Perpustakaan(Repository(paths, Journal(os.path.join(db, "journal"))),
+                           batas_tombstone=0, laporan=Laporan(laporan))
+    layanan.tambah_buku({"judul": "Fisika", "penulis": "A", "penerbit": "B", "stok": 5, "kategori": "Sains",
+                         "sumber_pendapatan": "BOSP", "tanggal_beli": "2023-07-01"})
+    layanan.tambah_buku({"judul": "Puisi", "penulis": "C", "penerbit": "D", "stok": 5, "kategori": "Sastra",
+                         "sumber_pendapatan": "Donatur", "tanggal_diberikan": "2024-01-10"})
+    layanan.tambah_anggota({"nama": "Budi", "kelas": "X-1", "nis": "0042"})
+    layanan.tambah_anggota({"nama": "Sari", "kelas": "XI-2", "nis": "0043"})
+    return laporan, layanan
+
+
+def test_laporan_diperbarui_dari_feed(db, paths):
+    path_laporan, layanan = _layanan(db, paths)
+    layanan.pinjam(1, 1)
+    layanan.pinjam(1, 2)
+    hasil = layanan.laporan()
+    assert [(r["judul"], r["jumlah"]) for r in hasil["judul_terlaris"]] == [("Fisika", 2)]
+    assert {r["kelas"]: r["jumlah"] for r in hasil["kelas_teraktif"]} == {"X-1": 1, "XI-2": 1}
+    assert [(r["sumber"], r["tahun"], r["judul"]) for r in hasil["pengadaan"]] == \
+        [("BOSP", "2023", 1), ("Donatur", "2024", 1)]
+    assert hasil["sirkulasi_bulanan"][0]["kategori"] == "Sains"
+
+    # Laporan yang dibaca dari file hanya menerapkan perubahan sesudah cursor-nya
+    layanan.pinjam(2, 1)
+    layanan.hapus_buku(1, "rusak")
+    kedua = Laporan(path_laporan)
+    hasil = kedua.hasil(layanan.store)
+    assert {r["id_buku"]: r["jumlah"] for r in hasil["judul_terlaris"]} == {1: 2, 2: 1}
+    assert {r["kelas"]: r["jumlah"] for r in hasil["kelas_teraktif"]} == {"X-1": 2, "XI-2": 1}
+    assert [(r["sumber"], r["judul"]) for r in hasil["pengadaan"]] == [("Donatur", 1)]
+    assert layanan.laporan()["pengadaan"] == hasil["pengadaan"]
+
+
+def test_perubahan_di_luar_journal_membangun_ulang(db, paths):
+    path_laporan, layanan = _layanan(db, paths)
+    layanan.pinjam(1, 1)
+    layanan.pinjam(2, 2)
+    assert len(layanan.laporan()["judul_terlaris"]) == 2
+
+    # Tabel ditulis tanpa journal (misal diedit di luar aplikasi)
+    luar = Repository(paths)
+    luar.save("peminjaman", luar.load("peminjaman")[1:])
+    hasil = layanan.laporan()
+    assert [r["judul"] for r in hasil["judul_terlaris"]] == ["Puisi"]
+    assert [r["kelas"] for r in hasil["kelas_teraktif"]] == ["XI-2"]
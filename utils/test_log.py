@@ -0,0 +1,54 @@
+import os
+
+from utils.atomic import transaksi
+from utils.perpustakaan import Perpustakaan
+from utils.repository import Repository
+
+
+def _tambah_buku(layanan, jumlah):
+    for n in range(jumlah):
+        layanan.tambah_buku({"judul": f"Buku {n}", "penulis": "A", "penerbit": "B", "stok": 1})
+
+
+def test_log_hapus_ditambah_di_akhir_dan_dibaca_mundur(paths):
+    layanan = Perpustakaan(Repository(paths))
+    _tambah_buku(layanan, 7)
+    layanan.hapus_buku(1, "rusak")  # file log dibuat utuh sekali
+    with open(paths["log_hapus"], "rb") as f:
+        awal = f.read()
+    for id_buku in range(2, 8):
+        assert layanan.hapus_buku(id_buku, f"hilang {id_buku}")[0]
+
+    # Isi lama tidak ditulis ulang, hanya ditambah di belakang
+    with open(paths["log_hapus"], "rb") as f:
+        assert f.read().startswith(awal)
+    logs = Repository(paths).load("log_hapus")
+    assert [log["id"] for log in logs] == list(range(1, 8))
+
+    data, berikutnya = Perpustakaan(Repository(paths)).log_hapus(1, per_halaman=3)
+    assert [log["id_buku"] for log in data] == [7, 6, 5] and berikutnya
+    data, berikutnya = layanan.log_hapus(3, per_halaman=3)
+    assert [log["id_buku"] for log in data] == [1] and not berikutnya
+    assert data[0]["alasan"] == "rusak"
+
+
+def test_ekor_terpotong_dibuang_dan_rollback_tidak_menambah(paths):
+    repo = Repository(paths)
+    layanan = Perpustakaan(repo)
+    _tambah_buku(layanan, 2)
+    layanan.hapus_buku(1, "rusak")
+    with open(paths["log_hapus"], "ab") as f:
+        f.write(b"99,9,Sebagian")  # crash di tengah append sebelumnya
+    assert layanan.hapus_buku(2, "hilang")[0]
+    assert [log["id_buku"] for log in Repository(paths).load("log_hapus")] == [1, 2]
+
+    ukuran = os.path.getsize(paths["log_hapus"])
+    try:
+        with transaksi():
+            repo.tambah("log_hapus", [{"id": 3, "id_buku": 3, "judul": "X", "alasan": "-"}])
+            assert repo.mundur("log_hapus", 0, 1)[0]["id"] == 3
+            raise RuntimeError("batal")
+    except RuntimeError:
+        pass
+    assert os.path.getsize(paths["log_hapus"]) == ukuran
+    assert repo.mundur("log_hapus", 0, 1)[0]["id"] == 2
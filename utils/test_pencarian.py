@@ -0,0 +1,53 @@
+from utils.pencarian import IndeksCari, KOLOM_CARI
+from utils.perpustakaan import Perpustakaan
+from utils.repository import Repository
+
+ANGGOTA = [
+    {"id": 1, "nama": "Budi Santoso", "nis": "22001", "kelas": "X-1"},
+    {"id": 2, "nama": "Ani Budiman", "nis": "22002", "kelas": "X-2"},
+    {"id": 3, "nama": "Citra", "nis": "23001", "kelas": "XI-1"},
+]
+
+
+def test_cari_prefix_nama_nis_kelas():
+    indeks = IndeksCari(ANGGOTA, KOLOM_CARI["anggota"])
+    assert [a["id"] for a in indeks.cari("bud")] == [2, 1]  # urut nama
+    assert [a["id"] for a in indeks.cari("220")] == [2, 1]
+    assert [a["id"] for a in indeks.cari("bud x-1")] == [1]
+    assert [a["id"] for a in indeks.cari("xi")] == [3]
+    assert indeks.cari("zz") == []
+    assert len(indeks.cari("", batas=2)) == 2
+
+
+def test_saran_mengikuti_perubahan_tabel(paths):
+    layanan = Perpustakaan(Repository(paths))
+    layanan.tambah_buku({"judul": "Fisika Dasar", "penulis": "Halliday", "penerbit": "B", "stok": 1})
+    layanan.tambah_buku({"judul": "Fisika Modern", "penulis": "Beiser", "penerbit": "B", "stok": 1})
+    layanan.tambah_anggota({"nama": "Budi", "kelas": "X-1", "nis": "100"})
+
+    assert [b["id"] for b in layanan.saran("buku", "fis", tersedia=True)] == [1, 2]
+    layanan.pinjam(1, 1)
+    assert [b["id"] for b in layanan.saran("buku", "fis", tersedia=True)] == [2]
+    assert [b["id"] for b in layanan.saran("buku", "halli")] == [1]
+
+
+def test_saran_diperbarui_dari_baris_yang_ditulis(paths):
+    repo = Repository(paths)
+    layanan = Perpustakaan(repo)
+    for judul in ("Biologi", "Fisika Dasar", "Kimia"):
+        layanan.tambah_buku({"judul": judul, "penulis": "A", "penerbit": "B", "stok": 1})
+    layanan.tambah_anggota({"nama": "Budi", "kelas": "X-1", "nis": "100"})
+    assert [b["id"] for b in layanan.saran("buku", "", tersedia=True)] == [1, 2, 3]
+
+    dimuat = []
+    load = repo.load
+    repo.load = lambda tabel: dimuat.append(tabel) or load(tabel)
+    layanan.pinjam(2, 1)
+    layanan.ubah_buku(3, {"judul": "Astronomi"})
+    layanan.tambah_buku({"judul": "Fisika Modern", "penulis": "A", "penerbit": "B", "stok": 1})
+    layanan.hapus_buku(1, "rusak")
+    # Hasil tetap urut judul, tanpa membaca ulang tabel buku
+    assert [b["judul"] for b in layanan.saran("buku", "")] == ["Astronomi", "Fisika Dasar", "Fisika Modern"]
+    assert [b["id"] for b in layanan.saran("buku", "fis", tersedia=True)] == [4]
+    assert layanan.saran("buku", "kimia") == []
+    assert "buku" not in dimuat
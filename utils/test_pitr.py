@@ -0,0 +1,120 @@
+import os
+import random
+from datetime import datetime, timedelta
+
+import pytest
+
+from utils.atomic import transaksi
+from utils.backup import BackupStore
+from utils.journal import FORMAT_TS, Journal
+from utils.perpustakaan import Perpustakaan
+from utils.repository import Repository
+
+PATHS = {
+    "buku": "db/buku.csv",
+    "anggota": "db/anggota.csv",
+    "peminjaman": "db/peminjaman.csv",
+    "log_hapus": "db/log_hapus_buku.csv",
+    "kategori": "db/kategori.json"
+}
+KATEGORI = ["Fiksi", "Sains", "Sejarah", "Agama", "Bahasa"]
+
+
+class Jam:
+    """Jam palsu supaya setahun aktivitas bisa disimulasikan dalam hitungan detik"""
+
+    def __init__(self, mulai):
+        self.t = mulai
+
+    def __call__(self):
+        return self.t
+
+
+def _isi(paths):
+    # Repository baru = isi file di disk, bukan cache proses yang menulisnya
+    repo = Repository(paths)
+    return {tabel: repo.load(tabel) for tabel in paths}
+
+
+def _aksi(layanan, rng, n):
+    buku = layanan.daftar("buku")
+    anggota = layanan.daftar("anggota")
+    dipinjam = [p for p in layanan.daftar("peminjaman") if p["status"] == "dipinjam"]
+    pilihan = rng.random()
+    if pilihan < 0.15 or not buku:
+        layanan.tambah_buku({"judul": f"Buku {n}", "penulis": f"Penulis {n % 37}", "penerbit": "Gramedia",
+                             "kategori": rng.choice(KATEGORI), "stok": rng.randint(1, 5)})
+    elif pilihan < 0.25 or not anggota:
+        layanan.tambah_anggota({"nama": f"Siswa {n}", "kelas": f"X-{n % 6}", "nis": str(10000 + n)})
+    elif pilihan < 0.60:
+        layanan.pinjam(rng.choice(buku)["id"], rng.choice(anggota)["id"])
+    elif pilihan < 0.90 and dipinjam:
+        layanan.kembalikan(rng.choice(dipinjam)["id"])
+    elif pilihan < 0.96:
+        layanan.ubah_buku(rng.choice(buku)["id"], {"stok": rng.randint(0, 9)})
+    else:
+        layanan.hapus_buku(rng.choice(buku)["id"], "Rusak")
+
+
+def test_restore_ke_titik_waktu_selama_setahun(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    rng = random.Random(36)
+    jam = Jam(datetime(2023, 1, 1, 7, 0))
+    journal = Journal("db/journal", clock=jam)
+    store = BackupStore("db/backup", clock=jam)
+    layanan = Perpustakaan(Repository(PATHS, journal))
+
+    store.buat(list(PATHS.values()))
+    backup_berikut = jam.t + timedelta(days=7)
+    jumlah_aksi = 1500
+    titik = set(rng.sample(range(jumlah_aksi), 20))
+    cek = []
+    for n in range(jumlah_aksi):
+        _aksi(layanan, rng, n)
+        if n in titik:
+            cek.append((jam.t.strftime(FORMAT_TS), _isi(PATHS)))
+        if jam.t >= backup_berikut:
+            # Snapshot memakai waktu yang sama dengan aksi terakhir: replay harus idempoten
+            store.buat(list(PATHS.values()))
+            backup_berikut += timedelta(days=7)
+        jam.t += timedelta(minutes=rng.randint(1, 700))
+
+    assert jam.t - datetime(2023, 1, 1) > timedelta(days=300)
+    assert len(journal.segmen()) >= 12
+    assert len(store.daftar()) >= 40
+
+    diputar = 0
+    for i, (waktu, isi) in enumerate(cek):
+        paths = {tabel: f"restore/{i}/{path.split('/')[-1]}" for tabel, path in PATHS.items()}
+        hasil = store.pulihkan_ke(waktu, journal, PATHS, Repository(paths))
+        assert _isi(paths) == isi, f"restore ke {waktu} (snapshot {hasil['snapshot']}) tidak sama"
+        diputar += hasil["journal"]
+    assert diputar > len(cek)  # bukan sekadar restore snapshot
+
+    with pytest.raises(ValueError):
+        store.pulihkan_ke("2022-12-31 23:59:59", journal, PATHS, Repository({"buku": "restore/x.csv"}))
+
+
+def test_journal_ditulis_saat_commit_dan_ekor_terpotong_dibuang(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    jam = Jam(datetime(2023, 1, 1, 7, 0))
+    journal = Journal("db/journal", clock=jam)
+    layanan = Perpustakaan(Repository(PATHS, journal))
+    assert layanan.tambah_buku({"judul": "A", "penulis": "P", "penerbit": "Q", "stok": 2})[0]
+    assert layanan.tambah_anggota({"nama": "Siswa", "kelas": "X-1", "nis": "10001"})[0]
+    segmen = journal.segmen()[0]
+    with open(segmen, "ab") as f:
+        f.write(b'{"ts": "2023-01-01 07:00:00.0')  # crash di tengah append sebelumnya
+
+    assert layanan.pinjam(1, 1)[0]
+    records = list(journal.baca())
+    assert len(records) == 3
+    assert set(records[-1]["tabel"]) == {"buku", "peminjaman"}
+
+    # Gagal menulis journal menggagalkan commit: tabel tidak diganti, error tidak ditelan
+    jam.t = datetime(2023, 2, 1, 7, 0)
+    os.makedirs(journal._segmen(journal.now()))
+    with pytest.raises(IsADirectoryError):
+        with transaksi():
+            Repository(PATHS, journal).save("buku", [{"id": 1, "judul": "B", "stok": 9}])
+    assert Repository(PATHS).load("buku")[0]["judul"] == "A"
@@ -0,0 +1,59 @@
+import os
+from datetime import date, datetime, timedelta
+
+from utils.perpustakaan import Perpustakaan
+from utils.repository import Repository
+from utils.rollup import SIMPAN_HARIAN, RollupSirkulasi
+
+
+def _layanan(db, paths):
+    rollup = RollupSirkulasi(os.path.join(db, "indeks", "rollup_sirkulasi.json"))
+    layanan = Perpustakaan(Repository(paths), rollup=rollup)
+    layanan.tambah_buku({"judul": "Fisika", "penulis": "A", "penerbit": "B", "stok": 9})
+    layanan.tambah_anggota({"nama": "Budi", "kelas": "X-1", "nis": "0042"})
+    return rollup, layanan
+
+
+def _tanggal(hari_lalu):
+    return (datetime.now() - timedelta(days=hari_lalu)).replace(microsecond=0)
+
+
+def test_rollup_diperbarui_per_transaksi_dan_dipadatkan(db, paths, monkeypatch):
+    rollup, layanan = _layanan(db, paths)
+    # Riwayat lama: dua tahun lalu (kembali terlambat) dan 10 hari lalu (masih dipinjam)
+    lama = _tanggal(730)
+    layanan.store.save("peminjaman", [
+        {"id": 1, "id_buku": 1, "id_anggota": 1, "status": "dikembalikan",
+         "tanggal_pinjam": lama, "tanggal_kembali": lama + timedelta(days=20)},
+        {"id": 2, "id_buku": 1, "id_anggota": 1, "status": "dipinjam",
+         "tanggal_pinjam": _tanggal(10), "tanggal_kembali": None},
+    ])
+    semua = layanan.grafik_sirkulasi()
+    assert semua["satuan"] == "bulanan"
+    assert [sum(r[k] for r in semua["data"]) for k in ("pinjam", "kembali", "terlambat")] == [2, 1, 2]
+    # Periode harian dua tahun lalu sudah dipadatkan; bulanannya tetap ada
+    assert min(rollup.hitung["harian"]) >= (date.today() - timedelta(days=SIMPAN_HARIAN)).isoformat()
+    assert lama.strftime("%Y-%m") in rollup.hitung["bulanan"]
+
+    # Pinjam dan kembalikan memperbarui rollup tanpa dibangun ulang dari tabel peminjaman
+    monkeypatch.setattr(rollup, "bangun", None)
+    assert layanan.pinjam(1, 1)[0]
+    assert layanan.kembalikan(2)[0]
+    minggu = layanan.grafik_sirkulasi(date.today() - timedelta(days=6))
+    assert minggu["satuan"] == "harian" and len(minggu["data"]) == 7
+    assert minggu["data"][-1] == {"periode": date.today().isoformat(), "pinjam": 1, "kembali": 1, "terlambat": 0}
+    # Peminjaman 10 hari lalu terlambat sejak hari ke-8, sekarang tercatat sebagai kembali terlambat
+    tanggal_terlambat = (_tanggal(10) + timedelta(days=8)).date().isoformat()
+    assert {r["periode"]: r["terlambat"] for r in minggu["data"]}[tanggal_terlambat] == 1
+    assert rollup.aktif == {(date.today() + timedelta(days=8)).isoformat(): 1}
+
+
+def test_rollup_dibangun_ulang_jika_tabel_diubah_di_luar(db, paths):
+    rollup, layanan = _layanan(db, paths)
+    layanan.pinjam(1, 1)
+    assert RollupSirkulasi(rollup.path).seri(layanan.store)["data"][-1]["pinjam"] == 1
+
+    luar = Repository(paths)
+    pinjam = luar.load("peminjaman")
+    luar.save("peminjaman", pinjam + [dict(pinjam[0], id=2)])
+    assert layanan.grafik_sirkulasi()["data"][-1]["pinjam"] == 2
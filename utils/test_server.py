@@ -0,0 +1,97 @@
+import asyncio
+import json
+
+from utils.perpustakaan import Perpustakaan
+from utils.repository import Repository
+from utils.server import LayananServer
+
+
+def _server(paths):
+    repo = Repository(paths)
+    layanan = Perpustakaan(repo, batas_tombstone=0)
+    for judul in ("Fisika", "Kimia", "Sejarah"):
+        layanan.tambah_buku({"judul": judul, "penulis": "A", "penerbit": "B", "stok": 1, "isbn": f"97860{len(judul)}"})
+    layanan.tambah_anggota({"nama": "Budi", "kelas": "X-1", "nis": "0042"})
+    layanan.pinjam(2, 1)
+    layanan.hapus_buku(3, "rusak")  # file log_hapus dibuat utuh sekali
+    return repo, LayananServer(layanan)
+
+
+async def _get(server, target):
+    status, _, body = await server.route("GET", target, b"")
+    assert status == 200
+    return json.loads(body)
+
+
+def test_writer_hanya_memasang_baris_yang_berubah(paths):
+    repo, server = _server(paths)
+
+    async def jalankan():
+        server.siapkan()
+        writer = asyncio.ensure_future(server.writer())
+        # Tabel yang dibaca ulang saat snapshot disusun (bukan oleh aksinya sendiri)
+        dimuat, sedang = [], []
+        load, perbarui = repo.load, server._perbarui_snapshot
+        repo.load = lambda tabel: (sedang and dimuat.append(tabel)) or load(tabel)
+        server._perbarui_snapshot = lambda: sedang.append(1) or perbarui() or sedang.clear()
+
+        ok, _, p = await server.submit("pinjam_kode", {"kode_buku": "978606", "kode_anggota": "0042"})
+        assert ok and p["judul"] == "Fisika"
+        assert [b["stok"] for b in await _get(server, "/api/buku")] == [0, 0]
+        pinjam = await _get(server, "/api/peminjaman")
+        assert [(x["id"], x["judul"], x["nama"]) for x in pinjam] == [(1, "Kimia", "Budi"), (2, "Fisika", "Budi")]
+        assert await _get(server, "/api/saran/buku?q=fis&tersedia=1") == []
+        assert (await _get(server, "/api/statistik/kategori"))[0]["dipinjam"] == 2
+
+        await server.submit("kembalikan", {"id_pinjam": 1})
+        await server.submit("hapus_buku", {"id_buku": 2, "alasan": "rusak"})
+        assert [b["id"] for b in await _get(server, "/api/buku")] == [1]
+        assert [b["id"] for b in await _get(server, "/api/buku_terhapus")] == [2, 3]
+        assert (await _get(server, "/api/peminjaman"))[0]["judul"] == "Kimia"
+        assert not {"buku", "anggota", "peminjaman"} & set(dimuat)
+
+        # Judul diganti: riwayat peminjaman ikut dimuat ulang
+        await server.submit("ubah_buku", {"id_buku": 1, "perubahan": {"judul": "Fisika Dasar"}})
+        assert (await _get(server, "/api/peminjaman"))[1]["judul"] == "Fisika Dasar"
+        assert [b["id"] for b in await _get(server, "/api/saran/buku?q=dasar")] == [1]
+
+        # Tulisan proses lain terlihat lewat poll()
+        luar = Repository(paths)
+        luar.save("anggota", luar.load("anggota") + [{"id": 2, "nama": "Sari", "kelas": "X-2", "nis": "0043"}])
+        repo.poll()
+        server._perbarui_snapshot()
+        assert [a["nama"] for a in await _get(server, "/api/anggota")] == ["Budi", "Sari"]
+
+        # Pembaruan snapshot gagal: perubahannya tidak hilang, dicoba lagi berikutnya
+        server._perbarui_snapshot = perbarui
+        susun = server._susun_snapshot
+
+        def gagal(berubah):
+            raise OSError("disk penuh")
+        server._susun_snapshot = gagal
+        ok, _, _ = await server.submit("ubah_buku", {"id_buku": 1, "perubahan": {"stok": 4}})
+        assert ok and (await _get(server, "/api/buku"))[0]["stok"] == 0
+        tertunda = server._berubah["buku"]
+        assert tertunda is not None and list(tertunda) == [1]
+        server._susun_snapshot = susun
+        server._perbarui_snapshot()
+        assert (await _get(server, "/api/buku"))[0]["stok"] == 4
+        writer.cancel()
+
+    asyncio.run(jalankan())
+
+
+def test_log_hapus_per_halaman_dari_snapshot(paths):
+    layanan = Perpustakaan(Repository(paths), batas_tombstone=0)
+    for n in range(1, 6):
+        layanan.tambah_buku({"judul": f"Buku {n}", "penulis": "A", "penerbit": "B", "stok": 1})
+        layanan.hapus_buku(n, "rusak")
+    server = LayananServer(layanan)
+
+    async def jalankan():
+        server.siapkan()
+        return [await _get(server, f"/api/log_hapus?halaman={h}&n=2") for h in (1, 2, 3, 4)]
+
+    halaman = asyncio.run(jalankan())
+    assert [[log["id_buku"] for log in h["data"]] for h in halaman] == [[5, 4], [3, 2], [1], []]
+    assert [h["berikutnya"] for h in halaman] == [True, True, False, False]
@@ -0,0 +1,89 @@
+import os
+
+from utils import repository
+from utils.converter import save_csv
+from utils.perpustakaan import Perpustakaan
+from utils.repository import DELTA_EXT, Repository
+
+
+def _layanan(paths, stok):
+    """Satu buku per nilai `stok` (ISBN 978-602-03-000n) dan satu anggota, NIS 0042"""
+    repo = Repository(paths)
+    layanan = Perpustakaan(repo)
+    for n, jumlah in enumerate(stok):
+        layanan.tambah_buku({"judul": f"Buku {n}", "penulis": "A", "penerbit": "B", "stok": jumlah,
+                             "isbn": f"978-602-03-{n:04d}"})
+    layanan.tambah_anggota({"nama": "Budi", "kelas": "X-1", "nis": "0042"})
+    return repo, layanan
+
+
+def test_scan_isbn_dan_kartu_ditulis_sebagai_delta(paths):
+    repo, layanan = _layanan(paths, [3, 3])
+    assert not layanan.tambah_buku({"judul": "X", "penulis": "A", "penerbit": "B", "isbn": "978602030000"})[0]
+    csv_buku = os.stat(paths["buku"])
+
+    ok, _, p = layanan.pinjam_kode("978 602 03 0001", "0042")
+    assert ok and p is not None and p["id_buku"] == 2
+    ok, pesan, _ = layanan.pinjam_kode("0000", "0042")
+    assert not ok and "tidak ditemukan" in pesan
+    assert layanan.kembalikan(p["id"])[0]
+
+    # CSV tidak ditulis ulang; perubahan ada di delta dan terbaca proses lain
+    assert os.stat(paths["buku"]).st_mtime_ns == csv_buku.st_mtime_ns
+    assert os.path.exists(paths["buku"] + DELTA_EXT)
+    assert Repository(paths).load("buku") == repo.load("buku")
+    assert Repository(paths).load("peminjaman")[-1]["status"] == "dikembalikan"
+
+
+def test_delta_dipadatkan_dan_delta_basi_diabaikan(paths, monkeypatch):
+    monkeypatch.setattr(repository, "BATAS_DELTA", 2)
+    repo, layanan = _layanan(paths, [5])
+    layanan.pinjam(1, 1)  # tabel peminjaman dibuat utuh sekali
+    for _ in range(3):
+        layanan.pinjam_kode("978602030000", "0042")
+    assert not os.path.exists(paths["peminjaman"] + DELTA_EXT)
+    assert len(Repository(paths).load("peminjaman")) == 4
+    assert repo.load("buku")[0]["stok"] == 1
+
+    # CSV ditimpa di luar Repository: delta lama tidak boleh ikut diterapkan
+    layanan.pinjam(1, 1)
+    save_csv(paths["peminjaman"], [{"id": 1, "id_buku": 1, "id_anggota": 1, "status": "dipinjam"}])
+    assert [p["id"] for p in Repository(paths).load("peminjaman")] == [1]
+
+
+def test_delta_ditambah_per_baris_dan_ekor_terpotong_diabaikan(paths):
+    _, layanan = _layanan(paths, [3, 3, 3])
+    layanan.pinjam(1, 1)
+    delta = paths["buku"] + DELTA_EXT
+    with open(delta, "rb") as f:
+        awal = f.read()
+    layanan.pinjam(2, 1)
+
+    # Isi lama tidak ditulis ulang: satu baris JSON baru di belakang
+    with open(delta, "rb") as f:
+        isi = f.read()
+    assert isi.startswith(awal) and isi[len(awal):].count(b"\n") == 1
+
+    with open(delta, "ab") as f:
+        f.write(b'{"id": 3, "stok": 0, "jud')  # crash di tengah append
+    assert [b["stok"] for b in Repository(paths).load("buku")] == [2, 2, 3]
+    layanan.pinjam(3, 1)
+    assert [b["stok"] for b in Repository(paths).load("buku")] == [2, 2, 2]
+    with open(delta, "rb") as f:
+        assert b'"stok": 0,' not in f.read()
+
+
+def test_tambah_anggota_ditulis_sebagai_delta(paths):
+    repo, layanan = _layanan(paths, [])
+    csv_anggota = os.stat(paths["anggota"])
+    dimuat = []
+    load = repo.load
+    repo.load = lambda tabel: dimuat.append(tabel) or load(tabel)
+
+    assert not layanan.tambah_anggota({"nama": "Budi Lain", "kelas": "X-2", "nis": "0042"})[0]
+    ok, _, s = layanan.tambah_anggota({"nama": "Sari", "kelas": "X-2", "nis": "0043"})
+    assert ok and s is not None and s["id"] == 2
+    # NIS dicek lewat peta kolom, tabel anggota tidak dimuat atau ditulis ulang
+    assert "anggota" not in dimuat
+    assert os.stat(paths["anggota"]).st_mtime_ns == csv_anggota.st_mtime_ns
+    assert [a["nis"] for a in Repository(paths).load("anggota")] == ["0042", "0043"]
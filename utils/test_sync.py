@@ -0,0 +1,158 @@
+import csv
+import json
+import os
+
+import pytest
+
+from utils.converter import union_fieldnames
+from utils.sync import sync, sync_json_to_csv
+
+BUKU = [{"id": i, "judul": f"Buku {i}", "stok": i % 4} for i in range(1, 21)]
+
+
+def _tulis_sumber(path, rows):
+    if path.endswith(".csv"):
+        fieldnames = union_fieldnames(rows)
+        with open(path, "w", encoding="utf-8", newline="") as f:
+            writer = csv.DictWriter(f, fieldnames=fieldnames)
+            writer.writeheader()
+            writer.writerows(rows)
+    else:
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(rows, f, indent=4, ensure_ascii=False)
+    # mtime_ns bisa sama dengan penulisan sebelumnya di filesystem yang kasar
+    st = os.stat(path)
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000))
+
+
+def _baca(path):
+    with open(path, "rb") as f:
+        return f.read()
+
+
+def _isi(path):
+    """Isi tujuan sebagai list of dict; urutan kolom CSV tidak ikut dibandingkan"""
+    if path.endswith(".csv"):
+        with open(path, encoding="utf-8", newline="") as f:
+            data = list(csv.reader(f))
+        assert {len(values) for values in data} == {len(data[0])}
+        return [dict(zip(data[0], values)) for values in data[1:]]
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+@pytest.fixture(params=[("buku.json", "buku.csv"), ("buku.csv", "buku.json")], ids=["json-csv", "csv-json"])
+def pasangan(request, tmp_path):
+    sumber, tujuan = (str(tmp_path / nama) for nama in request.param)
+    _tulis_sumber(sumber, BUKU)
+    assert sync(sumber, tujuan)["mode"] == "rebuild"
+
+    def cek(rows, **harapan):
+        """Tulis `rows` ke sumber, sinkronkan, dan bandingkan dengan konversi penuh dari nol"""
+        _tulis_sumber(sumber, rows)
+        stats = sync(sumber, tujuan)
+        for kunci, nilai in harapan.items():
+            assert stats[kunci] == nilai, (kunci, stats)
+        segar = str(tmp_path / ("segar" + os.path.splitext(tujuan)[1]))
+        for path in (segar, segar + ".sync", segar + ".sync.idx"):
+            if os.path.exists(path):
+                os.remove(path)
+        sync(sumber, segar)
+        assert _isi(tujuan) == _isi(segar)
+        return stats
+
+    return sumber, tujuan, cek
+
+
+def test_sumber_tidak_berubah(pasangan):
+    sumber, tujuan, cek = pasangan
+    isi = _baca(tujuan)
+    assert sync(sumber, tujuan)["mode"] == "noop"
+    # Ditulis ulang dengan isi sama: mtime berubah, tujuan tidak disentuh
+    cek(BUKU, mode="noop", bytes=0)
+    assert _baca(tujuan) == isi
+
+
+def test_tambah_di_akhir(pasangan):
+    _, _, cek = pasangan
+    cek(BUKU + [{"id": 21, "judul": "Buku 21", "stok": 1}], mode="append", baru=1, baris=21)
+
+
+def test_ubah_di_tengah_dan_hapus(pasangan):
+    _, _, cek = pasangan
+    rows = [dict(r) for r in BUKU]
+    rows[9]["judul"] = "Judul Baru"
+    cek(rows, mode="diff", berubah=1, dihapus=0)
+    del rows[4]
+    cek(rows, mode="diff", berubah=0, dihapus=1, baris=19)
+
+
+def test_key_duplikat(pasangan):
+    _, _, cek = pasangan
+    rows = [dict(r) for r in BUKU] + [{"id": 5, "judul": "Duplikat", "stok": 0}]
+    cek(rows, baru=1)
+    rows[-1]["judul"] = "Duplikat diubah"
+    cek(rows, mode="diff", baru=0, berubah=1, dihapus=0)
+    del rows[4]
+    # Key 5 pertama hilang: kemunculan kedua menjadi 5, jadi tercatat berubah + dihapus
+    cek(rows, mode="diff", baris=20)
+
+
+def test_urutan_key_berubah(pasangan):
+    _, _, cek = pasangan
+    cek([{"stok": r["stok"], "id": r["id"], "judul": r["judul"]} for r in BUKU])
+
+
+def test_kolom_baru(pasangan):
+    sumber, tujuan, cek = pasangan
+    rows = [dict(r) for r in BUKU]
+    rows[12]["penerbit"] = "Gramedia"
+    cek(rows, baru=0, dihapus=0)
+
+
+def test_kolom_baru_di_tengah_saat_rebuild_tidak_menghasilkan_baris_pendek(tmp_path):
+    sumber, tujuan = str(tmp_path / "buku.json"), str(tmp_path / "buku.csv")
+    rows = [dict(r) for r in BUKU]
+    rows[3]["penerbit"] = "Gramedia"
+    rows[15]["tahun"] = 2020
+    _tulis_sumber(sumber, rows)
+    stats = sync(sumber, tujuan)
+    assert stats["mode"] == "rebuild"
+    with open(tujuan, encoding="utf-8", newline="") as f:
+        data = list(csv.reader(f))
+    assert data[0] == ["id", "judul", "stok", "penerbit", "tahun"]
+    assert {len(values) for values in data} == {5}
+    assert data[4][3] == "Gramedia" and data[16][4] == "2020"
+    assert stats["bytes"] == os.path.getsize(tujuan)
+    # Offset index mengikuti isi yang sudah dilebarkan
+    rows[7]["judul"] = "Judul Baru"
+    _tulis_sumber(sumber, rows)
+    assert sync(sumber, tujuan)["mode"] == "diff"
+    assert _isi(tujuan)[7]["judul"] == "Judul Baru"
+
+
+@pytest.mark.parametrize("rusak", ["tujuan", "index", "manifest"])
+def test_manifest_usang_atau_terpotong_membangun_ulang(pasangan, rusak):
+    sumber, tujuan, cek = pasangan
+    if rusak == "tujuan":
+        with open(tujuan, "r+b") as f:
+            f.truncate(os.path.getsize(tujuan) - 7)
+    elif rusak == "index":
+        with open(tujuan + ".sync.idx", "r+b") as f:
+            f.truncate(os.path.getsize(tujuan + ".sync.idx") // 2)
+    else:
+        with open(tujuan + ".sync", "r+b") as f:
+            f.truncate(10)
+    rows = [dict(r) for r in BUKU]
+    rows[2]["stok"] = 9
+    cek(rows, mode="rebuild")
+
+
+def test_tabel_aktif_bukan_tujuan_sinkronisasi(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    _tulis_sumber("buku.json", BUKU)
+    with pytest.raises(ValueError):
+        sync("buku.json", "database/buku.csv")
+    assert not os.path.exists("database/buku.csv")
+    assert sync_json_to_csv("buku.json", "database/buku.csv")[0] is False
+    assert sync("buku.json", "ekspor/buku.csv")["mode"] == "rebuild"
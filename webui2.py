@@ -1,14 +1,28 @@
 import streamlit as st  # type: ignore[import-untyped]
-import json
+import base64
+import html
 import os
 from datetime import datetime, timedelta
 import hashlib
-from typing import Dict, List, Any, Union
-import pandas as pd
-from PIL import Image
-from io import BytesIO
+from typing import Dict, List, Any, Tuple, Union
 from utils.ganti_password import ganti_password
-from utils.converter import json_to_csv, csv_to_json, load_csv, save_csv
+from utils.covers import THUMB_LEBAR, CoverStore, KebijakanEncode, encode_cover
+from utils.gabung import Gabungan, migrasi_peminjaman
+from utils.kategori import StatKategori, migrasi_kategori
+from utils.laporan import Laporan
+from utils.rollup import RollupSirkulasi
+from utils.indeks import IndeksPeminjaman
+from utils.iolog import configure_from_variabel
+from utils.journal import Journal
+from utils.lazy import lazy_import
+from utils.metrics import METRICS, timed
+from utils.pencarian import Pencarian
+from utils.profiler import PROFILER, daftar_profil, top_alokasi, top_fungsi
+from utils.perpustakaan import batas_pinjam, buat_layanan
+from utils.repository import Repository, paths_from_variabel
+
+# Modul berat baru dimuat saat pertama kali dipakai (lihat utils/benchmark_startup.py)
+pd = lazy_import("pandas")
 
 
 def load_variabel() -> Dict[str, str]:
@@ -41,6 +55,7 @@ def load_variabel() -> Dict[str, str]:
 
 
 var: Dict[str, str] = load_variabel()
+configure_from_variabel(var)  # log I/O storage, lihat utils/iolog.py
 FOLDER_DB: str = var.get("FOLDER_DB", "database")
 FILE_BUKU: str = var.get("FILE_BUKU", "database/buku.csv")
 FILE_ANGGOTA: str = var.get("FILE_ANGGOTA", "database/anggota.csv")
@@ -48,7 +63,6 @@ FILE_PINJAM: str = var.get("FILE_PINJAM", "database/peminjaman.csv")
 FILE_LOG_HAPUS: str = var.get("FILE_LOG_HAPUS", "database/log_hapus_buku.csv")
 FILE_KATEGORI: str = os.path.join(FOLDER_DB, "kategori.json")
 
-DURASI_PEMINJAMAN_HARI = 7
 
 def load_config() -> Dict[str, str]:
     config: Dict[str, str] = {}
@@ -89,117 +103,152 @@ if not st.session_state.logged_in:  # type: ignore[attr-defined]
 
     st.stop()  # type: ignore[attr-defined]
 
-def now() -> str:
-    return datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+@st.cache_resource  # type: ignore[attr-defined]
+def get_repository() -> Repository:
+    """Satu Repository per proses Streamlit, jadi cache parsing bertahan antar rerun"""
+    repo = Repository(paths_from_variabel(var), Journal.from_variabel(var))
+    covers.migrasi(repo)  # cover lama cover_<id>.webp -> store content-addressed (sekali)
+    migrasi_peminjaman(repo)  # salinan judul/nama lama di peminjaman -> join saat baca (sekali)
+    migrasi_kategori(repo)  # nama kategori di buku -> id_kategori (sekali)
+    return repo
 
 
-def load_data(file: str) -> List[Dict[str, Any]]:
-    if not os.path.exists(file):
-        return []
-    # Jika file CSV
-    if file.endswith('.csv'):
-        return load_csv(file)
-    # Jika file JSON (backward compatibility)
-    else:
-        try:
-            with open(file, "r") as f:
-                return json.load(f)
-        except (json.JSONDecodeError, FileNotFoundError):
-            return []
+@st.cache_resource  # type: ignore[attr-defined]
+def get_indeks() -> IndeksPeminjaman:
+    """Indeks peminjaman per anggota, dipakai bersama semua sesi (lihat utils/indeks.py)"""
+    return IndeksPeminjaman.from_variabel(var)
 
 
-def save_data(file: str, data: List[Dict[str, Any]]) -> None:
-    # Jika file CSV
-    if file.endswith('.csv'):
-        save_csv(file, data)
-    # Jika file JSON (backward compatibility)
-    else:
-        try:
-            os.makedirs(os.path.dirname(file) if os.path.dirname(file) else '.', exist_ok=True)
-            with open(file, "w") as f:
-                json.dump(data, f, indent=4, ensure_ascii=False)
-        except Exception as e:
-            print(f"Error saving data: {e}")
+@st.cache_resource  # type: ignore[attr-defined]
+def get_pencarian() -> Pencarian:
+    """Indeks type-ahead anggota/buku, dibangun ulang hanya saat tabelnya berubah"""
+    return Pencarian()
+
+
+@st.cache_resource  # type: ignore[attr-defined]
+def get_gabungan() -> Gabungan:
+    """Join peminjaman dengan judul/nama, di-cache selama tabelnya tidak berubah"""
+    return Gabungan()
+
+
+@st.cache_resource  # type: ignore[attr-defined]
+def get_stat_kategori() -> StatKategori:
+    """Hitungan judul/stok/dipinjam per kategori, diperbarui per aksi (lihat utils/kategori.py)"""
+    return StatKategori()
+
+
+@st.cache_resource  # type: ignore[attr-defined]
+def get_laporan() -> Laporan:
+    """Agregat laporan, diperbarui dari change feed dan disimpan di disk (lihat utils/laporan.py)"""
+    return Laporan.from_variabel(var)
+
+
+@st.cache_resource  # type: ignore[attr-defined]
+def get_rollup() -> RollupSirkulasi:
+    """Rollup harian/mingguan/bulanan untuk grafik sirkulasi (lihat utils/rollup.py)"""
+    return RollupSirkulasi.from_variabel(var)
+
+
+# Cover disimpan sekali per isi gambar; lihat utils/covers.py
+covers = CoverStore(FOLDER_DB)
+kebijakan_cover = KebijakanEncode.from_variabel(var)
+
+# Semua operasi bisnis lewat utils.perpustakaan; jika SERVICE_URL diisi di
+# variabel.txt, UI menjadi klien tipis untuk utils/server.py
+layanan = buat_layanan(get_repository(), var.get("SERVICE_URL", ""), covers, get_indeks(), batas_pinjam(var),
+                       get_pencarian(), get_gabungan(), get_stat_kategori(), get_laporan(), get_rollup())
 
 
-def save_cover(uploaded_file: Any, book_id: int) -> str:
+@timed("image.save_cover")
+def save_cover(uploaded_file: Any) -> Tuple[str, Dict[str, Any]]:
     """
     Save cover buku dengan konversi ke format WebP
     
     Args:
         uploaded_file: File upload dari Streamlit
-        book_id: ID buku untuk nama file
     
     Returns:
-        str: Path file cover yang disimpan
+        tuple: (path cover relatif terhadap FOLDER_DB untuk kolom "cover",
+            laporan encode dari utils.covers.encode_cover)
     """
     try:
-        # Buat folder covers jika belum ada
-        cover_folder = os.path.join(FOLDER_DB, "covers")
-        os.makedirs(cover_folder, exist_ok=True)
-        
-        # Buka gambar
-        img = Image.open(uploaded_file)
-        
-        # Konversi ke RGB jika perlu (untuk format yang tidak support transparansi)
-        if img.mode in ('RGBA', 'LA', 'P'):
-            rgb_img = Image.new('RGB', img.size, (255, 255, 255))
-            rgb_img.paste(img, mask=img.split()[-1] if img.mode == 'RGBA' else None)
-            img = rgb_img
-        
-        # Simpan sebagai WebP
-        cover_path = os.path.join(cover_folder, f"cover_{book_id}.webp")
-        img.save(cover_path, "WEBP", quality=85)
-        
-        # Return relative path untuk disimpan di database
-        return os.path.join("covers", f"cover_{book_id}.webp")
+        # Quality/method dipilih per gambar supaya ukuran dan waktu encode terkendali
+        data, laporan = encode_cover(uploaded_file, kebijakan_cover)
+        # Gambar yang sama persis hanya disimpan sekali
+        return covers.simpan(data), laporan
     
     except Exception as e:
         print(f"Error saving cover: {e}")
-        return ""
+        return "", {"error": str(e)}
 
 
-def load_kategori() -> List[Dict[str, Any]]:
-    """Load kategori buku"""
-    try:
-        if os.path.exists(FILE_KATEGORI):
-            with open(FILE_KATEGORI, "r", encoding='utf-8') as f:
-                return json.load(f)
-    except (json.JSONDecodeError, IOError):
-        pass
-    return []
+BUKU_PER_HALAMAN = 24
+SARAN_PINJAM = 20  # opsi type-ahead per kotak di Pinjam Buku
 
 
-def save_kategori(data: List[Dict[str, Any]]) -> None:
-    """Save kategori buku"""
-    try:
-        os.makedirs(os.path.dirname(FILE_KATEGORI) if os.path.dirname(FILE_KATEGORI) else '.', exist_ok=True)
-        with open(FILE_KATEGORI, "w", encoding='utf-8') as f:
-            json.dump(data, f, indent=4, ensure_ascii=False)
-    except Exception as e:
-        print(f"Error saving kategori: {e}")
+@st.cache_data(max_entries=64, show_spinner=False)  # type: ignore[attr-defined]
+def grid_buku_html(halaman: Tuple[Tuple[Any, ...], ...]) -> str:
+    """
+    Satu blok HTML untuk satu halaman daftar buku, cover sebagai data URI thumbnail
 
+    Browser menerima seluruh halaman (termasuk gambar) dalam satu payload, bukan satu
+    request media per st.image. Di-cache per isi halaman: buku yang berubah atau cover
+    baru (nama cover = hash isinya) menghasilkan kunci cache baru.
 
-def export_to_excel(df: pd.DataFrame, sheet_name: str = "Data") -> BytesIO:
+    Args:
+        halaman: (judul, penulis, penerbit, stok, kategori, cover) per buku
+    """
+    kartu = []
+    for judul, penulis, penerbit, stok, kategori, cover in halaman:
+        gambar = '<div class="perpus-kosong">📕</div>'
+        if cover and os.path.exists(covers.path(cover)):
+            try:
+                data = base64.b64encode(covers.thumbnail(cover)).decode("ascii")
+                gambar = f'<img src="data:image/webp;base64,{data}" width="{THUMB_LEBAR}" loading="lazy">'
+            except Exception as e:
+                print(f"Error loading cover {cover}: {e}")
+        kartu.append(
+            f'<div class="perpus-kartu">{gambar}<b>{html.escape(str(judul))}</b>'
+            f'<small>{html.escape(str(penulis))} · {html.escape(str(penerbit))}<br>'
+            f'Stok: {html.escape(str(stok))} · {html.escape(str(kategori))}</small></div>')
+    return (
+        "<style>.perpus-grid{display:flex;flex-wrap:wrap;gap:16px}"
+        f".perpus-kartu{{width:{THUMB_LEBAR}px;display:flex;flex-direction:column;gap:4px}}"
+        f".perpus-kosong{{width:{THUMB_LEBAR}px;height:{THUMB_LEBAR * 4 // 3}px;display:flex;"
+        "align-items:center;justify-content:center;font-size:48px;background:#f0f2f6}</style>"
+        f'<div class="perpus-grid">{"".join(kartu)}</div>')
+
+
+def kartu_grid(data: List[Dict[str, Any]]) -> Tuple[Tuple[Any, ...], ...]:
+    """Kunci cache grid_buku_html untuk satu halaman buku"""
+    return tuple((b.get("judul", "-"), b.get("penulis", "-"), b.get("penerbit", "-"), b.get("stok", 0),
+                  b.get("kategori", "-"), b.get("cover", "")) for b in data)
+
+
+def pilih_halaman(data: List[Dict[str, Any]], key: str = "halaman_buku") -> List[Dict[str, Any]]:
+    """Pemilih nomor halaman; kembalikan potongan `data` untuk halaman yang dipilih"""
+    jumlah_halaman = (len(data) - 1) // BUKU_PER_HALAMAN + 1
+    nomor = st.number_input("Halaman", min_value=1, max_value=jumlah_halaman, value=1, key=key)  # type: ignore[attr-defined]
+    mulai = (int(nomor) - 1) * BUKU_PER_HALAMAN
+    return data[mulai:mulai + BUKU_PER_HALAMAN]
+
+
+def export_to_excel(tabel: str, sheet_name: str = "Data") -> bytes:
     """
-    Konversi DataFrame ke format Excel (.xlsx) dalam BytesIO
+    Ekspor tabel ke format Excel (.xlsx)
     
     Args:
-        df: DataFrame yang akan dikonversi
+        tabel: Nama tabel di layanan (buku, anggota, peminjaman, ...)
         sheet_name: Nama sheet di Excel
     
     Returns:
-        BytesIO: File Excel dalam format binary
+        bytes: File Excel dalam format binary
     """
     try:
-        output = BytesIO()
-        with pd.ExcelWriter(output, engine='openpyxl') as writer:
-            df.to_excel(writer, sheet_name=sheet_name, index=False)
-        output.seek(0)
-        return output
+        return layanan.ekspor(tabel, "xlsx", sheet_name)
     except Exception as e:
         print(f"Error exporting to Excel: {e}")
-        return BytesIO()
+        return b""
 
 
 st.set_page_config(page_title="📚 Sistem Perpustakaan", layout="wide")  # type: ignore[attr-defined]
@@ -218,6 +267,14 @@ with st.sidebar.expander("📊 Dashboard & Statistik", expanded=True):  # type:
         st.session_state.menu = "Dashboard"  # type: ignore[attr-defined]
         st.rerun()  # type: ignore[attr-defined]
 
+    if st.button("📈 Laporan"):  # type: ignore[attr-defined]
+        st.session_state.menu = "Laporan"  # type: ignore[attr-defined]
+        st.rerun()  # type: ignore[attr-defined]
+
+    if st.button("📉 Grafik Sirkulasi"):  # type: ignore[attr-defined]
+        st.session_state.menu = "Grafik Sirkulasi"  # type: ignore[attr-defined]
+        st.rerun()  # type: ignore[attr-defined]
+
 # ================= MANAJEMEN BUKU =================
 with st.sidebar.expander("📚 Manajemen Buku", expanded=False):  # type: ignore[attr-defined]
     if st.button("➕ Tambah Buku"):  # type: ignore[attr-defined]
@@ -278,8 +335,12 @@ with st.sidebar.expander("⚙️ Pengaturan & Alat", expanded=False):  # type: i
         st.session_state.menu = "Ganti Password"  # type: ignore[attr-defined]
         st.rerun()  # type: ignore[attr-defined]
     
-    if st.button("📊 JSON to CSV"):  # type: ignore[attr-defined]
-        st.session_state.menu = "JSON to CSV"  # type: ignore[attr-defined]
+    if st.button("⏱️ Performance"):  # type: ignore[attr-defined]
+        st.session_state.menu = "Performance"  # type: ignore[attr-defined]
+        st.rerun()  # type: ignore[attr-defined]
+
+    if st.button("🩺 Profiling"):  # type: ignore[attr-defined]
+        st.session_state.menu = "Profiling"  # type: ignore[attr-defined]
         st.rerun()  # type: ignore[attr-defined]
 
 st.sidebar.markdown("---")  # type: ignore[attr-defined]
@@ -287,28 +348,31 @@ st.sidebar.markdown("---")  # type: ignore[attr-defined]
 # Get menu dari session state
 menu = st.session_state.menu  # type: ignore[attr-defined]
 
+# Satu trace per rerun; span storage/converter/gambar/ekspor di bawah ini masuk ke sini
+METRICS.start_trace(menu)
+# cProfile + tracemalloc per rerun jika PROFILING=1 di variabel.txt atau dinyalakan di menu Profiling
+PROFILER.configure(var)
+PROFILER.start(menu)
+
 # ================= DASHBOARD =================
 if menu == "Dashboard":
     st.header("📊 Dashboard Perpustakaan")
     
-    buku_data = load_data(FILE_BUKU)
-    anggota_data = load_data(FILE_ANGGOTA)
-    pinjam_data = load_data(FILE_PINJAM)
+    stats = layanan.statistik()
     
     col1, col2, col3, col4 = st.columns(4)  # type: ignore[attr-defined]
     
     with col1:
-        st.metric("Total Buku", len(buku_data))  # type: ignore[attr-defined]
+        st.metric("Total Buku", stats["total_buku"])  # type: ignore[attr-defined]
     
     with col2:
-        total_stok = sum(b.get("stok", 0) for b in buku_data)
-        st.metric("Total Stok", total_stok)  # type: ignore[attr-defined]
+        st.metric("Total Stok", stats["total_stok"])  # type: ignore[attr-defined]
     
     with col3:
-        st.metric("Total Anggota", len(anggota_data))  # type: ignore[attr-defined]
+        st.metric("Total Anggota", stats["total_anggota"])  # type: ignore[attr-defined]
     
     with col4:
-        peminjaman_aktif = len([p for p in pinjam_data if p.get("status") == "dipinjam"])
+        peminjaman_aktif = stats["peminjaman_aktif"]
         st.metric("Peminjaman Aktif", peminjaman_aktif)  # type: ignore[attr-defined]
     
     st.divider()  # type: ignore[attr-defined]
@@ -317,25 +381,82 @@ if menu == "Dashboard":
     
     with col_left:
         st.subheader("Statistik Peminjaman")
-        total_pinjam = len(pinjam_data)
-        selesai = len([p for p in pinjam_data if p.get("status") == "dikembalikan"])
-        st.write(f"Total Transaksi: {total_pinjam}")
-        st.write(f"Selesai: {selesai}")
+        st.write(f"Total Transaksi: {stats['total_peminjaman']}")
+        st.write(f"Selesai: {stats['peminjaman_selesai']}")
         st.write(f"Aktif: {peminjaman_aktif}")
     
     with col_right:
         st.subheader("Buku Terlambat")
-        terlambat_count = 0
-        for p in pinjam_data:
-            if p.get("status") == "dipinjam":
-                tanggal_pinjam = datetime.strptime(p["tanggal_pinjam"], "%Y-%m-%d %H:%M:%S")
-                durasi = (datetime.now() - tanggal_pinjam).days
-                if durasi > DURASI_PEMINJAMAN_HARI:
-                    terlambat_count += 1
+        terlambat_count = stats["buku_terlambat"]
         st.write(f"Buku Terlambat: {terlambat_count}")
         if terlambat_count > 0:
             st.warning(f"⚠️ Ada {terlambat_count} buku yang terlambat!")
 
+    st.subheader("Statistik per Kategori")
+    stat_kategori = layanan.statistik_kategori()
+    if stat_kategori:
+        # List of dict langsung: Dashboard tidak perlu memuat pandas
+        st.dataframe([{"Kategori": k["nama"], "Judul": k["judul"], "Stok": k["stok"],
+                       "Dipinjam": k["dipinjam"]} for k in stat_kategori],
+                     use_container_width=True)
+    else:
+        st.info("Belum ada kategori")
+
+# ================= LAPORAN =================
+elif menu == "Laporan":
+    st.header("📈 Laporan Perpustakaan")
+    laporan = layanan.laporan()
+    st.caption(f"Data per {laporan['diperbarui']}")
+
+    st.subheader("Sirkulasi per Bulan dan Kategori")
+    if laporan["sirkulasi_bulanan"]:
+        df = pd.DataFrame(laporan["sirkulasi_bulanan"])
+        st.dataframe(df.pivot_table(index="bulan", columns="kategori", values="jumlah", aggfunc="sum", fill_value=0),
+                     use_container_width=True)
+    else:
+        st.info("Belum ada peminjaman")
+
+    col_left, col_right = st.columns(2)  # type: ignore[attr-defined]
+    with col_left:
+        st.subheader("Judul Paling Sering Dipinjam")
+        st.dataframe(pd.DataFrame([{"Judul": r["judul"], "Dipinjam": r["jumlah"]}
+                                   for r in laporan["judul_terlaris"]]), use_container_width=True)
+    with col_right:
+        st.subheader("Kelas Paling Aktif")
+        st.dataframe(pd.DataFrame([{"Kelas": r["kelas"], "Peminjaman": r["jumlah"]}
+                                   for r in laporan["kelas_teraktif"]]), use_container_width=True)
+
+    st.subheader("Pengadaan Buku: BOSP vs Donatur")
+    if laporan["pengadaan"]:
+        df = pd.DataFrame(laporan["pengadaan"])
+        st.dataframe(df.pivot_table(index="tahun", columns="sumber", values="judul", aggfunc="sum", fill_value=0),
+                     use_container_width=True)
+    else:
+        st.info("Belum ada buku")
+
+# ================= GRAFIK SIRKULASI =================
+elif menu == "Grafik Sirkulasi":
+    st.header("📉 Grafik Sirkulasi")
+    # Hanya membaca rollup; satuan (harian/mingguan/bulanan) dipilih dari panjang rentang
+    rentang = {"7 hari": 7, "30 hari": 30, "3 bulan": 91, "1 tahun": 365, "5 tahun": 5 * 365, "Semua": None}
+    pilihan = st.selectbox("Rentang", list(rentang), index=1)  # type: ignore[attr-defined]
+    hari_ini = datetime.now().date()
+    dari = hari_ini - timedelta(days=rentang[pilihan] - 1) if rentang[pilihan] else None
+    grafik = layanan.grafik_sirkulasi(dari, hari_ini)
+
+    df = pd.DataFrame(grafik["data"])
+    if df.empty or not df[["pinjam", "kembali", "terlambat"]].to_numpy().any():
+        st.info("Belum ada peminjaman pada rentang ini")
+    else:
+        df = df.set_index("periode")
+        st.caption(f"Per periode {grafik['satuan']}")
+        st.line_chart(df[["pinjam", "kembali"]])  # type: ignore[attr-defined]
+        st.bar_chart(df[["terlambat"]])  # type: ignore[attr-defined]
+        col1, col2, col3 = st.columns(3)  # type: ignore[attr-defined]
+        col1.metric("Dipinjam", int(df["pinjam"].sum()))  # type: ignore[attr-defined]
+        col2.metric("Dikembalikan", int(df["kembali"].sum()))  # type: ignore[attr-defined]
+        col3.metric("Terlambat", int(df["terlambat"].sum()))  # type: ignore[attr-defined]
+
 # ================= TAMBAH BUKU =================
 elif menu == "Tambah Buku":
     st.header("Tambah Buku")
@@ -343,6 +464,7 @@ elif menu == "Tambah Buku":
     judul = st.text_input("Judul")
     penulis = st.text_input("Penulis")
     penerbit = st.text_input("Penerbit")
+    isbn = st.text_input("ISBN / Barcode (opsional)")
     tahun = st.number_input("Tahun Terbit", min_value=0, step=1)
     stok = st.number_input("Stok", min_value=0, step=1)
     
@@ -360,7 +482,7 @@ elif menu == "Tambah Buku":
         tanggal_beli = None
     
     # Kategori
-    kategori_list = load_kategori()
+    kategori_list = layanan.daftar("kategori")
     kategori_names = [k['nama'] for k in kategori_list]
     kategori_names.append("+ Tambah Kategori Baru")
     
@@ -376,50 +498,55 @@ elif menu == "Tambah Buku":
     cover_file = st.file_uploader("Pilih file gambar (akan otomatis konversi ke WebP)", type=["jpg", "jpeg", "png", "gif", "webp", "bmp"])
 
     if st.button("Simpan Buku"):
-        if not judul or not penulis or not penerbit:
-            st.error("Judul, Penulis, dan Penerbit harus diisi!")
+        buku_baru: Dict[str, Any] = {
+            "judul": judul,
+            "penulis": penulis,
+            "penerbit": penerbit,
+            "isbn": isbn,
+            "tahun_terbit": int(tahun),
+            "stok": int(stok),
+            "kategori": kategori,
+            "sumber_pendapatan": sumber_pendapatan
+        }
+        if sumber_pendapatan == "BOSP":
+            buku_baru["tanggal_beli"] = str(tanggal_beli)
         else:
-            data = load_data(FILE_BUKU)
-            new_id = max([b["id"] for b in data], default=0) + 1
-
-            buku_baru: Dict[str, Any] = {
-                "id": new_id,
-                "judul": judul,
-                "penulis": penulis,
-                "penerbit": penerbit,
-                "tahun_terbit": int(tahun),
-                "stok": int(stok),
-                "kategori": kategori,
-                "sumber_pendapatan": sumber_pendapatan,
-                "created_at": now()
-            }
-            
-            # Save cover jika ada
+            buku_baru["nama_donatur"] = nama_donatur
+            buku_baru["tanggal_diberikan"] = str(tanggal_diberikan)
+        
+        ok, pesan, tersimpan = layanan.tambah_buku(buku_baru)
+        if not ok or tersimpan is None:
+            st.error(pesan)
+        else:
+            # Save cover jika ada (nama file memakai ID dari layanan)
             if cover_file:
-                cover_path = save_cover(cover_file, new_id)
+                cover_path, laporan = save_cover(cover_file)
+                if laporan.get("error"):
+                    st.warning(f"Cover tidak disimpan: {laporan['error']}")  # type: ignore[attr-defined]
                 if cover_path:
-                    buku_baru["cover"] = cover_path
-            
-            if sumber_pendapatan == "BOSP":
-                buku_baru["tanggal_beli"] = str(tanggal_beli)
-            else:
-                buku_baru["nama_donatur"] = nama_donatur
-                buku_baru["tanggal_diberikan"] = str(tanggal_diberikan)
+                    layanan.ubah_buku(tersimpan["id"], {"cover": cover_path})
+                    st.caption(  # type: ignore[attr-defined]
+                        f"Cover: {laporan['bytes_asal'] / 1024:.0f} KB → {laporan['bytes'] / 1024:.0f} KB, "
+                        f"{laporan['dimensi'][0]}×{laporan['dimensi'][1]}, "
+                        + (f"quality {laporan['quality']} method {laporan['method']}, "
+                           if laporan["encode_ulang"] else "WebP asli dipakai, ")
+                        + f"{laporan['encode_ms']:.0f} ms"
+                        + (f", puncak RSS +{laporan['rss_tambahan_mb']} MB"
+                           if laporan.get("rss_tambahan_mb") is not None else ""))
             
-            data.append(buku_baru)
-            save_data(FILE_BUKU, data)
-            
-            # Update kategori jika baru
-            if kategori not in kategori_names[:-1]:
-                kategori_list.append({"id": len(kategori_list) + 1, "nama": kategori})
-                save_kategori(kategori_list)
-            
-            st.success("Buku berhasil ditambahkan!")
+            st.success(pesan)
 
 # ================= DAFTAR BUKU =================
 elif menu == "Daftar Buku":
     st.header("Daftar Buku")
-    data = load_data(FILE_BUKU)
+    # Filter memakai hitungan per kategori (utils/kategori.py), tanpa memindai katalog
+    opsi_kategori: Dict[str, Any] = {"Semua kategori": ""}
+    opsi_kategori.update({f"{k['nama']} ({k['judul']})": k["id"] for k in layanan.statistik_kategori()})
+    pilih_filter = st.selectbox("Kategori", list(opsi_kategori))
+    if opsi_kategori[pilih_filter] == "":
+        data = layanan.daftar("buku")
+    else:
+        data = layanan.buku_kategori(opsi_kategori[pilih_filter])
     
     if not data:
         st.info("Belum ada data buku")
@@ -427,8 +554,7 @@ elif menu == "Daftar Buku":
         # Tombol unduh Excel
         col_export = st.columns([1, 4])
         with col_export[0]:
-            df_export = pd.DataFrame(data)
-            excel_file = export_to_excel(df_export, sheet_name="Daftar Buku")
+            excel_file = export_to_excel("buku", sheet_name="Daftar Buku")
             st.download_button(
                 label="📥 Unduh Excel",
                 data=excel_file,
@@ -437,49 +563,58 @@ elif menu == "Daftar Buku":
             )
         
         st.divider()
-        
-        # Tampilkan dalam format card dengan cover
-        for buku in data:
-            col1, col2 = st.columns([1, 3])
+
+        col_mode, col_hal = st.columns([3, 1])  # type: ignore[attr-defined]
+        with col_mode:
+            mode = st.radio("Tampilan", ["Grid", "Detail"], horizontal=True)  # type: ignore[attr-defined]
+        with col_hal:
+            data = pilih_halaman(data)
+
+        if mode == "Grid":
+            # Satu payload per halaman (lihat grid_buku_html)
+            st.markdown(grid_buku_html(kartu_grid(data)), unsafe_allow_html=True)  # type: ignore[attr-defined]
+        else:
+            # Tampilkan dalam format card dengan cover
+            for buku in data:
+                col1, col2 = st.columns([1, 3])
             
-            with col1:
-                # Tampilkan cover buku
-                cover_path = buku.get("cover", "")
-                if cover_path and os.path.exists(os.path.join(FOLDER_DB, cover_path)):
-                    try:
-                        img = Image.open(os.path.join(FOLDER_DB, cover_path))
-                        st.image(img, width=150)  # type: ignore[attr-defined]
-                    except Exception as e:
-                        st.write("📕 (Cover tidak bisa dibaca)")
-                else:
-                    st.write("📕 (Belum ada cover)")
+                with col1:
+                    # Tampilkan cover buku
+                    cover_path = buku.get("cover", "")
+                    if cover_path and os.path.exists(os.path.join(FOLDER_DB, cover_path)):
+                        try:
+                            st.image(os.path.join(FOLDER_DB, cover_path), width=150)  # type: ignore[attr-defined]
+                        except Exception as e:
+                            st.write("📕 (Cover tidak bisa dibaca)")
+                    else:
+                        st.write("📕 (Belum ada cover)")
             
-            with col2:
-                # Tampilkan informasi buku
-                st.subheader(buku.get("judul", "-"))  # type: ignore[attr-defined]
-                col_a, col_b = st.columns(2)  # type: ignore[attr-defined]
+                with col2:
+                    # Tampilkan informasi buku
+                    st.subheader(buku.get("judul", "-"))  # type: ignore[attr-defined]
+                    col_a, col_b = st.columns(2)  # type: ignore[attr-defined]
                 
-                with col_a:
-                    st.write(f"**Penulis:** {buku.get('penulis', '-')}")
-                    st.write(f"**Penerbit:** {buku.get('penerbit', '-')}")
-                    st.write(f"**Tahun Terbit:** {buku.get('tahun_terbit', '-')}")
-                    st.write(f"**Stok:** {buku.get('stok', 0)}")
+                    with col_a:
+                        st.write(f"**Penulis:** {buku.get('penulis', '-')}")
+                        st.write(f"**Penerbit:** {buku.get('penerbit', '-')}")
+                        st.write(f"**Tahun Terbit:** {buku.get('tahun_terbit', '-')}")
+                        st.write(f"**Stok:** {buku.get('stok', 0)}")
                 
-                with col_b:
-                    st.write(f"**Kategori:** {buku.get('kategori', '-')}")
-                    sumber = buku.get("sumber_pendapatan", "-")
-                    st.write(f"**Sumber Pendapatan:** {sumber}")
+                    with col_b:
+                        st.write(f"**Kategori:** {buku.get('kategori', '-')}")
+                        sumber = buku.get("sumber_pendapatan", "-")
+                        st.write(f"**Sumber Pendapatan:** {sumber}")
                     
-                    if sumber == "BOSP":
-                        tanggal = buku.get("tanggal_beli", "-")
-                        st.write(f"**Tanggal Beli:** {tanggal}")
-                    else:
-                        donatur = buku.get("nama_donatur", "-")
-                        tanggal = buku.get("tanggal_diberikan", "-")
-                        st.write(f"**Donatur:** {donatur}")
-                        st.write(f"**Tanggal Diberikan:** {tanggal}")
+                        if sumber == "BOSP":
+                            tanggal = buku.get("tanggal_beli") or "-"
+                            st.write(f"**Tanggal Beli:** {tanggal}")
+                        else:
+                            donatur = buku.get("nama_donatur", "-")
+                            tanggal = buku.get("tanggal_diberikan") or "-"
+                            st.write(f"**Donatur:** {donatur}")
+                            st.write(f"**Tanggal Diberikan:** {tanggal}")
             
-            st.divider()  # type: ignore[attr-defined]
+                st.divider()  # type: ignore[attr-defined]
 
 # ================= CARI BUKU =================
 elif menu == "Cari Buku":
@@ -488,7 +623,7 @@ elif menu == "Cari Buku":
     keyword = st.text_input("Masukkan kata kunci (judul/penulis/penerbit)")
     
     if keyword:
-        data = load_data(FILE_BUKU)
+        data = layanan.daftar("buku")
         hasil = [b for b in data if keyword.lower() in b.get('judul', '').lower() or 
                  keyword.lower() in b.get('penulis', '').lower() or 
                  keyword.lower() in b.get('penerbit', '').lower()]
@@ -496,36 +631,20 @@ elif menu == "Cari Buku":
         if not hasil:
             st.info(f"Tidak ada buku yang cocok dengan '{keyword}'")
         else:
-            st.success(f"Ditemukan {len(hasil)} buku")
-            
-            for buku in hasil:
-                col1, col2 = st.columns([1, 3])
-                
-                with col1:
-                    cover_path = buku.get("cover", "")
-                    if cover_path and os.path.exists(os.path.join(FOLDER_DB, cover_path)):
-                        try:
-                            img = Image.open(os.path.join(FOLDER_DB, cover_path))
-                            st.image(img, width=150)  # type: ignore[attr-defined]
-                        except:
-                            st.write("📕")
-                    else:
-                        st.write("📕")
-                
-                with col2:
-                    st.subheader(buku.get("judul", "-"))  # type: ignore[attr-defined]
-                    st.write(f"**Penulis:** {buku.get('penulis', '-')}")
-                    st.write(f"**Penerbit:** {buku.get('penerbit', '-')}")
-                    st.write(f"**Stok:** {buku.get('stok', 0)}")
-                    st.write(f"**Kategori:** {buku.get('kategori', '-')}")
-                
-                st.divider()  # type: ignore[attr-defined]
+            col_info, col_hal = st.columns([3, 1])  # type: ignore[attr-defined]
+            col_info.success(f"Ditemukan {len(hasil)} buku")
+            with col_hal:
+                # Kata kunci baru kembali ke halaman 1
+                hasil = pilih_halaman(hasil, key=f"halaman_cari_{keyword}")
+
+            # Hasil pencarian memakai grid dan halaman yang sama dengan Daftar Buku
+            st.markdown(grid_buku_html(kartu_grid(hasil)), unsafe_allow_html=True)  # type: ignore[attr-defined]
 
 # ================= HAPUS BUKU =================
 elif menu == "Hapus Buku":
     st.header("🗑️ Hapus Buku")
     
-    data = load_data(FILE_BUKU)
+    data = layanan.daftar("buku")
     
     if not data:
         st.warning("Tidak ada buku untuk dihapus.")
@@ -542,28 +661,24 @@ elif menu == "Hapus Buku":
         alasan = st.text_area("Masukkan alasan penghapusan buku")
         
         if st.button("Hapus Buku"):
-            if not alasan:
-                st.error("Alasan tidak boleh kosong!")
+            ok, pesan, _ = layanan.hapus_buku(buku_dipilih["id"], alasan)
+            if ok:
+                st.success(pesan)
             else:
-                # Hapus dari daftar buku
-                data = [b for b in data if b["id"] != buku_dipilih["id"]]
-                save_data(FILE_BUKU, data)
-                
-                # Simpan log penghapusan
-                try:
-                    log_data = load_data(FILE_LOG_HAPUS)
-                    log_data.append({
-                        "id": len(log_data) + 1,
-                        "id_buku": buku_dipilih["id"],
-                        "judul": buku_dipilih["judul"],
-                        "alasan": alasan,
-                        "deleted_at": now()
-                    })
-                    save_data(FILE_LOG_HAPUS, log_data)
-                except Exception as e:
-                    st.error(f"Error saving log: {e}")
-                
-                st.success("Buku berhasil dihapus dan alasan dicatat.")
+                st.error(pesan)
+
+    # Buku terhapus hanya diberi tombstone sampai dipadatkan, jadi masih bisa dipulihkan
+    terhapus = layanan.buku_terhapus()
+    if terhapus:
+        with st.expander(f"♻️ Pulihkan buku terhapus ({len(terhapus)})"):  # type: ignore[attr-defined]
+            pulih_options = {f"[{b['id']}] {b['judul']} - dihapus {b.get('dihapus_at') or '-'}": b for b in terhapus}
+            pilih_pulih = st.selectbox("Pilih buku yang ingin dipulihkan", list(pulih_options.keys()))
+            if st.button("Pulihkan Buku"):
+                ok, pesan, _ = layanan.pulihkan_buku(pulih_options[pilih_pulih]["id"])
+                if ok:
+                    st.success(pesan)
+                else:
+                    st.error(pesan)
 
 # ================= TAMBAH SISWA =================
 elif menu == "Tambah Siswa":
@@ -574,35 +689,23 @@ elif menu == "Tambah Siswa":
     nis = st.text_input("NIS")
 
     if st.button("Simpan Siswa"):
-        if not nama or not kelas or not nis:
-            st.error("Semua field harus diisi!")
+        ok, pesan, _ = layanan.tambah_anggota({"nama": nama, "kelas": kelas, "nis": nis})
+        if ok:
+            st.success(pesan)
         else:
-            data = load_data(FILE_ANGGOTA)
-            if any(a["nis"] == nis for a in data):
-                st.error("NIS sudah ada!")
-            else:
-                new_id = max([a["id"] for a in data], default=0) + 1
-                data.append({
-                    "id": new_id,
-                    "nama": nama,
-                    "kelas": kelas,
-                    "nis": nis
-                })
-                save_data(FILE_ANGGOTA, data)
-                st.success("Siswa ditambahkan!")
+            st.error(pesan)
 
 # ================= DAFTAR SISWA =================
 elif menu == "Daftar Siswa":
     st.header("Daftar Siswa")
-    data = load_data(FILE_ANGGOTA)
+    data = layanan.daftar("anggota")
     if not data:
         st.info("Belum ada data siswa")
     else:
         # Tombol unduh Excel
         col_export = st.columns([1, 4])
         with col_export[0]:
-            df_export = pd.DataFrame(data)
-            excel_file = export_to_excel(df_export, sheet_name="Daftar Siswa")
+            excel_file = export_to_excel("anggota", sheet_name="Daftar Siswa")
             st.download_button(
                 label="📥 Unduh Excel",
                 data=excel_file,
@@ -620,54 +723,71 @@ elif menu == "Daftar Siswa":
 elif menu == "Pinjam Buku":
     st.header("Pinjam Buku")
 
-    buku = load_data(FILE_BUKU)
-    anggota = load_data(FILE_ANGGOTA)
-    pinjam = load_data(FILE_PINJAM)
-
-    if not buku or not anggota:
-        st.warning("Data buku atau siswa masih kosong. Silakan tambahkan data terlebih dahulu.")
+    mode_pinjam = st.radio("Mode", ["Scan Barcode", "Cari Manual"], horizontal=True)
+
+    if mode_pinjam == "Scan Barcode":
+        # Scanner mengetik kode lalu Enter, yang langsung men-submit form; setiap scan
+        # di-resolve lewat hash lookup dan ditulis sebagai delta kecil (utils/repository.py)
+        with st.form("scan_kartu", clear_on_submit=True):
+            kode_kartu = st.text_input("Scan kartu siswa (NIS)")
+            if st.form_submit_button("Pilih Siswa") and kode_kartu:
+                siswa_scan = layanan.cari_kode("anggota", kode_kartu)
+                if siswa_scan:
+                    st.session_state.scan_siswa = siswa_scan
+                    st.session_state.scan_hasil = []
+                else:
+                    st.error(f"Kartu siswa '{kode_kartu}' tidak dikenal.")
+
+        siswa_scan = st.session_state.get("scan_siswa")
+        if siswa_scan:
+            st.info(f"Siswa: **{siswa_scan['nama']}** ({siswa_scan['nis']}) - {siswa_scan.get('kelas', '')}")
+            with st.form("scan_buku", clear_on_submit=True):
+                kode_buku = st.text_input("Scan buku (ISBN/barcode atau ID)")
+                if st.form_submit_button("Pinjam") and kode_buku:
+                    ok, pesan, data = layanan.pinjam_kode(kode_buku, siswa_scan["nis"])
+                    st.session_state.scan_hasil.insert(0, (ok, f"{data['judul']}: {pesan}" if ok and data else pesan))
+            for ok, pesan in st.session_state.get("scan_hasil", []):
+                if ok:
+                    st.success(pesan)
+                else:
+                    st.error(pesan)
+            if st.button("Selesai / Siswa Berikutnya"):
+                st.session_state.scan_siswa = None
+                st.session_state.scan_hasil = []
+                st.rerun()
     else:
-        buku_opsi = {f"{b['judul']} (Stok {b['stok']})": b for b in buku if b["stok"] > 0}
-        siswa_opsi = {f"{a['nama']} ({a['nis']})": a for a in anggota}
-
-        if not buku_opsi:
-            st.warning("Tidak ada buku yang tersedia untuk dipinjam.")
-        elif not siswa_opsi:
-            st.warning("Tidak ada siswa yang terdaftar.")
-        else:
-            pilih_buku = st.selectbox("Pilih Buku", list(buku_opsi.keys()))
-            pilih_siswa = st.selectbox("Pilih Siswa", list(siswa_opsi.keys()))
-
-            if st.button("Pinjam"):
-                b = buku_opsi[pilih_buku]
-                s = siswa_opsi[pilih_siswa]
-
-                new_id = max([p["id"] for p in pinjam], default=0) + 1
-                pinjam.append({
-                    "id": new_id,
-                    "id_buku": b["id"],
-                    "judul": b["judul"],
-                    "id_anggota": s["id"],
-                    "nama": s["nama"],
-                    "status": "dipinjam",
-                    "tanggal_pinjam": now(),
-                    "tanggal_kembali": ""
-                })
-
-                for bk in buku:
-                    if bk["id"] == b["id"]:
-                        bk["stok"] -= 1
-
-                save_data(FILE_BUKU, buku)
-                save_data(FILE_PINJAM, pinjam)
-                st.success("Buku dipinjam!")
+        # Hanya SARAN_PINJAM opsi teratas yang dikirim ke browser, berapa pun ukuran tabelnya
+        col_siswa, col_buku = st.columns(2)
+        with col_siswa:
+            kueri_siswa = st.text_input("Cari Siswa", placeholder="Nama, awalan NIS, atau kelas")
+            siswa_opsi = layanan.saran("anggota", kueri_siswa, SARAN_PINJAM)
+            pilih_siswa = st.selectbox("Pilih Siswa", range(len(siswa_opsi)),
+                                       format_func=lambda i: f"{siswa_opsi[i]['nama']} ({siswa_opsi[i]['nis']}) - "
+                                                             f"{siswa_opsi[i].get('kelas', '')}")
+        with col_buku:
+            kueri_buku = st.text_input("Cari Buku", placeholder="Judul, penulis, ISBN, atau ID")
+            buku_opsi = layanan.saran("buku", kueri_buku, SARAN_PINJAM, tersedia=True)
+            pilih_buku = st.selectbox("Pilih Buku", range(len(buku_opsi)),
+                                      format_func=lambda i: f"{buku_opsi[i]['judul']} - {buku_opsi[i]['penulis']} "
+                                                            f"(Stok {buku_opsi[i]['stok']})")
+
+        if not siswa_opsi:
+            st.warning("Tidak ada siswa yang cocok." if kueri_siswa else "Tidak ada siswa yang terdaftar.")
+        elif not buku_opsi:
+            st.warning("Tidak ada buku tersedia yang cocok." if kueri_buku
+                       else "Tidak ada buku yang tersedia untuk dipinjam.")
+        elif st.button("Pinjam"):
+            ok, pesan, _ = layanan.pinjam(buku_opsi[pilih_buku]["id"], siswa_opsi[pilih_siswa]["id"])
+            if ok:
+                st.success(pesan)
+            else:
+                st.error(pesan)
 
 # ================= KEMBALIKAN =================
 elif menu == "Kembalikan Buku":
     st.header("Kembalikan Buku")
 
-    pinjam = load_data(FILE_PINJAM)
-    buku = load_data(FILE_BUKU)
+    pinjam = layanan.daftar("peminjaman")
 
     aktif = {f"{p['judul']} - {p['nama']}": p for p in pinjam if p["status"] == "dipinjam"}
 
@@ -677,30 +797,23 @@ elif menu == "Kembalikan Buku":
         pilih = st.selectbox("Pilih Peminjaman", list(aktif.keys()))
 
         if st.button("Kembalikan"):
-            p = aktif[pilih]
-            p["status"] = "dikembalikan"
-            p["tanggal_kembali"] = now()
-
-            for b in buku:
-                if b["id"] == p["id_buku"]:
-                    b["stok"] += 1
-
-            save_data(FILE_BUKU, buku)
-            save_data(FILE_PINJAM, pinjam)
-            st.success("Buku dikembalikan!")
+            ok, pesan, _ = layanan.kembalikan(aktif[pilih]["id"])
+            if ok:
+                st.success(pesan)
+            else:
+                st.error(pesan)
 
 # ================= DATA PEMINJAMAN =================
 elif menu == "Data Peminjaman":
     st.header("Semua Transaksi")
-    data = load_data(FILE_PINJAM)
+    data = layanan.daftar("peminjaman")
     if not data:
         st.info("Belum ada data peminjaman")
     else:
         # Tombol unduh Excel dan CSV
         col_export1, col_export2 = st.columns(2)
         with col_export1:
-            df_export = pd.DataFrame(data)
-            excel_file = export_to_excel(df_export, sheet_name="Data Peminjaman")
+            excel_file = export_to_excel("peminjaman", sheet_name="Data Peminjaman")
             st.download_button(
                 label="📥 Unduh Excel",
                 data=excel_file,
@@ -709,7 +822,7 @@ elif menu == "Data Peminjaman":
             )
         
         with col_export2:
-            csv_data = df_export.to_csv(index=False)
+            csv_data = layanan.ekspor("peminjaman", "csv")
             st.download_button(
                 label="📥 Unduh CSV",
                 data=csv_data,
@@ -727,23 +840,16 @@ elif menu == "Data Peminjaman":
 elif menu == "Buku Terlambat":
     st.header("⏰ Buku Terlambat")
     
-    pinjam_data = load_data(FILE_PINJAM)
-    pinjaman_aktif = [p for p in pinjam_data if p.get("status") == "dipinjam"]
-    
     terlambat = []
-    sekarang = datetime.now()
-    
-    for p in pinjaman_aktif:
-        tanggal_pinjam = datetime.strptime(p["tanggal_pinjam"], "%Y-%m-%d %H:%M:%S")
-        durasi = (sekarang - tanggal_pinjam).days
-        if durasi > DURASI_PEMINJAMAN_HARI:
-            terlambat.append({
-                "ID": p["id"],
-                "Judul": p["judul"],
-                "Nama": p["nama"],
-                "Tanggal Pinjam": p["tanggal_pinjam"],
-                "Hari Terlambat": durasi - DURASI_PEMINJAMAN_HARI
-            })
+    for item in layanan.buku_terlambat():
+        p = item["peminjaman"]
+        terlambat.append({
+            "ID": p["id"],
+            "Judul": p["judul"],
+            "Nama": p["nama"],
+            "Tanggal Pinjam": p["tanggal_pinjam"],
+            "Hari Terlambat": item["hari_terlambat"]
+        })
     
     if not terlambat:
         st.success("✅ Tidak ada buku yang terlambat!")
@@ -756,19 +862,19 @@ elif menu == "Buku Terlambat":
 elif menu == "Riwayat Anggota":
     st.header("📜 Riwayat Peminjaman per Anggota")
     
-    anggota_data = load_data(FILE_ANGGOTA)
-    pinjam_data = load_data(FILE_PINJAM)
+    anggota_data = layanan.daftar("anggota")
     
     if not anggota_data:
         st.info("Belum ada data siswa")
     else:
-        pilih_anggota = st.selectbox("Pilih Siswa", 
-                                     [f"{a['nama']} ({a['nis']})" for a in anggota_data])
+        # Pilihan berupa posisi baris, jadi siswa terpilih diambil langsung tanpa mencocokkan label
+        pilih_anggota = st.selectbox("Pilih Siswa", range(len(anggota_data)),
+                                     format_func=lambda i: f"{anggota_data[i]['nama']} ({anggota_data[i]['nis']})")
         
-        selected = next((a for a in anggota_data if f"{a['nama']} ({a['nis']})" == pilih_anggota), None)
+        selected = anggota_data[pilih_anggota] if pilih_anggota is not None else None
         
         if selected:
-            riwayat = [p for p in pinjam_data if p["id_anggota"] == selected["id"]]
+            riwayat = layanan.riwayat_anggota(selected["id"])
             
             if not riwayat:
                 st.info(f"Belum ada riwayat peminjaman untuk {selected['nama']}")
@@ -780,13 +886,23 @@ elif menu == "Riwayat Anggota":
 # ================= LOG HAPUS =================
 elif menu == "Log Hapus Buku":
     st.header("Log Penghapusan Buku")
-    data = load_data(FILE_LOG_HAPUS)
-    if not data:
+    # Terbaru dulu, satu halaman per render (dibaca dari akhir log, bukan seluruh file)
+    halaman = st.session_state.get("log_halaman", 1)
+    data, berikutnya = layanan.log_hapus(halaman)
+    if not data and halaman == 1:
         st.info("Belum ada buku yang dihapus")
     else:
         # Sembunyikan kolom ID
         df = pd.DataFrame(data)
         st.dataframe(df.drop(columns=['id']) if 'id' in df.columns else df, use_container_width=True)
+        col_prev, col_hal, col_next = st.columns([1, 2, 1])  # type: ignore[attr-defined]
+        if col_prev.button("⬅️ Lebih baru", disabled=halaman <= 1):
+            st.session_state.log_halaman = halaman - 1  # type: ignore[attr-defined]
+            st.rerun()  # type: ignore[attr-defined]
+        col_hal.caption(f"Halaman {halaman}")
+        if col_next.button("Lebih lama ➡️", disabled=not berikutnya):
+            st.session_state.log_halaman = halaman + 1  # type: ignore[attr-defined]
+            st.rerun()  # type: ignore[attr-defined]
 
 # ================= GANTI PASSWORD =================
 elif menu == "Ganti Password":
@@ -803,50 +919,81 @@ elif menu == "Ganti Password":
         else:
             st.error(message)
 
-# ================= JSON TO CSV =================
-elif menu == "JSON to CSV":
-    st.header("📊 Convert JSON ke CSV")
-    
+# ================= PERFORMANCE =================
+elif menu == "Performance":
+    st.header("⏱️ Performance")
+    st.caption(f"Metrik proses ini sejak {METRICS.sejak.strftime('%Y-%m-%d %H:%M:%S')}")
+
+    operasi = METRICS.operasi()
+    if not operasi:
+        st.info("Belum ada operasi yang tercatat")
+    else:
+        st.subheader("Latensi per Operasi")
+        st.dataframe(pd.DataFrame(operasi), use_container_width=True)
+
+    st.subheader("Trace Rerun Terakhir")
+    for trace in METRICS.traces()[:20]:
+        durasi = "berjalan" if trace["durasi_ms"] is None else f"{trace['durasi_ms']:.1f} ms"
+        with st.expander(f"{trace['mulai']} · {trace['label']} · {durasi} · {len(trace['spans'])} span"):
+            if trace["spans"]:
+                st.dataframe(pd.DataFrame(trace["spans"]), use_container_width=True)
+            else:
+                st.write("Tidak ada operasi hot-path")
+
     col1, col2 = st.columns(2)
-    
     with col1:
-        st.subheader("📥 JSON to CSV")
-        json_files = {
-            "Buku": os.path.join(FOLDER_DB, "buku.json"),
-            "Anggota": os.path.join(FOLDER_DB, "anggota.json"),
-            "Peminjaman": os.path.join(FOLDER_DB, "peminjaman.json"),
-            "Log Hapus Buku": os.path.join(FOLDER_DB, "log_hapus_buku.json")
-        }
-        
-        pilih_json = st.selectbox("Pilih File JSON", list(json_files.keys()))
-        
-        if st.button("Convert ke CSV"):
-            json_path = json_files[pilih_json]
-            csv_path = json_path.replace(".json", ".csv")
-            
-            success, message = json_to_csv(json_path, csv_path)
-            if success:
-                st.success(message)
-            else:
-                st.error(message)
-    
+        st.download_button(
+            "📥 Download JSON",
+            data=METRICS.to_json(),
+            file_name=f"metrics_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json",
+            mime="application/json"
+        )
     with col2:
-        st.subheader("📤 CSV to JSON")
-        csv_files = {
-            "Buku": os.path.join(FOLDER_DB, "buku.csv"),
-            "Anggota": os.path.join(FOLDER_DB, "anggota.csv"),
-            "Peminjaman": os.path.join(FOLDER_DB, "peminjaman.csv"),
-            "Log Hapus Buku": os.path.join(FOLDER_DB, "log_hapus_buku.csv")
-        }
-        
-        pilih_csv = st.selectbox("Pilih File CSV", list(csv_files.keys()))
-        
-        if st.button("Convert ke JSON"):
-            csv_path = csv_files[pilih_csv]
-            json_path = csv_path.replace(".csv", ".json")
-            
-            success, message = csv_to_json(csv_path, json_path)
-            if success:
-                st.success(message)
-            else:
-                st.error(message)
+        if st.button("🔄 Reset Metrik"):
+            METRICS.reset()
+            st.rerun()
+
+# ================= PROFILING =================
+elif menu == "Profiling":
+    st.header("🩺 Profiling")
+
+    if PROFILER.config:
+        st.info("Profiling aktif dari variabel.txt (PROFILING=1)")
+    else:
+        label = "⏹️ Matikan Profiling" if PROFILER.manual else "▶️ Nyalakan Profiling"
+        if st.button(label):
+            PROFILER.manual = not PROFILER.manual
+            PROFILER.configure(var)
+            st.rerun()
+    st.caption(f"Status: {'aktif' if PROFILER.enabled else 'mati'} · folder {PROFILER.folder} · "
+               f"menyimpan {PROFILER.keep} profil terakhir")
+
+    profil = daftar_profil(PROFILER.folder)
+    if not profil:
+        st.info("Belum ada profil. Nyalakan profiling lalu buka halaman yang terasa lambat.")
+    else:
+        pilih_profil = st.selectbox("Pilih Profil", profil, format_func=os.path.basename)
+
+        st.subheader("Fungsi dengan Waktu Kumulatif Terbesar")
+        try:
+            st.dataframe(pd.DataFrame(top_fungsi(pilih_profil)), use_container_width=True)
+        except Exception as e:
+            st.error(f"Gagal membaca profil: {e}")
+
+        st.subheader("Lokasi Alokasi Memori Terbesar")
+        alokasi = top_alokasi(pilih_profil)["alokasi"]
+        if alokasi:
+            st.dataframe(pd.DataFrame(alokasi), use_container_width=True)
+        else:
+            st.write("Tidak ada data alokasi")
+
+        with open(pilih_profil, "rb") as f:
+            st.download_button(
+                "📥 Download .prof",
+                data=f.read(),
+                file_name=os.path.basename(pilih_profil),
+                mime="application/octet-stream"
+            )
+
+PROFILER.stop()
+METRICS.end_trace()
@@ -1,19 +1,26 @@
 import streamlit as st  # type: ignore[import-untyped]
-import json
 import os
 from datetime import datetime, timedelta
 import hashlib
-from typing import Dict, List, Any, Union
-import pandas as pd
-from PIL import Image
+from typing import TYPE_CHECKING, Dict, List, Any, Union
 from io import BytesIO
 from utils.ganti_password import ganti_password
-from utils.converter_optimized import json_to_csv, csv_to_json, load_csv, save_csv
+from utils.covers import CoverStore, KebijakanEncode, encode_cover
+from utils.iolog import configure_from_variabel
+from utils.journal import Journal
+from utils.lazy import lazy_import
+from utils.converter_optimized import json_to_csv, csv_to_json
+from utils.perpustakaan import buku_terlambat
+from utils.repository import Repository, paths_from_variabel
+
+# Modul berat baru dimuat saat pertama kali dipakai (lihat utils/benchmark_startup.py)
+pd = lazy_import("pandas")
+if TYPE_CHECKING:
+    import pandas
 
 
 # ============= CONSTANTS =============
 ITEMS_PER_PAGE = 10
-CACHE_TTL = 300  # 5 minutes
 
 
 def load_variabel() -> Dict[str, str]:
@@ -45,6 +52,7 @@ def load_variabel() -> Dict[str, str]:
 
 
 var: Dict[str, str] = load_variabel()
+configure_from_variabel(var)  # log I/O storage, lihat utils/iolog.py
 FOLDER_DB: str = var.get("FOLDER_DB", "database")
 FILE_BUKU: str = var.get("FILE_BUKU", "database/buku.csv")
 FILE_ANGGOTA: str = var.get("FILE_ANGGOTA", "database/anggota.csv")
@@ -98,119 +106,63 @@ def now() -> str:
 
 
 # ============= CACHING FUNCTIONS =============
-@st.cache_data(ttl=CACHE_TTL)  # type: ignore[attr-defined]
+@st.cache_resource  # type: ignore[attr-defined]
+def get_repository() -> Repository:
+    """Repository bersama CLI/web UI; cache-nya divalidasi mtime file, jadi tidak basi seperti TTL"""
+    repo = Repository(paths_from_variabel(var), Journal.from_variabel(var))
+    CoverStore(FOLDER_DB).migrasi(repo)  # cover lama cover_<id>.webp -> store content-addressed
+    return repo
+
+
+TABEL_FILE: Dict[str, str] = {path: tabel for tabel, path in get_repository().paths.items()}
+
+
 def load_data_cached(file: str) -> List[Dict[str, Any]]:
-    """Load data dengan caching Streamlit"""
-    if not os.path.exists(file):
-        return []
-    if file.endswith('.csv'):
-        return load_csv(file)
-    else:
-        try:
-            with open(file, "r") as f:
-                return json.load(f)
-        except (json.JSONDecodeError, FileNotFoundError):
-            return []
+    """Load data lewat Repository (parsing hanya diulang jika file berubah)"""
+    return get_repository().load(TABEL_FILE[file])
 
 
 def load_data(file: str) -> List[Dict[str, Any]]:
-    """Load data tanpa cache untuk operasi write"""
-    if not os.path.exists(file):
-        return []
-    if file.endswith('.csv'):
-        return load_csv(file)
-    else:
-        try:
-            with open(file, "r") as f:
-                return json.load(f)
-        except (json.JSONDecodeError, FileNotFoundError):
-            return []
+    """Load data untuk operasi write"""
+    return get_repository().load(TABEL_FILE[file])
 
 
 def save_data(file: str, data: List[Dict[str, Any]]) -> None:
-    """Save data dan clear cache"""
-    if file.endswith('.csv'):
-        save_csv(file, data)
-    else:
-        try:
-            os.makedirs(os.path.dirname(file) if os.path.dirname(file) else '.', exist_ok=True)
-            with open(file, "w") as f:
-                json.dump(data, f, indent=4, ensure_ascii=False)
-        except Exception as e:
-            print(f"Error saving data: {e}")
-    
-    # Clear cache setelah save
-    st.cache_data.clear()  # type: ignore[attr-defined]
+    """Save data; cache Repository ikut diperbarui"""
+    get_repository().save(TABEL_FILE[file], data)
 
 
-def save_cover(uploaded_file: Any, book_id: int) -> str:
+def save_cover(uploaded_file: Any) -> str:
     """
     Save cover buku dengan konversi ke format WebP dan optimasi ukuran
     """
     try:
-        cover_folder = os.path.join(FOLDER_DB, "covers")
-        os.makedirs(cover_folder, exist_ok=True)
-        
-        img = Image.open(uploaded_file)
-        
-        # Resize gambar untuk menghemat storage
-        max_width = 300
-        max_height = 400
-        img.thumbnail((max_width, max_height), Image.Resampling.LANCZOS)
-        
-        # Konversi ke RGB jika perlu
-        if img.mode in ('RGBA', 'LA', 'P'):
-            rgb_img = Image.new('RGB', img.size, (255, 255, 255))
-            rgb_img.paste(img, mask=img.split()[-1] if img.mode == 'RGBA' else None)
-            img = rgb_img
-        
-        # Simpan sebagai WebP dengan quality lebih rendah untuk ukuran lebih kecil
-        cover_path = os.path.join(cover_folder, f"cover_{book_id}.webp")
-        img.save(cover_path, "WEBP", quality=75, method=6)
-        
-        return os.path.join("covers", f"cover_{book_id}.webp")
+        # Dimensi lebih kecil untuk menghemat storage; quality/method dipilih per gambar
+        kebijakan = KebijakanEncode.from_variabel(var)._replace(max_ukuran=(300, 400))
+        data, _ = encode_cover(uploaded_file, kebijakan)
+        return CoverStore(FOLDER_DB).simpan(data)
     
     except Exception as e:
         print(f"Error saving cover: {e}")
         return ""
 
 
-@st.cache_data(ttl=CACHE_TTL)  # type: ignore[attr-defined]
 def load_kategori_cached() -> List[Dict[str, Any]]:
-    """Load kategori buku dengan caching"""
-    try:
-        if os.path.exists(FILE_KATEGORI):
-            with open(FILE_KATEGORI, "r", encoding='utf-8') as f:
-                return json.load(f)
-    except (json.JSONDecodeError, IOError):
-        pass
-    return []
+    """Load kategori buku lewat Repository"""
+    return get_repository().load("kategori")
 
 
 def load_kategori() -> List[Dict[str, Any]]:
-    """Load kategori buku tanpa cache"""
-    try:
-        if os.path.exists(FILE_KATEGORI):
-            with open(FILE_KATEGORI, "r", encoding='utf-8') as f:
-                return json.load(f)
-    except (json.JSONDecodeError, IOError):
-        pass
-    return []
+    """Load kategori buku untuk operasi write"""
+    return get_repository().load("kategori")
 
 
 def save_kategori(data: List[Dict[str, Any]]) -> None:
-    """Save kategori buku dan clear cache"""
-    try:
-        os.makedirs(os.path.dirname(FILE_KATEGORI) if os.path.dirname(FILE_KATEGORI) else '.', exist_ok=True)
-        with open(FILE_KATEGORI, "w", encoding='utf-8') as f:
-            json.dump(data, f, indent=4, ensure_ascii=False)
-    except Exception as e:
-        print(f"Error saving kategori: {e}")
-    
-    st.cache_data.clear()  # type: ignore[attr-defined]
+    """Save kategori buku"""
+    get_repository().save("kategori", data)
 
 
-def export_to_excel(df: pd.DataFrame, sheet_name: str = "Data") -> BytesIO:
+def export_to_excel(df: "pandas.DataFrame", sheet_name: str = "Data") -> BytesIO:
     """
     Konversi DataFrame ke format Excel (.xlsx) dalam BytesIO
     """
@@ -381,13 +333,8 @@ if menu == "Dashboard":
     
     with col_right:
         st.subheader("Buku Terlambat")
-        terlambat_count = 0
-        for p in pinjam_data:
-            if p.get("status") == "dipinjam":
-                tanggal_pinjam = datetime.strptime(p["tanggal_pinjam"], "%Y-%m-%d %H:%M:%S")
-                durasi = (datetime.now() - tanggal_pinjam).days
-                if durasi > DURASI_PEMINJAMAN_HARI:
-                    terlambat_count += 1
+        # tanggal_pinjam sudah diparse sekali oleh repository
+        terlambat_count = len(buku_terlambat(pinjam_data))
         st.write(f"Buku Terlambat: {terlambat_count}")
         if terlambat_count > 0:
             st.warning(f"⚠️ Ada {terlambat_count} buku yang terlambat!")
@@ -425,8 +372,7 @@ elif menu == "Daftar Buku":
                 cover_path = buku.get("cover", "")
                 if cover_path and os.path.exists(os.path.join(FOLDER_DB, cover_path)):
                     try:
-                        img = Image.open(os.path.join(FOLDER_DB, cover_path))
-                        st.image(img, width=150)  # type: ignore[attr-defined]
+                        st.image(os.path.join(FOLDER_DB, cover_path), width=150)  # type: ignore[attr-defined]
                     except Exception as e:
                         st.write("📕 (Cover tidak bisa dibaca)")
                 else:
@@ -448,11 +394,11 @@ elif menu == "Daftar Buku":
                     st.write(f"**Sumber Pendapatan:** {sumber}")
                     
                     if sumber == "BOSP":
-                        tanggal = buku.get("tanggal_beli", "-")
+                        tanggal = buku.get("tanggal_beli") or "-"
                         st.write(f"**Tanggal Beli:** {tanggal}")
                     else:
                         donatur = buku.get("nama_donatur", "-")
-                        tanggal = buku.get("tanggal_diberikan", "-")
+                        tanggal = buku.get("tanggal_diberikan") or "-"
                         st.write(f"**Donatur:** {donatur}")
                         st.write(f"**Tanggal Diberikan:** {tanggal}")
             
@@ -497,8 +443,7 @@ elif menu == "Cari Buku":
                     cover_path = buku.get("cover", "")
                     if cover_path and os.path.exists(os.path.join(FOLDER_DB, cover_path)):
                         try:
-                            img = Image.open(os.path.join(FOLDER_DB, cover_path))
-                            st.image(img, width=150)  # type: ignore[attr-defined]
+                            st.image(os.path.join(FOLDER_DB, cover_path), width=150)  # type: ignore[attr-defined]
                         except:
                             st.write("📕")
                     else: